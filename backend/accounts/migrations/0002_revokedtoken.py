@@ -0,0 +1,27 @@
+# Generated by Django 4.2.7 on 2025-08-29 10:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RevokedToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('jti', models.CharField(max_length=64, unique=True, verbose_name='Token ID (jti)')),
+                ('expires_at', models.DateTimeField(db_index=True, verbose_name='Son Geçerlilik')),
+                ('revoked_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='İptal Tarihi')),
+            ],
+            options={
+                'verbose_name': 'İptal Edilmiş Token',
+                'verbose_name_plural': "İptal Edilmiş Token'lar",
+            },
+        ),
+    ]
@@ -52,4 +52,33 @@ class User(AbstractUser):
     
     def save(self, *args, **kwargs):
         # Password hash'i zaten Django tarafından yapılıyor
-        super().save(*args, **kwargs)   
\ No newline at end of file
+        super().save(*args, **kwargs)   
+
+class RevokedToken(models.Model):
+    """
+    İptal edilmiş refresh token'lar (rotasyon ve çıkış) - kontrol revocation.py'deki bloom filtresiyle yapılır,
+    süresi dolan kayıtlar periyodik olarak silinir
+    """
+
+    jti = models.CharField(
+        max_length=64,
+        unique=True,
+        verbose_name="Token ID (jti)"
+    )
+
+    expires_at = models.DateTimeField(
+        db_index=True,
+        verbose_name="Son Geçerlilik"
+    )
+
+    revoked_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="İptal Tarihi"
+    )
+
+    class Meta:
+        verbose_name = "İptal Edilmiş Token"
+        verbose_name_plural = "İptal Edilmiş Token'lar"
+
+    def __str__(self):
+        return self.jti
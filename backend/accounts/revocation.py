@@ -0,0 +1,248 @@
+# accounts/revocation.py
+"""
+Refresh token iptal listesi (ROTATE_REFRESH_TOKENS + BLACKLIST_AFTER_ROTATION)
+
+- İptal edilen her token'ın jti'si RevokedToken tablosuna son geçerlilik zamanıyla yazılır. jti benzersiz olduğu
+  için aynı refresh token iki kez döndürülemez: eşzamanlı iki istekte INSERT'ü kaybeden reddedilir
+- Kontrol önce süreç içindeki bloom filtresine bakar: filtrede yoksa token iptal edilmemiştir ve veritabanına
+  gidilmez; varsa (gerçek iptal ya da yanlış pozitif) tek indeksli sorguyla doğrulanır
+- İptaller cache'teki nesil sayacıyla diğer süreçlere duyurulur; sayaç değişince filtreye sadece yeni kayıtlar
+  (id > son okunan) eklenir. Cache kaybolsa da en geç SYNC_INTERVAL saniyede bir senkronlanır
+- Sayaç en fazla GENERATION_CHECK_INTERVAL saniyede bir okunur (veritabanı cache'inde her okuma bir sorgudur);
+  başka süreçteki iptal en geç bu kadar gecikmeyle görülür. Rotasyondaki INSERT bu aralıkta da ikinci kullanımı reddeder
+- Süresi dolan token imza kontrolünde zaten reddedildiği için kaydı purge_expired ile parça parça silinir
+  (jobs.py'de saatlik); filtre kapasitesi dolunca süresi dolmamış kayıtlardan daha büyük kurulur
+- Ayarlar settings.TOKEN_REVOCATION ile değiştirilebilir: BLOOM_CAPACITY, BLOOM_ERROR_RATE, SYNC_INTERVAL,
+  GENERATION_CHECK_INTERVAL
+"""
+
+import hashlib
+import logging
+import math
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+logger = logging.getLogger(__name__)
+
+# Filtrenin yanlış pozitif oranını koruyarak tutabileceği kayıt sayısı (1M kayıt / %0.1 ~ 1.8 MB)
+DEFAULT_BLOOM_CAPACITY = 1_000_000
+DEFAULT_BLOOM_ERROR_RATE = 0.001
+
+# Nesil sayacı değişmese de filtrenin en fazla bu kadar eski kalmasına izin ver (saniye)
+DEFAULT_SYNC_INTERVAL = 60
+
+# Cache nesil sayacı en fazla bu sıklıkla okunur (saniye); aradaki kontroller sorgusuzdur
+DEFAULT_GENERATION_CHECK_INTERVAL = 2
+
+# Filtreye yüklenirken tek sorguda okunan kayıt
+LOAD_BATCH_SIZE = 5000
+
+# Süresi dolan kayıtları silme: parça boyutu ve parçalar arası bekleme (SQLite yazma kilidi uzun tutulmaz)
+DEFAULT_PURGE_BATCH_SIZE = 1000
+DEFAULT_PURGE_PAUSE = 0.05
+
+_NESIL_ANAHTARI = 'iptal_edilen_tokenlar:nesil'
+
+
+def _ayar(ad, varsayilan):
+    return getattr(settings, 'TOKEN_REVOCATION', {}).get(ad, varsayilan)
+
+
+class BloomFilter:
+    """Sabit boyutlu bloom filtresi: yanlış negatif yok, capacity kayda kadar yanlış pozitif oranı ~error_rate"""
+
+    __slots__ = ('capacity', 'size', 'hashes', 'count', '_bits')
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = max(int(capacity), 1)
+        self.size = max(int(math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2)), 64)
+        self.hashes = max(int(round(self.size / self.capacity * math.log(2))), 1)
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, key):
+        # Tek özetten iki 64 bitlik değer; k konum çift hash ile üretilir
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        size = self.size
+        return [(h1 + i * h2) % size for i in range(self.hashes)]
+
+    def add(self, key):
+        bits = self._bits
+        for position in self._positions(key):
+            bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        bits = self._bits
+        return all(bits[position >> 3] & (1 << (position & 7)) for position in self._positions(key))
+
+    @property
+    def nbytes(self):
+        return len(self._bits)
+
+
+def _duyur():
+    """Diğer süreçlere yeni iptal olduğunu bildir; yeni nesli döndürür"""
+    try:
+        return cache.incr(_NESIL_ANAHTARI)
+    except ValueError:
+        cache.set(_NESIL_ANAHTARI, 1, None)
+        return 1
+    except Exception as e:
+        logger.warning(f"Token iptal nesli cache'e yazılamadı: {e}")
+        return None
+
+
+class RevocationList:
+    """Süreç içi iptal listesi: bloom filtresi, filtreye yüklenen son kayıt id'si ve görülen cache nesli"""
+
+    def __init__(self, capacity=None, error_rate=None, sync_interval=None, check_interval=None):
+        self.capacity = capacity or _ayar('BLOOM_CAPACITY', DEFAULT_BLOOM_CAPACITY)
+        self.error_rate = error_rate or _ayar('BLOOM_ERROR_RATE', DEFAULT_BLOOM_ERROR_RATE)
+        self.sync_interval = sync_interval if sync_interval is not None else _ayar('SYNC_INTERVAL', DEFAULT_SYNC_INTERVAL)
+        self.check_interval = (
+            check_interval if check_interval is not None
+            else _ayar('GENERATION_CHECK_INTERVAL', DEFAULT_GENERATION_CHECK_INTERVAL)
+        )
+        self._lock = threading.Lock()
+        self._bloom = None
+        self._last_id = 0
+        self._generation = None
+        self._synced_at = 0.0
+        self._checked_at = 0.0
+
+    @property
+    def bloom(self):
+        return self._bloom
+
+    def _load(self, bloom, after_id, now):
+        """id > after_id olan, süresi dolmamış kayıtları filtreye ekle; okunan son id'yi döndür"""
+        from .models import RevokedToken
+
+        last_id = after_id
+        while True:
+            rows = list(
+                RevokedToken.objects.filter(id__gt=last_id).order_by('id')
+                .values_list('id', 'jti', 'expires_at')[:LOAD_BATCH_SIZE]
+            )
+            for row_id, jti, expires_at in rows:
+                if expires_at > now:
+                    bloom.add(jti)
+            if rows:
+                last_id = rows[-1][0]
+            if len(rows) < LOAD_BATCH_SIZE:
+                return last_id
+
+    def _rebuild(self, now):
+        from .models import RevokedToken
+
+        live = RevokedToken.objects.filter(expires_at__gt=now).count()
+        bloom = BloomFilter(max(self.capacity, live * 2), self.error_rate)
+        self._last_id = self._load(bloom, 0, now)
+        self._bloom = bloom
+        logger.info(f"Token iptal filtresi kuruldu: {bloom.count} kayıt, {bloom.nbytes // 1024} KB")
+
+    def sync(self, force=False):
+        """Cache nesli değiştiyse ya da SYNC_INTERVAL dolduysa yeni iptalleri filtreye ekle"""
+        checked_at = time.monotonic()
+        if not force and self._bloom is not None and checked_at - self._checked_at < self.check_interval:
+            return
+
+        generation = cache.get(_NESIL_ANAHTARI)
+        self._checked_at = checked_at
+        if (
+            not force
+            and self._bloom is not None
+            and generation is not None
+            and generation == self._generation
+            and time.monotonic() - self._synced_at < self.sync_interval
+        ):
+            return
+
+        with self._lock:
+            now = timezone.now()
+            if self._bloom is None or self._bloom.count >= self._bloom.capacity:
+                self._rebuild(now)
+            else:
+                self._last_id = self._load(self._bloom, self._last_id, now)
+            self._generation = generation
+            self._synced_at = time.monotonic()
+
+    def is_revoked(self, jti):
+        """jti iptal edilmiş mi; filtrede yoksa sorgu atılmaz"""
+        self.sync()
+        if jti not in self._bloom:
+            return False
+        from .models import RevokedToken
+
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, expires_at):
+        """jti'yi iptal et; zaten iptal edilmişse False döner (aynı refresh token'ın ikinci kullanımı)"""
+        from .models import RevokedToken
+
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            return False
+
+        with self._lock:
+            if self._bloom is not None:
+                self._bloom.add(jti)
+        transaction.on_commit(self._duyur)
+        return True
+
+    def _duyur(self):
+        generation = _duyur()
+        # Aradaki tek değişiklik bu süreçteki iptalse filtre günceldir, bir sonraki kontrolde senkron gerekmez
+        with self._lock:
+            if generation is not None and self._generation is not None and generation == self._generation + 1:
+                self._generation = generation
+
+
+revocation_list = RevocationList()
+
+
+def _jti(token):
+    return token[api_settings.JTI_CLAIM]
+
+
+def revoke_token(token):
+    """simplejwt refresh token'ını süresi dolana kadar iptal et; zaten iptal edilmişse False"""
+    return revocation_list.revoke(_jti(token), datetime_from_epoch(token['exp']))
+
+
+def is_token_revoked(token):
+    return revocation_list.is_revoked(_jti(token))
+
+
+def purge_expired(batch_size=DEFAULT_PURGE_BATCH_SIZE, pause=DEFAULT_PURGE_PAUSE, now=None):
+    """Süresi dolmuş iptal kayıtlarını birincil anahtar sırasıyla parça parça sil; silinen sayıyı döndür"""
+    from .models import RevokedToken
+
+    expired = RevokedToken.objects.filter(expires_at__lte=now or timezone.now())
+    deleted = 0
+    while True:
+        ids = list(expired.order_by('id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            deleted += RevokedToken.objects.filter(id__in=ids).delete()[0]
+        if len(ids) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    if deleted:
+        logger.info(f"Süresi dolan {deleted} iptal edilmiş token kaydı silindi")
+    return deleted
@@ -3,7 +3,11 @@
 from rest_framework import serializers
 from django.contrib.auth import get_user_model
 from django.contrib.auth.password_validation import validate_password
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
 from patients.models import Patient
+from . import revocation
 
 User = get_user_model()
 
@@ -83,4 +87,31 @@ class PatientRegisterSerializer(serializers.ModelSerializer):
         patient_data['user'] = user
         Patient.objects.create(**patient_data)
         
-        return user
\ No newline at end of file
+        return user
+
+
+class RotatingTokenRefreshSerializer(TokenRefreshSerializer):
+    """
+    Token yenileme - iptal listesi revocation.py ile (SIMPLE_JWT['TOKEN_REFRESH_SERIALIZER'])
+    Rotasyonda eski refresh token yeni token'lar üretilmeden önce iptal edilir; aynı token ikinci kez gelirse reddedilir.
+    """
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        if revocation.is_token_revoked(refresh):
+            raise InvalidToken('Token iptal edilmiş')
+
+        data = {'access': str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            if api_settings.BLACKLIST_AFTER_ROTATION and not revocation.revoke_token(refresh):
+                # Aynı token'la eşzamanlı başka bir yenileme önce davrandı
+                raise InvalidToken('Token iptal edilmiş')
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+
+            data['refresh'] = str(refresh)
+
+        return data
@@ -0,0 +1,22 @@
+# accounts/tasks.py
+
+from sms_service.jobs import shared_task
+import logging
+
+from . import revocation
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def purge_revoked_tokens():
+    """
+    Süresi dolmuş iptal edilmiş refresh token kayıtlarını parça parça sil - saatlik çalışır
+    """
+    try:
+        deleted = revocation.purge_expired()
+        return {'success': True, 'deleted': deleted}
+    except Exception as e:
+        error_msg = f"İptal edilmiş token temizleme hatası: {str(e)}"
+        logger.error(error_msg)
+        return {'success': False, 'error': error_msg}
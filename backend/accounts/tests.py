@@ -1,3 +1,78 @@
+from datetime import timedelta
+
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from accounts import revocation
+from accounts.models import RevokedToken, User
+
+
+def iptal_kayitlari(adet, onek, gecerli=True):
+    now = timezone.now()
+    RevokedToken.objects.bulk_create(
+        [
+            RevokedToken(jti=f'{onek}-{i}', expires_at=now + timedelta(days=7) if gecerli else now - timedelta(hours=1))
+            for i in range(adet)
+        ],
+        batch_size=1000,
+    )
+
+
+class TokenRevocationTests(TestCase):
+    """İptal kontrolü filtrede olmayan token için sorgusuz, iptaller diğer süreçlere yansımalı"""
+
+    def setUp(self):
+        self.user = User.objects.create(username='token-hasta', user_type='hasta')
+
+    def yenile(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': token}, content_type='application/json')
+
+    def test_iptal_edilmemis_token_kontrolu_sorgusuz(self):
+        iptal_kayitlari(500, 'eski')
+        liste = revocation.RevocationList(check_interval=60)
+        liste.sync(force=True)
+        with self.assertNumQueries(0):
+            for _ in range(50):
+                self.assertFalse(liste.is_revoked(RefreshToken.for_user(self.user)['jti']))
+
+    def test_yenileme_maliyeti_tablo_buyudukce_artmaz(self):
+        # Ölçümler arasında nesil okuması araya girmesin
+        liste = revocation.revocation_list
+        self.addCleanup(setattr, liste, 'check_interval', liste.check_interval)
+        liste.check_interval = 3600
+        liste.sync(force=True)
+        token = self.yenile(str(RefreshToken.for_user(self.user))).json()['refresh']
+        with CaptureQueriesContext(connection) as kucuk:
+            token = self.yenile(token).json()['refresh']
+        sorgu = len(kucuk)
+
+        iptal_kayitlari(5000, 'dolu')
+        liste.sync(force=True)
+        with CaptureQueriesContext(connection) as buyuk:
+            response = self.yenile(token)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(buyuk), sorgu)
+
+    def test_dondurulmus_token_ikinci_kez_kullanilamaz(self):
+        eski = str(RefreshToken.for_user(self.user))
+        self.assertEqual(self.yenile(eski).status_code, 200)
+        self.assertEqual(self.yenile(eski).status_code, 401)
+
+    def test_iptal_diger_surece_yansir(self):
+        diger = revocation.RevocationList(sync_interval=3600, check_interval=0)
+        diger.sync(force=True)
+        token = RefreshToken.for_user(self.user)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.assertTrue(revocation.revoke_token(token))
+        self.assertTrue(diger.is_revoked(token['jti']))
+        self.assertFalse(revocation.revoke_token(token))
 
-# Create your tests here.
+    def test_suresi_dolan_kayitlar_silinir(self):
+        iptal_kayitlari(25, 'suresi-dolmus', gecerli=False)
+        iptal_kayitlari(5, 'gecerli')
+        self.assertEqual(revocation.purge_expired(batch_size=10, pause=0), 25)
+        self.assertEqual(RevokedToken.objects.count(), 5)
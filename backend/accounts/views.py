@@ -9,6 +9,7 @@ from rest_framework_simplejwt.tokens import RefreshToken
 from django.contrib.auth import authenticate
 from django.contrib.auth import get_user_model
 from .serializers import UserSerializer, PatientRegisterSerializer
+from . import revocation
 from patients.models import Patient
 
 User = get_user_model()
@@ -169,8 +170,8 @@ class LogoutView(APIView):
         try:
             refresh_token = request.data.get('refresh')
             if refresh_token:
-                token = RefreshToken(refresh_token)
-                token.blacklist()
+                # Zaten iptal edilmiş token'la çıkış da başarılı sayılır
+                revocation.revoke_token(RefreshToken(refresh_token))
             
             return Response({
                 'message': 'Başarıyla çıkış yapıldı.'
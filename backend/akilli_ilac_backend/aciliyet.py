@@ -0,0 +1,56 @@
+# akilli_ilac_backend/aciliyet.py
+"""
+Not aciliyet sınıflandırması - doktor ve bakıcı notları kaydedilirken bir kez çalışır
+
+Metin Türkçe kurallarıyla küçük harfe çevrilip ASCII'ye indirilir (İ/I ve ş/ğ/ö... sorunları olmaz),
+ardından tüm anahtar kelimeler tek bir derlenmiş düzenli ifadeyle aranır. Kelimeler ek alabilir
+(acil -> acilen, dikkat -> dikkatli), ancak başka bir kelimenin ortasında eşleşmez.
+"""
+
+import re
+
+from .turkce import search_fold
+
+# Önem seviyeleri (sıralanabilir olması için sayısal)
+ONEM_NORMAL = 0
+ONEM_DIKKAT = 1
+ONEM_ACIL = 2
+
+ONEM_CHOICES = [
+    (ONEM_NORMAL, 'Normal'),
+    (ONEM_DIKKAT, 'Dikkat'),
+    (ONEM_ACIL, 'Acil'),
+]
+
+# Seviye -> anahtar kelimeler (search_fold uygulanmış halleriyle yazılır)
+ANAHTAR_KELIMELER = {
+    ONEM_ACIL: ('acil', 'kritik'),
+    ONEM_DIKKAT: ('onemli', 'dikkat'),
+}
+
+_GRUP_ADI = 'onem{}'
+
+_DESEN = re.compile(
+    '|'.join(
+        rf'(?P<{_GRUP_ADI.format(seviye)}>\b(?:{"|".join(map(re.escape, kelimeler))}))'
+        for seviye, kelimeler in sorted(ANAHTAR_KELIMELER.items(), reverse=True)
+    )
+)
+
+
+def not_onemi(metin):
+    """Notun önem seviyesi (ONEM_NORMAL / ONEM_DIKKAT / ONEM_ACIL)"""
+    if not metin:
+        return ONEM_NORMAL
+
+    seviye = ONEM_NORMAL
+    for eslesme in _DESEN.finditer(search_fold(metin)):
+        seviye = max(seviye, int(eslesme.lastgroup[len('onem'):]))
+        if seviye == ONEM_ACIL:
+            break
+    return seviye
+
+
+def acil_mi(metin):
+    """Not acil/önemli olarak işaretlenmeli mi (önceki anahtar kelime taramasıyla aynı kapsam)"""
+    return not_onemi(metin) > ONEM_NORMAL
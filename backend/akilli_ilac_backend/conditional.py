@@ -0,0 +1,65 @@
+# akilli_ilac_backend/conditional.py
+"""
+Koşullu GET - değişmeyen liste uç noktaları için 304
+
+- View yanıtı oluşturmadan önce kullanıcı kapsamındaki kayıtların sayısı ve en son güncelleme zamanından
+  (max(updated_at) / max(guncelleme_tarihi)) tek aggregate sorgusuyla ETag hesaplanır; istemcinin If-None-Match
+  değeri eşleşirse gövde hiç üretilmeden 304 döner (django.views.decorators.http.condition)
+- Silinen kayıt max(updated_at)'i değiştirmediği için sayı da ETag'e girer. Last-Modified bu yüzden doğrulayıcı
+  olarak kullanılmaz: silme ve zamana bağlı alanlar (is_past, days_remaining) onu ilerletmez
+- Zamana bağlı alanı olan view'lar ilgili sınırı (bugünün tarihi, geçmiş randevu sayısı) parçalara ekler
+- Yanıtlar kullanıcıya özeldir: Cache-Control: private, no-cache (her açılışta doğrulama), Vary: Authorization
+"""
+
+import hashlib
+from functools import wraps
+
+from django.db.models import Count, Max
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.views.decorators.http import condition
+
+# Yanıt biçimi değiştiğinde artırılır; eski ETag'ler geçersizleşir
+ETAG_VERSION = 1
+
+
+def fingerprint(queryset, *fields, **aggregates):
+    """Sorgunun kayıt sayısı, verilen alanların en büyük değerleri ve ek aggregate'ler (tek sorgu)"""
+    expressions = {'count': Count('pk')}
+    expressions.update({f'max_{index}': Max(field) for index, field in enumerate(fields)})
+    expressions.update(aggregates)
+    values = queryset.order_by().aggregate(**expressions)
+    return tuple(values[name] for name in expressions)
+
+
+def make_etag(request, parts):
+    """URL (sorgu parametreleriyle), kullanıcı ve parçalardan ETag"""
+    user_id = getattr(getattr(request, 'user', None), 'pk', None)
+    raw = repr((ETAG_VERSION, request.get_full_path(), user_id, tuple(parts)))
+    return hashlib.sha1(raw.encode()).hexdigest()
+
+
+def conditional(parts_func):
+    """
+    GET view'ı için ETag doğrulaması. parts_func(request, *args, **kwargs) ETag parçalarını döndürür;
+    None dönerse (profil yok vb.) view koşulsuz çalışır. APIView metotlarında method_decorator ile kullanılır.
+    """
+    def etag_func(request, *args, **kwargs):
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        parts = parts_func(request, *args, **kwargs)
+        return None if parts is None else make_etag(request, parts)
+
+    def decorator(view):
+        conditional_view = condition(etag_func=etag_func)(view)
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            response = conditional_view(request, *args, **kwargs)
+            if request.method in ('GET', 'HEAD'):
+                patch_cache_control(response, private=True, no_cache=True)
+                patch_vary_headers(response, ('Authorization',))
+            return response
+
+        return wrapper
+
+    return decorator
@@ -0,0 +1,49 @@
+# akilli_ilac_backend/fieldsets.py
+"""
+Seyrek alan seçimi - liste uç noktalarında ?fields=id,name,phone
+
+- Uç nokta satır alanlarını {çıktı alanı: (okunacak model sütunları, değer fonksiyonu)} sözlüğüyle tanımlar
+- İstenmeyen alanlar yanıttan çıkar, sütunları sorgudan düşer (.only()); alt sorgu gerektiren alanlar
+  wants() ile kontrol edilip istenmediğinde hiç çalıştırılmaz
+- fields verilmemişse tüm alanlar döner; bilinmeyen alan adları yok sayılır
+"""
+
+FIELDS_PARAM = 'fields'
+
+
+class Fieldset:
+    """İstekteki ?fields= seçimi"""
+
+    def __init__(self, request, param=FIELDS_PARAM):
+        raw = request.GET.get(param, '')
+        names = {name.strip() for name in raw.split(',') if name.strip()}
+        self.names = names or None
+
+    def wants(self, *names):
+        """Verilen alanlardan en az biri isteniyor mu"""
+        return self.names is None or any(name in self.names for name in names)
+
+    def columns(self, spec, always=('id',)):
+        """İstenen alanların sütunları (select_related ilişkileri için 'patient__ad' gibi); seçim yoksa None"""
+        if self.names is None:
+            return None
+        columns = set(always)
+        for name, (field_columns, _) in spec.items():
+            if name in self.names:
+                columns.update(field_columns)
+        return columns
+
+    def only(self, queryset, spec, always=('id',)):
+        """Sorguyu sadece istenen alanların sütunlarıyla sınırla"""
+        columns = self.columns(spec, always)
+        return queryset if columns is None else queryset.only(*columns)
+
+    def row(self, obj, spec):
+        """Nesneden istenen alanlarla satır sözlüğü üret"""
+        return {name: value(obj) for name, (_, value) in spec.items() if self.wants(name)}
+
+    def trim(self, data):
+        """Hazır satır sözlüğünden istenmeyen alanları çıkar"""
+        if self.names is None:
+            return data
+        return {name: value for name, value in data.items() if name in self.names}
@@ -0,0 +1,24 @@
+# akilli_ilac_backend/middleware.py
+"""
+Proje middleware'leri
+"""
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+
+# Bu boyutun altındaki yanıtlarda sıkıştırmanın CPU maliyeti kazandırdığı bant genişliğinden fazla (bayt)
+DEFAULT_GZIP_MIN_SIZE = 1024
+
+
+class LargeResponseGZipMiddleware(GZipMiddleware):
+    """
+    Sadece büyük, akış olmayan yanıtları gzip'ler. SSE gibi akışlar olduğu gibi geçer: gzip olay parçalarını
+    arabelleğe alıp gecikmeye yol açar.
+    """
+
+    def process_response(self, request, response):
+        if response.streaming:
+            return response
+        if len(response.content) < getattr(settings, 'GZIP_MIN_SIZE', DEFAULT_GZIP_MIN_SIZE):
+            return response
+        return super().process_response(request, response)
@@ -0,0 +1,113 @@
+# akilli_ilac_backend/renderers.py
+"""
+Ortak JSON çıktısı - DRF view'ları ve JsonResponse kullanan fonksiyon view'lar aynı kodlayıcıyı kullanır
+
+- orjson kuruluysa kodlama orjson ile yapılır (stdlib json'dan belirgin şekilde hızlı); kurulu değilse aynı
+  kurallarla stdlib json kullanılır, çıktı değişmez
+- Değerler eski kodlayıcılarla aynı yazılır: DRF yanıtları rest_framework JSONEncoder, JsonResponse
+  DjangoJSONEncoder kurallarıyla (datetime ISO 8601, UTC ise 'Z'; JsonResponse'ta milisaniye hassasiyeti).
+  Sadece boşluk ve kaçış biçimi farklıdır: çıktı sıkışıktır, ASCII dışı harfler UTF-8 yazılır
+"""
+
+import datetime
+import decimal
+import json
+import uuid
+
+from django.db.models.query import QuerySet
+from django.http import HttpResponse
+from django.utils import timezone
+from django.utils.duration import duration_iso_string
+from django.utils.functional import Promise
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # orjson opsiyonel; yoksa stdlib json
+    orjson = None
+
+
+def _iso_datetime(value):
+    value = value.isoformat()
+    return value[:-6] + 'Z' if value.endswith('+00:00') else value
+
+
+def _naive_time(value):
+    if timezone.is_aware(value):
+        raise ValueError("JSON can't represent timezone-aware times.")
+    return value
+
+
+def _default(obj):
+    """DRF yanıtları: kodlayıcının doğrudan yazamadığı değerler (rest_framework JSONEncoder kuralları)"""
+    if isinstance(obj, Promise):
+        return str(obj)
+    if isinstance(obj, datetime.datetime):
+        return _iso_datetime(obj)
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    if isinstance(obj, datetime.time):
+        return _naive_time(obj).isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if isinstance(obj, (QuerySet, set, frozenset)):
+        return list(obj)
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    raise TypeError(f'{type(obj).__name__} JSON olarak yazılamaz')
+
+
+def _django_default(obj):
+    """JsonResponse: DjangoJSONEncoder kuralları (milisaniye hassasiyeti, Decimal / timedelta metin)"""
+    if isinstance(obj, datetime.datetime):
+        value = obj.isoformat()
+        if obj.microsecond:
+            value = value[:23] + value[26:]
+        return value[:-6] + 'Z' if value.endswith('+00:00') else value
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    if isinstance(obj, datetime.time):
+        value = _naive_time(obj).isoformat()
+        return value[:12] if obj.microsecond else value
+    if isinstance(obj, datetime.timedelta):
+        return duration_iso_string(obj)
+    if isinstance(obj, (decimal.Decimal, uuid.UUID, Promise)):
+        return str(obj)
+    return _default(obj)
+
+
+if orjson is not None:
+    _ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def dumps(data, default=_default):
+        """Veriyi JSON (bytes) olarak kodla"""
+        return orjson.dumps(data, default=default, option=_ORJSON_OPTIONS)
+else:
+    def dumps(data, default=_default):
+        """Veriyi JSON (bytes) olarak kodla"""
+        return json.dumps(data, default=default, ensure_ascii=False, separators=(',', ':')).encode()
+
+
+class FastJSONRenderer(JSONRenderer):
+    """DRF için varsayılan renderer (REST_FRAMEWORK DEFAULT_RENDERER_CLASSES)"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return dumps(data)
+
+
+class JsonResponse(HttpResponse):
+    """django.http.JsonResponse yerine ortak kodlayıcıyla (encoder / json_dumps_params parametreleri yok)"""
+
+    def __init__(self, data, safe=True, **kwargs):
+        if safe and not isinstance(data, dict):
+            raise TypeError('In order to allow non-dict objects to be serialized set the safe parameter to False.')
+        kwargs.setdefault('content_type', 'application/json')
+        super().__init__(content=dumps(data, default=_django_default), **kwargs)
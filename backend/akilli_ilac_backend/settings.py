@@ -46,6 +46,10 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    # Gövdeyi okuyan/yazan middleware'lerden önce: sıkıştırma en son yapılır (SSE akışları hariç)
+    'akilli_ilac_backend.middleware.LargeResponseGZipMiddleware',
+    # ETag'i olmayan GET yanıtlarına içerikten ETag ekler, If-None-Match eşleşirse 304 (bant genişliği)
+    'django.middleware.http.ConditionalGetMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -81,10 +85,32 @@ WSGI_APPLICATION = 'akilli_ilac_backend.wsgi.application'
 DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': '/data/db.sqlite3',         # SQLite'ı container volume'üne taşı eski dockerdan once 'NAME': BASE_DIR / 'db.sqlite3'
+        # Container'larda volume üzerindeki dosya (docker-compose: DJANGO_DB_PATH); eski dockerdan once 'NAME': BASE_DIR / 'db.sqlite3'
+        'NAME': config('DJANGO_DB_PATH', default='/data/db.sqlite3'),
     }
 }
 
+# Paylaşılan cache: gunicorn worker'ları, run_jobs ve dispatch_sms aynı sürüm anahtarlarını görmeli (doktor rehberi,
+# SMS şablonları, randevu doluluğu, token iptalleri). Süreç içi LocMem'de bir worker'ın geçersiz kıldığı kayıt
+# diğerlerinde eski kalır. 'db' = veritabanı tablosu (manage.py createcachetable), 'redis' = REDIS_URL (redis paketi gerekir)
+CACHE_BACKEND = config('CACHE_BACKEND', default='db')
+if CACHE_BACKEND == 'redis':
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': config('REDIS_URL', default='redis://localhost:6379/0'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.db.DatabaseCache',
+            'LOCATION': 'django_cache',
+            # Doktor-gün doluluk kayıtları çok olabilir; varsayılan 300 kayıtta sık budama yapılır
+            'OPTIONS': {'MAX_ENTRIES': config('CACHE_MAX_ENTRIES', default=20000, cast=int)},
+        }
+    }
+
 # Password validation
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -131,7 +157,7 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_RENDERER_CLASSES': [
-        'rest_framework.renderers.JSONRenderer',
+        'akilli_ilac_backend.renderers.FastJSONRenderer',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 20,
@@ -146,6 +172,8 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=7),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
+    # Rotasyonda eski token accounts/revocation.py iptal listesine yazılır (token_blacklist uygulaması yerine)
+    'TOKEN_REFRESH_SERIALIZER': 'accounts.serializers.RotatingTokenRefreshSerializer',
     'UPDATE_LAST_LOGIN': True,
     'ALGORITHM': 'HS256',
     'SIGNING_KEY': SECRET_KEY,
@@ -165,6 +193,9 @@ CORS_ALLOW_CREDENTIALS = True
 
 CORS_ALLOW_ALL_ORIGINS = DEBUG  # Sadece development için
 
+# Sayfalı doktor rehberi (api/patients/doctors/) toplam ve sonraki sayfa bilgisini başlıkta döndürür
+CORS_EXPOSE_HEADERS = ['X-Total-Count', 'X-Has-Next']
+
 # Huawei Cloud SMS Configuration
 HUAWEI_CLOUD_CONFIG = {
     'SMS_ENDPOINT': config('HUAWEI_SMS_ENDPOINT', default='https://smsapi.tr-west-1.myhuaweicloud.com'),
@@ -175,6 +206,62 @@ HUAWEI_CLOUD_CONFIG = {
     'REGION': config('HUAWEI_REGION', default='tr-west-1'),
 }
 
+# Arka plan görevleri: 'db' = yerleşik veritabanı kuyruğu (python manage.py run_jobs), 'celery' = Celery worker/beat
+JOB_BACKEND = config('JOB_BACKEND', default='db')
+
+# Log arşivi klasörü ve tablo bazında saklama süreleri (gün, None = silinmez) - bkz. sms_service/retention.py
+# Arşiv silinen kayıtların tek kopyasıdır: container'da volume üzerinde olmalı (docker-compose: log_archive)
+RETENTION_ARCHIVE_DIR = config('RETENTION_ARCHIVE_DIR', default='/data/archive')
+RETENTION_DAYS = {}
+
+# Giden SMS şeritleri (bkz. sms_service/lanes.py): şerit başına ayrılmış gönderici ve ortak gönderici sayısı
+# 0 = acil, 1 = klinik, 2 = toplu
+SMS_LANE_CONCURRENCY = {
+    0: config('SMS_LANE_URGENT', default=2, cast=int),
+    1: config('SMS_LANE_CLINICAL', default=2, cast=int),
+    2: config('SMS_LANE_BULK', default=1, cast=int),
+    'shared': config('SMS_LANE_SHARED', default=3, cast=int),
+}
+# Bu süreden uzun bekleyen SMS'ler gönderilmeden kapatılır (saat)
+SMS_PENDING_MAX_AGE_HOURS = config('SMS_PENDING_MAX_AGE_HOURS', default=24, cast=int)
+
+# Huawei kota sınırı (bkz. sms_service/ratelimit.py): genel ve gönderici başına saniyede jeton / ani yük kapasitesi
+SMS_RATE_LIMITS = {
+    'global': {'rate': config('SMS_RATE_LIMIT_GLOBAL', default=20.0, cast=float), 'burst': 40},
+    'sender': {'rate': config('SMS_RATE_LIMIT_SENDER', default=10.0, cast=float), 'burst': 20},
+}
+# 'db' = veritabanı kovası, 'redis' = Redis kovası (redis paketi gerekir)
+SMS_RATE_LIMIT_BACKEND = config('SMS_RATE_LIMIT_BACKEND', default='db')
+SMS_RATE_LIMIT_REDIS_URL = config('REDIS_URL', default='redis://localhost:6379/0')
+# Kuyruk göndericisinin jeton için en fazla beklemesi (saniye); süre dolarsa SMS kuyrukta kalır ve sonra tekrar
+# denenir. İstek sırasındaki gönderim (SMSService.send_sms) beklemez, jeton yoksa SMS'i kuyruğa bırakır
+SMS_RATE_LIMIT_TIMEOUT = config('SMS_RATE_LIMIT_TIMEOUT', default=10.0, cast=float)
+
+# Aynı numaraya giden klinik/toplu mesajları birleştirme penceresi (saniye, 0 = kapalı) ve birleşik SMS segment
+# sınırı - bkz. sms_service/coalesce.py
+SMS_COALESCE_WINDOW_SECONDS = config('SMS_COALESCE_WINDOW_SECONDS', default=20, cast=int)
+SMS_COALESCE_MAX_SEGMENTS = config('SMS_COALESCE_MAX_SEGMENTS', default=3, cast=int)
+
+# Türkçe harfleri GSM-7 karşılıklarına çevir (ş -> s, ı -> i; bkz. sms_service/encoding.py);
+# UCS-2'de 70 yerine 160 karakterlik segment
+SMS_TRANSLITERATE = config('SMS_TRANSLITERATE', default=False, cast=bool)
+
+# SMS sağlayıcıları (bkz. sms_service/providers.py); yönlendirici en sağlıklı sağlayıcıyı seçer, hata olursa
+# sıradakine geçer. backend: 'huawei' | 'http' | 'file' (yerel, testler için) ya da sınıf yolu; weight > 1 yedekte tutar
+SMS_PROVIDERS = [
+    {'name': 'huawei', 'backend': 'huawei'},
+]
+# Yedek HTTP sağlayıcı: SMS_BACKUP_URL verilirse yönlendiriciye eklenir
+if config('SMS_BACKUP_URL', default=''):
+    SMS_PROVIDERS.append({
+        'name': 'yedek',
+        'backend': 'http',
+        'url': config('SMS_BACKUP_URL'),
+        'token': config('SMS_BACKUP_TOKEN', default=''),
+        'sender': config('SMS_BACKUP_SENDER', default='SMS-INFO'),
+        'weight': config('SMS_BACKUP_WEIGHT', default=3.0, cast=float),
+    })
+
 # Logging Configuration
 LOGGING = {
     'version': 1,
@@ -0,0 +1,61 @@
+# akilli_ilac_backend/telefon.py
+"""
+Telefon numarası yardımcıları - numaralar yazılırken bir kez E.164 (+90XXXXXXXXXX) formatına çevrilir
+"""
+
+import re
+
+TURKEY_COUNTRY_CODE = '90'
+
+# E.164 en fazla 15 hane + '+' işareti
+E164_MAX_LENGTH = 16
+
+# Ulusal numara: alan/operatör kodu + abone numarası (0 olmadan 10 hane)
+NATIONAL_NUMBER_LENGTH = 10
+
+_NON_DIGIT_RE = re.compile(r'\D')
+
+
+def phone_digits(phone_number):
+    """Numaradaki rakamlar dışındaki her şeyi at"""
+    return _NON_DIGIT_RE.sub('', phone_number or '')
+
+
+def normalize_phone(phone_number):
+    """
+    Telefon numarasını E.164 formatına çevir: '0532 123 45 67' -> '+905321234567'
+    Boş veya rakamsız değerler için '' döner.
+    """
+    digits = phone_digits(phone_number)
+    if not digits:
+        return ''
+
+    if digits.startswith('00'):
+        # Uluslararası çıkış kodu (0090...)
+        digits = digits[2:]
+    elif digits.startswith('0'):
+        digits = TURKEY_COUNTRY_CODE + digits[1:]
+    elif not digits.startswith(TURKEY_COUNTRY_CODE):
+        digits = TURKEY_COUNTRY_CODE + digits
+
+    return f"+{digits}"[:E164_MAX_LENGTH]
+
+
+def is_complete_phone(phone_e164):
+    """Normalize edilmiş numara tam bir Türkiye numarası mı (+90 + 10 hane)"""
+    return len(phone_e164) == 1 + len(TURKEY_COUNTRY_CODE) + NATIONAL_NUMBER_LENGTH
+
+
+def phone_lookup(field_name, phone_number):
+    """
+    Telefon filtresi için indeks kullanabilen lookup sözlüğü üret.
+    Tam numarada eşitlik, kısmi numarada ön ek araması yapılır.
+    """
+    phone_e164 = normalize_phone(phone_number)
+    if not phone_e164:
+        return None
+    if is_complete_phone(phone_e164):
+        return {field_name: phone_e164}
+    # Ön ek araması aralık sorgusu olarak yazılır: SQLite LIKE 'x%' indeksi kullanmaz,
+    # '+90532' <= numara < '+90532~' ise her veritabanında indeks taramasıdır ('~' tüm rakamlardan büyük)
+    return {f'{field_name}__gte': phone_e164, f'{field_name}__lt': phone_e164 + '~'}
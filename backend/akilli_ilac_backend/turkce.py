@@ -0,0 +1,43 @@
+# akilli_ilac_backend/turkce.py
+"""
+Türkçe metin yardımcıları - arama ve sınıflandırma için ortak normalizasyon
+"""
+
+import re
+import unicodedata
+
+# Python'un str.lower() fonksiyonu 'İ' harfini 'i̇' (i + birleşik nokta), 'I' harfini 'i' yapar.
+# Türkçe'de doğrusu 'İ' -> 'i', 'I' -> 'ı' olduğu için önce bu iki harfi çeviriyoruz.
+_TR_LOWER_MAP = str.maketrans({'İ': 'i', 'I': 'ı'})
+
+# Türkçe karakterleri ASCII karşılıklarına indir (klavyesi Türkçe olmayan kullanıcılar için)
+_ASCII_FOLD_MAP = str.maketrans({
+    'ı': 'i', 'ş': 's', 'ğ': 'g', 'ç': 'c', 'ö': 'o', 'ü': 'u',
+    'â': 'a', 'î': 'i', 'û': 'u',
+})
+
+_TOKEN_RE = re.compile(r'[a-z0-9]+')
+
+
+def turkish_lower(text):
+    """Metni Türkçe kurallarına göre küçük harfe çevir"""
+    if not text:
+        return ''
+    return text.translate(_TR_LOWER_MAP).lower()
+
+
+def ascii_fold(text):
+    """Küçük harfli metindeki Türkçe ve aksanlı karakterleri ASCII'ye indir"""
+    text = text.translate(_ASCII_FOLD_MAP)
+    text = unicodedata.normalize('NFKD', text)
+    return ''.join(ch for ch in text if not unicodedata.combining(ch))
+
+
+def search_fold(text):
+    """Arama anahtarı normalizasyonu: Türkçe küçük harf + ASCII indirgeme"""
+    return ascii_fold(turkish_lower(text))
+
+
+def search_tokens(text):
+    """Metni normalize edip arama kelimelerine böl"""
+    return _TOKEN_RE.findall(search_fold(text))
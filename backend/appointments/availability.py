@@ -0,0 +1,208 @@
+# appointments/availability.py
+"""
+Doktor müsaitlik motoru
+
+- Çalışma saatleri doctors/working_hours.py'de bir kez ayrıştırılır
+- Her doktor-gün için dolu randevu aralıkları sıralı tutulup cache'lenir (DoluAraliklar)
+- Çakışma kontrolü bisect ile O(log n): başlangıcı yeni aralığın bitişinden önce olan randevuların
+  en geç bitişi, yeni aralığın başlangıcından sonraysa çakışma vardır
+- Randevu kaydedildiğinde/silindiğinde signals.py ilgili doktor-gün cache'ini siler; cache paylaşılan olmalı
+  (settings.CACHES), yoksa silme sadece kaydı yapan süreçte görülür
+- Boş slot sorgusu aralıktaki tüm günlerin kaydını tek cache okumasıyla alır
+"""
+
+import bisect
+import logging
+from datetime import datetime, time, timedelta
+
+from django.core.cache import cache
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Takvimi dolduran randevu durumları
+AKTIF_DURUMLAR = ('Beklemede', 'Onaylandi')
+
+# Randevu süresi üst sınırı (Appointment.randevu_suresi validator'ı ile aynı): önceki günden taşan randevular için
+MAKS_RANDEVU_SURESI = timedelta(minutes=240)
+
+# Boş slot sorgusunda izin verilen en uzun tarih aralığı (gün)
+MAKS_GUN_ARALIGI = 31
+
+CACHE_SURESI = 60 * 60 * 24
+
+_CACHE_ANAHTARI = 'randevu_dolu:{doktor_id}:{gun}'
+
+
+class DoluAraliklar:
+    """
+    Bir doktor-günün dolu aralıkları (epoch saniye).
+    Eski kayıtlarda çakışan randevular olabileceği için bitişlerin önek maksimumu da tutulur.
+    """
+
+    __slots__ = ('baslangiclar', 'bitisler', '_maks_bitis')
+
+    def __init__(self, araliklar):
+        araliklar = sorted(araliklar)
+        self.baslangiclar = [a[0] for a in araliklar]
+        self.bitisler = [a[1] for a in araliklar]
+        self._maks_bitis = []
+        maks = float('-inf')
+        for bitis in self.bitisler:
+            maks = max(maks, bitis)
+            self._maks_bitis.append(maks)
+
+    def cakisiyor_mu(self, baslangic, bitis):
+        """[baslangic, bitis) aralığı dolu bir aralıkla kesişiyor mu - O(log n)"""
+        index = bisect.bisect_left(self.baslangiclar, bitis)
+        return index > 0 and self._maks_bitis[index - 1] > baslangic
+
+    def __len__(self):
+        return len(self.baslangiclar)
+
+
+def _gun_siniri(gun):
+    """Yerel saat dilimine göre günün başlangıç ve bitişi"""
+    tz = timezone.get_current_timezone()
+    baslangic = timezone.make_aware(datetime.combine(gun, time.min), tz)
+    return baslangic, baslangic + timedelta(days=1)
+
+
+def _ts(dt):
+    return int(dt.timestamp())
+
+
+def _db_araliklari(doktor_id, gun, haric_randevu_id=None):
+    """Günle kesişen aktif randevuların (başlangıç, bitiş) aralıkları"""
+    from .models import Appointment
+
+    gun_bas, gun_bit = _gun_siniri(gun)
+    randevular = Appointment.objects.filter(
+        doktor_id=doktor_id,
+        durum__in=AKTIF_DURUMLAR,
+        randevu_tarihi__gte=gun_bas - MAKS_RANDEVU_SURESI,
+        randevu_tarihi__lt=gun_bit,
+    ).values_list('randevu_id', 'randevu_tarihi', 'randevu_suresi')
+
+    araliklar = []
+    for randevu_id, baslangic, sure in randevular:
+        if randevu_id == haric_randevu_id:
+            continue
+        bitis = baslangic + timedelta(minutes=sure)
+        if bitis > gun_bas:
+            araliklar.append((_ts(baslangic), _ts(bitis)))
+    return araliklar
+
+
+def dolu_araliklar(doktor_id, gun, cache_kullan=True):
+    """Doktor-gün için DoluAraliklar; cache'te yoksa tek sorguyla oluşturulup yazılır"""
+    anahtar = _CACHE_ANAHTARI.format(doktor_id=doktor_id, gun=gun.isoformat())
+    if cache_kullan:
+        araliklar = cache.get(anahtar)
+        if araliklar is not None:
+            return DoluAraliklar(araliklar)
+
+    araliklar = _db_araliklari(doktor_id, gun)
+    cache.set(anahtar, araliklar, CACHE_SURESI)
+    return DoluAraliklar(araliklar)
+
+
+def dolu_araliklar_toplu(doktor_id, gunler):
+    """Günler için {gün: DoluAraliklar}; cache tek seferde okunur, eksik günler oluşturulup birlikte yazılır"""
+    anahtarlar = {gun: _CACHE_ANAHTARI.format(doktor_id=doktor_id, gun=gun.isoformat()) for gun in gunler}
+    bulunan = cache.get_many(anahtarlar.values())
+
+    sonuc = {}
+    yazilacak = {}
+    for gun, anahtar in anahtarlar.items():
+        araliklar = bulunan.get(anahtar)
+        if araliklar is None:
+            araliklar = _db_araliklari(doktor_id, gun)
+            yazilacak[anahtar] = araliklar
+        sonuc[gun] = DoluAraliklar(araliklar)
+    if yazilacak:
+        cache.set_many(yazilacak, CACHE_SURESI)
+    return sonuc
+
+
+def gecersiz_kil(doktor_id, baslangic, sure):
+    """Randevunun dokunduğu doktor-gün cache kayıtlarını sil"""
+    if not doktor_id or not baslangic:
+        return
+    yerel_bas = timezone.localtime(baslangic)
+    yerel_bit = timezone.localtime(baslangic + timedelta(minutes=sure or 0))
+    gun = yerel_bas.date()
+    anahtarlar = []
+    while gun <= yerel_bit.date():
+        anahtarlar.append(_CACHE_ANAHTARI.format(doktor_id=doktor_id, gun=gun.isoformat()))
+        gun += timedelta(days=1)
+    cache.delete_many(anahtarlar)
+
+
+def calisma_saatinde_mi(doktor, baslangic, bitis):
+    """Aralık doktorun tanımlı çalışma saatlerinden biri içinde mi (tanım yoksa kısıtlama yok)"""
+    haftalik = doktor.get_calisma_araliklari()
+    if haftalik is None:
+        return True
+
+    yerel_bas = timezone.localtime(baslangic)
+    bas_dk = yerel_bas.hour * 60 + yerel_bas.minute
+    bit_dk = bas_dk + int((bitis - baslangic).total_seconds() // 60)
+    return any(a_bas <= bas_dk and bit_dk <= a_bit for a_bas, a_bit in haftalik[yerel_bas.weekday()])
+
+
+def cakisma_var_mi(doktor_id, baslangic, sure, haric_randevu_id=None, cache_kullan=True):
+    """
+    Yeni/güncellenen randevu doktorun başka bir aktif randevusuyla çakışıyor mu.
+    Bir randevu en fazla iki güne yayılabildiği için bir veya iki doktor-gün yapısına bakılır.
+    """
+    bitis = baslangic + timedelta(minutes=sure)
+    bas_ts, bit_ts = _ts(baslangic), _ts(bitis)
+
+    gun = timezone.localtime(baslangic).date()
+    son_gun = timezone.localtime(bitis - timedelta(seconds=1)).date()
+    while gun <= son_gun:
+        if haric_randevu_id is not None:
+            # Güncellenen randevu kendisiyle çakışmasın diye bu gün veritabanından hariç tutularak okunur
+            yapi = DoluAraliklar(_db_araliklari(doktor_id, gun, haric_randevu_id))
+        else:
+            yapi = dolu_araliklar(doktor_id, gun, cache_kullan=cache_kullan)
+        if yapi.cakisiyor_mu(bas_ts, bit_ts):
+            return True
+        gun += timedelta(days=1)
+    return False
+
+
+def bos_slotlar(doktor, baslangic_gunu, bitis_gunu, sure=30, adim=None):
+    """
+    Tarih aralığındaki boş randevu slotları: {'YYYY-MM-DD': ['09:00', '09:30', ...], ...}
+    Çalışma saati tanımlı olmayan doktorlar için 09:00-17:00 varsayılır.
+    """
+    adim = adim or sure
+    haftalik = doktor.get_calisma_araliklari()
+    simdi_ts = _ts(timezone.now())
+    tz = timezone.get_current_timezone()
+
+    calisma = {}
+    gun = baslangic_gunu
+    while gun <= bitis_gunu:
+        calisma[gun] = haftalik[gun.weekday()] if haftalik is not None else ((9 * 60, 17 * 60),)
+        gun += timedelta(days=1)
+    doluluk = dolu_araliklar_toplu(doktor.doktor_id, [gun for gun, araliklar in calisma.items() if araliklar])
+
+    sonuc = {}
+    for gun, araliklar in calisma.items():
+        slotlar = []
+        if araliklar:
+            dolu = doluluk[gun]
+            gece_yarisi = datetime.combine(gun, time.min)
+            for a_bas, a_bit in araliklar:
+                dakika = a_bas
+                while dakika + sure <= a_bit:
+                    # DST geçişlerinde doğru olması için her slotun zamanı yerel saatten hesaplanır
+                    bas_ts = _ts(timezone.make_aware(gece_yarisi + timedelta(minutes=dakika), tz))
+                    if bas_ts >= simdi_ts and not dolu.cakisiyor_mu(bas_ts, bas_ts + sure * 60):
+                        slotlar.append(f'{dakika // 60:02d}:{dakika % 60:02d}')
+                    dakika += adim
+        sonuc[gun.isoformat()] = slotlar
+    return sonuc
@@ -0,0 +1,15 @@
+# appointments/management/commands/complete_past_appointments.py
+from django.core.management.base import BaseCommand
+
+from appointments.transitions import complete_past_appointments
+
+
+class Command(BaseCommand):
+    help = 'Bitmiş onaylı randevuları Tamamlandi yapar (run_jobs çalışmayan ortamlar için)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+
+    def handle(self, *args, **options):
+        completed = complete_past_appointments(chunk_size=options['chunk_size'])
+        self.stdout.write(f'Tamamlanan randevu: {completed}')
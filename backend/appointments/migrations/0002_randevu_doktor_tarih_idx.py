@@ -0,0 +1,17 @@
+# Generated by Django 4.2.7 on 2025-08-14 10:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='appointment',
+            index=models.Index(fields=['doktor', 'randevu_tarihi'], name='randevu_doktor_tarih_idx'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2025-08-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('appointments', '0002_randevu_doktor_tarih_idx'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='appointment',
+            name='doktor_notu_acil',
+            field=models.BooleanField(db_column='DoktorNotuAcil', db_index=True, default=False, verbose_name='Doktor Notu Acil Mi'),
+        ),
+        migrations.AddField(
+            model_name='appointment',
+            name='doktor_notu_onem',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Normal'), (1, 'Dikkat'), (2, 'Acil')], db_column='DoktorNotuOnem', default=0, verbose_name='Doktor Notu Önem Seviyesi'),
+        ),
+    ]
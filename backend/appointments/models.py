@@ -7,6 +7,8 @@ from django.core.exceptions import ValidationError
 from patients.models import Patient
 from doctors.models import Doctor
 from accounts.models import User
+from akilli_ilac_backend.aciliyet import ONEM_CHOICES, ONEM_NORMAL, not_onemi
+from .availability import AKTIF_DURUMLAR, cakisma_var_mi
 
 class Appointment(models.Model):
     """
@@ -97,6 +99,21 @@ class Appointment(models.Model):
         verbose_name="Doktor Notları"
     )
     
+    # Doktor notunun aciliyeti - not kaydedilirken sınıflandırılır (bkz. akilli_ilac_backend/aciliyet.py)
+    doktor_notu_onem = models.PositiveSmallIntegerField(
+        choices=ONEM_CHOICES,
+        default=ONEM_NORMAL,
+        db_column='DoktorNotuOnem',
+        verbose_name="Doktor Notu Önem Seviyesi"
+    )
+    
+    doktor_notu_acil = models.BooleanField(
+        default=False,
+        db_index=True,
+        db_column='DoktorNotuAcil',
+        verbose_name="Doktor Notu Acil Mi"
+    )
+    
     # Online randevu mu?
     online_randevu_mu = models.BooleanField(
         default=False,
@@ -132,7 +149,36 @@ class Appointment(models.Model):
         verbose_name = "Randevu"
         verbose_name_plural = "Randevular"
         ordering = ['-randevu_tarihi']
+        indexes = [
+            # Müsaitlik motoru doktor-gün aralığını bu indeks üzerinden okur
+            models.Index(fields=['doktor', 'randevu_tarihi'], name='randevu_doktor_tarih_idx'),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Tarih/doktor değişirse eski doktor-gün müsaitlik cache'i de silinebilsin diye
+        instance._musaitlik_durumu = (
+            instance.__dict__.get('doktor_id'),
+            instance.__dict__.get('randevu_tarihi'),
+            instance.__dict__.get('randevu_suresi'),
+        )
+        # Bakıcı dashboard özetinin artımlı güncellenebilmesi için
+        instance._pano_durumu = tuple(
+            instance.__dict__.get(alan) for alan in ('hasta_id', 'randevu_tarihi', 'durum')
+        )
+        return instance
+
+    def save(self, *args, **kwargs):
+        self.doktor_notu_onem = not_onemi(self.doktor_notlari)
+        self.doktor_notu_acil = self.doktor_notu_onem > ONEM_NORMAL
         
+        # Not güncelleniyorsa sınıflandırma alanları da kaydedilsin
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'doktor_notlari' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'doktor_notu_onem', 'doktor_notu_acil'}
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.hasta.full_name} - {self.doktor.full_name} ({self.randevu_tarihi.strftime('%d.%m.%Y %H:%M')})"
     
@@ -168,18 +214,11 @@ class Appointment(models.Model):
         if self.randevu_tarihi and self.randevu_tarihi < timezone.now():
             raise ValidationError("Randevu tarihi gelecekte olmalıdır.")
         
-        # Aynı doktor aynı saatte başka randevu var mı kontrol et
-        if self.randevu_tarihi:
-            conflicting_appointments = Appointment.objects.filter(
-                doktor=self.doktor,
-                randevu_tarihi__range=[
-                    self.randevu_tarihi,
-                    self.randevu_bitis_zamani
-                ],
-                durum__in=['Beklemede', 'Onaylandi']
-            ).exclude(randevu_id=self.randevu_id)
-            
-            if conflicting_appointments.exists():
+        # Aynı doktorun bu aralıkla kesişen başka randevusu var mı kontrol et
+        # (sadece başlangıcı aralığa düşenler değil, önce başlayıp bu aralığa taşanlar da)
+        if self.randevu_tarihi and self.doktor_id and self.durum in AKTIF_DURUMLAR:
+            if cakisma_var_mi(self.doktor_id, self.randevu_tarihi, self.randevu_suresi,
+                              haric_randevu_id=self.randevu_id, cache_kullan=False):
                 raise ValidationError("Bu saatte doktorun başka bir randevusu bulunmaktadır.")
     
     def approve(self, approver_user):
@@ -0,0 +1,47 @@
+# appointments/signals.py
+"""
+Randevu değişikliklerinde doktor-gün müsaitlik cache'ini geçersiz kıl
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import Signal, receiver
+
+from .availability import gecersiz_kil
+from .models import Appointment
+
+# update() sinyal tetiklemediği için toplu durum değişikliklerinden sonra gönderilir (hasta_ids)
+randevular_toplu_guncellendi = Signal()
+
+
+def _gecersiz_kil(araliklar):
+    for doktor_id, baslangic, sure in araliklar:
+        gecersiz_kil(doktor_id, baslangic, sure)
+
+
+def _araliklar(instance):
+    araliklar = {(instance.doktor_id, instance.randevu_tarihi, instance.randevu_suresi)}
+    eski = getattr(instance, '_musaitlik_durumu', None)
+    if eski:
+        araliklar.add(eski)
+    return araliklar
+
+
+def _planla(instance):
+    araliklar = _araliklar(instance)
+    # Hemen sil; işlem sürerken başka bir istek eski veriyi cache'e yazmış olabileceği için commit sonrası tekrar sil
+    _gecersiz_kil(araliklar)
+    transaction.on_commit(lambda: _gecersiz_kil(araliklar))
+
+
+@receiver(post_save, sender=Appointment)
+def randevu_kaydedildi(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _planla(instance)
+    instance._musaitlik_durumu = (instance.doktor_id, instance.randevu_tarihi, instance.randevu_suresi)
+
+
+@receiver(post_delete, sender=Appointment)
+def randevu_silindi(sender, instance, **kwargs):
+    _planla(instance)
@@ -0,0 +1,22 @@
+# appointments/tasks.py
+
+from sms_service.jobs import shared_task
+import logging
+
+from . import transitions
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def complete_past_appointments():
+    """
+    Bitmiş onaylı randevuları Tamamlandi yap - run_jobs zamanlamasıyla 15 dakikada bir çalışır (jobs.DEFAULT_SCHEDULE)
+    """
+    try:
+        completed = transitions.complete_past_appointments()
+        return {'success': True, 'completed': completed}
+    except Exception as e:
+        error_msg = f"Randevu tamamlama hatası: {str(e)}"
+        logger.error(error_msg)
+        return {'success': False, 'error': error_msg}
@@ -1,3 +1,64 @@
+from datetime import timedelta
+
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from appointments import availability
+from appointments.models import Appointment
+from doctors.models import Doctor
+from patients.models import Patient
+
+
+class RandevuTalebiTests(TestCase):
+    """Dolu slot cache'ten reddedilmeli; cache eskiyse kilit altındaki veritabanı kontrolü çift randevuyu önlemeli"""
+
+    def setUp(self):
+        self.doktor = Doctor.objects.create(
+            user=User.objects.create(username='talep-doktor', user_type='doktor'),
+            ad='Talep', soyad='Doktor', uzmanlik='Dahiliye',
+        )
+        self.hasta = Patient.objects.create(
+            user=User.objects.create(username='talep-hasta', user_type='hasta'),
+            ad='Talep', soyad='Hasta', telefon_no='05330000002',
+        )
+        self.tarih = (timezone.now() + timedelta(days=2)).replace(hour=10, minute=0, second=0, microsecond=0)
+        self.client.force_login(self.hasta.user)
+
+    def talep(self):
+        return self.client.post(
+            reverse('patient_appointments'),
+            {'doctor_id': self.doktor.doktor_id, 'appointment_date': self.tarih.isoformat(), 'duration': 30},
+            content_type='application/json',
+        )
+
+    def cache_anahtari(self):
+        gun = timezone.localtime(self.tarih).date()
+        return availability._CACHE_ANAHTARI.format(doktor_id=self.doktor.doktor_id, gun=gun.isoformat())
+
+    def test_dolu_slot_cacheten_reddedilir(self):
+        self.assertEqual(self.talep().status_code, 201)
+        availability.dolu_araliklar(self.doktor.doktor_id, timezone.localtime(self.tarih).date())
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.talep()
+        sorgular = [q['sql'] for q in ctx.captured_queries]
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse([sql for sql in sorgular if Appointment._meta.db_table in sql])
+        self.assertEqual(Appointment.objects.filter(doktor=self.doktor).count(), 1)
+
+    def test_eski_cache_cift_randevuya_yol_acmaz(self):
+        self.assertEqual(self.talep().status_code, 201)
+        # Commit ile cache silinmesi arasında yazılmış eski kayıt
+        cache.set(self.cache_anahtari(), [], availability.CACHE_SURESI)
+
+        response = self.talep()
 
-# Create your tests here.
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Appointment.objects.filter(doktor=self.doktor).count(), 1)
+        # Kilit altındaki okuma cache'i tazeler
+        self.assertEqual(len(cache.get(self.cache_anahtari())), 1)
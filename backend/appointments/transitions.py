@@ -0,0 +1,189 @@
+# appointments/transitions.py
+"""
+Toplu randevu durum geçişleri
+
+- Onay/red/iptal tek bir koşullu UPDATE ile yapılır (WHERE durum IN (...)); aynı anda başka bir istekle
+  durumu değişmiş randevular atlanır
+- Güncellenen satırlar, UPDATE'in yazdığı guncelleme_tarihi damgasıyla geri okunur; sadece gerçekten
+  geçiş yapan randevular için bildirim ve SMS kaydı toplu olarak oluşturulur
+- Geçmiş onaylı randevular zamanlanmış görevle parça parça Tamamlandi yapılır
+"""
+
+import logging
+from datetime import timedelta
+
+from django.db import transaction
+from django.utils import timezone
+
+from akilli_ilac_backend.aciliyet import ONEM_NORMAL, not_onemi
+
+from .availability import AKTIF_DURUMLAR, gecersiz_kil
+from .models import Appointment
+from .signals import randevular_toplu_guncellendi
+
+logger = logging.getLogger(__name__)
+
+# Tek istekte işlenebilecek en fazla randevu
+MAX_BULK_APPOINTMENTS = 500
+
+TRANSITIONS = {
+    'approve': {
+        'from': ('Beklemede',),
+        'to': 'Onaylandi',
+        'bildirim_tipi': 'randevu_onay',
+        'baslik': 'Randevunuz Onaylandı',
+        'mesaj': '{tarih} tarihli randevunuz onaylanmıştır.',
+        'sms': 'Sayın {hasta}, {tarih} tarihli randevunuz {doktor} tarafından onaylanmıştır.',
+        'sms_tipi': 'RandevuOnay',
+    },
+    'reject': {
+        'from': ('Beklemede',),
+        'to': 'Reddedildi',
+        'bildirim_tipi': 'randevu_red',
+        'baslik': 'Randevu Talebi Reddedildi',
+        'mesaj': '{tarih} tarihli randevu talebiniz reddedilmiştir. Lütfen farklı bir tarih seçiniz.',
+        'sms': 'Sayın {hasta}, {tarih} tarihli randevu talebiniz reddedilmiştir.',
+        'sms_tipi': 'RandevuRed',
+    },
+    'cancel': {
+        'from': ('Beklemede', 'Onaylandi'),
+        'to': 'Iptal',
+        'bildirim_tipi': 'randevu_iptal',
+        'baslik': 'Randevunuz İptal Edildi',
+        'mesaj': '{tarih} tarihli randevunuz doktorunuz tarafından iptal edilmiştir.',
+        'sms': 'Sayın {hasta}, {tarih} tarihli randevunuz {doktor} tarafından iptal edilmiştir.',
+        'sms_tipi': 'RandevuIptal',
+    },
+}
+
+
+def _invalidate_availability(rows):
+    """update() sinyal tetiklemediği için müsaitlik cache'i burada silinir (hemen ve commit sonrası)"""
+    araliklar = [(row.doktor_id, row.randevu_tarihi, row.randevu_suresi) for row in rows]
+
+    def sil():
+        for doktor_id, baslangic, sure in araliklar:
+            gecersiz_kil(doktor_id, baslangic, sure)
+
+    sil()
+    transaction.on_commit(sil)
+
+
+def bulk_transition(doctor, user, appointment_ids, action, doctor_notes=None, notify=True):
+    """
+    Doktorun randevularına toplu durum geçişi uygula.
+    Geçiş yapan randevuları döndürür; durumu uygun olmayanlar ya da başka doktora ait olanlar atlanır.
+    """
+    from notifications.models import Bildirim
+    from sms_service.models import SMSLog
+
+    transition = TRANSITIONS[action]
+    stamp = timezone.now()
+    values = {
+        'durum': transition['to'],
+        'onaylayan_kullanici': user,
+        'guncelleme_tarihi': stamp,
+    }
+    if doctor_notes:
+        # update() save() çalıştırmadığı için not aciliyeti burada sınıflandırılır
+        onem = not_onemi(doctor_notes)
+        values['doktor_notlari'] = doctor_notes
+        values['doktor_notu_onem'] = onem
+        values['doktor_notu_acil'] = onem > ONEM_NORMAL
+
+    with transaction.atomic():
+        updated = Appointment.objects.filter(
+            doktor=doctor,
+            randevu_id__in=appointment_ids,
+            durum__in=transition['from'],
+        ).update(**values)
+        if not updated:
+            return []
+
+        changed = list(
+            Appointment.objects.filter(
+                doktor=doctor,
+                randevu_id__in=appointment_ids,
+                durum=transition['to'],
+                guncelleme_tarihi=stamp,
+            ).select_related('hasta__user')
+        )
+
+        if transition['to'] not in AKTIF_DURUMLAR:
+            _invalidate_availability(changed)
+            randevular_toplu_guncellendi.send(
+                sender=Appointment, hasta_ids={appointment.hasta_id for appointment in changed}
+            )
+
+        if notify and changed:
+            bildirimler, sms_logs = [], []
+            for appointment in changed:
+                patient = appointment.hasta
+                params = {
+                    'tarih': timezone.localtime(appointment.randevu_tarihi).strftime('%d.%m.%Y %H:%M'),
+                    'hasta': patient.full_name,
+                    'doktor': doctor.full_name,
+                }
+                bildirimler.append(Bildirim(
+                    gonderen=user,
+                    gonderen_tip='doktor',
+                    alici=patient.user,
+                    alici_tip='hasta',
+                    bildirim_tipi=transition['bildirim_tipi'],
+                    baslik=transition['baslik'],
+                    mesaj=transition['mesaj'].format(**params),
+                    randevu=appointment,
+                ))
+                if patient.telefon_no:
+                    sms_logs.append(SMSLog(
+                        recipient_phone=patient.telefon_no,
+                        recipient_user=patient.user,
+                        message=transition['sms'].format(**params),
+                        message_type=transition['sms_tipi'],
+                        status='Pending',
+                    ))
+            Bildirim.bulk_olustur(bildirimler)
+            SMSLog.bulk_create_logs(sms_logs)
+
+    logger.info('Dr. %s: %s randevu için %s uygulandı', doctor.doktor_id, len(changed), action)
+    return changed
+
+
+def complete_past_appointments(chunk_size=500, now=None):
+    """Bitiş zamanı geçmiş onaylı randevuları parça parça Tamamlandi yap, güncellenen sayıyı döndür"""
+    now = now or timezone.now()
+    total = 0
+    last_id = 0
+    while True:
+        rows = list(
+            Appointment.objects.filter(
+                randevu_id__gt=last_id,
+                durum='Onaylandi',
+                randevu_tarihi__lt=now,
+            ).order_by('randevu_id').values_list('randevu_id', 'randevu_tarihi', 'randevu_suresi')[:chunk_size]
+        )
+        if not rows:
+            break
+
+        # Devam eden randevular takvimi doldurmaya devam etsin diye sadece bitmiş olanlar; kalanları sonraki çalışma alır
+        ids = [
+            randevu_id for randevu_id, baslangic, sure in rows
+            if baslangic + timedelta(minutes=sure) <= now
+        ]
+        if ids:
+            # Bu arada iptal edilen/değişen randevular koşul sayesinde atlanır
+            total += Appointment.objects.filter(randevu_id__in=ids, durum='Onaylandi').update(
+                durum='Tamamlandi',
+                guncelleme_tarihi=timezone.now(),
+            )
+            randevular_toplu_guncellendi.send(
+                sender=Appointment,
+                hasta_ids=set(
+                    Appointment.objects.filter(randevu_id__in=ids).values_list('hasta_id', flat=True)
+                ),
+            )
+        last_id = rows[-1][0]
+
+    if total:
+        logger.info('%s geçmiş randevu tamamlandı olarak işaretlendi', total)
+    return total
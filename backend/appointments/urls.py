@@ -1,5 +1,7 @@
 from django.urls import path
 
+from . import views
+
 urlpatterns = [
-    # Şimdilik boş, sonra API endpoint'leri ekleyeceğiz
-]
\ No newline at end of file
+    path('doctors/<str:doctor_id>/free-slots/', views.DoctorFreeSlotsView.as_view(), name='doctor-free-slots'),
+]
@@ -1,3 +1,49 @@
-from django.shortcuts import render
+from datetime import date, timedelta
 
-# Create your views here.
+from django.shortcuts import get_object_or_404
+from django.utils import timezone
+from rest_framework import status
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from doctors.models import Doctor
+from . import availability
+
+
+class DoctorFreeSlotsView(APIView):
+    """Doktorun tarih aralığındaki boş randevu slotları"""
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request, doctor_id):
+        doctor = get_object_or_404(Doctor, doktor_id=doctor_id)
+
+        try:
+            today = timezone.localdate()
+            start = date.fromisoformat(request.GET['start']) if request.GET.get('start') else today
+            end = date.fromisoformat(request.GET['end']) if request.GET.get('end') else start + timedelta(days=6)
+            duration = int(request.GET.get('duration', 30))
+            step = int(request.GET['step']) if request.GET.get('step') else None
+        except ValueError as e:
+            return Response({
+                'error': f'Geçersiz parametre: {str(e)}'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        if end < start:
+            return Response({
+                'error': 'Bitiş tarihi başlangıç tarihinden önce olamaz'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if (end - start).days >= availability.MAKS_GUN_ARALIGI:
+            return Response({
+                'error': f'En fazla {availability.MAKS_GUN_ARALIGI} günlük aralık sorgulanabilir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if not 1 <= duration <= 240 or (step is not None and not 5 <= step <= 240):
+            return Response({
+                'error': 'Süre 1-240, adım 5-240 dakika arasında olmalıdır'
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'doctor_id': doctor.doktor_id,
+            'duration': duration,
+            'slots': availability.bos_slotlar(doctor, max(start, today), end, sure=duration, adim=step),
+        })
@@ -82,11 +82,11 @@ class CaregiverNoteAdmin(admin.ModelAdmin):
         'patient__ad', 'patient__soyad', 'note'
     ]
     date_hierarchy = 'created_date'
-    readonly_fields = ['created_date']
+    readonly_fields = ['is_urgent', 'severity', 'created_date']
     
     fieldsets = (
         ('Not Bilgileri', {
-            'fields': ('caregiver', 'patient', 'note_type', 'is_urgent')
+            'fields': ('caregiver', 'patient', 'note_type', 'marked_urgent', 'is_urgent', 'severity')
         }),
         ('Not İçeriği', {
             'fields': ('note',)
@@ -0,0 +1,177 @@
+# caregivers/dashboard.py
+"""
+Bakıcı dashboard özetleri (CaregiverDashboardSnapshot)
+
+- Özet belirli bir gün (gun) için tutulur: aktif hasta, o günkü aktif randevu ve o gün kullanılan ilaç sayısı
+- Randevu/ilaç değişikliğinde sadece farkı, hastanın aktif bakıcılarının bugünkü özetlerine tek UPDATE ile yansıtılır
+- Atama değişikliklerinde ve toplu güncellemelerde ilgili bakıcıların özeti baştan hesaplanır
+- Gün değişince özetler gece görevinde (tasks.py) baştan oluşturulur; okunurken günü eski olan özet de yenilenir
+"""
+
+import logging
+
+from django.db.models import Count, F, OuterRef, Q, Subquery
+from django.utils import timezone
+
+from appointments.availability import AKTIF_DURUMLAR
+from appointments.models import Appointment
+from medications.models import Ilac
+from notifications.models import BildirimSayaci
+
+from .models import Caregiver, CaregiverDashboardSnapshot, CaregiverPatientAssignment
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_FIELDS = ('toplam_hasta', 'bugunku_randevu', 'kritik_ilac')
+
+
+def randevu_katkisi(durum, gun):
+    """Randevu (hasta_id, randevu_tarihi, durum) verilen günün randevu sayısına katkısı"""
+    hasta_id, randevu_tarihi, randevu_durumu = durum
+    if not hasta_id or randevu_tarihi is None:
+        return 0
+    return int(randevu_durumu in AKTIF_DURUMLAR and timezone.localtime(randevu_tarihi).date() == gun)
+
+
+def ilac_katkisi(durum, gun):
+    """İlaç (hasta_id, aktif, baslangic_tarihi, bitis_tarihi) verilen günün kritik ilaç sayısına katkısı"""
+    hasta_id, aktif, baslangic, bitis = durum
+    if not hasta_id or baslangic is None:
+        return 0
+    return int(bool(aktif) and baslangic <= gun and (bitis is None or bitis >= gun))
+
+
+def hesapla(caregiver_ids=None, gun=None):
+    """Özet değerlerini tablolardan baştan hesapla: {caregiver_id: (toplam_hasta, bugunku_randevu, kritik_ilac)}"""
+    gun = gun or timezone.localdate()
+
+    caregivers = Caregiver.objects.all()
+    assignments = CaregiverPatientAssignment.objects.filter(is_active=True)
+    if caregiver_ids is not None:
+        caregivers = caregivers.filter(id__in=caregiver_ids)
+        assignments = assignments.filter(caregiver_id__in=caregiver_ids)
+
+    hastalar = {caregiver_id: [] for caregiver_id in caregivers.values_list('id', flat=True)}
+    for caregiver_id, patient_id in assignments.values_list('caregiver_id', 'patient_id'):
+        hastalar.setdefault(caregiver_id, []).append(patient_id)
+
+    randevular = Appointment.objects.filter(randevu_tarihi__date=gun, durum__in=AKTIF_DURUMLAR)
+    ilaclar = Ilac.objects.filter(aktif=True, baslangic_tarihi__lte=gun).filter(
+        Q(bitis_tarihi__isnull=True) | Q(bitis_tarihi__gte=gun)
+    )
+    if caregiver_ids is not None:
+        patient_ids = {patient_id for ids in hastalar.values() for patient_id in ids}
+        randevular = randevular.filter(hasta_id__in=patient_ids)
+        ilaclar = ilaclar.filter(hasta_id__in=patient_ids)
+
+    randevu_sayilari = dict(
+        randevular.values('hasta_id').annotate(n=Count('pk')).order_by().values_list('hasta_id', 'n')
+    )
+    ilac_sayilari = dict(
+        ilaclar.values('hasta_id').annotate(n=Count('pk')).order_by().values_list('hasta_id', 'n')
+    )
+
+    return {
+        caregiver_id: (
+            len(patient_ids),
+            sum(randevu_sayilari.get(patient_id, 0) for patient_id in patient_ids),
+            sum(ilac_sayilari.get(patient_id, 0) for patient_id in patient_ids),
+        )
+        for caregiver_id, patient_ids in hastalar.items()
+    }
+
+
+def yeniden_olustur(caregiver_ids=None, gun=None, batch_size=500):
+    """Özetleri baştan hesaplayıp yaz (upsert), yazılan özet sayısını döndür"""
+    gun = gun or timezone.localdate()
+    now = timezone.now()
+    degerler = hesapla(caregiver_ids, gun)
+    snapshots = [
+        CaregiverDashboardSnapshot(
+            caregiver_id=caregiver_id,
+            gun=gun,
+            toplam_hasta=toplam_hasta,
+            bugunku_randevu=bugunku_randevu,
+            kritik_ilac=kritik_ilac,
+            guncellenme_tarihi=now,
+        )
+        for caregiver_id, (toplam_hasta, bugunku_randevu, kritik_ilac) in degerler.items()
+    ]
+    CaregiverDashboardSnapshot.objects.bulk_create(
+        snapshots,
+        batch_size=batch_size,
+        update_conflicts=True,
+        unique_fields=['caregiver'],
+        update_fields=['gun', *SNAPSHOT_FIELDS, 'guncellenme_tarihi'],
+    )
+    return len(snapshots)
+
+
+def hastalar_icin_yenile(hasta_ids):
+    """Hastaların aktif bakıcılarının özetlerini baştan hesapla (toplu güncellemelerden sonra)"""
+    caregiver_ids = set(
+        CaregiverPatientAssignment.objects.filter(patient_id__in=hasta_ids, is_active=True)
+        .values_list('caregiver_id', flat=True)
+    )
+    if caregiver_ids:
+        yeniden_olustur(caregiver_ids)
+
+
+def fark_uygula(hasta_id, bugunku_randevu=0, kritik_ilac=0):
+    """Hastanın aktif bakıcılarının bugünkü özetlerine farkı tek UPDATE ile uygula"""
+    if not hasta_id or not (bugunku_randevu or kritik_ilac):
+        return
+    CaregiverDashboardSnapshot.objects.filter(
+        gun=timezone.localdate(),
+        caregiver_id__in=CaregiverPatientAssignment.objects.filter(
+            patient_id=hasta_id, is_active=True
+        ).values('caregiver_id'),
+    ).update(
+        bugunku_randevu=F('bugunku_randevu') + bugunku_randevu,
+        kritik_ilac=F('kritik_ilac') + kritik_ilac,
+        guncellenme_tarihi=timezone.now(),
+    )
+
+
+def _oku(user):
+    return (
+        CaregiverDashboardSnapshot.objects.filter(caregiver__user=user)
+        .annotate(
+            acil_okunmamis=Subquery(
+                BildirimSayaci.objects.filter(user_id=OuterRef('caregiver__user_id')).values('acil_okunmamis')[:1]
+            )
+        )
+        .first()
+    )
+
+
+def dashboard_getir(user):
+    """Kullanıcının (bakıcı) dashboard özeti ve acil bildirim sayısı; tek sorgu, gün eskiyse yenilenir"""
+    snapshot = _oku(user)
+    if snapshot is not None and snapshot.gun == timezone.localdate() and snapshot.acil_okunmamis is not None:
+        return snapshot
+
+    # İlk açılış, gün değişimi ya da bildirim sayacı henüz oluşturulmamış
+    caregiver = Caregiver.objects.only('id').get(user=user)
+    yeniden_olustur([caregiver.id])
+    BildirimSayaci.getir(user.id)
+    return _oku(user)
+
+
+def tutarsizliklari_bul(gun=None):
+    """Özetleri tam hesaplamayla karşılaştır: [(caregiver_id, kayitli, gercek), ...]"""
+    gun = gun or timezone.localdate()
+    gercek = hesapla(gun=gun)
+    kayitli = {
+        snapshot.caregiver_id: snapshot
+        for snapshot in CaregiverDashboardSnapshot.objects.all()
+    }
+
+    farklar = []
+    for caregiver_id, degerler in gercek.items():
+        snapshot = kayitli.get(caregiver_id)
+        if snapshot is None:
+            farklar.append((caregiver_id, None, degerler))
+        elif snapshot.gun != gun or snapshot.as_tuple() != degerler:
+            farklar.append((caregiver_id, (snapshot.gun, *snapshot.as_tuple()), degerler))
+    return farklar
@@ -0,0 +1,72 @@
+# caregivers/management/commands/classify_note_urgency.py
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from akilli_ilac_backend.aciliyet import ONEM_NORMAL, not_onemi
+from appointments.models import Appointment
+from caregivers.models import CaregiverNote
+
+
+def _siniflandir_randevu(row):
+    onem = not_onemi(row.doktor_notlari)
+    return {'doktor_notu_onem': onem, 'doktor_notu_acil': onem > ONEM_NORMAL}
+
+
+def _siniflandir_bakici_notu(row):
+    onem = not_onemi(row.note)
+    # Bakıcının kendi işaretlediği acil notlar korunur (marked_urgent); önceki sınıflandırma korunmaz
+    return {'severity': onem, 'is_urgent': row.marked_urgent or onem > ONEM_NORMAL}
+
+
+# (model, okunacak alanlar, sınıflandırma fonksiyonu)
+HEDEFLER = {
+    'appointments': (Appointment, ('doktor_notlari', 'doktor_notu_onem', 'doktor_notu_acil'), _siniflandir_randevu),
+    'caregiver_notes': (CaregiverNote, ('note', 'marked_urgent', 'severity', 'is_urgent'), _siniflandir_bakici_notu),
+}
+
+
+class Command(BaseCommand):
+    help = 'Mevcut doktor ve bakıcı notlarının aciliyetini parça parça sınıflandırır (geriye dönük doldurma)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Tek seferde işlenecek kayıt sayısı')
+        parser.add_argument('--only', choices=sorted(HEDEFLER), help='Sadece verilen tabloyu işle')
+        parser.add_argument('--dry-run', action='store_true', help='Değişecek kayıtları say, yazma')
+
+    def handle(self, *args, **options):
+        hedefler = [options['only']] if options['only'] else sorted(HEDEFLER)
+        for ad in hedefler:
+            taranan, degisen = self._isle(*HEDEFLER[ad], options['chunk_size'], options['dry_run'])
+            self.stdout.write(self.style.SUCCESS(f'{ad}: {taranan} kayıt tarandı, {degisen} kayıt güncellendi'))
+
+    def _isle(self, model, okunan_alanlar, siniflandir, chunk_size, dry_run):
+        pk_adi = model._meta.pk.name
+        taranan = degisen = 0
+        son_pk = 0
+        while True:
+            # Birincil anahtara göre sıralı parçalar: OFFSET kullanılmaz, tablo büyüse de her parça indeksle okunur
+            parca = list(
+                model.objects.filter(**{f'{pk_adi}__gt': son_pk})
+                .order_by(pk_adi)
+                .only(pk_adi, *okunan_alanlar)[:chunk_size]
+            )
+            if not parca:
+                break
+
+            guncellenecek, alanlar = [], set()
+            for row in parca:
+                yeni = siniflandir(row)
+                alanlar.update(yeni)
+                if any(getattr(row, alan) != deger for alan, deger in yeni.items()):
+                    for alan, deger in yeni.items():
+                        setattr(row, alan, deger)
+                    guncellenecek.append(row)
+
+            if guncellenecek and not dry_run:
+                with transaction.atomic():
+                    model.objects.bulk_update(guncellenecek, alanlar)
+
+            taranan += len(parca)
+            degisen += len(guncellenecek)
+            son_pk = getattr(parca[-1], pk_adi)
+        return taranan, degisen
@@ -0,0 +1,30 @@
+# Generated by Django 4.2.7 on 2025-08-17 11:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caregivers', '0003_caregivernote_caregiverpatientassignment_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CaregiverDashboardSnapshot',
+            fields=[
+                ('caregiver', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='dashboard_snapshot', serialize=False, to='caregivers.caregiver', verbose_name='Bakıcı')),
+                ('gun', models.DateField(verbose_name='Özet Günü')),
+                ('toplam_hasta', models.PositiveIntegerField(default=0, verbose_name='Aktif Hasta Sayısı')),
+                ('bugunku_randevu', models.IntegerField(default=0, verbose_name='Bugünkü Randevu Sayısı')),
+                ('kritik_ilac', models.IntegerField(default=0, verbose_name='Kritik İlaç Sayısı')),
+                ('guncellenme_tarihi', models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Bakıcı Dashboard Özeti',
+                'verbose_name_plural': 'Bakıcı Dashboard Özetleri',
+                'db_table': 'caregiver_dashboard_snapshots',
+            },
+        ),
+    ]
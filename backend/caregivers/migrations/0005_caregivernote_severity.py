@@ -0,0 +1,23 @@
+# Generated by Django 4.2.7 on 2025-08-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caregivers', '0004_caregiverdashboardsnapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='caregivernote',
+            name='severity',
+            field=models.PositiveSmallIntegerField(choices=[(0, 'Normal'), (1, 'Dikkat'), (2, 'Acil')], default=0, verbose_name='Önem Seviyesi'),
+        ),
+        migrations.AlterField(
+            model_name='caregivernote',
+            name='is_urgent',
+            field=models.BooleanField(db_index=True, default=False, verbose_name='Acil'),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 4.2.7 on 2026-10-19 18:37
+
+from django.db import migrations, models
+
+# akilli_ilac_backend/aciliyet.py ONEM_NORMAL
+ONEM_NORMAL = 0
+
+
+def backfill_marked_urgent(apps, schema_editor):
+    """
+    Sınıflandırmayla açıklanamayan acil işaretleri bakıcıya ait sayılır. Metni de acil sınıflanan notlarda
+    işaretin kaynağı bilinmez; bunlar sınıflandırıcıya bırakılır, metin acil kaldıkça not acil kalır.
+    """
+    CaregiverNote = apps.get_model('caregivers', 'CaregiverNote')
+    CaregiverNote.objects.filter(is_urgent=True, severity=ONEM_NORMAL).update(marked_urgent=True)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('caregivers', '0005_caregivernote_severity'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='caregivernote',
+            name='marked_urgent',
+            field=models.BooleanField(default=False, verbose_name='Bakıcı Acil İşaretledi'),
+        ),
+        migrations.RunPython(backfill_marked_urgent, migrations.RunPython.noop),
+    ]
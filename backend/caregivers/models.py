@@ -4,6 +4,7 @@ from django.db import models
 from django.conf import settings  # User yerine settings kullan
 from django.utils import timezone
 from patients.models import Patient
+from akilli_ilac_backend.aciliyet import ONEM_CHOICES, ONEM_NORMAL, not_onemi
 
 class Caregiver(models.Model):
     """
@@ -245,6 +246,13 @@ class CaregiverPatientAssignment(models.Model):
         verbose_name="İletişim Sıklığı"
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Atama başka bakıcıya/hastaya taşınırsa eski bakıcının panosu da yenilenebilsin diye
+        instance._onceki_bakici_id = instance.__dict__.get('caregiver_id')
+        return instance
+
     class Meta:
         verbose_name = "Bakıcı-Hasta Ataması"
         verbose_name_plural = "Bakıcı-Hasta Atamaları"
@@ -294,11 +302,26 @@ class CaregiverNote(models.Model):
         verbose_name="Not Tipi"
     )
     
+    # Bakıcının kendi acil işareti; sınıflandırıcı bu alana yazmaz
+    marked_urgent = models.BooleanField(
+        default=False,
+        verbose_name="Bakıcı Acil İşaretledi"
+    )
+    
+    # Her kayıtta yeniden hesaplanır: bakıcının işareti ya da metnin sınıflandırması
     is_urgent = models.BooleanField(
         default=False,
+        db_index=True,
         verbose_name="Acil"
     )
     
+    # Not metninin aciliyeti - kaydederken sınıflandırılır
+    severity = models.PositiveSmallIntegerField(
+        choices=ONEM_CHOICES,
+        default=ONEM_NORMAL,
+        verbose_name="Önem Seviyesi"
+    )
+    
     created_date = models.DateTimeField(
         auto_now_add=True,
         verbose_name="Oluşturulma Tarihi"
@@ -310,5 +333,66 @@ class CaregiverNote(models.Model):
         db_table = 'caregiver_notes'
         ordering = ['-created_date']
     
+    def save(self, *args, **kwargs):
+        self.severity = not_onemi(self.note)
+        # Metin düzeltilip acil olmaktan çıkınca sınıflandırıcının koyduğu işaret kalkar, bakıcınınki kalır
+        self.is_urgent = bool(self.marked_urgent) or self.severity > ONEM_NORMAL
+        
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'note', 'marked_urgent'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'severity', 'is_urgent'}
+        super().save(*args, **kwargs)
+    
+    def __str__(self):
+        return f"{self.caregiver.full_name} - {self.patient.full_name} ({self.created_date.strftime('%d.%m.%Y')})"
+
+
+class CaregiverDashboardSnapshot(models.Model):
+    """
+    Bakıcı dashboard özeti - dashboard her açılışta yeniden hesaplanmak yerine buradan tek satır olarak okunur.
+    Randevu, ilaç ve atama sinyalleriyle artımlı güncellenir, gece gün değişimi için baştan oluşturulur
+    (bkz. dashboard.py). Acil bildirim sayısı BildirimSayaci'ndan aynı sorguda okunur.
+    """
+
+    caregiver = models.OneToOneField(
+        Caregiver,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='dashboard_snapshot',
+        verbose_name="Bakıcı"
+    )
+
+    gun = models.DateField(
+        verbose_name="Özet Günü"
+    )
+
+    toplam_hasta = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Aktif Hasta Sayısı"
+    )
+
+    bugunku_randevu = models.IntegerField(
+        default=0,
+        verbose_name="Bugünkü Randevu Sayısı"
+    )
+
+    kritik_ilac = models.IntegerField(
+        default=0,
+        verbose_name="Kritik İlaç Sayısı"
+    )
+
+    guncellenme_tarihi = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Güncellenme Tarihi"
+    )
+
+    class Meta:
+        verbose_name = "Bakıcı Dashboard Özeti"
+        verbose_name_plural = "Bakıcı Dashboard Özetleri"
+        db_table = 'caregiver_dashboard_snapshots'
+
     def __str__(self):
-        return f"{self.caregiver.full_name} - {self.patient.full_name} ({self.created_date.strftime('%d.%m.%Y')})"
\ No newline at end of file
+        return f"{self.caregiver_id} - {self.gun}"
+
+    def as_tuple(self):
+        return (self.toplam_hasta, self.bugunku_randevu, self.kritik_ilac)
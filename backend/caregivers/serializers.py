@@ -108,6 +108,6 @@ class CaregiverNoteSerializer(serializers.ModelSerializer):
         model = CaregiverNote
         fields = [
             'id', 'caregiver', 'patient', 'caregiver_name', 'patient_name',
-            'note', 'note_type', 'is_urgent', 'created_date'
+            'note', 'note_type', 'marked_urgent', 'is_urgent', 'created_date'
         ]
-        read_only_fields = ['id', 'created_date']
\ No newline at end of file
+        read_only_fields = ['id', 'is_urgent', 'created_date']
\ No newline at end of file
@@ -0,0 +1,86 @@
+# caregivers/signals.py
+"""
+Randevu, ilaç ve atama değişikliklerini bakıcı dashboard özetlerine yansıt
+"""
+
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from appointments.models import Appointment
+from appointments.signals import randevular_toplu_guncellendi
+from medications.models import Ilac
+from medications.signals import ilaclar_toplu_olusturuldu
+
+from . import dashboard
+from .models import CaregiverPatientAssignment
+
+
+def _randevu_durumu(instance):
+    return (instance.hasta_id, instance.randevu_tarihi, instance.durum)
+
+
+def _ilac_durumu(instance):
+    return (instance.hasta_id, instance.aktif, instance.baslangic_tarihi, instance.bitis_tarihi)
+
+
+def _uygula(created, onceki, yeni, katki, alan):
+    """Önceki ve yeni durumun bugünkü katkı farkını ilgili hastaların bakıcılarına uygula"""
+    gun = timezone.localdate()
+    if created:
+        dashboard.fark_uygula(yeni[0], **{alan: katki(yeni, gun)})
+    elif onceki is None or None in onceki[:3]:
+        # Önceki durum bilinmiyor (veritabanından yüklenmemiş ya da alanları ertelenmiş nesne)
+        dashboard.hastalar_icin_yenile([yeni[0]])
+    elif onceki[0] == yeni[0]:
+        dashboard.fark_uygula(yeni[0], **{alan: katki(yeni, gun) - katki(onceki, gun)})
+    else:
+        dashboard.fark_uygula(onceki[0], **{alan: -katki(onceki, gun)})
+        dashboard.fark_uygula(yeni[0], **{alan: katki(yeni, gun)})
+
+
+@receiver(post_save, sender=Appointment)
+def randevu_kaydedildi(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    yeni = _randevu_durumu(instance)
+    _uygula(created, getattr(instance, '_pano_durumu', None), yeni, dashboard.randevu_katkisi, 'bugunku_randevu')
+    instance._pano_durumu = yeni
+
+
+@receiver(post_delete, sender=Appointment)
+def randevu_silindi(sender, instance, **kwargs):
+    onceki = getattr(instance, '_pano_durumu', None) or _randevu_durumu(instance)
+    dashboard.fark_uygula(onceki[0], bugunku_randevu=-dashboard.randevu_katkisi(onceki, timezone.localdate()))
+
+
+@receiver(post_save, sender=Ilac)
+def ilac_kaydedildi(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    yeni = _ilac_durumu(instance)
+    _uygula(created, getattr(instance, '_pano_durumu', None), yeni, dashboard.ilac_katkisi, 'kritik_ilac')
+    instance._pano_durumu = yeni
+
+
+@receiver(post_delete, sender=Ilac)
+def ilac_silindi(sender, instance, **kwargs):
+    onceki = getattr(instance, '_pano_durumu', None) or _ilac_durumu(instance)
+    dashboard.fark_uygula(onceki[0], kritik_ilac=-dashboard.ilac_katkisi(onceki, timezone.localdate()))
+
+
+@receiver(post_save, sender=CaregiverPatientAssignment)
+@receiver(post_delete, sender=CaregiverPatientAssignment)
+def atama_degisti(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    caregiver_ids = {instance.caregiver_id, getattr(instance, '_onceki_bakici_id', None)} - {None}
+    dashboard.yeniden_olustur(caregiver_ids)
+    instance._onceki_bakici_id = instance.caregiver_id
+
+
+@receiver(randevular_toplu_guncellendi)
+@receiver(ilaclar_toplu_olusturuldu)
+def toplu_guncelleme(sender, hasta_ids, **kwargs):
+    """update()/bulk_create sinyal tetiklemediği için ilgili bakıcıların özeti baştan hesaplanır"""
+    dashboard.hastalar_icin_yenile(hasta_ids)
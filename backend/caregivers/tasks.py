@@ -0,0 +1,22 @@
+# caregivers/tasks.py
+
+from sms_service.jobs import shared_task
+import logging
+
+from . import dashboard
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def rebuild_dashboard_snapshots():
+    """
+    Gün değişiminde tüm bakıcı dashboard özetlerini yeniden oluştur - run_jobs zamanlamasıyla her gece çalışır (jobs.DEFAULT_SCHEDULE)
+    """
+    try:
+        count = dashboard.yeniden_olustur()
+        return {'success': True, 'rebuilt': count}
+    except Exception as e:
+        error_msg = f"Dashboard özeti oluşturma hatası: {str(e)}"
+        logger.error(error_msg)
+        return {'success': False, 'error': error_msg}
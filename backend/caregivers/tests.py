@@ -1,3 +1,86 @@
+from datetime import datetime, time, timedelta
+
 from django.test import TestCase
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.models import Appointment
+from caregivers import dashboard
+from caregivers.models import Caregiver, CaregiverDashboardSnapshot, CaregiverPatientAssignment
+from doctors.models import Doctor
+from medications.models import Ilac
+from patients.models import Patient
+
+
+def hasta(no):
+    user = User.objects.create(username=f'pano-hasta-{no}', user_type='hasta')
+    return Patient.objects.create(user=user, ad='Pano', soyad=str(no), telefon_no=f'0532000000{no}')
+
+
+def gun_ortasi(gun):
+    return timezone.make_aware(datetime.combine(gun, time(12)))
+
+
+class CaregiverDashboardTests(TestCase):
+    """Özetler sinyallerle güncellendikten sonra tam hesaplamayla aynı olmalı"""
+
+    def setUp(self):
+        self.bugun = timezone.localdate()
+        doktor_user = User.objects.create(username='pano-doktor', user_type='doktor')
+        self.doktor = Doctor.objects.create(user=doktor_user, ad='Pano', soyad='Doktor', uzmanlik='Test')
+        self.bakici_user = User.objects.create(username='pano-bakici', user_type='bakici')
+        self.bakici = Caregiver.objects.create(
+            user=self.bakici_user, ad='Pano', soyad='Bakıcı', telefon_no='05320000099'
+        )
+        self.hasta1, self.hasta2, self.atanmamis = hasta(1), hasta(2), hasta(3)
+        CaregiverPatientAssignment.objects.create(caregiver=self.bakici, patient=self.hasta1)
+        self.atama = CaregiverPatientAssignment.objects.create(caregiver=self.bakici, patient=self.hasta2)
+
+    def randevu(self, patient, gun):
+        return Appointment.objects.create(hasta=patient, doktor=self.doktor, randevu_tarihi=gun_ortasi(gun))
+
+    def ilac(self, patient, baslangic):
+        return Ilac.objects.create(
+            hasta=patient, doktor=self.doktor, ilac_adi='Deneme', dozaj='1x1',
+            kullanim_sikligi='Günde 1', baslangic_tarihi=baslangic,
+        )
+
+    def assertOzetTutarli(self):
+        self.assertEqual(dashboard.tutarsizliklari_bul(), [])
+
+    def test_sinyaller_ozeti_gunceller(self):
+        randevu = self.randevu(self.hasta1, self.bugun)
+        self.randevu(self.hasta2, self.bugun + timedelta(days=1))
+        ilac = self.ilac(self.hasta2, self.bugun)
+        self.ilac(self.atanmamis, self.bugun)
+        self.assertOzetTutarli()
+        self.assertEqual(CaregiverDashboardSnapshot.objects.get(caregiver=self.bakici).as_tuple(), (2, 1, 1))
+
+        randevu.hasta = self.atanmamis
+        randevu.save()
+        self.assertOzetTutarli()
+
+        self.randevu(self.hasta2, self.bugun).delete()
+        ilac.aktif = False
+        ilac.save()
+        self.assertOzetTutarli()
+
+        self.atama.is_active = False
+        self.atama.save()
+        self.assertOzetTutarli()
+        self.assertEqual(CaregiverDashboardSnapshot.objects.get(caregiver=self.bakici).as_tuple(), (1, 0, 0))
+
+    def test_dashboard_tek_sorgu(self):
+        self.ilac(self.hasta1, self.bugun)
+        dashboard.dashboard_getir(self.bakici_user)
+        with self.assertNumQueries(1):
+            snapshot = dashboard.dashboard_getir(self.bakici_user)
+        self.assertEqual((snapshot.toplam_hasta, snapshot.kritik_ilac, snapshot.acil_okunmamis), (2, 1, 0))
 
-# Create your tests here.
+    def test_eski_gunun_ozeti_okunurken_yenilenir(self):
+        self.randevu(self.hasta1, self.bugun)
+        CaregiverDashboardSnapshot.objects.filter(caregiver=self.bakici).update(
+            gun=self.bugun - timedelta(days=1), bugunku_randevu=5
+        )
+        snapshot = dashboard.dashboard_getir(self.bakici_user)
+        self.assertEqual((snapshot.gun, snapshot.bugunku_randevu), (self.bugun, 1))
@@ -15,7 +15,17 @@ from patients.models import Patient
 from appointments.models import Appointment
 from medications.models import Ilac
 from notifications.models import Bildirim
+from sms_service.lanes import LANE_EMERGENCY
+from sms_service.outbound import enqueue_sms
+from akilli_ilac_backend.fieldsets import Fieldset
 from .serializers import CaregiverSerializer, CaregiverPatientAssignmentSerializer
+from . import dashboard
+
+
+def _urgent_only(request):
+    """?urgent=1 / true verilmişse sadece acil notlar listelenir"""
+    return request.GET.get('urgent', '').lower() in ('1', 'true', 'yes')
+
 
 class CaregiverDashboardView(APIView):
     permission_classes = [IsAuthenticated]
@@ -23,46 +33,14 @@ class CaregiverDashboardView(APIView):
     def get(self, request):
         """Bakıcı dashboard istatistikleri"""
         try:
-            caregiver = get_object_or_404(Caregiver, user=request.user)
-            
-            # Bakıcının hastalarını getir
-            assigned_patients = CaregiverPatientAssignment.objects.filter(
-                caregiver=caregiver,
-                is_active=True
-            ).values_list('patient_id', flat=True)
-            
-            # İstatistikleri hesapla
-            today = timezone.now().date()
-            
-            # Bugünkü randevular
-            today_appointments = Appointment.objects.filter(
-                hasta_id__in=assigned_patients,
-                randevu_tarihi__date=today,
-                durum__in=['Onaylandi', 'Beklemede']
-            ).count()
-            
-            # Kritik ilaçlar (bugün alınması gereken)
-            critical_medications = Ilac.objects.filter(
-                hasta_id__in=assigned_patients,
-                aktif=True,
-                baslangic_tarihi__lte=today
-            ).filter(
-                Q(bitis_tarihi__isnull=True) | Q(bitis_tarihi__gte=today)
-            ).count()
-            
-            # Acil bildirimler
-            urgent_notifications = Bildirim.objects.filter(
-                alici=request.user,
-                aktif=True,
-                okundu=False,
-                oncelik='acil'
-            ).count()
+            # Özet sinyallerle güncel tutulur, tek satır olarak okunur (bkz. dashboard.py)
+            snapshot = dashboard.dashboard_getir(request.user)
             
             stats = {
-                'totalPatients': len(assigned_patients),
-                'todayAppointments': today_appointments,
-                'criticalMedications': critical_medications,
-                'urgentNotifications': urgent_notifications
+                'totalPatients': snapshot.toplam_hasta,
+                'todayAppointments': snapshot.bugunku_randevu,
+                'criticalMedications': snapshot.kritik_ilac,
+                'urgentNotifications': snapshot.acil_okunmamis
             }
             
             return Response(stats)
@@ -159,8 +137,8 @@ class CaregiverPatientsView(APIView):
                         'doctor_specialty': note_appointment.doktor.uzmanlik,
                         'note': note_appointment.doktor_notlari,
                         'appointment_type': note_appointment.randevu_tipi,
-                        'is_urgent': any(word in note_appointment.doktor_notlari.lower() 
-                                       for word in ['acil', 'kritik', 'önemli', 'dikkat'])
+                        'is_urgent': note_appointment.doktor_notu_acil,
+                        'severity': note_appointment.doktor_notu_onem
                     })
                 
                 # ======= YENİ: Son ilaçları formatla =======
@@ -340,8 +318,8 @@ class PatientDetailView(APIView):
                     'note': note_appointment.doktor_notlari,
                     'appointment_type': note_appointment.randevu_tipi,
                     'patient_complaints': note_appointment.hasta_notlari,
-                    'is_urgent': any(word in note_appointment.doktor_notlari.lower() 
-                                   for word in ['acil', 'kritik', 'önemli', 'dikkat'])
+                    'is_urgent': note_appointment.doktor_notu_acil,
+                    'severity': note_appointment.doktor_notu_onem
                 })
             
             # ======= YENİ: İlaçları formatla =======
@@ -527,7 +505,10 @@ class PatientNotesView(APIView):
             notes = CaregiverNote.objects.filter(
                 caregiver=caregiver,
                 patient=assignment.patient
-            ).order_by('-created_date')
+            )
+            if _urgent_only(request):
+                notes = notes.filter(is_urgent=True)
+            notes = notes.order_by('-created_date')
             
             notes_list = []
             for note in notes:
@@ -536,6 +517,7 @@ class PatientNotesView(APIView):
                     'note': note.note,
                     'note_type': note.note_type,
                     'is_urgent': note.is_urgent,
+                    'severity': note.severity,
                     'created_date': note.created_date.strftime('%Y-%m-%d %H:%M')
                 }
                 notes_list.append(note_data)
@@ -565,7 +547,7 @@ class PatientNotesView(APIView):
                 patient=assignment.patient,
                 note=request.data.get('note'),
                 note_type=request.data.get('note_type', 'general'),
-                is_urgent=request.data.get('is_urgent', False)
+                marked_urgent=request.data.get('is_urgent', False)
             )
             
             return Response({
@@ -599,7 +581,7 @@ class EmergencyAlertView(APIView):
             alert_message = request.data.get('message', '')
             
             # Bildirim oluştur
-            Bildirim.objects.create(
+            bildirim = Bildirim.objects.create(
                 gonderen=request.user,
                 gonderen_tip='bakici',
                 alici=patient.user,
@@ -610,6 +592,16 @@ class EmergencyAlertView(APIView):
                 mesaj=f'Bakıcınız {caregiver.full_name} acil durum bildirimi gönderdi: {alert_message}'
             )
             
+            # SMS'ler acil şeritte gider, bekleyen toplu mesajların arkasında kalmaz
+            bildirim.send_sms_notification()
+            if patient.acil_durum_telefon:
+                enqueue_sms(
+                    phone_number=patient.acil_durum_telefon,
+                    message=f'{patient.full_name} için bakıcı {caregiver.full_name} acil durum bildirdi: {alert_message}',
+                    message_type='AcilDurum',
+                    lane=LANE_EMERGENCY
+                )
+            
             return Response({
                 'message': 'Acil durum bildirimi gönderildi'
             }, status=status.HTTP_201_CREATED)
@@ -650,7 +642,12 @@ class PatientDoctorNotesView(APIView):
                 doktor_notlari__isnull=False
             ).exclude(
                 doktor_notlari__exact=''
-            ).order_by('-randevu_tarihi')[:limit]
+            ).select_related('doktor')
+            
+            # Sadece acil notlar (?urgent=1) - aciliyet kayıt anında sınıflandırıldığı için SQL'de süzülür
+            if _urgent_only(request):
+                doctor_notes = doctor_notes.filter(doktor_notu_acil=True)
+            doctor_notes = doctor_notes.order_by('-randevu_tarihi')[:limit]
             
             notes_list = []
             for appointment in doctor_notes:
@@ -663,9 +660,8 @@ class PatientDoctorNotesView(APIView):
                     'doctor_note': appointment.doktor_notlari,
                     'patient_complaint': appointment.hasta_notlari,
                     'appointment_status': appointment.durum,
-                    'is_urgent': any(word in appointment.doktor_notlari.lower() 
-                                   for word in ['acil', 'kritik', 'önemli', 'dikkat'] 
-                                   if appointment.doktor_notlari),
+                    'is_urgent': appointment.doktor_notu_acil,
+                    'severity': appointment.doktor_notu_onem,
                     'created_date': appointment.olusturulma_tarihi.strftime('%Y-%m-%d %H:%M')
                 }
                 notes_list.append(note_data)
@@ -690,135 +686,161 @@ class PatientDoctorNotesView(APIView):
 from django.db.models import Q
 from datetime import datetime, timedelta
 
+# Bakıcının hasta listesi satırı (atama üzerinden): çıktı alanı -> (okunan sütunlar, değer); ?fields= ile seçilir.
+# İlaç / randevu / not alt sorgularıyla hesaplanan alanlar view içinde eklenir.
+CAREGIVER_PATIENT_FIELDS = {
+    'id': (('patient__id',), lambda assignment: assignment.patient.id),
+    'first_name': (('patient__ad',), lambda assignment: assignment.patient.ad),
+    'last_name': (('patient__soyad',), lambda assignment: assignment.patient.soyad),
+    'age': (('patient__dogum_tarihi',), lambda assignment: assignment.patient.age),
+    'gender': (('patient__cinsiyet',), lambda assignment: assignment.patient.gender_display),
+    'phone': (('patient__telefon_no',), lambda assignment: assignment.patient.telefon_no),
+    'address': (('patient__adres',), lambda assignment: assignment.patient.adres),
+    'blood_type': (('patient__blood_type',), lambda assignment: assignment.patient.blood_type),
+    'medical_conditions': (('patient__medical_conditions',), lambda assignment: assignment.patient.medical_conditions),
+    'allergies': (('patient__allergies',), lambda assignment: assignment.patient.allergies),
+    'emergency_contact_name': (('patient__acil_durum_kisi',), lambda assignment: assignment.patient.acil_durum_kisi),
+    'emergency_contact_phone': (('patient__acil_durum_telefon',), lambda assignment: assignment.patient.acil_durum_telefon),
+    'last_seen': (('last_contact_date',), lambda assignment: assignment.last_contact_date),
+    'assignment_date': (('assigned_date',), lambda assignment: assignment.assigned_date.strftime('%Y-%m-%d')),
+}
+
+
 class CaregiverPatientsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        """Bakıcının atanmış hastalarını listele - Doktor notları ile birlikte"""
+        """Bakıcının atanmış hastalarını listele - Doktor notları ile birlikte (?fields= ile sadece istenen alanlar)"""
         try:
             caregiver = get_object_or_404(Caregiver, user=request.user)
+            fields = Fieldset(request)
             
             # Aktif hasta atamalarını getir
             assignments = CaregiverPatientAssignment.objects.filter(
                 caregiver=caregiver,
                 is_active=True
-            ).select_related('patient', 'patient__user')
+            ).select_related('patient')
+            columns = fields.columns(CAREGIVER_PATIENT_FIELDS, always=('id', 'patient', 'patient__id'))
+            if columns is not None:
+                if fields.wants('critical_alerts', 'health_status'):
+                    columns.add('patient__medical_conditions')
+                assignments = assignments.only(*columns)
+            
+            # Kritik uyarı / sağlık durumu aktif ilaç ve randevu sayısından hesaplanır
+            needs_medications = fields.wants('active_medications', 'critical_alerts', 'health_status')
+            needs_appointments = fields.wants('upcoming_appointments', 'health_status')
             
             patient_list = []
             
             for assignment in assignments:
                 patient = assignment.patient
+                patient_data = fields.row(assignment, CAREGIVER_PATIENT_FIELDS)
                 
                 # Hastanın istatistiklerini hesapla
                 today = timezone.now().date()
+                thirty_days_ago = today - timedelta(days=30)
                 
                 # Aktif ilaç sayısı
-                active_medications = Ilac.objects.filter(
-                    hasta=patient,
-                    aktif=True,
-                    baslangic_tarihi__lte=today
-                ).filter(
-                    Q(bitis_tarihi__isnull=True) | Q(bitis_tarihi__gte=today)
-                ).count()
+                active_medications = 0
+                if needs_medications:
+                    active_medications = Ilac.objects.filter(
+                        hasta=patient,
+                        aktif=True,
+                        baslangic_tarihi__lte=today
+                    ).filter(
+                        Q(bitis_tarihi__isnull=True) | Q(bitis_tarihi__gte=today)
+                    ).count()
                 
                 # Yaklaşan randevu sayısı
-                upcoming_appointments = Appointment.objects.filter(
-                    hasta=patient,
-                    randevu_tarihi__date__gte=today,
-                    durum__in=['Onaylandi', 'Beklemede']
-                ).count()
-                
-                # Son randevu bilgisi
-                last_appointment = Appointment.objects.filter(
-                    hasta=patient
-                ).order_by('-randevu_tarihi').first()
-                
-                # Doktor notları - son 30 gün içindeki randevu notları
-                thirty_days_ago = today - timedelta(days=30)
-                doctor_notes = Appointment.objects.filter(
-                    hasta=patient,
-                    randevu_tarihi__date__gte=thirty_days_ago,
-                    doktor_notlari__isnull=False
-                ).exclude(doktor_notlari__exact='').order_by('-randevu_tarihi')[:5]
-                
-                # Hasta için yazılan son ilaçlar (son 30 gün)
-                recent_medications = Ilac.objects.filter(
-                    hasta=patient,
-                    olusturulma_tarihi__date__gte=thirty_days_ago
-                ).order_by('-olusturulma_tarihi')[:5]
-                
-                # Kritik uyarı sayısı (örnek hesaplama)
-                critical_alerts = 0
-                if active_medications > 5:
-                    critical_alerts += 1
-                if patient.medical_conditions and ('diyabet' in patient.medical_conditions.lower() or 'hipertansiyon' in patient.medical_conditions.lower()):
-                    critical_alerts += 1
-                
-                # Sağlık durumu (basit bir hesaplama)
-                health_status = 'good'  # Default
-                if active_medications > 5:
-                    health_status = 'fair'
-                if critical_alerts > 0:
-                    health_status = 'poor'
-                if active_medications == 0 and upcoming_appointments == 0:
-                    health_status = 'excellent'
-                
-                # Doktor notlarını düzenle
-                formatted_doctor_notes = []
-                for note_appointment in doctor_notes:
-                    formatted_doctor_notes.append({
-                        'date': note_appointment.randevu_tarihi.strftime('%Y-%m-%d'),
-                        'doctor_name': note_appointment.doktor.full_name,
-                        'note': note_appointment.doktor_notlari,
-                        'appointment_type': note_appointment.randevu_tipi
-                    })
-                
-                # Son ilaçları düzenle
-                formatted_medications = []
-                for medication in recent_medications:
-                    formatted_medications.append({
-                        'name': medication.ilac_adi,
-                        'dosage': medication.dozaj,
-                        'frequency': medication.kullanim_sikligi,
-                        'start_date': medication.baslangic_tarihi.strftime('%Y-%m-%d'),
-                        'end_date': medication.bitis_tarihi.strftime('%Y-%m-%d') if medication.bitis_tarihi else None,
-                        'doctor_name': medication.doktor.full_name,
-                        'instructions': medication.kullanim_talimatlari,
-                        'is_active': medication.aktif
-                    })
+                upcoming_appointments = 0
+                if needs_appointments:
+                    upcoming_appointments = Appointment.objects.filter(
+                        hasta=patient,
+                        randevu_tarihi__date__gte=today,
+                        durum__in=['Onaylandi', 'Beklemede']
+                    ).count()
                 
-                patient_data = {
-                    'id': patient.id,
-                    'first_name': patient.ad,
-                    'last_name': patient.soyad,
-                    'age': patient.age,
-                    'gender': patient.gender_display if hasattr(patient, 'gender_display') else (patient.cinsiyet or ''),
-                    'phone': patient.telefon_no,
-                    'address': patient.adres,
-                    'blood_type': patient.blood_type if hasattr(patient, 'blood_type') else None,
-                    'medical_conditions': patient.medical_conditions if hasattr(patient, 'medical_conditions') else None,
-                    'allergies': patient.allergies if hasattr(patient, 'allergies') else None,
-                    'emergency_contact_name': patient.acil_durum_kisi,
-                    'emergency_contact_phone': patient.acil_durum_telefon,
+                patient_data.update(fields.trim({
                     'active_medications': active_medications,
                     'upcoming_appointments': upcoming_appointments,
-                    'critical_alerts': critical_alerts,
-                    'health_status': health_status,
-                    'last_seen': assignment.last_contact_date,
-                    'assignment_date': assignment.assigned_date.strftime('%Y-%m-%d'),
+                }))
+                
+                if fields.wants('critical_alerts', 'health_status'):
+                    # Kritik uyarı sayısı (örnek hesaplama)
+                    critical_alerts = 0
+                    if active_medications > 5:
+                        critical_alerts += 1
+                    if patient.medical_conditions and ('diyabet' in patient.medical_conditions.lower() or 'hipertansiyon' in patient.medical_conditions.lower()):
+                        critical_alerts += 1
                     
-                    # YENİ: Doktor bilgileri
-                    'last_appointment': {
+                    # Sağlık durumu (basit bir hesaplama)
+                    health_status = 'good'  # Default
+                    if active_medications > 5:
+                        health_status = 'fair'
+                    if critical_alerts > 0:
+                        health_status = 'poor'
+                    if active_medications == 0 and upcoming_appointments == 0:
+                        health_status = 'excellent'
+                    
+                    patient_data.update(fields.trim({
+                        'critical_alerts': critical_alerts,
+                        'health_status': health_status,
+                    }))
+                
+                # Son randevu bilgisi
+                if fields.wants('last_appointment'):
+                    last_appointment = Appointment.objects.filter(
+                        hasta=patient
+                    ).select_related('doktor').order_by('-randevu_tarihi').first()
+                    patient_data['last_appointment'] = {
                         'date': last_appointment.randevu_tarihi.strftime('%Y-%m-%d %H:%M') if last_appointment else None,
                         'doctor_name': last_appointment.doktor.full_name if last_appointment else None,
                         'type': last_appointment.randevu_tipi if last_appointment else None,
                         'status': last_appointment.durum if last_appointment else None
-                    },
-                    'doctor_notes': formatted_doctor_notes,
-                    'recent_medications': formatted_medications,
-                    
-                    # Hastanın doktorları (son 6 ay içinde randevusu olan)
-                    'doctors': list(Appointment.objects.filter(
+                    }
+                
+                # Doktor notları - son 30 gün içindeki randevu notları
+                if fields.wants('doctor_notes'):
+                    doctor_notes = Appointment.objects.filter(
+                        hasta=patient,
+                        randevu_tarihi__date__gte=thirty_days_ago,
+                        doktor_notlari__isnull=False
+                    ).exclude(doktor_notlari__exact='').select_related('doktor').order_by('-randevu_tarihi')[:5]
+                    patient_data['doctor_notes'] = [
+                        {
+                            'date': note_appointment.randevu_tarihi.strftime('%Y-%m-%d'),
+                            'doctor_name': note_appointment.doktor.full_name,
+                            'note': note_appointment.doktor_notlari,
+                            'appointment_type': note_appointment.randevu_tipi,
+                            'is_urgent': note_appointment.doktor_notu_acil,
+                            'severity': note_appointment.doktor_notu_onem
+                        }
+                        for note_appointment in doctor_notes
+                    ]
+                
+                # Hasta için yazılan son ilaçlar (son 30 gün)
+                if fields.wants('recent_medications'):
+                    recent_medications = Ilac.objects.filter(
+                        hasta=patient,
+                        olusturulma_tarihi__date__gte=thirty_days_ago
+                    ).select_related('doktor').order_by('-olusturulma_tarihi')[:5]
+                    patient_data['recent_medications'] = [
+                        {
+                            'name': medication.ilac_adi,
+                            'dosage': medication.dozaj,
+                            'frequency': medication.kullanim_sikligi,
+                            'start_date': medication.baslangic_tarihi.strftime('%Y-%m-%d'),
+                            'end_date': medication.bitis_tarihi.strftime('%Y-%m-%d') if medication.bitis_tarihi else None,
+                            'doctor_name': medication.doktor.full_name,
+                            'instructions': medication.kullanim_talimatlari,
+                            'is_active': medication.aktif
+                        }
+                        for medication in recent_medications
+                    ]
+                
+                # Hastanın doktorları (son 6 ay içinde randevusu olan)
+                if fields.wants('doctors'):
+                    patient_data['doctors'] = list(Appointment.objects.filter(
                         hasta=patient,
                         randevu_tarihi__date__gte=today - timedelta(days=180)
                     ).values(
@@ -828,7 +850,7 @@ class CaregiverPatientsView(APIView):
                         'doktor__uzmanlik',
                         'doktor__telefon_no'
                     ).distinct())
-                }
+                
                 patient_list.append(patient_data)
             
             return Response(patient_list)
@@ -894,7 +916,8 @@ class PatientDetailView(APIView):
                     'note': note_appointment.doktor_notlari,
                     'appointment_type': note_appointment.randevu_tipi,
                     'patient_complaints': note_appointment.hasta_notlari,
-                    'is_urgent': 'acil' in note_appointment.doktor_notlari.lower() if note_appointment.doktor_notlari else False
+                    'is_urgent': note_appointment.doktor_notu_acil,
+                    'severity': note_appointment.doktor_notu_onem
                 })
             
             # İlaçları formatla
@@ -1010,7 +1033,12 @@ class PatientDoctorNotesView(APIView):
                 doktor_notlari__isnull=False
             ).exclude(
                 doktor_notlari__exact=''
-            ).order_by('-randevu_tarihi')[:limit]
+            ).select_related('doktor')
+            
+            # Sadece acil notlar (?urgent=1) - aciliyet kayıt anında sınıflandırıldığı için SQL'de süzülür
+            if _urgent_only(request):
+                doctor_notes = doctor_notes.filter(doktor_notu_acil=True)
+            doctor_notes = doctor_notes.order_by('-randevu_tarihi')[:limit]
             
             notes_list = []
             for appointment in doctor_notes:
@@ -1023,9 +1051,8 @@ class PatientDoctorNotesView(APIView):
                     'doctor_note': appointment.doktor_notlari,
                     'patient_complaint': appointment.hasta_notlari,
                     'appointment_status': appointment.durum,
-                    'is_urgent': any(word in appointment.doktor_notlari.lower() 
-                                   for word in ['acil', 'kritik', 'önemli', 'dikkat'] 
-                                   if appointment.doktor_notlari),
+                    'is_urgent': appointment.doktor_notu_acil,
+                    'severity': appointment.doktor_notu_onem,
                     'created_date': appointment.olusturulma_tarihi.strftime('%Y-%m-%d %H:%M')
                 }
                 notes_list.append(note_data)
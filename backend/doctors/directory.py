@@ -0,0 +1,160 @@
+# doctors/directory.py
+"""
+Hastalar için doktor rehberi
+
+- Aktif doktorların listesi tek sorguyla hazırlanır: satırlar (çalışma saatleri ayrıştırılmış), uzmanlık indeksi
+  ve ad/soyad kelime indeksi birlikte paylaşılan cache'e sürüm anahtarıyla yazılır
+- Doktor kaydedildiğinde/silindiğinde signals.py sürümü değiştirir; eski sürümün kaydı kullanılmaz, süresi
+  dolunca cache'ten düşer
+- Okumalar cache isabetinde veritabanına gitmez: sürüm cache'ten okunur, aynı sürümün rehberi süreçte de tutulur
+- Uzmanlık filtresi indeksten, isim araması sıralı kelime listesinde bisect ile önek eşleşmesiyle yapılır
+"""
+
+import bisect
+import logging
+import threading
+import uuid
+
+from django.core.cache import cache
+
+from akilli_ilac_backend.turkce import search_fold, search_tokens
+
+logger = logging.getLogger(__name__)
+
+CACHE_SURESI = 60 * 60 * 24
+
+_SURUM_ANAHTARI = 'doktor_rehberi:surum'
+_REHBER_ANAHTARI = 'doktor_rehberi:{surum}'
+
+# Süreç içi kopya: (sürüm, rehber)
+_yerel = (None, None)
+_kilit = threading.Lock()
+
+
+def surum():
+    """Rehberin güncel sürümü; cache boşaldıysa yeni sürüm başlatılır"""
+    deger = cache.get(_SURUM_ANAHTARI)
+    if deger is None:
+        cache.add(_SURUM_ANAHTARI, uuid.uuid4().hex, None)
+        deger = cache.get(_SURUM_ANAHTARI)
+    return deger
+
+
+def gecersiz_kil():
+    """Rehberi tüm süreçlerde geçersiz kıl (yeni sürüm)"""
+    cache.set(_SURUM_ANAHTARI, uuid.uuid4().hex, None)
+
+
+def _olustur(surum_degeri):
+    """Aktif doktorlardan rehberi oluştur (tek sorgu)"""
+    from .models import Doctor
+
+    doktorlar = Doctor.objects.filter(is_active=True).only(
+        'doktor_id', 'ad', 'soyad', 'uzmanlik', 'muayenehane_adresi', 'telefon_no', 'calisma_saatleri',
+        'diploma_no',
+    )
+    # (sıralama anahtarı, arama kelimeleri, satır); 'Dr. ' öneki aramaya ve sıralamaya girmez
+    kayitlar = sorted(
+        (
+            (search_fold(f'{doktor.ad} {doktor.soyad}'), doktor.doktor_id),
+            search_tokens(f'{doktor.ad} {doktor.soyad}'),
+            {
+                'id': doktor.doktor_id,
+                'name': doktor.full_name,
+                'specialty': doktor.uzmanlik,
+                'address': doktor.muayenehane_adresi,
+                'phone': doktor.telefon_no,
+                'working_hours': doktor.get_calisma_saatleri(),
+                'diploma_no': doktor.diploma_no,
+            },
+        )
+        for doktor in doktorlar
+    )
+
+    satirlar = []
+    uzmanliklar = {}
+    kelimeler = []
+    for index, (_, isim_kelimeleri, satir) in enumerate(kayitlar):
+        satirlar.append(satir)
+        anahtar = search_fold(satir['specialty'])
+        uzmanlik = uzmanliklar.setdefault(anahtar, {'name': satir['specialty'], 'satirlar': []})
+        uzmanlik['satirlar'].append(index)
+        kelimeler.extend((kelime, index) for kelime in set(isim_kelimeleri))
+    kelimeler.sort()
+
+    return {
+        'surum': surum_degeri,
+        'satirlar': satirlar,
+        'uzmanliklar': uzmanliklar,
+        'kelimeler': [kelime for kelime, _ in kelimeler],
+        'kelime_satirlari': [index for _, index in kelimeler],
+    }
+
+
+def rehber():
+    """Güncel sürümün rehberi: önce süreç içi kopya, sonra paylaşılan cache, en son veritabanı"""
+    global _yerel
+
+    surum_degeri = surum()
+    yerel_surum, yerel_rehber = _yerel
+    if yerel_surum == surum_degeri:
+        return yerel_rehber
+
+    anahtar = _REHBER_ANAHTARI.format(surum=surum_degeri)
+    hazir = cache.get(anahtar)
+    if hazir is None:
+        hazir = _olustur(surum_degeri)
+        cache.set(anahtar, hazir, CACHE_SURESI)
+        logger.debug('Doktor rehberi oluşturuldu: %s doktor (sürüm %s)', len(hazir['satirlar']), surum_degeri)
+
+    with _kilit:
+        _yerel = (surum_degeri, hazir)
+    return hazir
+
+
+def _onek_eslesen(hazir, kelime):
+    """Bu önekle başlayan kelimesi olan satırlar"""
+    kelimeler = hazir['kelimeler']
+    bas = bisect.bisect_left(kelimeler, kelime)
+    bit = bisect.bisect_left(kelimeler, kelime + '\uffff', bas)
+    return set(hazir['kelime_satirlari'][bas:bit])
+
+
+def ara(uzmanlik=None, sorgu=None, sayfa=1, sayfa_boyutu=20):
+    """
+    Rehberde uzmanlık ve isimle filtreleyip sayfala (sayfa_boyutu=None: tüm sonuçlar). İsim aramasında sorgudaki
+    her kelime doktorun adında/soyadında bir kelimenin öneki olmalı ('ay yil' -> 'Ayşe Yılmaz').
+    """
+    hazir = rehber()
+    satirlar = hazir['satirlar']
+
+    secilen = None
+    if uzmanlik:
+        kayit = hazir['uzmanliklar'].get(search_fold(uzmanlik))
+        secilen = set(kayit['satirlar']) if kayit else set()
+    for kelime in search_tokens(sorgu or ''):
+        eslesen = _onek_eslesen(hazir, kelime)
+        secilen = eslesen if secilen is None else secilen & eslesen
+        if not secilen:
+            break
+
+    indeksler = range(len(satirlar)) if secilen is None else sorted(secilen)
+    toplam = len(indeksler)
+    if sayfa_boyutu is None:
+        sayfa, sayfa_boyutu = 1, max(toplam, 1)
+    bas = (sayfa - 1) * sayfa_boyutu
+    return {
+        'doctors': [satirlar[index] for index in indeksler[bas:bas + sayfa_boyutu]],
+        'total': toplam,
+        'page': sayfa,
+        'per_page': sayfa_boyutu,
+        'has_next': bas + sayfa_boyutu < toplam,
+    }
+
+
+def uzmanliklar():
+    """Rehberdeki uzmanlıklar ve doktor sayıları (ada göre sıralı)"""
+    return sorted(
+        ({'name': kayit['name'], 'count': len(kayit['satirlar'])} for kayit in rehber()['uzmanliklar'].values()),
+        key=lambda kayit: search_fold(kayit['name']),
+    )
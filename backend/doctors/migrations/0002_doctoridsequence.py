@@ -0,0 +1,41 @@
+# Generated by Django 4.2.7 on 2025-08-15 09:40
+
+import re
+
+from django.db import migrations, models
+
+
+def seed_sequence(apps, schema_editor):
+    """Sırayı mevcut en büyük doktor numarasıyla başlat (sayısal karşılaştırma)"""
+    Doctor = apps.get_model('doctors', 'Doctor')
+    DoctorIdSequence = apps.get_model('doctors', 'DoctorIdSequence')
+
+    pattern = re.compile(r'^DOC(\d+)$')
+    last = 0
+    for doktor_id in Doctor.objects.values_list('doktor_id', flat=True).iterator():
+        match = pattern.match(doktor_id)
+        if match:
+            last = max(last, int(match.group(1)))
+    DoctorIdSequence.objects.update_or_create(ad='doctor', defaults={'son_deger': last})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('doctors', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DoctorIdSequence',
+            fields=[
+                ('ad', models.CharField(max_length=30, primary_key=True, serialize=False, verbose_name='Sıra Adı')),
+                ('son_deger', models.BigIntegerField(default=0, verbose_name='Son Verilen Değer')),
+            ],
+            options={
+                'verbose_name': 'ID Sırası',
+                'verbose_name_plural': 'ID Sıraları',
+            },
+        ),
+        migrations.RunPython(seed_sequence, migrations.RunPython.noop),
+    ]
@@ -2,6 +2,7 @@ from django.db import models
 from django.utils import timezone
 import json
 from accounts.models import User
+from .working_hours import parse_working_hours_dict, working_intervals
 
 class Doctor(models.Model):
     """
@@ -85,6 +86,12 @@ class Doctor(models.Model):
         default=timezone.now,
         verbose_name="Oluşturulma Tarihi"
     )
+    
+    # Liste uç noktalarının ETag'i için (bkz. akilli_ilac_backend/conditional.py)
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Güncellenme Tarihi"
+    )
 
     class Meta:
         verbose_name = "Doktor"
@@ -99,12 +106,12 @@ class Doctor(models.Model):
     
     def get_calisma_saatleri(self):
         """Çalışma saatlerini dictionary olarak döndürür"""
-        if self.calisma_saatleri:
-            try:
-                return json.loads(self.calisma_saatleri)
-            except json.JSONDecodeError:
-                return {}
-        return {}
+        # Ayrıştırma sonucu JSON metnine göre önbellekte tutulur (bkz. working_hours.py)
+        return parse_working_hours_dict(self.calisma_saatleri)
+    
+    def get_calisma_araliklari(self):
+        """Haftanın her günü için (başlangıç_dk, bitiş_dk) aralıkları, tanımsızsa None"""
+        return working_intervals(self.calisma_saatleri or '')
     
     def set_calisma_saatleri(self, saatler_dict):
         """Çalışma saatlerini JSON string olarak kaydeder"""
@@ -116,13 +123,34 @@ class Doctor(models.Model):
         return day_name.lower() in saatler and saatler[day_name.lower()]
     
     def save(self, *args, **kwargs):
-        # DoktorID otomatik oluşturma
+        # DoktorID otomatik oluşturma - sıra tablosundan atomik olarak alınır (bkz. sequences.py)
         if not self.doktor_id:
-            last_doctor = Doctor.objects.order_by('doktor_id').last()
-            if last_doctor:
-                last_id = int(last_doctor.doktor_id[3:])  # DOC kısmını çıkar
-                new_id = last_id + 1
-            else:
-                new_id = 1
-            self.doktor_id = f"DOC{new_id:03d}"  # DOC001 formatı
-        super().save(*args, **kwargs)
\ No newline at end of file
+            from .sequences import next_doctor_id
+            self.doktor_id = next_doctor_id()
+            # ID yeni üretildiği için önce UPDATE denemeye gerek yok; çakışma varsa sessizce üzerine yazılmaz
+            kwargs.setdefault('force_insert', True)
+        super().save(*args, **kwargs)
+
+
+class DoctorIdSequence(models.Model):
+    """
+    Doktor ID sıra tablosu - her sıra için son verilen numarayı tutar
+    """
+
+    ad = models.CharField(
+        max_length=30,
+        primary_key=True,
+        verbose_name="Sıra Adı"
+    )
+
+    son_deger = models.BigIntegerField(
+        default=0,
+        verbose_name="Son Verilen Değer"
+    )
+
+    class Meta:
+        verbose_name = "ID Sırası"
+        verbose_name_plural = "ID Sıraları"
+
+    def __str__(self):
+        return f"{self.ad}: {self.son_deger}"
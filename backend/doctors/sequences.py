@@ -0,0 +1,136 @@
+# doctors/sequences.py
+"""
+Doktor ID üretimi
+
+- Son verilen numara DoctorIdSequence tablosunda tutulur; numara tek bir koşulsuz UPDATE ile artırılır,
+  tablo taraması yapılmaz ve eşzamanlı kayıtlar aynı numarayı alamaz
+- Toplu aktarımlar için süreç başına numara bloğu ayrılabilir (DOCTOR_ID_BLOCK_SIZE ayarı veya reserve_doctor_ids)
+- Numara 999'u geçince ID'ler DOC1000, DOC1001... şeklinde devam eder
+"""
+
+import logging
+import re
+import threading
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+from django.db.models import F
+
+logger = logging.getLogger(__name__)
+
+DOCTOR_SEQUENCE = 'doctor'
+DOCTOR_ID_PREFIX = 'DOC'
+
+_SUFFIX_RE = re.compile(r'^DOC(\d+)$')
+
+
+def format_doctor_id(number):
+    """Numarayı DOC001 formatına çevir"""
+    return f"{DOCTOR_ID_PREFIX}{number:03d}"
+
+
+def max_existing_number():
+    """Mevcut doktor ID'lerindeki en büyük numara (sayısal karşılaştırma, DOC999 < DOC1000)"""
+    from .models import Doctor
+
+    numbers = (
+        int(match.group(1))
+        for match in map(_SUFFIX_RE.match, Doctor.objects.values_list('doktor_id', flat=True).iterator())
+        if match
+    )
+    return max(numbers, default=0)
+
+
+def _ensure_sequence(name):
+    """Sıra kaydı yoksa mevcut doktorlardan başlangıç değeriyle oluştur (normalde migration oluşturur)"""
+    from .models import DoctorIdSequence
+
+    try:
+        with transaction.atomic():
+            DoctorIdSequence.objects.create(ad=name, son_deger=max_existing_number())
+    except IntegrityError:
+        pass  # Başka bir süreç aynı anda oluşturdu
+
+
+def allocate_numbers(count=1, name=DOCTOR_SEQUENCE):
+    """
+    Sıradan ardışık `count` numara ayır ve range olarak döndür.
+    UPDATE satırı kilitlediği için aynı numara iki kez verilemez; kilit işlem sonuna kadar tutulur,
+    dış işlem geri alınırsa numaralar da geri alınır.
+    """
+    from .models import DoctorIdSequence
+
+    if count < 1:
+        raise ValueError('count en az 1 olmalıdır')
+
+    for _ in range(2):
+        with transaction.atomic():
+            updated = DoctorIdSequence.objects.filter(ad=name).update(son_deger=F('son_deger') + count)
+            if updated:
+                last = DoctorIdSequence.objects.filter(ad=name).values_list('son_deger', flat=True).get()
+                return range(last - count + 1, last + 1)
+        _ensure_sequence(name)
+
+    raise RuntimeError(f'{name} sırası oluşturulamadı')
+
+
+class BlockAllocator:
+    """
+    Süreç içi numara bloğu: her `block_size` numarada bir veritabanına gider.
+    Blok sadece bir işlem (transaction) dışında ayrılır; böylece ayrılan numaralar hemen commit edilir
+    ve bir geri alma işlemi, bu sürecin elindeki numaraları başka süreçlere tekrar verdiremez.
+    Kullanılmayan numaralar süreç kapanınca boşa gider (ID'lerde boşluk olabilir).
+    """
+
+    def __init__(self, name=DOCTOR_SEQUENCE, block_size=1):
+        self.name = name
+        self.block_size = max(1, block_size)
+        self._lock = threading.Lock()
+        self._next = 0
+        self._end = 0
+
+    def next(self):
+        with self._lock:
+            if self._next < self._end:
+                number = self._next
+                self._next += 1
+                return number
+
+            if self.block_size == 1 or connection.in_atomic_block:
+                return allocate_numbers(1, self.name)[0]
+
+            block = allocate_numbers(self.block_size, self.name)
+            self._next, self._end = block.start + 1, block.stop
+            return block.start
+
+    def reset(self):
+        with self._lock:
+            self._next = self._end = 0
+
+
+_allocator = BlockAllocator(DOCTOR_SEQUENCE, getattr(settings, 'DOCTOR_ID_BLOCK_SIZE', 1))
+
+
+def next_doctor_id():
+    """Yeni doktor için ID"""
+    return format_doctor_id(_allocator.next())
+
+
+def reserve_doctor_ids(count):
+    """Toplu aktarım (bulk_create) için tek sorguda `count` adet doktor ID'si ayır"""
+    return [format_doctor_id(number) for number in allocate_numbers(count)]
+
+
+def resync_sequence(name=DOCTOR_SEQUENCE):
+    """Sırayı mevcut en büyük doktor numarasına ileri al (elle ID verilmiş kayıtlardan sonra)"""
+    from .models import DoctorIdSequence
+
+    with transaction.atomic():
+        sequence, _ = DoctorIdSequence.objects.select_for_update().get_or_create(ad=name)
+        current = max_existing_number()
+        if current > sequence.son_deger:
+            logger.warning('%s sırası %s -> %s ileri alındı', name, sequence.son_deger, current)
+            sequence.son_deger = current
+            sequence.save(update_fields=['son_deger'])
+    _allocator.reset()
+    return sequence.son_deger
@@ -0,0 +1,29 @@
+# doctors/signals.py
+"""
+Doktor değişikliklerinde hastalara sunulan doktor rehberini geçersiz kıl
+"""
+
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from . import directory
+from .models import Doctor
+
+
+def _planla():
+    # Hemen geçersiz kıl; işlem sürerken başka bir istek eski veriyle rehber oluşturmuş olabileceği için commit sonrası tekrar
+    directory.gecersiz_kil()
+    transaction.on_commit(directory.gecersiz_kil)
+
+
+@receiver(post_save, sender=Doctor)
+def doktor_kaydedildi(sender, instance, raw=False, **kwargs):
+    if raw:
+        return
+    _planla()
+
+
+@receiver(post_delete, sender=Doctor)
+def doktor_silindi(sender, instance, **kwargs):
+    _planla()
@@ -1,3 +1,229 @@
-from django.test import TestCase
+import datetime
+import decimal
+import json
+import uuid
 
-# Create your tests here.
+from django.conf import settings
+from django.db import connection, transaction
+from django.http import JsonResponse as DjangoJsonResponse
+from django.test import SimpleTestCase, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.translation import gettext_lazy
+from rest_framework.renderers import JSONRenderer
+
+from accounts.models import User
+from akilli_ilac_backend.renderers import FastJSONRenderer, JsonResponse
+from akilli_ilac_backend.turkce import search_tokens
+from appointments.models import Appointment
+from caregivers.models import Caregiver, CaregiverPatientAssignment
+from doctors import directory
+from doctors.models import Doctor, DoctorIdSequence
+from doctors.sequences import DOCTOR_SEQUENCE, BlockAllocator, allocate_numbers, reserve_doctor_ids
+from medications.models import Ilac
+from patients.models import Patient
+from sms_service.models import SMSLog
+
+
+def ornek_veri():
+    return {
+        'an': datetime.datetime(2026, 3, 1, 9, 30, 15, 123456, tzinfo=datetime.timezone.utc),
+        'yerel': timezone.localtime(datetime.datetime(2026, 3, 1, 9, 30, tzinfo=datetime.timezone.utc)),
+        'gun': datetime.date(2026, 3, 1),
+        'saat': datetime.time(8, 15, 0, 500000),
+        'sure': datetime.timedelta(minutes=90),
+        'tutar': decimal.Decimal('12.50'),
+        'kimlik': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'metin': gettext_lazy('Doktor'),
+        'isim': 'Şükrü Çağlar',
+        'liste': [1, None, True, 2.5],
+    }
+
+
+class RendererTests(SimpleTestCase):
+    """Ortak kodlayıcı eski kodlayıcılarla aynı değerleri yazmalı"""
+
+    def test_drf_renderer_matches_stock_renderer(self):
+        data = ornek_veri()
+        self.assertEqual(
+            json.loads(FastJSONRenderer().render(data)), json.loads(JSONRenderer().render(data))
+        )
+
+    def test_json_response_matches_django_json_response(self):
+        data = ornek_veri()
+        self.assertEqual(json.loads(JsonResponse(data).content), json.loads(DjangoJsonResponse(data).content))
+        self.assertEqual(json.loads(JsonResponse(data).content)['an'], '2026-03-01T09:30:15.123Z')
+
+    def test_json_response_refuses_non_dict_unless_unsafe(self):
+        with self.assertRaises(TypeError):
+            JsonResponse([1, 2])
+        self.assertEqual(json.loads(JsonResponse([1, 2], safe=False).content), [1, 2])
+
+
+def doktor(sira):
+    user = User.objects.create(username=f'sira-doktor-{sira}', user_type='doktor')
+    return Doctor.objects.create(user=user, ad='Sıra', soyad=str(sira), uzmanlik='Test')
+
+
+class DoctorIdTests(TestCase):
+    """Doktor ID'leri sıra tablosundan çakışmasız ve tablo boyutundan bağımsız maliyetle alınmalı"""
+
+    def test_kayit_maliyeti_tablo_buyudukce_artmaz(self):
+        with CaptureQueriesContext(connection) as ilk:
+            doktor(0)
+        for sira in range(1, 50):
+            doktor(sira)
+        user = User.objects.create(username='sira-doktor-son', user_type='doktor')
+        with self.assertNumQueries(len(ilk) - 1):
+            Doctor.objects.create(user=user, ad='Sıra', soyad='son', uzmanlik='Test')
+
+    def test_ardisik_ve_tekrarsiz(self):
+        ids = [doktor(sira).doktor_id for sira in range(20)]
+        self.assertEqual(len(set(ids)), len(ids))
+        numaralar = [int(doktor_id[3:]) for doktor_id in ids]
+        self.assertEqual(numaralar, list(range(numaralar[0], numaralar[0] + 20)))
+
+    def test_999_sonrasi_dort_hane(self):
+        DoctorIdSequence.objects.filter(ad=DOCTOR_SEQUENCE).update(son_deger=998)
+        self.assertEqual([doktor(sira).doktor_id for sira in range(2)], ['DOC999', 'DOC1000'])
+
+    def test_geri_alinan_islem_numarayi_geri_verir(self):
+        onceki = DoctorIdSequence.objects.get(ad=DOCTOR_SEQUENCE).son_deger
+        with self.assertRaises(RuntimeError):
+            with transaction.atomic():
+                allocate_numbers(3)
+                raise RuntimeError('geri al')
+        self.assertEqual(DoctorIdSequence.objects.get(ad=DOCTOR_SEQUENCE).son_deger, onceki)
+
+
+class DoctorIdBlockTests(TransactionTestCase):
+    """Blok ayırma işlem dışında çalışır; iki süreç gibi davranan iki ayırıcı aynı numarayı vermemeli"""
+
+    def test_bloklar_cakismaz(self):
+        birinci, ikinci = BlockAllocator(block_size=10), BlockAllocator(block_size=10)
+        numaralar = []
+        with CaptureQueriesContext(connection) as ctx:
+            for _ in range(10):
+                numaralar += [birinci.next(), ikinci.next()]
+        # Ayırıcı başına 10 numarada bir sıra güncellemesi
+        self.assertEqual(sum(sorgu['sql'].startswith('UPDATE') for sorgu in ctx.captured_queries), 2)
+        numaralar += [int(doktor_id[3:]) for doktor_id in reserve_doctor_ids(5)]
+        numaralar += [birinci.next(), ikinci.next()]
+        self.assertEqual(len(set(numaralar)), len(numaralar))
+
+
+class ListFieldsetTests(TestCase):
+    """?fields= ile liste uç noktaları sadece istenen alanları döndürmeli, alt sorguları atlamalı"""
+
+    def setUp(self):
+        doktor_user = User.objects.create(username='liste-doktor', user_type='doktor')
+        self.doktor = Doctor.objects.create(user=doktor_user, ad='Liste', soyad='Doktor', uzmanlik='Dahiliye')
+        self.bakici = Caregiver.objects.create(
+            user=User.objects.create(username='liste-bakici', user_type='bakici'),
+            ad='Liste', soyad='Bakıcı', telefon_no='05440000001', uzmanlik_alanlari='Yaşlı bakımı',
+        )
+        for i in range(3):
+            self.hasta_ekle(i)
+        SMSLog.bulk_create_logs([
+            SMSLog(recipient_phone=f'0555000{i:04d}', recipient_user=doktor_user, message=f'Hatırlatma {i}',
+                   message_type='General', status='Delivered', sent_at=timezone.now())
+            for i in range(5)
+        ])
+
+    def hasta_ekle(self, i):
+        hasta = Patient.objects.create(
+            user=User.objects.create(username=f'liste-hasta-{i}', user_type='hasta'),
+            ad='Hasta', soyad=str(i), telefon_no=f'0533000{i:04d}', adres='Merkez Mah.',
+        )
+        Appointment.objects.create(hasta=hasta, doktor=self.doktor, randevu_tarihi=timezone.now())
+        Ilac.objects.create(hasta=hasta, doktor=self.doktor, ilac_adi='İlaç', dozaj='1 tablet',
+                            kullanim_sikligi='Günde 2 kez', baslangic_tarihi=timezone.localdate())
+        CaregiverPatientAssignment.objects.create(caregiver=self.bakici, patient=hasta)
+
+    def satirlar(self, url_name, user, params=None):
+        self.client.force_login(user)
+        response = self.client.get(reverse(url_name), params or {})
+        self.assertEqual(response.status_code, 200)
+        data = json.loads(response.content)
+        return data['logs'] if isinstance(data, dict) else data
+
+    def test_sadece_istenen_alanlar_doner(self):
+        uc_noktalar = [
+            ('doctor_patients', self.doktor.user, 'id,name,phone'),
+            ('doctor-caregivers', self.doktor.user, 'id,name,phone'),
+            ('caregiver-patients', self.bakici.user, 'id,first_name,last_name,phone'),
+            ('doctor-sms-logs', self.doktor.user, 'id,status,sent_at'),
+        ]
+        for url_name, user, fields in uc_noktalar:
+            with self.subTest(url_name):
+                tam = self.satirlar(url_name, user)
+                seyrek = self.satirlar(url_name, user, {'fields': fields})
+                self.assertEqual(len(seyrek), len(tam))
+                self.assertTrue(all(set(satir) == set(fields.split(',')) for satir in seyrek))
+                self.assertGreater(len(tam[0]), len(seyrek[0]))
+
+    def sorgu_sayisi(self, params=None):
+        self.client.force_login(self.doktor.user)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get(reverse('doctor_patients'), params or {})
+        return len(ctx)
+
+    def test_seyrek_liste_hasta_basina_sorgu_atmaz(self):
+        seyrek, tam = self.sorgu_sayisi({'fields': 'id,name,phone'}), self.sorgu_sayisi()
+        for i in range(3, 6):
+            self.hasta_ekle(i)
+        self.assertEqual(self.sorgu_sayisi({'fields': 'id,name,phone'}), seyrek)
+        # Alt sorgulu alanlar hasta başına sorgu atar; seyrek seçim bunları hiç çalıştırmaz
+        self.assertGreater(self.sorgu_sayisi(), tam)
+        self.assertLess(seyrek, tam)
+
+
+class DoctorDirectoryTests(TestCase):
+    """Doktor rehberi cache isabetinde doktor tablosuna gitmemeli ve veritabanıyla tutarlı kalmalı"""
+
+    UZMANLIKLAR = ('Dahiliye', 'Kardiyoloji', 'Nöroloji')
+    ADLAR = ('Ayşe', 'Mehmet', 'İsmail', 'Aydın', 'Şule')
+
+    def setUp(self):
+        self.doktorlar = [
+            Doctor.objects.create(
+                user=User.objects.create(username=f'rehber-doktor-{i}', user_type='doktor'),
+                ad=self.ADLAR[i % len(self.ADLAR)], soyad=f'Soyad{i}', uzmanlik=self.UZMANLIKLAR[i % 3],
+                calisma_saatleri='{"pazartesi": "09:00-17:00"}',
+            )
+            for i in range(18)
+        ]
+
+    def test_isabette_sadece_surum_okunur(self):
+        directory.ara()
+        cache_tablosu = settings.CACHES['default'].get('LOCATION') or ''
+        with CaptureQueriesContext(connection) as ctx:
+            directory.ara()
+            directory.ara(uzmanlik='kardiyoloji', sorgu='ay')
+        # Veritabanı cache'inde sürüm anahtarı okuması dışında sorgu yok
+        self.assertLessEqual(len(ctx), 2)
+        self.assertTrue(all(cache_tablosu in sorgu['sql'] for sorgu in ctx.captured_queries))
+
+    def test_filtreler_veritabaniyla_ayni(self):
+        beklenen = {
+            doktor.doktor_id for doktor in self.doktorlar
+            if doktor.uzmanlik == 'Kardiyoloji'
+            and any(kelime.startswith('ay') for kelime in search_tokens(f'{doktor.ad} {doktor.soyad}'))
+        }
+        sonuc = directory.ara(uzmanlik='KARDİYOLOJİ', sorgu='ay', sayfa_boyutu=None)
+        self.assertTrue(beklenen)
+        self.assertEqual({satir['id'] for satir in sonuc['doctors']}, beklenen)
+        self.assertEqual(sonuc['total'], len(beklenen))
+        self.assertEqual(directory.ara(sayfa=2, sayfa_boyutu=10)['doctors'], directory.ara(sayfa_boyutu=None)['doctors'][10:])
+
+    def test_kayit_rehbere_yansir(self):
+        directory.ara()
+        doktor = self.doktorlar[0]
+        doktor.soyad = 'Güncellendi'
+        doktor.save()
+        self.assertEqual([satir['id'] for satir in directory.ara(sorgu='guncellendi')['doctors']], [doktor.doktor_id])
+
+        doktor.is_active = False
+        doktor.save()
+        self.assertEqual(directory.ara(sorgu='guncellendi')['total'], 0)
@@ -12,9 +12,11 @@ urlpatterns = [
     # Randevu
     path('appointments/', views.DoctorAppointmentsView.as_view(), name='doctor_appointments'),
     path('appointments/<int:appointment_id>/', views.DoctorAppointmentsView.as_view(), name='doctor_appointment_detail'),
+    path('appointments/bulk/', views.DoctorBulkAppointmentsView.as_view(), name='doctor_appointments_bulk'),
     
     # İlaç yönetimi
     path('medications/', views.DoctorMedicationsView.as_view(), name='doctor_medications'),
+    path('medications/bulk/', views.DoctorBulkMedicationsView.as_view(), name='doctor_medications_bulk'),
     
     # Bildirim sistemi - MEVCUT
     path('notifications/', views.DoctorNotificationsView.as_view(), name='doctor_notifications'),
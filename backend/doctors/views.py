@@ -7,76 +7,96 @@ from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
 from django.utils import timezone
+from django.utils.decorators import method_decorator
 from django.db import models
+from datetime import date
 from .models import Doctor
 from patients.models import Patient
 from appointments.models import Appointment
+from appointments import transitions
 from medications.models import Ilac
+from medications import prescriptions
+from medications.schedule import DEFAULT_SCHEDULE_DAYS
 from notifications.models import Bildirim
 from sms_service.models import SMSLog
+from akilli_ilac_backend.conditional import conditional, fingerprint
+from akilli_ilac_backend.fieldsets import Fieldset
 from .serializers import DoctorSerializer
 import json
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Doktorun hasta listesi satırı: çıktı alanı -> (okunan sütunlar, değer); ?fields= ile seçilir.
+# Alt sorgu gerektiren last_appointment / active_medications_count / caregiver_info view içinde eklenir.
+DOCTOR_PATIENT_FIELDS = {
+    'id': (('id',), lambda patient: patient.id),
+    'name': (('ad', 'soyad'), lambda patient: patient.full_name),
+    'phone': (('telefon_no',), lambda patient: patient.telefon_no),
+    'email': (('email',), lambda patient: patient.email),
+    'age': (('dogum_tarihi',), lambda patient: patient.age),
+    'gender': (('cinsiyet',), lambda patient: patient.cinsiyet),
+    'address': (('adres',), lambda patient: patient.adres),
+    'emergency_contact': (('acil_durum_kisi', 'acil_durum_telefon'), lambda patient: {
+        'name': patient.acil_durum_kisi,
+        'phone': patient.acil_durum_telefon
+    }),
+}
+
 
 class DoctorPatientsView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        """Doktorun hastalarını listele"""
+        """Doktorun hastalarını listele (?fields=id,name,phone ile sadece istenen alanlar)"""
         try:
             doctor = get_object_or_404(Doctor, user=request.user)
+            fields = Fieldset(request)
             
             # Doktorun randevuları olan hastaları getir
             appointments = Appointment.objects.filter(doktor=doctor).values('hasta').distinct()
             patient_ids = [app['hasta'] for app in appointments]
-            patients = Patient.objects.filter(id__in=patient_ids)
+            patients = fields.only(Patient.objects.filter(id__in=patient_ids), DOCTOR_PATIENT_FIELDS)
+            
+            from caregivers.models import CaregiverPatientAssignment
             
             patient_list = []
             for patient in patients:
+                patient_data = fields.row(patient, DOCTOR_PATIENT_FIELDS)
+                
                 # Her hasta için son randevu bilgisi
-                last_appointment = Appointment.objects.filter(
-                    hasta=patient, 
-                    doktor=doctor
-                ).order_by('-randevu_tarihi').first()
+                if fields.wants('last_appointment'):
+                    last_appointment = Appointment.objects.filter(
+                        hasta=patient, 
+                        doktor=doctor
+                    ).order_by('-randevu_tarihi').first()
+                    patient_data['last_appointment'] = {
+                        'date': last_appointment.randevu_tarihi.strftime('%Y-%m-%d %H:%M') if last_appointment else None,
+                        'type': last_appointment.randevu_tipi if last_appointment else None,
+                        'status': last_appointment.durum if last_appointment else None
+                    }
                 
                 # Hasta için aktif ilaç sayısı
-                active_medications = Ilac.objects.filter(
-                    hasta=patient, 
-                    doktor=doctor, 
-                    aktif=True
-                ).count()
+                if fields.wants('active_medications_count'):
+                    patient_data['active_medications_count'] = Ilac.objects.filter(
+                        hasta=patient, 
+                        doktor=doctor, 
+                        aktif=True
+                    ).count()
                 
                 # Hastanın aktif bakıcısı var mı kontrol et
-                from caregivers.models import CaregiverPatientAssignment
-                active_caregiver = CaregiverPatientAssignment.objects.filter(
-                    patient=patient,
-                    is_active=True
-                ).first()
-                
-                patient_data = {
-                    'id': patient.id,
-                    'name': patient.full_name,
-                    'phone': patient.telefon_no,
-                    'email': patient.email,
-                    'age': patient.age,
-                    'gender': patient.cinsiyet,
-                    'address': patient.adres,
-                    'last_appointment': {
-                        'date': last_appointment.randevu_tarihi.strftime('%Y-%m-%d %H:%M') if last_appointment else None,
-                        'type': last_appointment.randevu_tipi if last_appointment else None,
-                        'status': last_appointment.durum if last_appointment else None
-                    },
-                    'active_medications_count': active_medications,
-                    'emergency_contact': {
-                        'name': patient.acil_durum_kisi,
-                        'phone': patient.acil_durum_telefon
-                    },
-                    'caregiver_info': {
+                if fields.wants('caregiver_info'):
+                    active_caregiver = CaregiverPatientAssignment.objects.filter(
+                        patient=patient,
+                        is_active=True
+                    ).select_related('caregiver').first()
+                    patient_data['caregiver_info'] = {
                         'has_caregiver': active_caregiver is not None,
                         'caregiver_name': active_caregiver.caregiver.full_name if active_caregiver else None,
                         'caregiver_phone': active_caregiver.caregiver.telefon_no if active_caregiver else None,
                         'assignment_date': active_caregiver.assigned_date.strftime('%Y-%m-%d') if active_caregiver else None
                     }
-                }
+                
                 patient_list.append(patient_data)
             
             return Response(patient_list)
@@ -87,14 +107,26 @@ class DoctorPatientsView(APIView):
             }, status=status.HTTP_404_NOT_FOUND)
 
 
+def _appointments_etag(request, *args, **kwargs):
+    doctor_id = Doctor.objects.filter(user=request.user).values_list('pk', flat=True).first()
+    if doctor_id is None:
+        return None
+    # is_past randevu saati geçince, is_today gün değişince değişir
+    return fingerprint(
+        Appointment.objects.filter(doktor_id=doctor_id), 'guncelleme_tarihi', 'hasta__guncelleme_tarihi',
+        gecmis=models.Count('pk', filter=models.Q(randevu_tarihi__lt=timezone.now())),
+    ) + (date.today(),)
+
+
 class DoctorAppointmentsView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(conditional(_appointments_etag))
     def get(self, request):
         """Doktorun randevularını listele"""
         try:
             doctor = get_object_or_404(Doctor, user=request.user)
-            appointments = Appointment.objects.filter(doktor=doctor).order_by('-randevu_tarihi')
+            appointments = Appointment.objects.filter(doktor=doctor).select_related('hasta').order_by('-randevu_tarihi')
             
             appointment_list = []
             for appointment in appointments:
@@ -212,11 +244,61 @@ class DoctorAppointmentsView(APIView):
                 message_type=message_type,
                 status='Pending'
             )
-            # Gerçek SMS gönderimi Huawei Cloud ile yapılacak
+            # Gönderimi kuyruk göndericisi yapar (sms_service/outbound.py)
         except Exception as e:
             print(f"SMS gönderim hatası: {e}")
 
 
+
+class DoctorBulkAppointmentsView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """Toplu randevu durumu güncelle (onayla/reddet/iptal et)"""
+        doctor = get_object_or_404(Doctor, user=request.user)
+        
+        action = request.data.get('action')
+        if action not in transitions.TRANSITIONS:
+            return Response({
+                'error': f"Geçersiz işlem, geçerli işlemler: {', '.join(transitions.TRANSITIONS)}"
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        appointment_ids = request.data.get('appointment_ids')
+        try:
+            appointment_ids = {int(appointment_id) for appointment_id in appointment_ids} if isinstance(appointment_ids, list) else None
+        except (TypeError, ValueError):
+            appointment_ids = None
+        if not appointment_ids:
+            return Response({
+                'error': 'appointment_ids listesi gereklidir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(appointment_ids) > transitions.MAX_BULK_APPOINTMENTS:
+            return Response({
+                'error': f'Tek istekte en fazla {transitions.MAX_BULK_APPOINTMENTS} randevu işlenebilir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            changed = transitions.bulk_transition(
+                doctor,
+                request.user,
+                appointment_ids,
+                action,
+                doctor_notes=request.data.get('doctor_notes')
+            )
+        except Exception as e:
+            logger.exception('Toplu randevu işlemi hatası')
+            return Response({
+                'error': f'İşlem gerçekleştirilemedi: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        changed_ids = [appointment.randevu_id for appointment in changed]
+        return Response({
+            'message': f'{len(changed_ids)} randevu güncellendi',
+            'updated_ids': changed_ids,
+            # Başka doktora ait, bulunamayan ya da durumu uygun olmayan randevular
+            'skipped_ids': sorted(appointment_ids.difference(changed_ids))
+        })
+
 class DoctorMedicationsView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -375,6 +457,64 @@ class DoctorMedicationsView(APIView):
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
+
+class DoctorBulkMedicationsView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    def post(self, request):
+        """Toplu reçete: ilaçları tek işlemde ekle, hasta başına tek bildirim/SMS gönder"""
+        doctor = get_object_or_404(Doctor, user=request.user)
+        
+        items = request.data.get('prescriptions')
+        if not isinstance(items, list) or not items:
+            return Response({
+                'error': 'prescriptions listesi gereklidir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        if len(items) > prescriptions.MAX_BULK_PRESCRIPTIONS:
+            return Response({
+                'error': f'Tek istekte en fazla {prescriptions.MAX_BULK_PRESCRIPTIONS} reçete gönderilebilir'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        schedule_days = None
+        if request.data.get('generate_schedule'):
+            try:
+                schedule_days = int(request.data.get('schedule_days', DEFAULT_SCHEDULE_DAYS))
+            except (TypeError, ValueError):
+                schedule_days = 0
+            if not 1 <= schedule_days <= 90:
+                return Response({
+                    'error': 'schedule_days 1-90 arasında olmalıdır'
+                }, status=status.HTTP_400_BAD_REQUEST)
+        
+        medications, errors = prescriptions.validate_prescriptions(items, doctor)
+        if errors:
+            # Hatalı reçete varsa hiçbiri eklenmez
+            return Response({
+                'error': 'Reçetelerde hata var, hiçbir ilaç eklenmedi',
+                'errors': errors
+            }, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            created = prescriptions.create_prescriptions(
+                doctor,
+                request.user,
+                medications,
+                notify=request.data.get('notify', True),
+                schedule_days=schedule_days
+            )
+        except Exception as e:
+            logger.exception('Toplu reçete hatası')
+            return Response({
+                'error': f'İlaçlar eklenemedi: {str(e)}'
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+        
+        return Response({
+            'message': f'{len(created)} ilaç başarıyla eklendi',
+            'medication_ids': [medication.id for medication in created],
+            'patient_count': len({medication.hasta_id for medication in created}),
+            'schedule_queued': bool(schedule_days)
+        }, status=status.HTTP_201_CREATED)
+
 class DoctorNotificationsView(APIView):
     permission_classes = [IsAuthenticated]
     
@@ -456,51 +596,68 @@ class DoctorNotificationsView(APIView):
 
 # ==================== CAREGIVER MANAGEMENT VIEWS ====================
 
+# Bakıcı listesinde modelde karşılığı olmayan alanlar için varsayılanlar
+DEFAULT_MAX_PATIENTS = 5
+
+# Bakıcı listesi satırı; ?fields= ile seçilir (is_available / current_patient_count view içinde eklenir)
+DOCTOR_CAREGIVER_FIELDS = {
+    'id': (('id',), lambda caregiver: caregiver.id),
+    'name': (('ad', 'soyad'), lambda caregiver: caregiver.full_name),
+    'phone': (('telefon_no',), lambda caregiver: caregiver.telefon_no),
+    'email': (('email',), lambda caregiver: caregiver.email),
+    'address': (('adres',), lambda caregiver: caregiver.adres),
+    'experience_years': (('deneyim',), lambda caregiver: caregiver.deneyim if caregiver.deneyim else '0-1'),
+    'specializations': (('uzmanlik_alanlari',), lambda caregiver: (
+        caregiver.uzmanlik_alanlari.split(',') if caregiver.uzmanlik_alanlari else []
+    )),
+    'max_patient_count': ((), lambda caregiver: DEFAULT_MAX_PATIENTS),
+    'rating': (('toplam_puan', 'degerlendirme_sayisi'), lambda caregiver: float(caregiver.ortalama_puan)),
+    'total_reviews': (('degerlendirme_sayisi',), lambda caregiver: caregiver.degerlendirme_sayisi),
+    'education': (('egitim_durumu',), lambda caregiver: (
+        caregiver.get_egitim_durumu_display() if caregiver.egitim_durumu else 'Belirtilmemiş'
+    )),
+    'city': ((), lambda caregiver: 'İstanbul'),  # Default şehir
+    'district': ((), lambda caregiver: 'Merkez'),  # Default ilçe
+    'shift_preference': (('calisma_saatleri',), lambda caregiver: (
+        caregiver.calisma_saatleri if caregiver.calisma_saatleri else 'Esnek'
+    )),
+    'profile_photo': ((), lambda caregiver: None),  # Profil fotoğrafı field'ı yok
+    'about': ((), lambda caregiver: 'Deneyimli bakıcı'),  # Default açıklama
+    'certificates': (('sertifikalar',), lambda caregiver: (
+        caregiver.sertifikalar if caregiver.sertifikalar else 'Belirtilmemiş'
+    )),
+}
+
+
 class DoctorCaregiversView(APIView):
     permission_classes = [IsAuthenticated]
     
     def get(self, request):
-        """Mevcut bakıcıları listele"""
+        """Mevcut bakıcıları listele (?fields=id,name,phone ile sadece istenen alanlar)"""
         try:
             doctor = get_object_or_404(Doctor, user=request.user)
+            fields = Fieldset(request)
             
             # Bakıcıları getir (şimdilik tüm aktif bakıcılar)
             # Gelecekte doktorun bulunduğu bölgedeki bakıcılar getirilebilir
             from caregivers.models import Caregiver, CaregiverPatientAssignment
-            caregivers = Caregiver.objects.filter(aktif=True)
+            caregivers = fields.only(Caregiver.objects.filter(aktif=True), DOCTOR_CAREGIVER_FIELDS)
             
             caregiver_list = []
             for caregiver in caregivers:
-                # Her bakıcı için aktif hasta sayısını hesapla
-                active_assignments = CaregiverPatientAssignment.objects.filter(
-                    caregiver=caregiver,
-                    is_active=True
-                ).count()
+                caregiver_data = fields.row(caregiver, DOCTOR_CAREGIVER_FIELDS)
                 
-                # Maksimum hasta sayısı için default değer (modelde yoksa 5 kabul et)
-                max_patients = 5  # Default değer
+                # Her bakıcı için aktif hasta sayısını hesapla
+                if fields.wants('is_available', 'current_patient_count'):
+                    active_assignments = CaregiverPatientAssignment.objects.filter(
+                        caregiver=caregiver,
+                        is_active=True
+                    ).count()
+                    caregiver_data.update(fields.trim({
+                        'is_available': active_assignments < DEFAULT_MAX_PATIENTS,
+                        'current_patient_count': active_assignments,
+                    }))
                 
-                caregiver_data = {
-                    'id': caregiver.id,
-                    'name': caregiver.full_name,
-                    'phone': caregiver.telefon_no,
-                    'email': caregiver.email,
-                    'address': caregiver.adres,
-                    'experience_years': caregiver.deneyim if caregiver.deneyim else '0-1',
-                    'specializations': caregiver.uzmanlik_alanlari.split(',') if caregiver.uzmanlik_alanlari else [],
-                    'is_available': active_assignments < max_patients,
-                    'current_patient_count': active_assignments,
-                    'max_patient_count': max_patients,
-                    'rating': float(caregiver.ortalama_puan),
-                    'total_reviews': caregiver.degerlendirme_sayisi,
-                    'education': caregiver.get_egitim_durumu_display() if caregiver.egitim_durumu else 'Belirtilmemiş',
-                    'city': 'İstanbul',  # Default şehir
-                    'district': 'Merkez',  # Default ilçe
-                    'shift_preference': caregiver.calisma_saatleri if caregiver.calisma_saatleri else 'Esnek',
-                    'profile_photo': None,  # Profil fotoğrafı field'ı yok
-                    'about': 'Deneyimli bakıcı',  # Default açıklama
-                    'certificates': caregiver.sertifikalar if caregiver.sertifikalar else 'Belirtilmemiş'
-                }
                 caregiver_list.append(caregiver_data)
             
             return Response(caregiver_list)
@@ -0,0 +1,82 @@
+# doctors/working_hours.py
+"""
+Doktor çalışma saatleri ayrıştırma
+
+calisma_saatleri JSON metni ({"pazartesi": "09:00-17:00", "sali": "09:00-12:00,13:00-17:00", ...})
+metnin kendisine göre önbelleğe alınarak bir kez ayrıştırılır; metin değişince yeni anahtar oluşur,
+ayrıca geçersiz kılmaya gerek kalmaz.
+"""
+
+import json
+import re
+from functools import lru_cache
+
+from akilli_ilac_backend.turkce import search_fold
+
+# Hafta günü (datetime.weekday(): Pazartesi=0) -> JSON anahtarı
+GUNLER = ('pazartesi', 'sali', 'carsamba', 'persembe', 'cuma', 'cumartesi', 'pazar')
+
+_GUN_INDEX = {gun: index for index, gun in enumerate(GUNLER)}
+
+_ARALIK_RE = re.compile(r'(\d{1,2})[:.](\d{2})\s*-\s*(\d{1,2})[:.](\d{2})')
+
+
+@lru_cache(maxsize=1024)
+def _parse_json(calisma_saatleri):
+    try:
+        saatler = json.loads(calisma_saatleri)
+    except (TypeError, ValueError):
+        return {}
+    return saatler if isinstance(saatler, dict) else {}
+
+
+def parse_working_hours_dict(calisma_saatleri):
+    """JSON metnini sözlük olarak döndür (çağıran değiştirebilsin diye kopya)"""
+    if not calisma_saatleri:
+        return {}
+    return dict(_parse_json(calisma_saatleri))
+
+
+def _parse_araliklar(deger):
+    """'09:00-12:00,13:00-17:00' ya da liste -> [(540, 720), (780, 1020)] (gün başından dakika)"""
+    if isinstance(deger, (list, tuple)):
+        deger = ','.join(str(parca) for parca in deger)
+    if not isinstance(deger, str):
+        return ()
+
+    araliklar = []
+    for bas_s, bas_d, bit_s, bit_d in _ARALIK_RE.findall(deger):
+        baslangic = int(bas_s) * 60 + int(bas_d)
+        bitis = int(bit_s) * 60 + int(bit_d)
+        if bitis == 0:
+            bitis = 24 * 60  # '18:00-00:00' gece yarısına kadar
+        if 0 <= baslangic < bitis <= 24 * 60:
+            araliklar.append((baslangic, bitis))
+
+    # Sıralı ve birleştirilmiş aralıklar
+    araliklar.sort()
+    birlesik = []
+    for baslangic, bitis in araliklar:
+        if birlesik and baslangic <= birlesik[-1][1]:
+            birlesik[-1] = (birlesik[-1][0], max(birlesik[-1][1], bitis))
+        else:
+            birlesik.append((baslangic, bitis))
+    return tuple(birlesik)
+
+
+@lru_cache(maxsize=1024)
+def working_intervals(calisma_saatleri):
+    """
+    Haftanın her günü için çalışma aralıkları: 7 elemanlı tuple, her biri ((başlangıç_dk, bitiş_dk), ...)
+    Çalışma saati hiç tanımlanmamışsa None döner (kısıtlama yok).
+    """
+    saatler = _parse_json(calisma_saatleri) if calisma_saatleri else {}
+    if not saatler:
+        return None
+
+    gunler = [()] * 7
+    for anahtar, deger in saatler.items():
+        index = _GUN_INDEX.get(search_fold(str(anahtar)).strip())
+        if index is not None:
+            gunler[index] = _parse_araliklar(deger)
+    return tuple(gunler)
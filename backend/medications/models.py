@@ -112,6 +112,15 @@ class Ilac(models.Model):
         verbose_name="Güncellenme Tarihi"
     )
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Bakıcı dashboard özetinin artımlı güncellenebilmesi için yüklendiği andaki durum
+        instance._pano_durumu = tuple(
+            instance.__dict__.get(alan) for alan in ('hasta_id', 'aktif', 'baslangic_tarihi', 'bitis_tarihi')
+        )
+        return instance
+
     class Meta:
         verbose_name = "İlaç"
         verbose_name_plural = "İlaçlar"
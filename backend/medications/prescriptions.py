@@ -0,0 +1,182 @@
+# medications/prescriptions.py
+"""
+Toplu reçete oluşturma
+
+- Reçete listesi tek geçişte doğrulanır (hastalar tek sorguyla yüklenir), hata varsa hiçbir kayıt eklenmez
+- İlaçlar tek işlem içinde bulk_create ile eklenir
+- Her hasta için, ilaç sayısından bağımsız olarak tek bir bildirim ve tek bir SMS kaydı oluşturulur
+"""
+
+import logging
+from datetime import date, datetime, timedelta
+
+from django.db import transaction
+
+from .models import Ilac
+from .schedule import schedule_in_background
+from .signals import ilaclar_toplu_olusturuldu
+
+logger = logging.getLogger(__name__)
+
+# Tek istekte kabul edilen en fazla reçete sayısı
+MAX_BULK_PRESCRIPTIONS = 500
+
+# Bildirim/SMS metninde adı yazılacak en fazla ilaç sayısı
+MAX_NAMES_IN_MESSAGE = 5
+
+_MEAL_RELATIONS = {choice for choice, _ in Ilac.YEMEK_ILISKISI_CHOICES}
+
+
+def _parse_date(value, field):
+    if value in (None, ''):
+        return None
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(str(value), '%Y-%m-%d').date()
+    except ValueError:
+        raise ValueError(f'{field} YYYY-AA-GG formatında olmalıdır')
+
+
+def _text(item, *keys):
+    for key in keys:
+        value = item.get(key)
+        if value not in (None, ''):
+            return str(value).strip()
+    return ''
+
+
+def build_prescription(item, doctor, patients, today):
+    """Tek reçete kaydını doğrula ve kaydedilmemiş Ilac nesnesi döndür (hata varsa ValueError)"""
+    if not isinstance(item, dict):
+        raise ValueError('Her reçete bir nesne olmalıdır')
+
+    patient_id = item.get('patient_id')
+    if not patient_id:
+        raise ValueError('Hasta seçimi gereklidir')
+    try:
+        patient = patients.get(int(patient_id))
+    except (TypeError, ValueError):
+        patient = None
+    if patient is None:
+        raise ValueError('Hasta bulunamadı')
+
+    ilac_adi = _text(item, 'medication_name', 'name')
+    if not ilac_adi:
+        raise ValueError('İlaç adı gereklidir')
+    dozaj = _text(item, 'dosage')
+    if not dozaj:
+        raise ValueError('Dozaj bilgisi gereklidir')
+    kullanim_sikligi = _text(item, 'frequency')
+    if not kullanim_sikligi:
+        raise ValueError('Kullanım sıklığı gereklidir')
+
+    yemek_iliskisi = item.get('meal_relation') or 'farketmez'
+    if yemek_iliskisi not in _MEAL_RELATIONS:
+        raise ValueError(f'Geçersiz yemek ilişkisi: {yemek_iliskisi}')
+
+    baslangic_tarihi = _parse_date(item.get('start_date'), 'start_date') or today
+    bitis_tarihi = _parse_date(item.get('end_date'), 'end_date')
+    if bitis_tarihi is None and item.get('duration_days'):
+        try:
+            bitis_tarihi = baslangic_tarihi + timedelta(days=int(item['duration_days']))
+        except (TypeError, ValueError):
+            raise ValueError('duration_days sayı olmalıdır')
+    if bitis_tarihi and bitis_tarihi < baslangic_tarihi:
+        raise ValueError('Bitiş tarihi başlangıç tarihinden önce olamaz')
+
+    return Ilac(
+        hasta=patient,
+        doktor=doctor,
+        ilac_adi=ilac_adi[:200],
+        etken_madde=_text(item, 'active_ingredient')[:200],
+        dozaj=dozaj[:50],
+        kullanim_sikligi=kullanim_sikligi[:100],
+        yemek_iliskisi=yemek_iliskisi,
+        baslangic_tarihi=baslangic_tarihi,
+        bitis_tarihi=bitis_tarihi,
+        kullanim_talimatlari=_text(item, 'instructions'),
+        yan_etkiler=_text(item, 'side_effects'),
+        uyarilar=_text(item, 'warnings'),
+        aktif=True,
+    )
+
+
+def validate_prescriptions(items, doctor):
+    """Tüm reçeteleri doğrula: (ilaclar, hatalar) - hatalar [{'index': i, 'error': ...}]"""
+    from patients.models import Patient
+
+    patient_ids = set()
+    for item in items:
+        try:
+            patient_ids.add(int(item.get('patient_id')))
+        except (AttributeError, TypeError, ValueError):
+            pass
+    patients = Patient.objects.select_related('user').in_bulk(patient_ids)
+
+    today = date.today()
+    ilaclar, errors = [], []
+    for index, item in enumerate(items):
+        try:
+            ilaclar.append(build_prescription(item, doctor, patients, today))
+        except ValueError as e:
+            errors.append({'index': index, 'error': str(e)})
+    return ilaclar, errors
+
+
+def _summary(ilaclar):
+    summary = ', '.join(f'{ilac.ilac_adi} ({ilac.dozaj})' for ilac in ilaclar[:MAX_NAMES_IN_MESSAGE])
+    if len(ilaclar) > MAX_NAMES_IN_MESSAGE:
+        summary += f' ve {len(ilaclar) - MAX_NAMES_IN_MESSAGE} ilaç daha'
+    return summary
+
+
+def create_prescriptions(doctor, sender, ilaclar, notify=True, schedule_days=None):
+    """
+    Doğrulanmış ilaçları tek işlemde ekle; hasta başına tek bildirim ve tek SMS kaydı oluştur.
+    schedule_days verilirse doz takvimi commit sonrası arka planda oluşturulur.
+    """
+    from notifications.models import Bildirim
+    from sms_service.models import SMSLog
+
+    with transaction.atomic():
+        created = Ilac.objects.bulk_create(ilaclar)
+        ilaclar_toplu_olusturuldu.send(sender=Ilac, hasta_ids={ilac.hasta_id for ilac in created})
+
+        if notify:
+            by_patient = {}
+            for ilac in created:
+                by_patient.setdefault(ilac.hasta_id, []).append(ilac)
+
+            bildirimler, sms_logs = [], []
+            for patient_ilaclar in by_patient.values():
+                patient = patient_ilaclar[0].hasta
+                summary = _summary(patient_ilaclar)
+                tek = len(patient_ilaclar) == 1
+                bildirimler.append(Bildirim(
+                    gonderen=sender,
+                    gonderen_tip='doktor',
+                    alici=patient.user,
+                    alici_tip='hasta',
+                    bildirim_tipi='ilac_eklendi',
+                    baslik='Yeni İlaç Reçetesi' if tek else f'Yeni Tedavi Planı ({len(patient_ilaclar)} ilaç)',
+                    mesaj=f'{doctor.full_name} tarafından size şu ilaçlar reçete edilmiştir: {summary}',
+                    ilac=patient_ilaclar[0] if tek else None,
+                ))
+                if patient.telefon_no:
+                    sms_logs.append(SMSLog(
+                        recipient_phone=patient.telefon_no,
+                        recipient_user=patient.user,
+                        message=f"Sayın {patient.full_name}, {doctor.full_name} tarafından {summary} reçete edilmiştir.",
+                        message_type='IlacEklendi',
+                        status='Pending',
+                    ))
+
+            Bildirim.bulk_olustur(bildirimler)
+            SMSLog.bulk_create_logs(sms_logs)
+
+        if schedule_days:
+            schedule_in_background([ilac.id for ilac in created], days=schedule_days)
+
+    logger.info('Dr. %s için %s ilaç toplu eklendi', doctor.doktor_id, len(created))
+    return created
@@ -0,0 +1,113 @@
+# medications/schedule.py
+"""
+Doz takvimi üretimi
+
+Kullanım sıklığı metninden ("Günde 3 kez", "8 saatte bir") günlük doz saatleri çıkarılır ve
+ilacın aktif olduğu günler için planlanan alımlar (IlacAlimGecmisi) toplu olarak oluşturulur.
+Daha önce oluşturulmuş alımlar tekrar eklenmez, böylece üretim tekrar tekrar çalıştırılabilir.
+"""
+
+import logging
+import re
+from datetime import datetime, time, timedelta
+from functools import lru_cache
+
+from django.db import transaction
+from django.utils import timezone
+
+from akilli_ilac_backend.turkce import search_fold
+
+logger = logging.getLogger(__name__)
+
+# Varsayılan takvim uzunluğu (gün)
+DEFAULT_SCHEDULE_DAYS = 7
+
+# Sıklık belirtilmemişse/anlaşılamazsa günde 3 doz (8 saatte bir)
+DEFAULT_INTERVAL_HOURS = 8
+
+# İlk dozun saati
+FIRST_DOSE_HOUR = 8
+
+_GUNDE_RE = re.compile(r'gunde\s*(\d+)')
+_SAATTE_RE = re.compile(r'(\d+)\s*saatte')
+
+
+@lru_cache(maxsize=256)
+def daily_dose_times(kullanim_sikligi):
+    """Kullanım sıklığına göre gün içindeki doz saatleri (Ilac.get_next_dose_times ile aynı aralık kuralı, ilk doz 08:00)"""
+    metin = search_fold(kullanim_sikligi or '')
+
+    match = _GUNDE_RE.search(metin)
+    if match and int(match.group(1)) > 0:
+        interval_minutes = 24 * 60 // min(int(match.group(1)), 24)
+    else:
+        match = _SAATTE_RE.search(metin)
+        hours = int(match.group(1)) if match else DEFAULT_INTERVAL_HOURS
+        interval_minutes = max(1, min(hours, 24)) * 60
+
+    times = []
+    minute = FIRST_DOSE_HOUR * 60
+    while minute < FIRST_DOSE_HOUR * 60 + 24 * 60:
+        wrapped = minute % (24 * 60)
+        times.append(time(wrapped // 60, wrapped % 60))
+        minute += interval_minutes
+    return tuple(sorted(times))
+
+
+def planned_doses(ilac, start_date, end_date):
+    """İlacın [start_date, end_date] günleri için planlanan alım zamanları (aware datetime)"""
+    if ilac.baslangic_tarihi > start_date:
+        start_date = ilac.baslangic_tarihi
+    if ilac.bitis_tarihi and ilac.bitis_tarihi < end_date:
+        end_date = ilac.bitis_tarihi
+
+    tz = timezone.get_current_timezone()
+    times = daily_dose_times(ilac.kullanim_sikligi)
+    day = start_date
+    while day <= end_date:
+        for dose_time in times:
+            yield timezone.make_aware(datetime.combine(day, dose_time), tz)
+        day += timedelta(days=1)
+
+
+def generate_dose_schedule(ilac_ids, days=DEFAULT_SCHEDULE_DAYS, batch_size=1000):
+    """Verilen ilaçlar için bugünden itibaren `days` günlük doz takvimi oluştur, eklenen kayıt sayısını döndür"""
+    from .models import Ilac, IlacAlimGecmisi
+
+    today = timezone.localdate()
+    end_date = today + timedelta(days=max(days, 1) - 1)
+    now = timezone.now()
+
+    ilaclar = list(
+        Ilac.objects.filter(id__in=ilac_ids, aktif=True)
+        .only('id', 'hasta_id', 'kullanim_sikligi', 'baslangic_tarihi', 'bitis_tarihi')
+    )
+    if not ilaclar:
+        return 0
+
+    existing = set(
+        IlacAlimGecmisi.objects.filter(
+            ilac_id__in=[ilac.id for ilac in ilaclar],
+            planlanan_alim_tarihi__gte=timezone.make_aware(datetime.combine(today, time.min)),
+        ).values_list('ilac_id', 'planlanan_alim_tarihi')
+    )
+
+    rows = [
+        IlacAlimGecmisi(ilac_id=ilac.id, hasta_id=ilac.hasta_id, planlanan_alim_tarihi=planned)
+        for ilac in ilaclar
+        for planned in planned_doses(ilac, today, end_date)
+        if planned >= now and (ilac.id, planned) not in existing
+    ]
+    with transaction.atomic():
+        IlacAlimGecmisi.objects.bulk_create(rows, batch_size=batch_size)
+
+    logger.info('%s ilaç için %s planlanan alım oluşturuldu', len(ilaclar), len(rows))
+    return len(rows)
+
+
+def schedule_in_background(ilac_ids, days=DEFAULT_SCHEDULE_DAYS):
+    """İşlem commit edildikten sonra doz takvimi üretimini görev kuyruğuna gönder (sms_service/jobs.py, run_jobs)"""
+    from .tasks import generate_dose_schedules
+
+    ilac_ids = list(ilac_ids)
+    transaction.on_commit(lambda: generate_dose_schedules.delay(ilac_ids, days))
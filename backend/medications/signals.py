@@ -0,0 +1,6 @@
+# medications/signals.py
+
+from django.dispatch import Signal
+
+# bulk_create sinyal tetiklemediği için toplu ilaç eklemelerinden sonra gönderilir (hasta_ids)
+ilaclar_toplu_olusturuldu = Signal()
@@ -0,0 +1,22 @@
+# medications/tasks.py
+
+from sms_service.jobs import shared_task
+import logging
+
+from .schedule import DEFAULT_SCHEDULE_DAYS, generate_dose_schedule
+
+logger = logging.getLogger(__name__)
+
+
+@shared_task
+def generate_dose_schedules(ilac_ids, days=DEFAULT_SCHEDULE_DAYS):
+    """
+    Yeni reçete edilen ilaçlar için doz takvimi oluştur
+    """
+    try:
+        created = generate_dose_schedule(ilac_ids, days=days)
+        return {'success': True, 'created': created}
+    except Exception as e:
+        error_msg = f"Doz takvimi oluşturma hatası: {str(e)}"
+        logger.error(error_msg)
+        return {'success': False, 'error': error_msg}
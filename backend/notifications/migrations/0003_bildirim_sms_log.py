@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2025-08-20 14:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0004_deliveryreceipt_smslog_receipt_at_and_more'),
+        ('notifications', '0002_bildirim_sms_durum_bildirim_sms_hata_mesaji'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bildirim',
+            name='sms_log',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='bildirimler', to='sms_service.smslog', verbose_name='SMS Kaydı'),
+        ),
+    ]
@@ -0,0 +1,62 @@
+# Generated by Django 4.2.7 on 2025-08-21 11:30
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+from django.db.models import Count, Q
+
+
+def sayaclari_doldur(apps, schema_editor):
+    """Mevcut bildirimlerden kullanıcı sayaçlarını tek gruplu sorguyla oluştur"""
+    Bildirim = apps.get_model('notifications', 'Bildirim')
+    BildirimSayaci = apps.get_model('notifications', 'BildirimSayaci')
+
+    satirlar = (
+        Bildirim.objects.filter(aktif=True)
+        .values('alici_id')
+        .annotate(
+            toplam=Count('id'),
+            okunmamis=Count('id', filter=Q(okundu=False)),
+            acil_okunmamis=Count('id', filter=Q(okundu=False, oncelik='acil')),
+        )
+        .order_by()
+    )
+    BildirimSayaci.objects.bulk_create(
+        [
+            BildirimSayaci(
+                user_id=satir['alici_id'],
+                toplam=satir['toplam'],
+                okunmamis=satir['okunmamis'],
+                acil_okunmamis=satir['acil_okunmamis'],
+            )
+            for satir in satirlar.iterator()
+        ],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('accounts', '0001_initial'),
+        ('notifications', '0003_bildirim_sms_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BildirimSayaci',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='bildirim_sayaci', serialize=False, to=settings.AUTH_USER_MODEL, verbose_name='Kullanıcı')),
+                ('toplam', models.PositiveIntegerField(default=0, verbose_name='Toplam Bildirim')),
+                ('okunmamis', models.PositiveIntegerField(default=0, verbose_name='Okunmamış Bildirim')),
+                ('acil_okunmamis', models.PositiveIntegerField(default=0, verbose_name='Okunmamış Acil Bildirim')),
+                ('surum', models.PositiveBigIntegerField(default=0, verbose_name='Sürüm')),
+                ('guncellenme_tarihi', models.DateTimeField(auto_now=True, verbose_name='Güncellenme Tarihi')),
+            ],
+            options={
+                'verbose_name': 'Bildirim Sayacı',
+                'verbose_name_plural': 'Bildirim Sayaçları',
+            },
+        ),
+        migrations.RunPython(sayaclari_doldur, migrations.RunPython.noop),
+    ]
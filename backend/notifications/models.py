@@ -1,5 +1,6 @@
 #notifications/models.py
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from django.utils import timezone
 from django.contrib.auth import get_user_model
 
@@ -183,13 +184,23 @@ class Bildirim(models.Model):
         blank=True,
         verbose_name="SMS Hata Mesajı"
     )
+    
+    # Teslim raporlarının bildirime yansıtılması için gönderilen SMS kaydı
+    sms_log = models.ForeignKey(
+        'sms_service.SMSLog',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        verbose_name="SMS Kaydı",
+        related_name='bildirimler'
+    )
 
 # Mevcut @classmethod metodlarınızın SONUNA şu metodları ekleyin:
 
     @classmethod
-    def create_doctor_message(cls, doktor_user, hasta_user, baslik, mesaj, oncelik='normal'):
+    def create_doctor_message(cls, doktor_user, hasta_user, baslik, mesaj, oncelik='normal', sms_lane=None):
         """
-        Doktor mesajı bildirimi oluştur ve SMS gönder
+        Doktor mesajı bildirimi oluştur ve SMS'i kuyruğa ekle
         """
         # Bildirim oluştur
         bildirim = cls.objects.create(
@@ -205,7 +216,7 @@ class Bildirim(models.Model):
         
         # SMS gönder
         try:
-            bildirim.send_sms_notification()
+            bildirim.send_sms_notification(lane=sms_lane)
         except Exception as e:
             import logging
             logger = logging.getLogger(__name__)
@@ -213,13 +224,13 @@ class Bildirim(models.Model):
         
         return bildirim
     
-    def send_sms_notification(self):
+    def send_sms_notification(self, lane=None):
         """
-        Bu bildirim için SMS gönder
+        Bu bildirim için SMS'i gönderim kuyruğuna ekle.
+        Şerit verilmezse bildirim önceliğinden belirlenir (acil -> acil şerit, dusuk -> toplu şerit).
         """
         try:
-            # SMS service import et
-            from sms_service.services import sms_service
+            from sms_service.outbound import enqueue_sms
             
             # Hasta telefon numarasını al
             patient_phone = None
@@ -232,28 +243,25 @@ class Bildirim(models.Model):
                 return False
             
             # SMS mesajını oluştur
-            if self.gonderen:
+            if self.gonderen and self.gonderen_tip == 'doktor':
                 sms_message = f"Dr. {self.gonderen.get_full_name()}: {self.mesaj}"
             else:
                 sms_message = self.mesaj
             
-            # SMS gönder
-            result = sms_service.send_sms(
+            sms_log = enqueue_sms(
                 phone_number=patient_phone,
                 message=sms_message,
                 user=self.alici,
-                message_type='DoktorMesaj'
+                message_type='AcilDurum' if self.oncelik == 'acil' else 'DoktorMesaj',
+                lane=lane,
+                oncelik=self.oncelik
             )
             
-            if result['success']:
-                self.mark_sms_sent()
-                return True
-            else:
-                # SMS hatası için alanlar güncelle
-                self.sms_durum = 'failed'
-                self.sms_hata_mesaji = result.get('error', '')
-                self.save()
-                return False
+            # Gönderim sonucu ve teslim raporları bildirime sms_log üzerinden yansır
+            self.sms_log = sms_log
+            self.sms_durum = 'pending'
+            self.save(update_fields=['sms_log', 'sms_durum'])
+            return True
                 
         except Exception as e:
             import logging
@@ -275,6 +283,39 @@ class Bildirim(models.Model):
     def __str__(self):
         return f"{self.baslik} - {self.alici.username}"
     
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Sayaç güncellemesi için yüklenen durum saklanır (bkz. signals.py)
+        instance._sayac_durumu = instance.sayac_durumu()
+        return instance
+    
+    def sayac_durumu(self):
+        """Bildirimin sayaçlara katkısı: (toplam, okunmamış, acil okunmamış)"""
+        if not self.aktif:
+            return (0, 0, 0)
+        okunmamis = 0 if self.okundu else 1
+        return (1, okunmamis, okunmamis if self.oncelik == 'acil' else 0)
+    
+    @classmethod
+    def bulk_olustur(cls, bildirimler, batch_size=500):
+        """
+        Toplu bildirim oluştur.
+        bulk_create sinyal tetiklemediği için sayaçlar burada kullanıcı başına tek sorguyla güncellenir.
+        """
+        olusturulan = cls.objects.bulk_create(bildirimler, batch_size=batch_size)
+        
+        farklar = {}
+        for bildirim in olusturulan:
+            toplam, okunmamis, acil = bildirim.sayac_durumu()
+            onceki = farklar.get(bildirim.alici_id, (0, 0, 0))
+            farklar[bildirim.alici_id] = (onceki[0] + toplam, onceki[1] + okunmamis, onceki[2] + acil)
+            bildirim._sayac_durumu = (toplam, okunmamis, acil)
+        
+        for user_id, (toplam, okunmamis, acil) in farklar.items():
+            BildirimSayaci.degistir(user_id, toplam=toplam, okunmamis=okunmamis, acil_okunmamis=acil)
+        return olusturulan
+    
     @property
     def is_urgent(self):
         """Acil bildirim mi"""
@@ -295,11 +336,16 @@ class Bildirim(models.Model):
             self.okunma_tarihi = timezone.now()
             self.save(update_fields=['okundu', 'okunma_tarihi'])
     
-    def mark_sms_sent(self):
+    def mark_sms_sent(self, sms_log_id=None):
         """SMS gönderildi olarak işaretle"""
         self.sms_gonderildi = True
         self.sms_gonderim_tarihi = timezone.now()
-        self.save(update_fields=['sms_gonderildi', 'sms_gonderim_tarihi'])
+        self.sms_durum = 'sent'
+        update_fields = ['sms_gonderildi', 'sms_gonderim_tarihi', 'sms_durum']
+        if sms_log_id:
+            self.sms_log_id = sms_log_id
+            update_fields.append('sms_log')
+        self.save(update_fields=update_fields)
     
     def mark_email_sent(self):
         """Email gönderildi olarak işaretle"""
@@ -353,6 +399,125 @@ class Bildirim(models.Model):
         )
 
 
+class BildirimSayaci(models.Model):
+    """
+    Kullanıcı başına bildirim sayaçları - istatistikler COUNT sorgusu yerine buradan okunur.
+    Bildirim sinyalleri tarafından güncel tutulur; surum her değişiklikte artar ve anlık bildirim
+    kanalı (push.py) istemcilere sadece surum değiştiğinde veri gönderir.
+    """
+    
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='bildirim_sayaci',
+        verbose_name="Kullanıcı"
+    )
+    
+    toplam = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Toplam Bildirim"
+    )
+    
+    okunmamis = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Okunmamış Bildirim"
+    )
+    
+    acil_okunmamis = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Okunmamış Acil Bildirim"
+    )
+    
+    surum = models.PositiveBigIntegerField(
+        default=0,
+        verbose_name="Sürüm"
+    )
+    
+    guncellenme_tarihi = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Güncellenme Tarihi"
+    )
+
+    class Meta:
+        verbose_name = "Bildirim Sayacı"
+        verbose_name_plural = "Bildirim Sayaçları"
+        
+    def __str__(self):
+        return f"{self.user_id} - {self.okunmamis}/{self.toplam}"
+    
+    @property
+    def okunan(self):
+        return self.toplam - self.okunmamis
+    
+    def as_dict(self):
+        return {
+            'total': self.toplam,
+            'read': self.okunan,
+            'unread': self.okunmamis,
+            'urgent_unread': self.acil_okunmamis,
+            'version': self.surum,
+        }
+    
+    @classmethod
+    def hesapla(cls, user_id):
+        """Sayaçları Bildirim tablosundan baştan hesapla"""
+        aktif = Bildirim.objects.filter(alici_id=user_id, aktif=True)
+        return {
+            'toplam': aktif.count(),
+            'okunmamis': aktif.filter(okundu=False).count(),
+            'acil_okunmamis': aktif.filter(okundu=False, oncelik='acil').count(),
+        }
+    
+    @classmethod
+    def getir(cls, user_id):
+        """Kullanıcının sayacını getir, yoksa hesaplayıp oluştur"""
+        sayac = cls.objects.filter(user_id=user_id).first()
+        if sayac is None:
+            sayac = cls.yeniden_hesapla(user_id)
+        return sayac
+    
+    @classmethod
+    def yeniden_hesapla(cls, user_id):
+        """Sayacı baştan hesaplayıp kaydet (tutarlılık kontrolü ve ilk oluşturma için)"""
+        with transaction.atomic():
+            sayac, created = cls.objects.select_for_update().get_or_create(
+                user_id=user_id, defaults=cls.hesapla(user_id)
+            )
+            if not created:
+                for alan, deger in cls.hesapla(user_id).items():
+                    setattr(sayac, alan, deger)
+                sayac.surum += 1
+                sayac.save()
+        cls._yayinla(user_id)
+        return sayac
+    
+    @classmethod
+    def degistir(cls, user_id, toplam=0, okunmamis=0, acil_okunmamis=0, olustur=True):
+        """Sayaçları fark kadar değiştir (tek UPDATE, yarış koşulu yok)"""
+        if not (toplam or okunmamis or acil_okunmamis):
+            return
+        guncellenen = cls.objects.filter(user_id=user_id).update(
+            toplam=F('toplam') + toplam,
+            okunmamis=F('okunmamis') + okunmamis,
+            acil_okunmamis=F('acil_okunmamis') + acil_okunmamis,
+            surum=F('surum') + 1,
+            guncellenme_tarihi=timezone.now(),
+        )
+        if not guncellenen:
+            # İlk bildirim: sayaç yok, mevcut kayıtlardan hesaplanarak oluşturulur
+            if olustur:
+                cls.yeniden_hesapla(user_id)
+            return
+        cls._yayinla(user_id)
+    
+    @staticmethod
+    def _yayinla(user_id):
+        """Değişikliği işlem tamamlanınca anlık bildirim kanalına duyur"""
+        from .push import yayinla
+        transaction.on_commit(lambda: yayinla(user_id))
+
+
 class SistemAyarlari(models.Model):
     """
     Sistem ayarları modeli - SQLite için optimize edilmiş
@@ -0,0 +1,189 @@
+# notifications/push.py
+"""
+Anlık bildirim kanalı (SSE / long-poll)
+
+- BildirimSayaci her değiştiğinde yayinla() çağrılır: aynı süreçteki bağlı istemciler asyncio.Event ile
+  anında uyanır, paylaşılan cache'teki sürüm anahtarı artırılarak diğer süreçler de haberdar edilir
+- Boşta bekleyen bir istemci veritabanına sorgu atmaz; sadece belirli aralıklarla cache'teki sürümü okur
+- Cache süreçler arası paylaşılmıyorsa (LocMemCache) sayaç sürümü seyrek aralıklarla veritabanından kontrol edilir
+"""
+
+import asyncio
+import logging
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+SURUM_ANAHTARI = 'bildirim_surum:{user_id}'
+
+# Paylaşılan cache sürümünün kontrol aralığı (saniye)
+KONTROL_ARALIGI = 5
+
+# SSE bağlantısını canlı tutmak için yorum satırı gönderme aralığı (saniye)
+NABIZ_ARALIGI = 25
+
+# Cache paylaşılmıyorsa veritabanındaki sayaç sürümünün kontrol aralığı (saniye)
+DB_KONTROL_ARALIGI = 60
+
+# Tek olayda gönderilecek en fazla yeni bildirim
+OLAY_BILDIRIM_LIMITI = 50
+
+
+def _cache_paylasimli():
+    """Cache süreçler arası paylaşılıyor mu (LocMem/Dummy değilse)"""
+    backend = settings.CACHES.get('default', {}).get('BACKEND', '')
+    return not any(name in backend for name in ('locmem', 'dummy'))
+
+
+class BildirimMerkezi:
+    """Süreç içi abonelik listesi: user_id -> bekleyen istemcilerin (event loop, Event) çiftleri"""
+
+    def __init__(self):
+        self._aboneler = {}
+        self._lock = threading.Lock()
+
+    def abone_ol(self, user_id):
+        abonelik = (asyncio.get_running_loop(), asyncio.Event())
+        with self._lock:
+            self._aboneler.setdefault(user_id, set()).add(abonelik)
+        return abonelik
+
+    def ayril(self, user_id, abonelik):
+        with self._lock:
+            aboneler = self._aboneler.get(user_id)
+            if aboneler is not None:
+                aboneler.discard(abonelik)
+                if not aboneler:
+                    del self._aboneler[user_id]
+
+    def uyandir(self, user_id):
+        """Kullanıcının bu süreçteki bağlantılarını uyandır (herhangi bir thread'den çağrılabilir)"""
+        with self._lock:
+            aboneler = list(self._aboneler.get(user_id, ()))
+        for loop, event in aboneler:
+            try:
+                loop.call_soon_threadsafe(event.set)
+            except RuntimeError:
+                # Event loop kapanmış, bağlantı zaten sonlanıyor
+                pass
+
+    @property
+    def baglanti_sayisi(self):
+        with self._lock:
+            return sum(len(aboneler) for aboneler in self._aboneler.values())
+
+
+merkez = BildirimMerkezi()
+
+
+def yayinla(user_id):
+    """Kullanıcının bildirimleri değişti: bağlı istemcileri ve diğer süreçleri haberdar et"""
+    anahtar = SURUM_ANAHTARI.format(user_id=user_id)
+    try:
+        cache.incr(anahtar)
+    except ValueError:
+        cache.set(anahtar, 1, None)
+    except Exception as e:
+        logger.warning(f"Bildirim sürümü cache'e yazılamadı: {e}")
+    merkez.uyandir(user_id)
+
+
+def bildirim_ozeti(bildirim):
+    """İstemciye gönderilen bildirim verisi (PatientNotificationsView ile aynı alanlar)"""
+    return {
+        'id': bildirim.id,
+        'title': bildirim.baslik,
+        'message': bildirim.mesaj,
+        'type': bildirim.bildirim_tipi,
+        'priority': bildirim.oncelik,
+        'is_read': bildirim.okundu,
+        'sent_date': bildirim.gonderim_tarihi.strftime('%Y-%m-%d %H:%M'),
+        'sender_type': bildirim.gonderen_tip,
+        'is_urgent': bildirim.is_urgent,
+    }
+
+
+def durum_getir(user_id, son_bildirim_id=None):
+    """
+    Sayaçları ve son_bildirim_id'den sonra gelen bildirimleri getir.
+    son_bildirim_id None ise sadece en son bildirim id'si belirlenir.
+    """
+    from .models import Bildirim, BildirimSayaci
+
+    sayac = BildirimSayaci.getir(user_id).as_dict()
+    aktif = Bildirim.objects.filter(alici_id=user_id, aktif=True)
+
+    if son_bildirim_id is None:
+        son_bildirim_id = aktif.order_by('-id').values_list('id', flat=True).first() or 0
+        return sayac, [], son_bildirim_id
+
+    yeni = list(aktif.filter(id__gt=son_bildirim_id).order_by('id')[:OLAY_BILDIRIM_LIMITI])
+    if yeni:
+        son_bildirim_id = yeni[-1].id
+    return sayac, [bildirim_ozeti(b) for b in yeni], son_bildirim_id
+
+
+def sayac_surumu(user_id):
+    """Sadece sayaç sürümü (birincil anahtar üzerinden tek satır)"""
+    from .models import BildirimSayaci
+    return BildirimSayaci.objects.filter(user_id=user_id).values_list('surum', flat=True).first()
+
+
+durum_getir_async = sync_to_async(durum_getir)
+sayac_surumu_async = sync_to_async(sayac_surumu)
+
+
+class DegisiklikBekleyici:
+    """
+    Bir kullanıcının bildirimlerinde değişiklik olana kadar veritabanına dokunmadan bekler.
+    SSE ve long-poll görünümleri ortak kullanır.
+    """
+
+    def __init__(self, user_id, surum):
+        self.user_id = user_id
+        self.surum = surum
+        self._anahtar = SURUM_ANAHTARI.format(user_id=user_id)
+        self._cache_surumu = None
+        self._db_kontrolu = not _cache_paylasimli()
+        self._son_db_kontrolu = time.monotonic()
+        self._abonelik = None
+
+    async def __aenter__(self):
+        self._abonelik = merkez.abone_ol(self.user_id)
+        self._cache_surumu = await cache.aget(self._anahtar)
+        return self
+
+    async def __aexit__(self, *exc):
+        merkez.ayril(self.user_id, self._abonelik)
+
+    async def bekle(self, sure):
+        """En fazla `sure` saniye bekle; değişiklik olduysa True döner"""
+        event = self._abonelik[1]
+        bitis = time.monotonic() + sure
+        while True:
+            kalan = bitis - time.monotonic()
+            if kalan <= 0:
+                return False
+            try:
+                await asyncio.wait_for(event.wait(), timeout=min(kalan, KONTROL_ARALIGI))
+                event.clear()
+                return True
+            except asyncio.TimeoutError:
+                pass
+
+            # Başka süreçte yayınlanan değişiklik
+            cache_surumu = await cache.aget(self._anahtar)
+            if cache_surumu != self._cache_surumu:
+                self._cache_surumu = cache_surumu
+                return True
+
+            if self._db_kontrolu and time.monotonic() - self._son_db_kontrolu >= DB_KONTROL_ARALIGI:
+                self._son_db_kontrolu = time.monotonic()
+                surum = await sayac_surumu_async(self.user_id)
+                if surum is not None and surum != self.surum:
+                    return True
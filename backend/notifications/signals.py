@@ -0,0 +1,40 @@
+# notifications/signals.py
+
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Bildirim, BildirimSayaci
+
+_BOS_DURUM = (0, 0, 0)
+
+
+@receiver(post_save, sender=Bildirim)
+def bildirim_sayaclarini_guncelle(sender, instance, created, **kwargs):
+    """Oluşturma, okunma ve pasifleştirmeyi kullanıcı sayaçlarına yansıt"""
+    onceki = _BOS_DURUM if created else getattr(instance, '_sayac_durumu', None)
+    yeni = instance.sayac_durumu()
+    instance._sayac_durumu = yeni
+
+    if onceki is None:
+        # Veritabanından yüklenmemiş bir nesne güncellendi, önceki durum bilinmiyor
+        BildirimSayaci.yeniden_hesapla(instance.alici_id)
+        return
+
+    BildirimSayaci.degistir(
+        instance.alici_id,
+        toplam=yeni[0] - onceki[0],
+        okunmamis=yeni[1] - onceki[1],
+        acil_okunmamis=yeni[2] - onceki[2],
+    )
+
+
+@receiver(post_delete, sender=Bildirim)
+def silinen_bildirimi_dus(sender, instance, **kwargs):
+    onceki = getattr(instance, '_sayac_durumu', None) or instance.sayac_durumu()
+    BildirimSayaci.degistir(
+        instance.alici_id,
+        toplam=-onceki[0],
+        okunmamis=-onceki[1],
+        acil_okunmamis=-onceki[2],
+        olustur=False,  # Kullanıcı silinirken sayaç yeniden oluşturulmasın
+    )
@@ -1,3 +1,93 @@
+from django.db.models import Count, Q
 from django.test import TestCase
+from django.urls import reverse
+from rest_framework_simplejwt.tokens import AccessToken
 
-# Create your tests here.
+from accounts.models import User
+from notifications.models import Bildirim, BildirimSayaci
+
+
+def bildirim(alici, oncelik='normal', **kwargs):
+    return Bildirim(
+        alici=alici,
+        alici_tip='hasta',
+        gonderen_tip='sistem',
+        bildirim_tipi='genel',
+        oncelik=oncelik,
+        baslik='Bilgi',
+        mesaj='Deneme bildirimi',
+        **kwargs,
+    )
+
+
+class BildirimSayaciTests(TestCase):
+    """Sayaçlar her yazma yolundan sonra Bildirim tablosunun gruplu sayımıyla aynı kalmalı"""
+
+    def setUp(self):
+        self.hasta = User.objects.create(username='sayac-hasta', user_type='hasta')
+        self.diger = User.objects.create(username='sayac-diger', user_type='hasta')
+
+    def assertSayaclarTutarli(self):
+        gercek = {
+            satir['alici_id']: (satir['toplam'], satir['okunmamis'], satir['acil_okunmamis'])
+            for satir in Bildirim.objects.filter(aktif=True)
+            .values('alici_id')
+            .annotate(
+                toplam=Count('id'),
+                okunmamis=Count('id', filter=Q(okundu=False)),
+                acil_okunmamis=Count('id', filter=Q(okundu=False, oncelik='acil')),
+            )
+            .order_by()
+        }
+        sayaclar = {
+            sayac.user_id: (sayac.toplam, sayac.okunmamis, sayac.acil_okunmamis)
+            for sayac in BildirimSayaci.objects.all()
+        }
+        for user_id in set(gercek) | set(sayaclar):
+            self.assertEqual(sayaclar.get(user_id, (0, 0, 0)), gercek.get(user_id, (0, 0, 0)), user_id)
+
+    def test_yazma_yollari_sayaci_gunceller(self):
+        tek = bildirim(self.hasta, oncelik='acil')
+        tek.save()
+        Bildirim.bulk_olustur(
+            [bildirim(self.hasta) for _ in range(3)]
+            + [bildirim(self.diger, oncelik='acil') for _ in range(2)]
+        )
+        self.assertSayaclarTutarli()
+
+        tek.mark_as_read()
+        self.assertSayaclarTutarli()
+
+        Bildirim.objects.filter(alici=self.diger).first().delete()
+        self.assertSayaclarTutarli()
+        self.assertEqual(BildirimSayaci.getir(self.hasta.id).acil_okunmamis, 0)
+
+    def test_tumunu_okundu_isaretle(self):
+        Bildirim.bulk_olustur([bildirim(self.hasta, oncelik='acil'), bildirim(self.hasta), bildirim(self.hasta)])
+        self.client.force_login(self.hasta)
+
+        response = self.client.post(reverse('patient_notifications_mark_all_read'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(Bildirim.objects.filter(alici=self.hasta, okundu=False).exists())
+        sayac = BildirimSayaci.getir(self.hasta.id)
+        self.assertEqual((sayac.toplam, sayac.okunmamis, sayac.acil_okunmamis), (3, 0, 0))
+        self.assertSayaclarTutarli()
+
+
+class BildirimKimlikTests(TestCase):
+    """Anlık bildirim uç noktaları token'ı yalnız Authorization başlığından kabul eder"""
+
+    def setUp(self):
+        self.hasta = User.objects.create(username='poll-hasta', user_type='hasta')
+        self.token = str(AccessToken.for_user(self.hasta))
+
+    def test_baslikla_kabul(self):
+        response = self.client.get(
+            reverse('notification_poll'), {'timeout': 0}, HTTP_AUTHORIZATION=f'Bearer {self.token}'
+        )
+        self.assertEqual(response.status_code, 200)
+
+    def test_adresteki_token_reddedilir(self):
+        response = self.client.get(reverse('notification_poll'), {'timeout': 0, 'token': self.token})
+        self.assertEqual(response.status_code, 401)
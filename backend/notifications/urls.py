@@ -1,5 +1,8 @@
 from django.urls import path
+from . import views
 
 urlpatterns = [
-    # Şimdilik boş, sonra API endpoint'leri ekleyeceğiz
-]
\ No newline at end of file
+    # Anlık bildirim kanalı (ASGI)
+    path('stream/', views.notification_stream, name='notification_stream'),
+    path('poll/', views.notification_poll, name='notification_poll'),
+]
@@ -1,3 +1,144 @@
-from django.shortcuts import render
+# notifications/views.py
+"""
+Anlık bildirim uç noktaları - ASGI (akilli_ilac_backend/asgi.py) altında async çalışır,
+bekleyen bağlantılar worker thread'i ve veritabanı bağlantısı tutmaz
+"""
 
-# Create your views here.
+import json
+import logging
+import time
+
+from asgiref.sync import sync_to_async
+from django.http import HttpResponseNotAllowed, JsonResponse, StreamingHttpResponse
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+
+from .push import DegisiklikBekleyici, NABIZ_ARALIGI, durum_getir_async
+
+logger = logging.getLogger(__name__)
+
+# SSE bağlantısının en uzun açık kalma süresi; sonrasında tarayıcı otomatik yeniden bağlanır (saniye)
+BAGLANTI_OMRU = 600
+
+# Long-poll isteğinin en uzun bekleme süresi (saniye)
+LONG_POLL_MAX = 55
+
+
+def _kullanici_bul(request):
+    """
+    Authorization başlığındaki JWT ile kimlik doğrula. Token adreste kabul edilmez (erişim loglarına ve
+    geçmişe düşer); tarayıcı akışı başlık gönderebilen (fetch tabanlı) bir EventSource ile açmalıdır.
+    """
+    auth = JWTAuthentication()
+    try:
+        sonuc = auth.authenticate(request)
+        if sonuc is not None:
+            return sonuc[0]
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return None
+
+    # Oturum ile giriş yapılmışsa (admin paneli vb.)
+    if request.user.is_authenticated:
+        return request.user
+    return None
+
+
+_kullanici_bul_async = sync_to_async(_kullanici_bul)
+
+
+def _int_param(value, default=None):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _sse_olayi(olay, veri, olay_id=None):
+    satirlar = []
+    if olay_id is not None:
+        satirlar.append(f'id: {olay_id}')
+    satirlar.append(f'event: {olay}')
+    satirlar.append(f'data: {json.dumps(veri, ensure_ascii=False)}')
+    return '\n'.join(satirlar) + '\n\n'
+
+
+async def _sse_akisi(user_id, son_bildirim_id):
+    bitis = time.monotonic() + BAGLANTI_OMRU
+    async with DegisiklikBekleyici(user_id, None) as bekleyici:
+        # Abone olduktan sonra ilk durum okunur, aradaki değişiklik kaçmaz
+        sayac, yeni, son_bildirim_id = await durum_getir_async(user_id, son_bildirim_id)
+        bekleyici.surum = sayac['version']
+
+        yield 'retry: 5000\n\n'
+        for bildirim in yeni:
+            yield _sse_olayi('notification', bildirim, bildirim['id'])
+        yield _sse_olayi('counters', sayac, son_bildirim_id)
+
+        while time.monotonic() < bitis:
+            if not await bekleyici.bekle(NABIZ_ARALIGI):
+                yield ': nabiz\n\n'
+                continue
+
+            sayac, yeni, son_bildirim_id = await durum_getir_async(user_id, son_bildirim_id)
+            if sayac['version'] == bekleyici.surum and not yeni:
+                continue
+            bekleyici.surum = sayac['version']
+            for bildirim in yeni:
+                yield _sse_olayi('notification', bildirim, bildirim['id'])
+            yield _sse_olayi('counters', sayac, son_bildirim_id)
+
+
+async def notification_stream(request):
+    """
+    Server-Sent Events ile bildirim akışı
+    Olaylar: 'counters' (okunmamış/toplam sayaçları), 'notification' (yeni bildirim)
+    """
+    # Not: Django 4.2'de require_http_methods async view'ları desteklemiyor
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    user = await _kullanici_bul_async(request)
+    if user is None:
+        return JsonResponse({'success': False, 'error': 'Kimlik doğrulama gerekli'}, status=401)
+
+    # Yeniden bağlanan tarayıcı son aldığı olay id'sini (son bildirim id'si) gönderir
+    son_bildirim_id = _int_param(request.headers.get('Last-Event-ID') or request.GET.get('after_id'))
+
+    response = StreamingHttpResponse(_sse_akisi(user.id, son_bildirim_id), content_type='text/event-stream')
+    response['Cache-Control'] = 'no-cache'
+    response['X-Accel-Buffering'] = 'no'  # nginx arabelleğe almasın
+    return response
+
+
+async def notification_poll(request):
+    """
+    Long-poll: ?version=<sayaç sürümü>&after_id=<son bildirim id>&timeout=<saniye>
+    Sürüm değişene ya da süre dolana kadar bekler
+    """
+    if request.method != 'GET':
+        return HttpResponseNotAllowed(['GET'])
+
+    user = await _kullanici_bul_async(request)
+    if user is None:
+        return JsonResponse({'success': False, 'error': 'Kimlik doğrulama gerekli'}, status=401)
+
+    surum = _int_param(request.GET.get('version'))
+    son_bildirim_id = _int_param(request.GET.get('after_id'))
+    sure = min(max(_int_param(request.GET.get('timeout'), 25), 0), LONG_POLL_MAX)
+
+    async with DegisiklikBekleyici(user.id, surum) as bekleyici:
+        sayac, yeni, son_id = await durum_getir_async(user.id, son_bildirim_id)
+        degisti = surum is None or sayac['version'] != surum or bool(yeni)
+
+        if not degisti and await bekleyici.bekle(sure):
+            sayac, yeni, son_id = await durum_getir_async(user.id, son_bildirim_id)
+            degisti = sayac['version'] != surum or bool(yeni)
+
+    return JsonResponse({
+        'success': True,
+        'changed': degisti,
+        'counters': sayac,
+        'notifications': yeni,
+        'last_id': son_id,
+    })
@@ -0,0 +1,21 @@
+# patients/management/commands/rebuild_patient_search_index.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from patients import search
+
+
+class Command(BaseCommand):
+    help = 'Hasta arama anahtarlarını ve tam metin indeksini yeniden oluşturur'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000, help='Tek seferde işlenecek hasta sayısı')
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        updated = search.rebuild_index(chunk_size=options['chunk_size'])
+        elapsed = time.monotonic() - started
+        self.stdout.write(self.style.SUCCESS(
+            f'{updated} hasta indekslendi ({elapsed:.1f} sn)'
+        ))
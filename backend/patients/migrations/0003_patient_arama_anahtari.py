@@ -0,0 +1,73 @@
+# Generated by Django 4.2.7 on 2025-08-18 10:12
+
+from django.db import migrations, models
+
+FTS_TABLE = 'patients_patient_fts'
+
+
+def backfill_search_keys(apps, schema_editor):
+    """Mevcut hastaların arama anahtarlarını parça parça doldur"""
+    from patients.search import build_search_key
+
+    Patient = apps.get_model('patients', 'Patient')
+    last_id = 0
+    while True:
+        chunk = list(
+            Patient.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .only('id', 'ad', 'soyad', 'email', 'telefon_no')[:1000]
+        )
+        if not chunk:
+            break
+        for patient in chunk:
+            patient.arama_anahtari = build_search_key(
+                patient.ad, patient.soyad, patient.email, patient.telefon_no
+            )
+        Patient.objects.bulk_update(chunk, ['arama_anahtari'])
+        last_id = chunk[-1].id
+
+
+def create_search_index(apps, schema_editor):
+    """Veritabanına göre tam metin indeksini oluştur"""
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        # prefix='2 3 4' kısa ön ek aramalarını (otomatik tamamlama) hızlandırır
+        schema_editor.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} "
+            f"USING fts5(arama_anahtari, tokenize='unicode61', prefix='2 3 4')"
+        )
+        schema_editor.execute(
+            f"INSERT INTO {FTS_TABLE} (rowid, arama_anahtari) "
+            f"SELECT id, arama_anahtari FROM patients_patient WHERE arama_anahtari != ''"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        schema_editor.execute(
+            'CREATE INDEX IF NOT EXISTS patients_patient_arama_trgm '
+            'ON patients_patient USING gin (arama_anahtari gin_trgm_ops)'
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    if vendor == 'sqlite':
+        schema_editor.execute(f'DROP TABLE IF EXISTS {FTS_TABLE}')
+    elif vendor == 'postgresql':
+        schema_editor.execute('DROP INDEX IF EXISTS patients_patient_arama_trgm')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0002_patient_aktif_patient_allergies_patient_blood_type_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='arama_anahtari',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=255, verbose_name='Arama Anahtarı'),
+        ),
+        migrations.RunPython(backfill_search_keys, migrations.RunPython.noop),
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2025-08-19 09:40
+
+from django.db import migrations, models
+
+
+def backfill_telefon_e164(apps, schema_editor):
+    """Mevcut hastaların E.164 numaralarını parça parça doldur"""
+    from akilli_ilac_backend.telefon import normalize_phone
+
+    Patient = apps.get_model('patients', 'Patient')
+    last_id = 0
+    while True:
+        chunk = list(
+            Patient.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .only('id', 'telefon_no')[:2000]
+        )
+        if not chunk:
+            break
+        for patient in chunk:
+            patient.telefon_e164 = normalize_phone(patient.telefon_no)
+        Patient.objects.bulk_update(chunk, ['telefon_e164'])
+        last_id = chunk[-1].id
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0003_patient_arama_anahtari'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='telefon_e164',
+            field=models.CharField(blank=True, db_index=True, default='', editable=False, max_length=16, verbose_name='Telefon (E.164)'),
+        ),
+        migrations.RunPython(backfill_telefon_e164, migrations.RunPython.noop),
+    ]
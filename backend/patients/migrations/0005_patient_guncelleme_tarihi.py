@@ -0,0 +1,20 @@
+# Generated by Django 4.2.7 on 2025-08-29 10:15
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('patients', '0004_patient_telefon_e164'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='patient',
+            name='guncelleme_tarihi',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now, verbose_name='Güncellenme Tarihi'),
+            preserve_default=False,
+        ),
+    ]
@@ -1,6 +1,7 @@
 from django.db import models
 from django.core.validators import RegexValidator
 from accounts.models import User
+from akilli_ilac_backend.telefon import E164_MAX_LENGTH, normalize_phone
 
 class Patient(models.Model):
     """
@@ -55,6 +56,16 @@ class Patient(models.Model):
         unique=True,
         verbose_name="Telefon Numarası"
     )
+    
+    # telefon_no'nun E.164 hali (+905XXXXXXXXX) - save() içinde doldurulur, SMS eşleştirmeleri bunu kullanır
+    telefon_e164 = models.CharField(
+        max_length=E164_MAX_LENGTH,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        verbose_name="Telefon (E.164)"
+    )
         
     email = models.EmailField(
         max_length=100,
@@ -139,6 +150,22 @@ class Patient(models.Model):
         blank=True,
         verbose_name="Son Giriş"
     )
+    
+    # Liste uç noktalarının ETag'i için (bkz. akilli_ilac_backend/conditional.py)
+    guncelleme_tarihi = models.DateTimeField(
+        auto_now=True,
+        verbose_name="Güncellenme Tarihi"
+    )
+    
+    # Arama: ad, soyad, e-posta ve telefondan üretilen normalize anahtar (bkz. search.py)
+    arama_anahtari = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        db_index=True,
+        editable=False,
+        verbose_name="Arama Anahtarı"
+    )
 
     class Meta:
         verbose_name = "Hasta"
@@ -146,6 +173,31 @@ class Patient(models.Model):
             
     def __str__(self):
         return f"{self.ad} {self.soyad}"
+    
+    def save(self, *args, **kwargs):
+        self.telefon_e164 = normalize_phone(self.telefon_no)
+        
+        # Türetilmiş alanların kaynakları güncelleniyorsa kendileri de kaydedilsin (bkz. signals.py)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None:
+            from .search import SEARCH_SOURCE_FIELDS
+            update_fields = set(update_fields)
+            if SEARCH_SOURCE_FIELDS.intersection(update_fields):
+                update_fields.add('arama_anahtari')
+            if 'telefon_no' in update_fields:
+                update_fields.add('telefon_e164')
+            # auto_now alanı update_fields'ta yoksa güncellenmez
+            update_fields.add('guncelleme_tarihi')
+            kwargs['update_fields'] = update_fields
+        super().save(*args, **kwargs)
+    
+    @classmethod
+    def find_by_phone(cls, phone_number):
+        """Telefon numarasından hastayı bul (yazım biçiminden bağımsız, indeksli)"""
+        phone_e164 = normalize_phone(phone_number)
+        if not phone_e164:
+            return None
+        return cls.objects.select_related('user').filter(telefon_e164=phone_e164).first()
         
     @property
     def full_name(self):
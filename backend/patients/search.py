@@ -0,0 +1,194 @@
+# patients/search.py
+"""
+Hasta arama altyapısı
+
+- Her hasta için Türkçe'ye duyarlı normalize edilmiş bir arama anahtarı (arama_anahtari) tutulur
+- SQLite'ta bu anahtar FTS5 sanal tablosunda, PostgreSQL'de trigram (pg_trgm) indeksinde aranır
+- İndeks signals.py üzerinden her kayıt/silme işleminde artımlı olarak güncellenir
+"""
+
+import logging
+
+from django.db import connection
+
+from akilli_ilac_backend.turkce import search_tokens
+
+logger = logging.getLogger(__name__)
+
+FTS_TABLE = 'patients_patient_fts'
+
+# Arama anahtarını etkileyen alanlar
+SEARCH_SOURCE_FIELDS = frozenset({'ad', 'soyad', 'email', 'telefon_no'})
+
+_fts_available = None
+
+
+def _phone_tokens(telefon_no):
+    """Telefonu farklı yazımlarla da bulunabilecek şekilde parçala (05..., 5..., 905...)"""
+    digits = ''.join(filter(str.isdigit, telefon_no or ''))
+    if not digits:
+        return []
+
+    if digits.startswith('90'):
+        national = digits[2:]
+    elif digits.startswith('0'):
+        national = digits[1:]
+    else:
+        national = digits
+
+    tokens = [digits, national, f'0{national}', f'90{national}']
+    return list(dict.fromkeys(tokens))  # Sırayı koruyarak tekrarları at
+
+
+def build_search_key(ad, soyad, email, telefon_no):
+    """Hasta bilgilerinden arama anahtarı oluştur"""
+    tokens = []
+    tokens.extend(search_tokens(ad))
+    tokens.extend(search_tokens(soyad))
+    tokens.extend(search_tokens(email))
+    tokens.extend(_phone_tokens(telefon_no))
+    return ' '.join(dict.fromkeys(tokens))[:255]
+
+
+def build_search_key_for(patient):
+    """Patient instance'ı için arama anahtarı"""
+    return build_search_key(patient.ad, patient.soyad, patient.email, patient.telefon_no)
+
+
+def fts_available():
+    """SQLite FTS5 tablosu kullanılabilir mi (sonuç önbelleğe alınır)"""
+    global _fts_available
+    if _fts_available is None:
+        _fts_available = (
+            connection.vendor == 'sqlite'
+            and FTS_TABLE in connection.introspection.table_names()
+        )
+    return _fts_available
+
+
+def index_patient(patient_id, search_key):
+    """Tek bir hastanın FTS kaydını güncelle (PostgreSQL'de indeks kolon üzerinde, işlem gerekmez)"""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [patient_id])
+        if search_key:
+            cursor.execute(
+                f'INSERT INTO {FTS_TABLE} (rowid, arama_anahtari) VALUES (%s, %s)',
+                [patient_id, search_key]
+            )
+
+
+def remove_patient(patient_id):
+    """Hastayı FTS indeksinden çıkar"""
+    if not fts_available():
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {FTS_TABLE} WHERE rowid = %s', [patient_id])
+
+
+def rebuild_index(chunk_size=1000):
+    """Tüm arama anahtarlarını ve FTS indeksini parça parça yeniden oluştur"""
+    from .models import Patient
+
+    updated = 0
+    last_id = 0
+    while True:
+        chunk = list(
+            Patient.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .only('id', 'ad', 'soyad', 'email', 'telefon_no', 'arama_anahtari')[:chunk_size]
+        )
+        if not chunk:
+            break
+
+        for patient in chunk:
+            patient.arama_anahtari = build_search_key_for(patient)
+        Patient.objects.bulk_update(chunk, ['arama_anahtari'])
+
+        if fts_available():
+            ids = [p.id for p in chunk]
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    f'DELETE FROM {FTS_TABLE} WHERE rowid >= %s AND rowid <= %s',
+                    [ids[0], ids[-1]]
+                )
+                cursor.executemany(
+                    f'INSERT INTO {FTS_TABLE} (rowid, arama_anahtari) VALUES (%s, %s)',
+                    [(p.id, p.arama_anahtari) for p in chunk if p.arama_anahtari]
+                )
+
+        updated += len(chunk)
+        last_id = chunk[-1].id
+
+    return updated
+
+
+def _fts_query(tokens):
+    """Kelimelerden FTS5 ön ek sorgusu oluştur: "ali"* "yil"*"""
+    # Kelimeler sadece [a-z0-9] içerdiği için kaçış gerekmiyor
+    return ' '.join(f'"{token}"*' for token in tokens)
+
+
+def search_patient_ids(query, limit=20, offset=0):
+    """
+    Sorguya uyan hasta ID'lerini alaka sırasına göre döndür.
+    Her kelime ön ek olarak eşleşir (örn. "ayş yıl" -> "Ayşe Yılmaz").
+    """
+    tokens = search_tokens(query)
+    if not tokens:
+        return []
+
+    if fts_available():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}) LIMIT %s OFFSET %s',
+                [_fts_query(tokens), limit, offset]
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    from .models import Patient
+
+    queryset = Patient.objects.all()
+    for token in tokens:
+        queryset = queryset.filter(arama_anahtari__contains=token)
+
+    if connection.vendor == 'postgresql':
+        # pg_trgm GIN indeksi hem LIKE '%..%' filtresini hem benzerlik sıralamasını hızlandırır
+        from django.contrib.postgres.search import TrigramSimilarity
+        queryset = queryset.annotate(
+            benzerlik=TrigramSimilarity('arama_anahtari', ' '.join(tokens))
+        ).order_by('-benzerlik', 'id')
+    else:
+        queryset = queryset.order_by('ad', 'soyad', 'id')
+
+    return list(queryset.values_list('id', flat=True)[offset:offset + limit])
+
+
+def search_patients(query, limit=20, offset=0):
+    """Sorguya uyan hastaları alaka sırasına göre döndür"""
+    from .models import Patient
+
+    ids = search_patient_ids(query, limit=limit, offset=offset)
+    patients = Patient.objects.in_bulk(ids)
+    return [patients[pk] for pk in ids if pk in patients]
+
+
+def autocomplete(prefix, limit=10):
+    """Yazarken öneri: en alakalı hastaların kısa bilgileri"""
+    from .models import Patient
+
+    ids = search_patient_ids(prefix, limit=limit)
+    rows = {
+        row['id']: row
+        for row in Patient.objects.filter(id__in=ids).values('id', 'ad', 'soyad', 'telefon_no')
+    }
+    return [
+        {
+            'id': rows[pk]['id'],
+            'full_name': f"{rows[pk]['ad']} {rows[pk]['soyad']}",
+            'phone': rows[pk]['telefon_no'],
+        }
+        for pk in ids if pk in rows
+    ]
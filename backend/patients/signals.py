@@ -0,0 +1,27 @@
+# patients/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Patient
+from . import search
+
+
+@receiver(pre_save, sender=Patient)
+def update_patient_search_key(sender, instance, **kwargs):
+    """Kayıttan önce arama anahtarını yeniden hesapla"""
+    instance.arama_anahtari = search.build_search_key_for(instance)
+
+
+@receiver(post_save, sender=Patient)
+def update_patient_search_index(sender, instance, update_fields=None, **kwargs):
+    """Arama indeksini artımlı olarak güncelle"""
+    if update_fields is not None and not search.SEARCH_SOURCE_FIELDS.intersection(update_fields):
+        return
+    search.index_patient(instance.pk, instance.arama_anahtari)
+
+
+@receiver(post_delete, sender=Patient)
+def remove_patient_from_search_index(sender, instance, **kwargs):
+    """Silinen hastayı arama indeksinden çıkar"""
+    search.remove_patient(instance.pk)
@@ -1,3 +1,123 @@
-from django.test import TestCase
+import time
+from datetime import timedelta
 
-# Create your tests here.
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from appointments.models import Appointment
+from doctors.models import Doctor
+from medications.models import Ilac
+from patients.models import Patient
+from sms_service.models import SMSTemplate
+
+
+class ConditionalGetTests(TestCase):
+    """Okuma ağırlıklı listeler değişmeyen kaynakta ucuz 304 dönmeli, güncellemede ETag değişmeli"""
+
+    def setUp(self):
+        self.doktor = Doctor.objects.create(
+            user=User.objects.create(username='etag-doktor', user_type='doktor'),
+            ad='Etag', soyad='Doktor', uzmanlik='Dahiliye',
+        )
+        self.hasta = Patient.objects.create(
+            user=User.objects.create(username='etag-hasta', user_type='hasta'),
+            ad='Etag', soyad='Hasta', telefon_no='05330000001', adres='Merkez Mah.',
+        )
+        self.randevu = Appointment.objects.create(
+            hasta=self.hasta, doktor=self.doktor, randevu_tarihi=timezone.now() + timedelta(days=1)
+        )
+        self.ilac = Ilac.objects.create(
+            hasta=self.hasta, doktor=self.doktor, ilac_adi='İlaç', dozaj='1 tablet',
+            kullanim_sikligi='Günde 2 kez', baslangic_tarihi=timezone.localdate(),
+        )
+        self.sablon = SMSTemplate.objects.create(
+            name='etag-sablon', template_id='etag-sablon', category='Test',
+            message_template='Sayın {hasta}, {ilac} ilacınızı almayı unutmayın.',
+        )
+
+    def uc_noktalar(self):
+        """(url adı, kullanıcı, ETag'i değiştirmesi gereken güncelleme)"""
+        return [
+            ('patient_doctors', self.hasta.user, lambda: self.doktor.save()),
+            ('patient_appointments', self.hasta.user, lambda: self.randevu.save()),
+            ('patient_medications', self.hasta.user, lambda: self.ilac.save()),
+            ('doctor_appointments', self.doktor.user, lambda: self.hasta.save(update_fields=['adres'])),
+            ('sms_service:get_sms_templates', self.doktor.user, lambda: self.sablon.save()),
+        ]
+
+    def test_degismeyen_kaynak_304_ve_daha_az_sorgu(self):
+        for url_name, user, _ in self.uc_noktalar():
+            with self.subTest(url_name):
+                self.client.force_login(user)
+                with CaptureQueriesContext(connection) as tam:
+                    response = self.client.get(reverse(url_name))
+                tam_sorgu = len(tam)
+                self.assertEqual(response.status_code, 200)
+                self.assertTrue(response.has_header('ETag'))
+
+                with CaptureQueriesContext(connection) as dogrulama:
+                    tekrar = self.client.get(reverse(url_name), HTTP_IF_NONE_MATCH=response['ETag'])
+                self.assertEqual(tekrar.status_code, 304)
+                self.assertLess(len(dogrulama), tam_sorgu)
+
+    def test_guncelleme_etagi_degistirir(self):
+        for url_name, user, guncelle in self.uc_noktalar():
+            with self.subTest(url_name):
+                self.client.force_login(user)
+                etag = self.client.get(reverse(url_name))['ETag']
+                # Zaman damgaları ayrışsın (SQLite mikrosaniye saklar)
+                time.sleep(0.01)
+                guncelle()
+                response = self.client.get(reverse(url_name), HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 200)
+                self.assertNotEqual(response['ETag'], etag)
+
+    def test_sadece_buyuk_yanit_sikistirilir(self):
+        self.client.force_login(self.hasta.user)
+        url = reverse('patient_medications')
+        kucuk = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertFalse(kucuk.has_header('Content-Encoding'))
+
+        with override_settings(GZIP_MIN_SIZE=1):
+            buyuk = self.client.get(url, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(buyuk['Content-Encoding'], 'gzip')
+        self.assertLess(len(buyuk.content), len(kucuk.content))
+
+
+class PatientDoctorsTests(TestCase):
+    """Doktor listesi düz liste olarak kalmalı; sayfa bilgisi başlıklarda"""
+
+    def setUp(self):
+        for i in range(5):
+            Doctor.objects.create(
+                user=User.objects.create(username=f'liste-doktor-{i}', user_type='doktor'),
+                ad='Liste', soyad=f'Doktor{i}', uzmanlik='Kardiyoloji' if i % 2 else 'Dahiliye',
+            )
+        self.client.force_login(User.objects.create(username='liste-hasta', user_type='hasta'))
+
+    def test_varsayilan_yanit_tum_doktorlarin_listesi(self):
+        response = self.client.get(reverse('patient_doctors'))
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertIsInstance(data, list)
+        self.assertEqual(len(data), 5)
+        self.assertEqual(
+            set(data[0]), {'id', 'name', 'specialty', 'address', 'phone', 'working_hours', 'diploma_no'}
+        )
+        self.assertEqual(response['X-Total-Count'], '5')
+
+    def test_sayfali_istek_basliklarla(self):
+        response = self.client.get(reverse('patient_doctors'), {'page': 2, 'per_page': 2})
+        self.assertEqual(len(response.json()), 2)
+        self.assertEqual((response['X-Total-Count'], response['X-Has-Next']), ('5', 'true'))
+
+        response = self.client.get(reverse('patient_doctors'), {'specialty': 'kardiyoloji'})
+        self.assertEqual(len(response.json()), 2)
+
+    def test_uzmanliklar(self):
+        response = self.client.get(reverse('patient_doctor_specialties'))
+        self.assertEqual(response.json(), [{'name': 'Dahiliye', 'count': 3}, {'name': 'Kardiyoloji', 'count': 2}])
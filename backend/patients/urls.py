@@ -8,6 +8,7 @@ urlpatterns = [
     
     # Doktor listesi
     path('doctors/', views.PatientDoctorsView.as_view(), name='patient_doctors'),
+    path('doctors/specialties/', views.PatientDoctorSpecialtiesView.as_view(), name='patient_doctor_specialties'),
     
     # Randevu işlemleri
     path('appointments/', views.PatientAppointmentsView.as_view(), name='patient_appointments'),
@@ -22,6 +23,10 @@ urlpatterns = [
     
     path('notifications/statistics/', views.patient_notifications_statistics, name='patient_notifications_statistics'),
     path('notifications/mark_all_read/', views.patient_notifications_mark_all_read, name='patient_notifications_mark_all_read'),
+    
+    # Hasta arama (doktorlar için)
+    path('search/', views.PatientSearchView.as_view(), name='patient_search'),
+    path('search/autocomplete/', views.PatientAutocompleteView.as_view(), name='patient_search_autocomplete'),
 
     
 ]
\ No newline at end of file
@@ -4,14 +4,73 @@ from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.views import APIView
 from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import Count, Q
 from django.utils import timezone
-from datetime import datetime
+from django.utils.decorators import method_decorator
+from datetime import date, datetime, timedelta
+from akilli_ilac_backend.conditional import conditional, fingerprint
 from .models import Patient
+from doctors import directory as doctor_directory
 from doctors.models import Doctor
 from appointments.models import Appointment
+from appointments import availability
 from medications.models import Ilac
-from notifications.models import Bildirim
+from notifications.models import Bildirim, BildirimSayaci
 from .serializers import PatientSerializer
+from . import search
+
+# Arama sonuçlarında tek seferde dönebilecek en fazla kayıt
+SEARCH_MAX_LIMIT = 100
+
+# Doktor rehberi sayfa boyutu (varsayılan / en fazla)
+DOCTOR_DIRECTORY_PAGE_SIZE = 20
+DOCTOR_DIRECTORY_MAX_PAGE_SIZE = 100
+
+
+def _can_search_patients(user):
+    """Hasta araması sadece doktorlara ve yöneticilere açık"""
+    return user.is_staff or getattr(user, 'user_type', None) == 'Doktor'
+
+
+def _int_param(value, default, minimum=0, maximum=None):
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        return default
+    value = max(value, minimum)
+    return min(value, maximum) if maximum is not None else value
+
+
+def _patient_id(request):
+    return Patient.objects.filter(user=request.user).values_list('id', flat=True).first()
+
+
+def _doctors_etag(request, *args, **kwargs):
+    """Doktor rehberi herkes için aynı; sürümü doktor kaydedilince değişir (sorgusuz)"""
+    return (doctor_directory.surum(),)
+
+
+def _appointments_etag(request, *args, **kwargs):
+    patient_id = _patient_id(request)
+    if patient_id is None:
+        return None
+    # can_cancel randevuya 2 saat kalınca değişir (Appointment.can_be_cancelled)
+    cancel_deadline = timezone.now() + timedelta(hours=2)
+    return fingerprint(
+        Appointment.objects.filter(hasta_id=patient_id), 'guncelleme_tarihi', 'doktor__updated_at',
+        kapanan=Count('pk', filter=Q(randevu_tarihi__lte=cancel_deadline)),
+    )
+
+
+def _medications_etag(request, *args, **kwargs):
+    patient_id = _patient_id(request)
+    if patient_id is None:
+        return None
+    # is_current / is_expired / days_remaining gün değişince değişir
+    return fingerprint(
+        Ilac.objects.filter(hasta_id=patient_id), 'guncelleme_tarihi', 'doktor__updated_at'
+    ) + (date.today(),)
 
 class PatientProfileView(APIView):
     permission_classes = [IsAuthenticated]
@@ -42,34 +101,49 @@ class PatientProfileView(APIView):
 class PatientDoctorsView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(conditional(_doctors_etag))
     def get(self, request):
+        """
+        Doktor rehberi (?specialty=, ?q=) - cache'teki hazır rehberden. Yanıt eskisi gibi düz listedir;
+        ?page= / ?per_page= verilirse o sayfa döner, toplam ve sonraki sayfa bilgisi başlıklarda
+        """
         try:
-            doctors = Doctor.objects.filter(is_active=True)
-            doctor_list = []
-            for doctor in doctors:
-                doctor_data = {
-                    'id': doctor.doktor_id,
-                    'name': doctor.full_name,
-                    'specialty': doctor.uzmanlik,
-                    'address': doctor.muayenehane_adresi,
-                    'phone': doctor.telefon_no,
-                    'working_hours': doctor.get_calisma_saatleri(),
-                    'diploma_no': doctor.diploma_no
-                }
-                doctor_list.append(doctor_data)
-            return Response(doctor_list)
+            sayfali = 'page' in request.GET or 'per_page' in request.GET
+            page = _int_param(request.GET.get('page'), 1, minimum=1)
+            per_page = _int_param(request.GET.get('per_page'), DOCTOR_DIRECTORY_PAGE_SIZE, minimum=1,
+                                  maximum=DOCTOR_DIRECTORY_MAX_PAGE_SIZE)
+            result = doctor_directory.ara(
+                uzmanlik=request.GET.get('specialty', '').strip(),
+                sorgu=request.GET.get('q', '').strip(),
+                sayfa=page,
+                sayfa_boyutu=per_page if sayfali else None,
+            )
+            response = Response(result['doctors'])
+            response['X-Total-Count'] = result['total']
+            if sayfali:
+                response['X-Has-Next'] = 'true' if result['has_next'] else 'false'
+            return response
         except Exception as e:
             return Response({
                 'error': f'Doktor listesi getirilemedi: {str(e)}'
             }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
+class PatientDoctorSpecialtiesView(APIView):
+    permission_classes = [IsAuthenticated]
+    
+    @method_decorator(conditional(_doctors_etag))
+    def get(self, request):
+        """Rehberdeki uzmanlıklar ve doktor sayıları (?specialty= filtresi için)"""
+        return Response(doctor_directory.uzmanliklar())
+
 class PatientAppointmentsView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(conditional(_appointments_etag))
     def get(self, request):
         try:
             patient = get_object_or_404(Patient, user=request.user)
-            appointments = Appointment.objects.filter(hasta=patient).order_by('-randevu_tarihi')
+            appointments = Appointment.objects.filter(hasta=patient).select_related('doktor').order_by('-randevu_tarihi')
             appointment_list = []
             for appointment in appointments:
                 appointment_data = {
@@ -124,15 +198,41 @@ class PatientAppointmentsView(APIView):
                 return Response({
                     'error': 'Geçmiş tarihe randevu oluşturamazsınız'
                 }, status=status.HTTP_400_BAD_REQUEST)
-            appointment = Appointment.objects.create(
-                hasta=patient,
-                doktor=doctor,
-                randevu_tarihi=appointment_date,
-                randevu_suresi=request.data.get('duration', 30),
-                randevu_tipi=request.data.get('appointment_type', 'Muayene'),
-                hasta_notlari=request.data.get('notes', ''),
-                online_randevu_mu=request.data.get('is_online', False)
-            )
+            try:
+                duration = int(request.data.get('duration', 30))
+            except (TypeError, ValueError):
+                duration = 0
+            if not 1 <= duration <= 240:
+                return Response({
+                    'error': 'Randevu süresi 1-240 dakika arasında olmalıdır'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            appointment_end = appointment_date + timedelta(minutes=duration)
+            if not availability.calisma_saatinde_mi(doctor, appointment_date, appointment_end):
+                return Response({
+                    'error': 'Seçilen saat doktorun çalışma saatleri dışında'
+                }, status=status.HTTP_400_BAD_REQUEST)
+            conflict_response = Response({
+                'error': 'Bu saatte doktorun başka bir randevusu bulunmaktadır'
+            }, status=status.HTTP_400_BAD_REQUEST)
+            # Dolu slot talepleri cache'ten, kilit ve sorgu olmadan reddedilir
+            if availability.cakisma_var_mi(doctor.doktor_id, appointment_date, duration):
+                return conflict_response
+            with transaction.atomic():
+                # Aynı doktora eşzamanlı iki talep aynı slotu alamasın diye doktor satırı kilitlenir
+                Doctor.objects.select_for_update().only('doktor_id').get(doktor_id=doctor.doktor_id)
+                # Kilit altında veritabanından tekrar bakılır: önceki talebin commit'i ile cache silinmesi arasında
+                # cache'e eski veri yazılmış olabilir; bu okuma cache'i de tazeler
+                if availability.cakisma_var_mi(doctor.doktor_id, appointment_date, duration, cache_kullan=False):
+                    return conflict_response
+                appointment = Appointment.objects.create(
+                    hasta=patient,
+                    doktor=doctor,
+                    randevu_tarihi=appointment_date,
+                    randevu_suresi=duration,
+                    randevu_tipi=request.data.get('appointment_type', 'Muayene'),
+                    hasta_notlari=request.data.get('notes', ''),
+                    online_randevu_mu=request.data.get('is_online', False)
+                )
             Bildirim.objects.create(
                 gonderen=request.user,
                 gonderen_tip='hasta',
@@ -196,10 +296,11 @@ class PatientAppointmentsView(APIView):
 class PatientMedicationsView(APIView):
     permission_classes = [IsAuthenticated]
     
+    @method_decorator(conditional(_medications_etag))
     def get(self, request):
         try:
             patient = get_object_or_404(Patient, user=request.user)
-            medications = Ilac.objects.filter(hasta=patient).order_by('-olusturulma_tarihi')
+            medications = Ilac.objects.filter(hasta=patient).select_related('doktor').order_by('-olusturulma_tarihi')
             medication_list = []
             for medication in medications:
                 medication_data = {
@@ -279,16 +380,14 @@ class PatientNotificationsView(APIView):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def patient_notifications_statistics(request):
-    user = request.user
-    total = Bildirim.objects.filter(alici=user, aktif=True).count()
-    read = Bildirim.objects.filter(alici=user, aktif=True, okundu=True).count()
-    unread = Bildirim.objects.filter(alici=user, aktif=True, okundu=False).count()
+    # Sayaçlar bildirim sinyalleriyle güncel tutulur, COUNT sorgusu yok
+    sayac = BildirimSayaci.getir(request.user.id)
     return Response({
         "success": True,
         "statistics": {
-            "total": total,
-            "read": read,
-            "unread": unread
+            "total": sayac.toplam,
+            "read": sayac.okunan,
+            "unread": sayac.okunmamis
         }
     })
 
@@ -296,8 +395,62 @@ def patient_notifications_statistics(request):
 @permission_classes([IsAuthenticated])
 def patient_notifications_mark_all_read(request):
     user = request.user
-    updated = Bildirim.objects.filter(alici=user, aktif=True, okundu=False).update(okundu=True)
+    now = timezone.now()
+    unread = Bildirim.objects.filter(alici=user, aktif=True, okundu=False)
+    # Toplu update sinyal tetiklemez; sayaç farkı için acil olanlar ayrı güncellenir.
+    # İki UPDATE ve sayaç tek işlemde: yarıda kalan istek sayacı tablodan ayırmaz
+    with transaction.atomic():
+        urgent = unread.filter(oncelik='acil').update(okundu=True, okunma_tarihi=now)
+        updated = urgent + unread.update(okundu=True, okunma_tarihi=now)
+        BildirimSayaci.degistir(user.id, okunmamis=-updated, acil_okunmamis=-urgent)
     return Response({
         "success": True,
         "message": f"{updated} bildirim okundu olarak işaretlendi."
     })
+
+
+class PatientSearchView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not _can_search_patients(request.user):
+            return Response({
+                'error': 'Bu işlem için yetkiniz yok'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        query = request.GET.get('q', '').strip()
+        limit = _int_param(request.GET.get('limit'), 20, minimum=1, maximum=SEARCH_MAX_LIMIT)
+        offset = _int_param(request.GET.get('offset'), 0)
+
+        patients = search.search_patients(query, limit=limit, offset=offset)
+        results = [
+            {
+                'id': patient.id,
+                'full_name': f"{patient.ad} {patient.soyad}",
+                'phone': patient.telefon_no,
+                'email': patient.email,
+                'gender': patient.cinsiyet,
+                'birth_date': patient.dogum_tarihi.strftime('%Y-%m-%d') if patient.dogum_tarihi else None,
+            }
+            for patient in patients
+        ]
+        return Response({
+            'results': results,
+            'count': len(results)
+        })
+
+
+class PatientAutocompleteView(APIView):
+    permission_classes = [IsAuthenticated]
+
+    def get(self, request):
+        if not _can_search_patients(request.user):
+            return Response({
+                'error': 'Bu işlem için yetkiniz yok'
+            }, status=status.HTTP_403_FORBIDDEN)
+
+        prefix = request.GET.get('q', '').strip()
+        limit = _int_param(request.GET.get('limit'), 10, minimum=1, maximum=20)
+        return Response({
+            'results': search.autocomplete(prefix, limit=limit)
+        })
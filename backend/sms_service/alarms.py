@@ -0,0 +1,108 @@
+# sms_service/alarms.py
+"""
+Doktor alarmlarının tetiklenmesi
+
+- Her alarm tetiklemesinin anahtarı (alarm, planlanan zaman) çiftidir; AlarmHistory'de benzersizdir
+- Tetikleme tek işlemde yapılır: alarmın next_run'ı koşullu UPDATE ile ilerletilir, SMS kuyruğa yazılır
+  (outbound.py, klinik şerit) ve geçmiş kaydı eklenir. Aynı tetiklemeyi ikinci kez almaya çalışan çalıştırma
+  0 satır günceller (ya da benzersizlik kısıtına takılır) ve hiçbir şey yapmadan geçer
+- SMS'i işlem dışında gönderici gönderir; worker tetikleme ile gönderim arasında çökerse mesaj kuyrukta kalır,
+  tekrar çalıştırma aynı tetiklemeyi yeniden göndermez
+- Gönderim sonucu (başarı, successful_sent) gönderici tarafından geçmiş kaydına yansıtılır (after_delivery)
+"""
+
+import logging
+
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .lanes import LANE_CLINICAL
+from .models import AlarmHistory, DoctorAlarm
+from .outbound import enqueue_sms
+
+logger = logging.getLogger(__name__)
+
+# Tek çalıştırmada işlenecek en fazla alarm
+DEFAULT_BATCH_SIZE = 500
+
+
+def due_alarms(now=None):
+    """Zamanı gelmiş aktif alarmlar"""
+    now = now or timezone.now()
+    return DoctorAlarm.objects.filter(status='active', next_run__lte=now).exclude(end_date__lt=now.date())
+
+
+def fire_occurrence(alarm, now=None):
+    """
+    Alarmın planlanan tetiklemesini bir kez çalıştır: SMS'i kuyruğa ekle ve geçmiş kaydını oluştur.
+    Tetikleme başka bir çalıştırma tarafından zaten alınmışsa None döner.
+    """
+    now = now or timezone.now()
+    scheduled_for = alarm.next_run
+    next_run = alarm.calculate_next_run()
+    completed = alarm.repeat_type == 'once'
+
+    try:
+        with transaction.atomic():
+            advanced = DoctorAlarm.objects.filter(pk=alarm.pk, status='active', next_run=scheduled_for).update(
+                next_run=next_run,
+                last_sent=now,
+                total_sent=F('total_sent') + 1,
+                status='completed' if completed else 'active',
+                updated_at=now,
+            )
+            if not advanced:
+                return None
+            sms_log = enqueue_sms(
+                phone_number=alarm.patient_phone,
+                message=alarm.message,
+                user=alarm.doctor,
+                message_type=alarm.alarm_type,
+                lane=LANE_CLINICAL,
+            )
+            history = AlarmHistory.objects.create(
+                alarm=alarm, scheduled_for=scheduled_for, sms_log=sms_log, sent_at=now
+            )
+    except IntegrityError:
+        # Aynı tetikleme zaten kayıtlı (alarm eski zamanda kalmış); tekrar göndermeden ilerlet
+        DoctorAlarm.objects.filter(pk=alarm.pk, next_run=scheduled_for).update(
+            next_run=next_run, status='completed' if completed else F('status'), updated_at=now
+        )
+        logger.info('Alarm tetiklemesi zaten işlenmiş: %s @ %s', alarm.id, scheduled_for)
+        return None
+
+    alarm.next_run = next_run
+    alarm.last_sent = now
+    if completed:
+        alarm.status = 'completed'
+    return history
+
+
+def fire_due_alarms(now=None, limit=DEFAULT_BATCH_SIZE):
+    """Zamanı gelen alarmları tetikle: {'due', 'fired', 'skipped', 'errors'}"""
+    now = now or timezone.now()
+    totals = {'due': 0, 'fired': 0, 'skipped': 0, 'errors': 0}
+    for alarm in due_alarms(now).select_related('doctor').order_by('next_run', 'id')[:limit]:
+        totals['due'] += 1
+        try:
+            if fire_occurrence(alarm, now):
+                totals['fired'] += 1
+            else:
+                totals['skipped'] += 1
+        except Exception:
+            logger.exception('Alarm tetikleme hatası: %s', alarm.id)
+            totals['errors'] += 1
+    return totals
+
+
+def record_delivery(sms_log, result):
+    """Alarm SMS'inin gönderim sonucunu geçmiş kaydına ve alarm sayacına yansıt (birleşik SMS'te hepsine)"""
+    histories = AlarmHistory.objects.filter(sms_log_id=sms_log.id)
+    if not result.get('success'):
+        histories.update(error_message=result.get('error') or '')
+        return
+    alarm_ids = list(histories.filter(success=False).values_list('alarm_id', flat=True))
+    # Aynı mesaj tekrar gönderilse de sayaç bir kez artar
+    if alarm_ids and histories.filter(success=False).update(success=True, error_message=''):
+        DoctorAlarm.objects.filter(id__in=alarm_ids).update(successful_sent=F('successful_sent') + 1)
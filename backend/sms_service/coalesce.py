@@ -0,0 +1,141 @@
+# sms_service/coalesce.py
+"""
+Aynı alıcıya giden mesajların birleştirilmesi
+
+- Klinik ve toplu şeritteki mesajlar kuyrukta birleştirme penceresi kadar bekletilir; gönderici bir mesajı
+  aldığında aynı numaraya bekleyen diğer mesajları da sahiplenip tek SMS olarak gönderir
+  (08:00'de beş ilaç hatırlatması -> tek SMS)
+- Birleştirilen mesajlar Coalesced durumuna geçer ve taşıyıcı SMS'i gösterir; bağlı alarm geçmişi ve bildirimler
+  taşıyıcıya aktarılır, böylece gönderim sonucu ve teslim raporları hepsine yansır
+- Acil şerit birleştirilmez ve bekletilmez; şablonlu mesajlar sağlayıcıda şablonla işlendiği için birleştirilmez
+- Birleşik metin segment sınırını aşacaksa kalan mesajlar kendi sıralarında ayrıca gönderilir
+"""
+
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Q, Sum
+from django.utils import timezone
+
+from .encoding import segment_count
+from .lanes import LANE_BULK, LANE_CLINICAL
+from .models import AlarmHistory, SMSLog
+
+logger = logging.getLogger(__name__)
+
+COALESCE_LANES = (LANE_CLINICAL, LANE_BULK)
+
+# Mesajların birleştirilmek üzere bekletildiği süre (saniye, settings.SMS_COALESCE_WINDOW_SECONDS; 0 = kapalı)
+DEFAULT_WINDOW_SECONDS = 20
+
+# Tek SMS'te birleştirilecek en fazla mesaj
+MAX_FAN_IN = 10
+
+# Birleşik SMS için segment sınırı (settings.SMS_COALESCE_MAX_SEGMENTS)
+DEFAULT_MAX_SEGMENTS = 3
+
+SEPARATOR = '\n'
+
+
+def window():
+    return timedelta(seconds=getattr(settings, 'SMS_COALESCE_WINDOW_SECONDS', DEFAULT_WINDOW_SECONDS))
+
+
+def max_segments():
+    return getattr(settings, 'SMS_COALESCE_MAX_SEGMENTS', DEFAULT_MAX_SEGMENTS)
+
+
+def merge_messages(messages):
+    """Mesajları tek metinde birleştir (aynı metin bir kez yazılır)"""
+    unique = []
+    for message in messages:
+        if message not in unique:
+            unique.append(message)
+    return SEPARATOR.join(unique)
+
+
+def coalesce(carrier, now=None, filters=None):
+    """
+    Taşıyıcı mesajla aynı numaraya bekleyen mesajları sahiplenip taşıyıcıda birleştir.
+    Birleştirilen mesaj sayısını döndürür (0 = taşıyıcı tek başına gider).
+    """
+    if carrier.lane not in COALESCE_LANES or carrier.template_id or not carrier.recipient_phone_e164:
+        return 0
+
+    from .outbound import max_age
+
+    now = now or timezone.now()
+    candidates = SMSLog.objects.filter(
+        status='Pending',
+        recipient_phone_e164=carrier.recipient_phone_e164,
+        lane__in=COALESCE_LANES,
+        template_id__isnull=True,
+        created_at__gte=now - max_age(),
+        **(filters or {})
+    ).filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+    )
+    candidates = list(
+        candidates.exclude(pk=carrier.pk).order_by('lane', 'id').values_list('id', 'message')[:MAX_FAN_IN - 1]
+    )
+
+    limit = max_segments()
+    messages = [carrier.message]
+    picked = []
+    for pk, message in candidates:
+        # Kodlamaya göre gerçek segment sayısı; tek bir Türkçe harf tüm metni UCS-2'ye düşürür
+        if segment_count(merge_messages(messages + [message])) > limit:
+            continue
+        messages.append(message)
+        picked.append(pk)
+    if not picked:
+        return 0
+
+    from notifications.models import Bildirim
+
+    with transaction.atomic():
+        merged = []
+        for pk in picked:
+            # Başka gönderici araya girdiyse mesaj atlanır
+            if SMSLog.objects.filter(pk=pk, status='Pending').filter(
+                Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+            ).update(status='Coalesced', coalesced_into=carrier, claimed_until=None):
+                merged.append(pk)
+        if not merged:
+            return 0
+
+        messages = [carrier.message] + [message for pk, message in candidates if pk in merged]
+        carrier.message = merge_messages(messages)
+        carrier.fan_in += len(merged)
+        carrier.segments = segment_count(carrier.message)
+        SMSLog.objects.filter(pk=carrier.pk).update(
+            message=carrier.message, fan_in=carrier.fan_in, segments=carrier.segments
+        )
+
+        # Gönderim sonucu ve teslim raporları taşıyıcı üzerinden yansır
+        AlarmHistory.objects.filter(sms_log_id__in=merged).update(sms_log=carrier)
+        AlarmHistory.objects.filter(sms_log=carrier).update(fan_in=carrier.fan_in)
+        Bildirim.objects.filter(sms_log_id__in=merged).update(sms_log=carrier)
+
+    logger.info('SMS %s: %s mesaj birleştirildi', carrier.id, len(merged))
+    return len(merged)
+
+
+def coalesce_stats(since=None):
+    """
+    Birleştirme özeti: {'carriers', 'coalesced', 'provider_calls_saved', 'avg_fan_in'}.
+    Birleştirilen her mesaj bir sağlayıcı çağrısı tasarrufudur.
+    """
+    since = since or timezone.now() - timedelta(days=1)
+    coalesced = SMSLog.objects.filter(status='Coalesced', created_at__gte=since).count()
+    carriers = SMSLog.objects.filter(fan_in__gt=1, created_at__gte=since).aggregate(
+        count=Count('id'), fan_in=Sum('fan_in')
+    )
+    return {
+        'carriers': carriers['count'],
+        'coalesced': coalesced,
+        'provider_calls_saved': coalesced,
+        'avg_fan_in': round(carriers['fan_in'] / carriers['count'], 2) if carriers['count'] else 1.0,
+    }
@@ -0,0 +1,443 @@
+# sms_service/cold_storage.py
+"""
+Soğuk arşiv - sorgulanabilir sütunlu segment dosyaları
+
+retention.py'nin günlük NDJSON arşivleri, günü saklama sınırının gerisinde kaldığında segmentlere
+dönüştürülür (<arşiv>/_segments/<politika>/<YYYY>/<YYYY-MM-DD>.seg); arşivi sonradan büyüyen günün segmenti
+yeniden yazılır. Segment içeriği:
+
+- Sabit genişlikli sütunlar: sayılar ve zamanlar int64 (zaman = UTC epoch mikrosaniye, boş = INT64_MIN)
+- Metin sütunları: satır başına uint32 sözlük kodu + segment sözlüğü (uint64 ofsetler ve UTF-8 blob)
+- Satırlar zamana göre sıralıdır; başlıkta min/max zaman, zaman aralığı ikili aramayla bulunur
+- Telefon (sistem loglarında kullanıcı) için bloom filtresi: numara segmentte yoksa segment hiç taranmaz
+
+Sorgular birincil veritabanına hiç dokunmaz: segment listesi _index.json'dan okunur, zaman aralığı ve bloom
+filtresiyle elenmeyen segmentler mmap ile açılıp sadece ilgili satırlar çözülür.
+"""
+
+import bisect
+import gzip
+import hashlib
+import json
+import logging
+import mmap
+import os
+import struct
+import sys
+from array import array
+from datetime import datetime, timedelta, timezone as dt_timezone
+from pathlib import Path
+
+from django.utils.dateparse import parse_datetime
+
+from akilli_ilac_backend.telefon import normalize_phone
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b'AKSEG001'
+NULL_INT = -(2 ** 63)
+NULL_CODE = 0xFFFFFFFF
+
+# Bloom filtresi: eleman başına bit ve hash sayısı (~%1 yanlış pozitif)
+BLOOM_BITS_PER_ITEM = 10
+BLOOM_HASHES = 7
+
+_EPOCH = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+# Segment şemaları: (sütun, tip) - tip: int / time / str
+SEGMENT_SCHEMAS = {
+    'sms_logs': {
+        'time': 'created_at',
+        'bloom': 'recipient_phone_e164',
+        'columns': [
+            ('id', 'int'),
+            ('created_at', 'time'),
+            ('sent_at', 'time'),
+            ('delivered_at', 'time'),
+            ('recipient_phone', 'str'),
+            ('recipient_phone_e164', 'str'),
+            ('recipient_user_id', 'int'),
+            ('message', 'str'),
+            ('message_type', 'str'),
+            ('template_id', 'str'),
+            ('message_id', 'str'),
+            ('status', 'str'),
+            ('error_message', 'str'),
+            ('retry_count', 'int'),
+        ],
+    },
+    'system_logs': {
+        'time': 'created_at',
+        'bloom': 'user_id',
+        'columns': [
+            ('log_id', 'int'),
+            ('created_at', 'time'),
+            ('user_id', 'int'),
+            ('log_level', 'str'),
+            ('kategori', 'str'),
+            ('mesaj', 'str'),
+            ('ip_adresi', 'str'),
+            ('user_agent', 'str'),
+            ('ek_bilgiler', 'str'),
+        ],
+    },
+}
+
+
+def segment_root(name, root=None):
+    from .retention import archive_root
+    return Path(root or archive_root()) / '_segments' / name
+
+
+# ==================== Kodlama ====================
+
+def _to_micros(value):
+    if value in (None, ''):
+        return NULL_INT
+    if isinstance(value, str):
+        value = parse_datetime(value)
+    return (value - _EPOCH) // timedelta(microseconds=1)
+
+
+def _from_micros(value):
+    return None if value == NULL_INT else _EPOCH + timedelta(microseconds=value)
+
+
+def _bloom_key(value):
+    return str(value).encode('utf-8')
+
+
+def _bloom_positions(key, bits):
+    digest = hashlib.blake2b(key, digest_size=16).digest()
+    h1, h2 = struct.unpack('<QQ', digest)
+    return [(h1 + i * h2) % bits for i in range(BLOOM_HASHES)]
+
+
+def _build_bloom(values):
+    keys = {_bloom_key(value) for value in values if value not in (None, '')}
+    bits = max(64, len(keys) * BLOOM_BITS_PER_ITEM)
+    bits += -bits % 8
+    filtre = bytearray(bits // 8)
+    for key in keys:
+        for position in _bloom_positions(key, bits):
+            filtre[position >> 3] |= 1 << (position & 7)
+    return bytes(filtre), bits
+
+
+def write_segment(path, name, rows):
+    """Kayıtları (attname -> değer sözlükleri) değişmez bir segment dosyasına yaz, segment özetini döndür"""
+    schema = SEGMENT_SCHEMAS[name]
+    time_field = schema['time']
+    pk_field = schema['columns'][0][0]
+    rows = sorted(rows, key=lambda row: (_to_micros(row.get(time_field)), row.get(pk_field) or 0))
+
+    body = bytearray()
+
+    def add(data):
+        body.extend(b'\0' * (-len(body) % 8))
+        offset = len(body)
+        body.extend(data)
+        return {'offset': offset, 'length': len(data)}
+
+    columns = {}
+    for column, kind in schema['columns']:
+        values = [row.get(column) for row in rows]
+        if kind in ('int', 'time'):
+            encode = _to_micros if kind == 'time' else (lambda v: NULL_INT if v is None else int(v))
+            columns[column] = {'kind': kind, 'data': add(array('q', map(encode, values)).tobytes())}
+        else:
+            sozluk, codes = {}, array('I')
+            for value in values:
+                codes.append(NULL_CODE if value is None else sozluk.setdefault(str(value), len(sozluk)))
+            encoded = [value.encode('utf-8') for value in sozluk]
+            offsets = array('Q', [0])
+            for item in encoded:
+                offsets.append(offsets[-1] + len(item))
+            columns[column] = {
+                'kind': kind,
+                'data': add(codes.tobytes()),
+                'dict_size': len(encoded),
+                'dict_offsets': add(offsets.tobytes()),
+                'dict_blob': add(b''.join(encoded)),
+            }
+
+    times = [_to_micros(row.get(time_field)) for row in rows]
+    bloom_bytes, bloom_bits = _build_bloom(row.get(schema['bloom']) for row in rows)
+    header = {
+        'table': name,
+        'byteorder': sys.byteorder,
+        'rows': len(rows),
+        'min_time': times[0] if times else None,
+        'max_time': times[-1] if times else None,
+        'columns': columns,
+        'bloom': {'column': schema['bloom'], 'bits': bloom_bits, 'data': add(bloom_bytes)},
+    }
+
+    header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+    prefix = MAGIC + struct.pack('<I', len(header_bytes)) + header_bytes
+    prefix += b'\0' * (-len(prefix) % 8)
+
+    # Yarım yazılmış segment okunmasın: geçici dosyaya yaz, sonra yerine taşı
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.seg.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(prefix)
+        f.write(body)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+    return {'file': str(path), 'rows': len(rows), 'min_time': header['min_time'], 'max_time': header['max_time']}
+
+
+# ==================== Okuma ====================
+
+class Segment:
+    """mmap ile açılmış tek segment; `with Segment(path) as segment:` ile kullanılır"""
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self._views = {}
+        self._dicts = {}
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            self.close()
+            raise ValueError(f'Geçersiz segment dosyası: {self.path}')
+        (header_length,) = struct.unpack_from('<I', self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        self.header = json.loads(self._mm[start:start + header_length])
+        if self.header['byteorder'] != sys.byteorder:
+            self.close()
+            raise ValueError(f'Segment farklı bayt sıralı bir makinede yazılmış: {self.path}')
+        self._data_start = start + header_length + (-(start + header_length) % 8)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        # mmap kapatılmadan önce üzerindeki memoryview'lar bırakılmalı
+        for view in self._views.values():
+            view.release()
+        self._views.clear()
+        self._dicts.clear()
+        if self._mm is not None:
+            self._mm.close()
+            self._mm = None
+        self._file.close()
+
+    @property
+    def rows(self):
+        return self.header['rows']
+
+    def _view(self, section, fmt):
+        key = (section['offset'], fmt)
+        if key not in self._views:
+            start = self._data_start + section['offset']
+            raw = memoryview(self._mm)[start:start + section['length']]
+            self._views[key] = raw.cast(fmt)
+            raw.release()
+        return self._views[key]
+
+    def column(self, name):
+        """Sütunun ham dizisi (int/time için int64, str için uint32 kodlar)"""
+        spec = self.header['columns'][name]
+        return self._view(spec['data'], 'q' if spec['kind'] in ('int', 'time') else 'I')
+
+    def _string(self, name, code):
+        if code == NULL_CODE:
+            return None
+        cache = self._dicts.setdefault(name, {})
+        if code not in cache:
+            spec = self.header['columns'][name]
+            offsets = self._view(spec['dict_offsets'], 'Q')
+            start = self._data_start + spec['dict_blob']['offset']
+            cache[code] = self._mm[start + offsets[code]:start + offsets[code + 1]].decode('utf-8')
+        return cache[code]
+
+    def code_of(self, name, value):
+        """Metnin bu segmentteki sözlük kodu (yoksa None)"""
+        spec = self.header['columns'][name]
+        needle = str(value)
+        for code in range(spec['dict_size']):
+            if self._string(name, code) == needle:
+                return code
+        return None
+
+    def might_contain(self, value):
+        """Bloom filtresi: False ise değer segmentte kesinlikle yok"""
+        bloom = self.header['bloom']
+        start = self._data_start + bloom['data']['offset']
+        return all(
+            self._mm[start + (position >> 3)] & (1 << (position & 7))
+            for position in _bloom_positions(_bloom_key(value), bloom['bits'])
+        )
+
+    def time_range(self, start=None, end=None):
+        """[start, end) zaman aralığındaki satır aralığı (satırlar zamana göre sıralı)"""
+        times = self.column(SEGMENT_SCHEMAS[self.header['table']]['time'])
+        lo = bisect.bisect_left(times, _to_micros(start)) if start else 0
+        hi = bisect.bisect_left(times, _to_micros(end)) if end else self.rows
+        return lo, hi
+
+    def find_code(self, name, code, lo, hi):
+        """Metin sütununda kodu eşleşen satırlar - uint32 deseni mmap üzerinde C hızında aranır"""
+        spec = self.header['columns'][name]['data']
+        base = self._data_start + spec['offset']
+        needle = array('I', [code]).tobytes()
+        position = self._mm.find(needle, base + lo * 4, base + hi * 4)
+        while position != -1:
+            if (position - base) % 4 == 0:
+                yield (position - base) // 4
+                position = self._mm.find(needle, position + 4, base + hi * 4)
+            else:
+                position = self._mm.find(needle, position + 1, base + hi * 4)
+
+    def cell(self, name, index):
+        """Tek hücreyi çöz"""
+        kind = self.header['columns'][name]['kind']
+        value = self.column(name)[index]
+        if kind == 'str':
+            return self._string(name, value)
+        if kind == 'time':
+            return _from_micros(value)
+        return None if value == NULL_INT else value
+
+    def row(self, index, columns=None):
+        """Tek satırı çöz"""
+        return {name: self.cell(name, index) for name in columns or self.header['columns']}
+
+
+# ==================== Segment üretimi ve indeks ====================
+
+def _index_path(name, root=None):
+    return segment_root(name, root) / '_index.json'
+
+
+def load_index(name, root=None):
+    """Segment indeksi: {gün: {'file', 'rows', 'min_time', 'max_time', 'source_size'}}"""
+    path = _index_path(name, root)
+    if not path.exists():
+        return {}
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _save_index(name, index, root=None):
+    path = _index_path(name, root)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix('.json.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(index, f, sort_keys=True)
+    os.replace(tmp_path, path)
+
+
+def _read_ndjson(path, pk_field):
+    rows = {}
+    with gzip.open(path, 'rt', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                row = json.loads(line)
+                # Arşive en az bir kez yazıldığı için tekrar eden kayıtlar birincil anahtarla tekilleştirilir
+                rows[row[pk_field]] = row
+    return list(rows.values())
+
+
+def seal_days(name, before, root=None):
+    """
+    `before` gününden önceki günlük arşivleri segmente dönüştür. `before` saklama sınırının günü olmalıdır
+    (retention.sealed_before): bu günlerin arşivi tamamlanmıştır. Segmenti yazıldıktan sonra arşivine yine de kayıt
+    eklenmiş gün (NDJSON büyümüş) yeniden dönüştürülür. Oluşan segment sayısını döndürür.
+    """
+    from .retention import archive_root
+
+    archive_dir = Path(root or archive_root()) / name
+    if name not in SEGMENT_SCHEMAS or not archive_dir.exists():
+        return 0
+
+    pk_field = SEGMENT_SCHEMAS[name]['columns'][0][0]
+    index = load_index(name, root)
+    created = 0
+    for ndjson in sorted(archive_dir.glob('*/*/*.ndjson.gz')):
+        day = ndjson.name[:10]
+        if day >= before.isoformat():
+            continue
+        source_size = ndjson.stat().st_size
+        if day in index and index[day].get('source_size') == source_size:
+            continue
+        rows = _read_ndjson(ndjson, pk_field)
+        target = segment_root(name, root) / day[:4] / f'{day}.seg'
+        summary = write_segment(target, name, rows)
+        summary['file'] = str(target.relative_to(segment_root(name, root)))
+        summary['source_size'] = source_size
+        index[day] = summary
+        created += 1
+
+    if created:
+        _save_index(name, index, root)
+        logger.info('%s: %s günlük arşiv segmente dönüştürüldü', name, created)
+    return created
+
+
+# ==================== Sorgu ====================
+
+def query(name, start=None, end=None, phone=None, user_id=None, filters=None, columns=None, limit=None, root=None):
+    """
+    Soğuk arşivde ara: [start, end) zaman aralığı, telefon (SMS) / kullanıcı (sistem logu) ve
+    sütun eşitlik filtreleri ({'status': 'Failed'}). Sonuçları zaman sırasıyla sözlük olarak üretir.
+    """
+    start_us = _to_micros(start) if start else None
+    end_us = _to_micros(end) if end else None
+
+    bloom_value = None
+    filters = dict(filters or {})
+    if phone:
+        bloom_value = normalize_phone(phone)
+        filters['recipient_phone_e164'] = bloom_value
+    if user_id is not None:
+        bloom_value = user_id
+        filters['user_id'] = int(user_id)
+
+    base = segment_root(name, root)
+    found = 0
+    for day, info in sorted(load_index(name, root).items()):
+        if not info['rows']:
+            continue
+        if start_us is not None and info['max_time'] < start_us:
+            continue
+        if end_us is not None and info['min_time'] >= end_us:
+            continue
+
+        with Segment(base / info['file']) as segment:
+            if bloom_value is not None and bloom_value != '' and not segment.might_contain(bloom_value):
+                continue
+            lo, hi = segment.time_range(start, end)
+            if lo >= hi:
+                continue
+
+            kinds = segment.header['columns']
+            candidates = None
+            others = {}
+            for column, value in filters.items():
+                if kinds[column]['kind'] == 'str' and candidates is None:
+                    code = segment.code_of(column, value)
+                    if code is None:
+                        candidates = []
+                        break
+                    candidates = segment.find_code(column, code, lo, hi)
+                else:
+                    others[column] = value
+            if candidates is None:
+                candidates = range(lo, hi)
+
+            for index in candidates:
+                if others and any(segment.cell(column, index) != value for column, value in others.items()):
+                    continue
+                yield segment.row(index, columns)
+                found += 1
+                if limit and found >= limit:
+                    return
+
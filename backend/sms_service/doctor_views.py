@@ -1,6 +1,5 @@
 # sms_service/doctor_views.py - Tamamlanmış ve düzeltilmiş hali
 from django.shortcuts import render, get_object_or_404
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.contrib.auth.decorators import login_required
@@ -12,12 +11,21 @@ from datetime import datetime, timedelta
 import json
 import logging
 
+from akilli_ilac_backend.renderers import JsonResponse
 from notifications.models import Bildirim  # Bildirim modelini import et
+from patients.models import Patient
+from patients.search import search_patient_ids
+from .encoding import plan
+from .lanes import LANE_BULK
+from .models import SMSLog
 from .tasks import send_immediate_sms
 
 User = get_user_model()
 logger = logging.getLogger(__name__)
 
+# Hasta aramasında sayfalamaya verilecek en fazla sonuç
+SEARCH_RESULT_LIMIT = 500
+
 @login_required
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -63,7 +71,8 @@ def send_patient_message(request):
             'success': True,
             'notification_id': bildirim.id,
             'message': 'Mesaj başarıyla gönderildi',
-            'sms_sent': bildirim.sms_gonderildi
+            'sms_sent': bildirim.sms_gonderildi,
+            'sms_queued': bildirim.sms_log_id is not None
         })
         
     except json.JSONDecodeError:
@@ -109,9 +118,13 @@ def send_bulk_patient_message(request):
                 'error': 'Hiçbir hasta bulunamadı'
             }, status=404)
         
+        # Toplu mesajların SMS'leri toplu şeritte bekler, acil ve klinik mesajların önüne geçmez
+        sms_lane = None if priority == 'acil' else LANE_BULK
+        
         # Her hastaya bildirim gönder
         notifications_created = []
         errors = []
+        sms_log_ids = []
         
         for patient in patients:
             try:
@@ -120,14 +133,18 @@ def send_bulk_patient_message(request):
                     hasta_user=patient,
                     baslik=title,
                     mesaj=message,
-                    oncelik=priority
+                    oncelik=priority,
+                    sms_lane=sms_lane
                 )
                 notifications_created.append({
                     'patient_id': patient.id,
                     'patient_name': f"{patient.first_name} {patient.last_name}",
                     'notification_id': bildirim.id,
-                    'sms_sent': bildirim.sms_gonderildi
+                    'sms_sent': bildirim.sms_gonderildi,
+                    'sms_queued': bildirim.sms_log_id is not None
                 })
+                if bildirim.sms_log_id:
+                    sms_log_ids.append(bildirim.sms_log_id)
             except Exception as e:
                 errors.append({
                     'patient_id': patient.id,
@@ -141,7 +158,9 @@ def send_bulk_patient_message(request):
             'notifications': notifications_created,
             'errors': errors,
             'total_sent': len(notifications_created),
-            'total_errors': len(errors)
+            'total_errors': len(errors),
+            # Kuyruğa alınan SMS'lerin segment maliyeti ve harf çevirisiyle kazanılacak segment
+            'sms_plan': plan(SMSLog.objects.filter(id__in=sms_log_ids).values_list('message', flat=True))
         })
         
     except Exception as e:
@@ -178,11 +197,18 @@ def get_doctor_patients(request):
             ).exclude(id=request.user.id)
         
         if search:
-            patients_query = patients_query.filter(
-                models.Q(first_name__icontains=search) |
-                models.Q(last_name__icontains=search) |
-                models.Q(email__icontains=search)
+            # Tam metin indeksinden ara (Türkçe karakter duyarlı, alaka sıralı)
+            patient_ids = search_patient_ids(search, limit=SEARCH_RESULT_LIMIT)
+            user_ids = dict(
+                Patient.objects.filter(id__in=patient_ids).values_list('id', 'user_id')
             )
+            ranked_user_ids = [user_ids[pk] for pk in patient_ids if pk in user_ids]
+            patients_query = patients_query.filter(id__in=ranked_user_ids).order_by(
+                models.Case(
+                    *[models.When(id=user_id, then=rank) for rank, user_id in enumerate(ranked_user_ids)],
+                    output_field=models.IntegerField()
+                )
+            ) if ranked_user_ids else patients_query.none()
         
         # Sayfalama
         paginator = Paginator(patients_query, per_page)
@@ -346,6 +372,11 @@ def get_notification_statistics(request):
         sms_delivered = Bildirim.objects.filter(gonderen=request.user, sms_durum='delivered').count()
         sms_failed = Bildirim.objects.filter(gonderen=request.user, sms_durum='failed').count()
         
+        # Harcanan SMS segmenti (birleştirilen bildirimler aynı SMS'i gösterir, bir kez sayılır)
+        sms_segments = SMSLog.objects.filter(
+            id__in=Bildirim.objects.filter(gonderen=request.user, sms_log__isnull=False).values('sms_log_id')
+        ).aggregate(total=models.Sum('segments'))['total'] or 0
+        
         # Bildirim türlerine göre
         notification_types = Bildirim.objects.filter(
             gonderen=request.user
@@ -389,6 +420,7 @@ def get_notification_statistics(request):
                 'sms_delivered': sms_delivered,
                 'sms_failed': sms_failed,
                 'sms_success_rate': round((sms_delivered / sms_sent * 100) if sms_sent > 0 else 0, 2),
+                'sms_segments': sms_segments,
                 'notification_types': type_stats,
                 'priority_stats': priority_data,
                 'last_7_days': list(reversed(last_7_days))
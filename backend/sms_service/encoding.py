@@ -0,0 +1,104 @@
+# sms_service/encoding.py
+"""
+SMS kodlaması ve segment hesabı
+
+- Metin tamamen GSM-7 alfabesindeyse tek SMS 160 karakter, çok parçalı SMS'te parça başına 153 karakterdir;
+  genişletilmiş tablodaki karakterler ({ } [ ] ~ ^ | \\ €) iki karakter yer kaplar
+- Tek bir GSM-7 dışı karakter (ş, ğ, ı, İ, ç ...) tüm mesajı UCS-2'ye düşürür: tek SMS 70, parça 67 birim
+  (emoji gibi karakterler iki birimdir). Sağlayıcı kotası ve ücret segment başınadır
+- Parçalar karakter ortasından bölünmez; segment sayısı parçalar tek tek doldurularak hesaplanır
+- Harf çevirisi (settings.SMS_TRANSLITERATE) Türkçe harfleri GSM-7 karşılıklarına çevirir (ş -> s, ı -> i);
+  ö, ü, Ç zaten GSM-7'dedir ve korunur
+"""
+
+from django.conf import settings
+
+GSM7 = 'GSM-7'
+UCS2 = 'UCS-2'
+
+GSM7_BASIC = frozenset(
+    '@£$¥èéùìòÇ\nØø\rÅåΔ_ΦΓΛΩΠΨΣΘΞÆæßÉ !"#¤%&\'()*+,-./0123456789:;<=>?'
+    '¡ABCDEFGHIJKLMNOPQRSTUVWXYZÄÖÑÜ§¿abcdefghijklmnopqrstuvwxyzäöñüà'
+)
+GSM7_EXTENDED = frozenset('\f^{}\\[~]|€')
+
+# (tek SMS, çok parçalı SMS'te parça başına) kapasite
+SEGMENT_LIMITS = {
+    GSM7: (160, 153),
+    UCS2: (70, 67),
+}
+
+TRANSLITERATION = str.maketrans({
+    'ş': 's', 'Ş': 'S', 'ğ': 'g', 'Ğ': 'G', 'ı': 'i', 'İ': 'I', 'ç': 'c',
+    'â': 'a', 'Â': 'A', 'î': 'i', 'Î': 'I', 'û': 'u', 'Û': 'U',
+    '‘': "'", '’': "'", '“': '"', '”': '"', '–': '-', '—': '-', '…': '...', ' ': ' ',
+})
+
+
+def is_gsm7(text):
+    return all(char in GSM7_BASIC or char in GSM7_EXTENDED for char in text)
+
+
+def _units(char, encoding):
+    if encoding == GSM7:
+        return 2 if char in GSM7_EXTENDED else 1
+    return 2 if ord(char) > 0xFFFF else 1
+
+
+def analyze(text):
+    """Mesajın kodlaması, birim uzunluğu ve segment sayısı: {'encoding', 'units', 'segments'}"""
+    text = text or ''
+    encoding = GSM7 if is_gsm7(text) else UCS2
+    single, part = SEGMENT_LIMITS[encoding]
+    units = [_units(char, encoding) for char in text]
+    total = sum(units)
+    if total <= single:
+        return {'encoding': encoding, 'units': total, 'segments': 1}
+
+    segments, filled = 1, 0
+    for size in units:
+        if filled + size > part:
+            segments += 1
+            filled = 0
+        filled += size
+    return {'encoding': encoding, 'units': total, 'segments': segments}
+
+
+def segment_count(text):
+    return analyze(text)['segments']
+
+
+def transliterate(text):
+    """Türkçe harfleri ve tipografik işaretleri GSM-7 karşılıklarına çevir"""
+    return (text or '').translate(TRANSLITERATION)
+
+
+def prepare(text, transliteration=None):
+    """
+    Gönderilecek metni hazırla: harf çevirisi açıksa (None = ayarlardan) ve metin ancak çeviriyle GSM-7'ye
+    sığıyorsa çevrilmiş metni döndür. Çeviri sonrası da GSM-7 dışı karakter kalıyorsa (emoji vb.) metin
+    değiştirilmez, çünkü mesaj zaten UCS-2 gider.
+    """
+    if transliteration is None:
+        transliteration = getattr(settings, 'SMS_TRANSLITERATE', False)
+    if not transliteration or is_gsm7(text or ''):
+        return text
+    converted = transliterate(text)
+    return converted if is_gsm7(converted) else text
+
+
+def plan(messages):
+    """
+    Mesaj listesinin maliyet planı: kodlamaya göre mesaj sayıları, toplam segment ve harf çevirisiyle
+    gönderilse gereken segment.
+    """
+    totals = {'messages': 0, GSM7: 0, UCS2: 0, 'segments': 0, 'transliterated_segments': 0}
+    for message in messages:
+        info = analyze(message)
+        totals['messages'] += 1
+        totals[info['encoding']] += 1
+        totals['segments'] += info['segments']
+        totals['transliterated_segments'] += segment_count(prepare(message, transliteration=True))
+    totals['segments_saved'] = totals['segments'] - totals['transliterated_segments']
+    return totals
+
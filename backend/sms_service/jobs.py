@@ -0,0 +1,430 @@
+# sms_service/jobs.py
+"""
+Yerleşik, veritabanı tabanlı görev çalıştırıcısı (Redis/RabbitMQ gerektirmez)
+
+- Görev modülleri shared_task'ı buradan alır: JOB_BACKEND='db' (varsayılan) ise görev fonksiyonu olduğu gibi
+  kalır, .delay()/.apply_async() Job tablosuna kayıt ekler; JOB_BACKEND='celery' ise Celery'nin shared_task'ı kullanılır
+- Periyodik görevler JobSchedule tablosunda tutulur (DEFAULT_SCHEDULE / settings.JOB_SCHEDULE ile senkronlanır);
+  zamanı gelen tanım koşullu UPDATE ile bir sonraki zamana ilerletilir, böylece birden fazla çalıştırıcı aynı
+  çalışmayı iki kez kuyruğa eklemez
+- Çalıştırıcılar (manage.py run_jobs, istenildiği kadar süreç) kayıtları tek UPDATE ile süreli kilitleyerek alır;
+  süresi dolan kilitler başka çalıştırıcıya geçer (en az bir kez çalıştırma). Görev çalışırken kilit arka planda
+  düzenli yenilenir; kilit süresinden uzun süren görev başka çalıştırıcıya geçmez. Sonuç yazılırken kilidin
+  hâlâ bu çalıştırıcıda olduğu kontrol edilir
+- Her çalışmanın süresi Job kaydına, periyodik görevlerin toplam/son/en uzun süreleri JobSchedule'a yazılır
+"""
+
+import functools
+import json
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F, Q, Subquery
+from django.db.models.functions import Greatest
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Çalıştırıcının bir görevi kilitli tuttuğu varsayılan süre (saniye)
+DEFAULT_LEASE_SECONDS = 600
+
+# Çalışan görevin kilidi kilit süresinin bu kesrinde bir yenilenir
+HEARTBEAT_FRACTION = 3
+
+# Bir döngüde alınacak en fazla görev
+DEFAULT_CLAIM_BATCH = 10
+
+# Başarısız görevin tekrar denenmesi için taban bekleme (saniye, deneme sayısıyla katlanır)
+RETRY_BASE_DELAY = 30
+
+# Sonuç metninin saklanan en fazla uzunluğu
+MAX_RESULT_LENGTH = 2000
+
+# Periyodik görevler: interval (saniye) ya da cron (dakika saat gün ay haftanın-günü)
+DEFAULT_SCHEDULE = {
+    'process-alarm-notifications': {
+        'task': 'sms_service.tasks.process_alarm_notifications',
+        'cron': '* * * * *',
+    },
+    'process-delivery-receipts': {
+        'task': 'sms_service.tasks.process_delivery_receipts',
+        'interval': 5,
+    },
+    'complete-past-appointments': {
+        'task': 'appointments.tasks.complete_past_appointments',
+        'cron': '*/15 * * * *',
+    },
+    'rebuild-caregiver-dashboards': {
+        'task': 'caregivers.tasks.rebuild_dashboard_snapshots',
+        'cron': '1 0 * * *',
+    },
+    'retry-failed-sms': {
+        'task': 'sms_service.tasks.retry_failed_sms',
+        'cron': '0 2 * * *',
+    },
+    'apply-retention-policies': {
+        'task': 'sms_service.tasks.apply_retention_policies',
+        'cron': '0 3 * * *',
+    },
+    'purge-revoked-tokens': {
+        'task': 'accounts.tasks.purge_revoked_tokens',
+        'cron': '30 * * * *',
+    },
+}
+
+
+# ==================== Görev tanımı ====================
+
+class DbTask:
+    """Veritabanı kuyruğuyla çalışan görev; doğrudan çağrıldığında fonksiyonu çalıştırır"""
+
+    def __init__(self, func, name=None, max_attempts=3, lease_seconds=DEFAULT_LEASE_SECONDS):
+        functools.update_wrapper(self, func)
+        self.func = func
+        self.name = name or f'{func.__module__}.{func.__name__}'
+        self.max_attempts = max_attempts
+        self.lease_seconds = lease_seconds
+
+    def __call__(self, *args, **kwargs):
+        return self.func(*args, **kwargs)
+
+    def delay(self, *args, **kwargs):
+        return self.apply_async(args, kwargs)
+
+    def apply_async(self, args=None, kwargs=None, countdown=None, eta=None, **options):
+        """Celery ile aynı imza: görevi kuyruğa ekle"""
+        run_at = eta or timezone.now() + timedelta(seconds=countdown or 0)
+        return enqueue(self.name, args, kwargs, run_at=run_at, max_attempts=self.max_attempts)
+
+
+def shared_task(*args, **options):
+    """Celery shared_task yerine kullanılır (@shared_task ve @shared_task(...) biçimleri)"""
+    if getattr(settings, 'JOB_BACKEND', 'db') == 'celery':
+        try:
+            from celery import shared_task as celery_shared_task
+        except ImportError as e:
+            # Görev modülleri uygulama yüklenirken import edilir; ham ImportError yerine ayar hatası ver
+            raise ImproperlyConfigured("JOB_BACKEND='celery' için celery paketi kurulu olmalı") from e
+        return celery_shared_task(*args, **options)
+
+    if len(args) == 1 and callable(args[0]) and not options:
+        return DbTask(args[0])
+    known = {key: options[key] for key in ('name', 'max_attempts', 'lease_seconds') if key in options}
+    return lambda func: DbTask(func, **known)
+
+
+def enqueue(task, args=None, kwargs=None, run_at=None, max_attempts=3, schedule=None):
+    """Görevi kuyruğa ekle; commit edilmemiş bir işlem içindeyse kayıt işlemle birlikte görünür olur"""
+    from .models import Job
+
+    return Job.objects.create(
+        task=task,
+        args=list(args or []),
+        kwargs=dict(kwargs or {}),
+        run_at=run_at or timezone.now(),
+        max_attempts=max_attempts,
+        schedule=schedule,
+    )
+
+
+# ==================== Zamanlama ====================
+
+def _cron_field(expr, low, high):
+    values = set()
+    for part in expr.split(','):
+        step = 1
+        if '/' in part:
+            part, step = part.split('/')
+            step = int(step)
+        if part == '*':
+            start, end = low, high
+        elif '-' in part:
+            start, end = map(int, part.split('-'))
+        else:
+            start = end = int(part)
+        values.update(range(start, end + 1, step))
+    return values
+
+
+def parse_cron(expr):
+    """'*/15 2 * * 1-5' -> (dakikalar, saatler, günler, aylar, haftanın günleri[0=Pazar])"""
+    fields = expr.split()
+    if len(fields) != 5:
+        raise ValueError(f'Cron ifadesi 5 alandan oluşmalıdır: {expr}')
+    minutes, hours, days, months, weekdays = (
+        _cron_field(field, low, high)
+        for field, (low, high) in zip(fields, [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)])
+    )
+    if 7 in weekdays:
+        weekdays.add(0)
+    return minutes, hours, days, months, weekdays
+
+
+def cron_next(expr, after):
+    """after'dan sonraki ilk cron zamanı (yerel saatle değerlendirilir)"""
+    minutes, hours, days, months, weekdays = parse_cron(expr)
+    moment = timezone.localtime(after).replace(second=0, microsecond=0) + timedelta(minutes=1)
+    limit = moment + timedelta(days=366)
+    while moment < limit:
+        if moment.month not in months or moment.day not in days or (moment.isoweekday() % 7) not in weekdays:
+            moment = (moment + timedelta(days=1)).replace(hour=0, minute=0)
+            continue
+        if moment.hour not in hours:
+            moment = (moment + timedelta(hours=1)).replace(minute=0)
+            continue
+        if moment.minute in minutes:
+            return timezone.localtime(moment)
+        moment += timedelta(minutes=1)
+    raise ValueError(f'Cron ifadesi bir yıl içinde eşleşmiyor: {expr}')
+
+
+def next_run(schedule, after):
+    if schedule.cron:
+        return cron_next(schedule.cron, after)
+    return after + timedelta(seconds=schedule.interval_seconds or 60)
+
+
+def configured_schedule():
+    return getattr(settings, 'JOB_SCHEDULE', None) or DEFAULT_SCHEDULE
+
+
+def sync_schedule(definitions=None):
+    """Kod/ayar tanımlarını JobSchedule tablosuna yaz; tanımda olmayanlar pasifleştirilir. Metrikler korunur."""
+    from .models import JobSchedule
+
+    definitions = definitions or configured_schedule()
+    now = timezone.now()
+    existing = {schedule.name: schedule for schedule in JobSchedule.objects.all()}
+    for name, definition in definitions.items():
+        values = {
+            'task': definition['task'],
+            'interval_seconds': definition.get('interval'),
+            'cron': definition.get('cron', ''),
+        }
+        if values['cron']:
+            parse_cron(values['cron'])
+        schedule = existing.get(name)
+        if schedule is None:
+            schedule = JobSchedule(name=name, **values)
+            schedule.next_run_at = next_run(schedule, now)
+            schedule.save()
+        elif any(getattr(schedule, field) != value for field, value in values.items()) or not schedule.enabled:
+            for field, value in values.items():
+                setattr(schedule, field, value)
+            schedule.enabled = True
+            schedule.next_run_at = next_run(schedule, now)
+            schedule.save()
+
+    JobSchedule.objects.exclude(name__in=list(definitions)).filter(enabled=True).update(enabled=False)
+
+
+def schedule_due(now=None):
+    """Zamanı gelen periyodik görevleri kuyruğa ekle, eklenen sayısını döndür"""
+    from .models import Job, JobSchedule
+
+    now = now or timezone.now()
+    queued = 0
+    for schedule in JobSchedule.objects.filter(enabled=True, next_run_at__lte=now):
+        with transaction.atomic():
+            # Koşullu ilerletme: aynı anda çalışan diğer çalıştırıcılar bu çalışmayı tekrar eklemez
+            advanced = JobSchedule.objects.filter(pk=schedule.pk, next_run_at=schedule.next_run_at).update(
+                next_run_at=next_run(schedule, now)
+            )
+            if not advanced:
+                continue
+            # Önceki çalışma hâlâ bekliyor/çalışıyorsa üst üste birikmez
+            if Job.objects.filter(schedule=schedule, status__in=('queued', 'running')).exists():
+                continue
+            enqueue(schedule.task, schedule=schedule, max_attempts=1, run_at=now)
+            queued += 1
+    return queued
+
+
+# ==================== Çalıştırma ====================
+
+def worker_name():
+    return f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}'
+
+
+def _claimable(now):
+    return Q(status='queued', run_at__lte=now) | Q(status='running', lease_until__lt=now)
+
+
+def claim(worker, limit=DEFAULT_CLAIM_BATCH, lease_seconds=DEFAULT_LEASE_SECONDS):
+    """Sıradaki (ya da kilidi süresi dolmuş) görevleri tek UPDATE ile bu çalıştırıcıya kilitle"""
+    from .models import Job
+
+    now = timezone.now()
+    lease_until = now + timedelta(seconds=lease_seconds)
+    candidates = Job.objects.filter(_claimable(now)).order_by('run_at', 'id').values('id')[:limit]
+    # Dış koşul tekrarlanır: aynı satırı eş zamanlı alan diğer UPDATE'ten sonra satır artık uymaz
+    claimed = Job.objects.filter(_claimable(now), id__in=Subquery(candidates)).update(
+        status='running',
+        locked_by=worker,
+        lease_until=lease_until,
+        started_at=now,
+        attempts=F('attempts') + 1,
+    )
+    if not claimed:
+        return []
+    return list(Job.objects.filter(status='running', locked_by=worker, lease_until=lease_until).order_by('run_at', 'id'))
+
+
+class LeaseHeartbeat:
+    """
+    Görev çalışırken kilidi ayrı bir iş parçacığında (kendi veritabanı bağlantısıyla) yeniler. Kilit başka
+    çalıştırıcıya geçtiyse yenileme durur; sonuç yine execute'taki kontrolle yazılmaz
+    """
+
+    def __init__(self, job, worker, lease_seconds):
+        self.job = job
+        self.worker = worker
+        self.lease_seconds = lease_seconds
+        self._stop = threading.Event()
+        self._thread = None
+
+    def __enter__(self):
+        self._thread = threading.Thread(target=self._run, name=f'job-lease-{self.job.pk}', daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        from .models import Job
+
+        mine = Job.objects.filter(pk=self.job.pk, status='running', locked_by=self.worker)
+        try:
+            while not self._stop.wait(self.lease_seconds / HEARTBEAT_FRACTION):
+                try:
+                    renewed = mine.update(lease_until=timezone.now() + timedelta(seconds=self.lease_seconds))
+                except Exception as e:
+                    # Geçici hata (kilitli veritabanı vb.): bir sonraki turda tekrar denenir
+                    logger.warning('Görev kilidi yenilenemedi: %s #%s - %s', self.job.task, self.job.pk, e)
+                    continue
+                if not renewed:
+                    logger.warning('Görev kilidi çalışırken kaybedildi: %s #%s', self.job.task, self.job.pk)
+                    return
+        finally:
+            connection.close()
+
+
+def _serialize(value):
+    try:
+        text = json.dumps(value, ensure_ascii=False, default=str)
+    except (TypeError, ValueError):
+        text = repr(value)
+    return text[:MAX_RESULT_LENGTH]
+
+
+def _record_metrics(job, status, duration_ms, finished_at):
+    from .models import JobSchedule
+
+    if not job.schedule_id:
+        return
+    JobSchedule.objects.filter(pk=job.schedule_id).update(
+        last_run_at=finished_at,
+        last_status=status,
+        run_count=F('run_count') + 1,
+        failure_count=F('failure_count') + int(status == 'failed'),
+        total_duration_ms=F('total_duration_ms') + duration_ms,
+        last_duration_ms=duration_ms,
+        max_duration_ms=Greatest(F('max_duration_ms'), duration_ms),
+    )
+
+
+def execute(job, worker):
+    """
+    Kilitli görevi çalıştır ve sonucunu yaz. Kilit başlamadan önce başka çalıştırıcıya geçtiyse görev çalıştırılmaz
+    ('skipped'), çalışırken geçtiyse sonuç yazılmaz
+    """
+    from .models import Job
+
+    mine = Job.objects.filter(pk=job.pk, status='running', locked_by=worker)
+    started = time.monotonic()
+    status, result, error = 'done', '', ''
+    run_at = None
+    try:
+        if job.attempts > job.max_attempts:
+            # Kilidi süresi dolan (çalıştırıcısı ölen) görev deneme hakkını bitirdi
+            raise RuntimeError('Görev kilidi tekrar tekrar süresi dolduğu için bırakıldı')
+        func = import_string(job.task)
+        lease_seconds = getattr(func, 'lease_seconds', DEFAULT_LEASE_SECONDS)
+        # Toplu alınan görevler sırayla çalışır: kilit görev başlamadan hemen önce yenilenir. Önceki görevler
+        # sürerken kilidin süresi dolup görev başka çalıştırıcıya geçtiyse burada çalıştırılmaz
+        if not mine.update(lease_until=timezone.now() + timedelta(seconds=lease_seconds)):
+            logger.warning('Görev kilidi başlamadan kaybedildi, çalıştırılmadı: %s #%s', job.task, job.pk)
+            return 'skipped'
+        with LeaseHeartbeat(job, worker, lease_seconds):
+            value = func(*job.args, **job.kwargs)
+        result = _serialize(value)
+    except Exception as e:
+        logger.exception('Görev hatası: %s #%s', job.task, job.pk)
+        error = f'{type(e).__name__}: {e}'[:MAX_RESULT_LENGTH]
+        if job.attempts < job.max_attempts:
+            status = 'queued'
+            run_at = timezone.now() + timedelta(seconds=RETRY_BASE_DELAY * 2 ** (job.attempts - 1))
+        else:
+            status = 'failed'
+
+    duration_ms = int((time.monotonic() - started) * 1000)
+    finished_at = timezone.now()
+    values = {'status': status, 'duration_ms': duration_ms, 'result': result, 'error': error, 'lease_until': None}
+    if status == 'queued':
+        values.update(run_at=run_at, locked_by='')
+    else:
+        values['finished_at'] = finished_at
+
+    if not mine.update(**values):
+        logger.warning('Görev kilidi kaybedildi, sonuç yazılmadı: %s #%s', job.task, job.pk)
+        return status
+    if status != 'queued':
+        _record_metrics(job, status, duration_ms, finished_at)
+    return status
+
+
+def run_pending(worker, limit=DEFAULT_CLAIM_BATCH):
+    """Bir tur: zamanı gelenleri kuyruğa ekle, alabildiğin kadar görev al ve çalıştır; çalışan görev sayısını döndür"""
+    schedule_due()
+    jobs = claim(worker, limit=limit)
+    for job in jobs:
+        close_old_connections()
+        execute(job, worker)
+    return len(jobs)
+
+
+def job_stats(since=None):
+    """Görev bazında süre metrikleri: {görev: {'count', 'failed', 'avg_ms', 'p95_ms', 'max_ms'}}"""
+    from .models import Job
+
+    since = since or timezone.now() - timedelta(days=1)
+    durations = {}
+    failed = {}
+    for task, status, duration_ms in Job.objects.filter(
+        finished_at__gte=since, duration_ms__isnull=False
+    ).values_list('task', 'status', 'duration_ms'):
+        durations.setdefault(task, []).append(duration_ms)
+        failed[task] = failed.get(task, 0) + int(status == 'failed')
+
+    stats = {}
+    for task, values in sorted(durations.items()):
+        values.sort()
+        stats[task] = {
+            'count': len(values),
+            'failed': failed[task],
+            'avg_ms': sum(values) // len(values),
+            'p95_ms': values[min(len(values) - 1, int(len(values) * 0.95))],
+            'max_ms': values[-1],
+        }
+    return stats
@@ -0,0 +1,125 @@
+# sms_service/lanes.py
+"""
+Giden SMS öncelik şeritleri
+
+- Acil (acil durum bildirimleri), Klinik (ilaç/randevu/doktor mesajları), Toplu (kampanya ve genel mesajlar)
+- Her şeridin kendine ayrılmış göndericileri vardır; ortak göndericiler her zaman en yüksek öncelikli dolu şeritten
+  alır (kesin öncelik). Böylece binlerce toplu mesaj beklerken acil mesaj kuyruğun sonuna düşmez
+- Gecikme hedefi (SLO): mesajın kuyruğa girişinden sağlayıcıya teslimine kadar geçen sürenin p99'u
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import F
+from django.utils import timezone
+
+LANE_EMERGENCY = 0
+LANE_CLINICAL = 1
+LANE_BULK = 2
+
+LANE_CHOICES = [
+    (LANE_EMERGENCY, 'Acil'),
+    (LANE_CLINICAL, 'Klinik'),
+    (LANE_BULK, 'Toplu'),
+]
+
+LANE_NAMES = {
+    LANE_EMERGENCY: 'emergency',
+    LANE_CLINICAL: 'clinical',
+    LANE_BULK: 'bulk',
+}
+
+# Öncelik sırası (ortak göndericiler bu sırayla bakar)
+LANE_ORDER = (LANE_EMERGENCY, LANE_CLINICAL, LANE_BULK)
+
+# Şerit başına ayrılmış gönderici sayısı ve ortak gönderici sayısı (settings.SMS_LANE_CONCURRENCY ile değişir)
+DEFAULT_LANE_CONCURRENCY = {
+    LANE_EMERGENCY: 2,
+    LANE_CLINICAL: 2,
+    LANE_BULK: 1,
+    'shared': 3,
+}
+
+# p99 gecikme hedefleri (saniye)
+LANE_LATENCY_SLO = {
+    LANE_EMERGENCY: 5,
+    LANE_CLINICAL: 60,
+    LANE_BULK: 900,
+}
+
+# Bildirim.oncelik -> şerit
+ONCELIK_LANES = {
+    'acil': LANE_EMERGENCY,
+    'yuksek': LANE_CLINICAL,
+    'normal': LANE_CLINICAL,
+    'dusuk': LANE_BULK,
+}
+
+# SMSLog.message_type -> şerit (listede olmayanlar toplu şeride düşer)
+MESSAGE_TYPE_LANES = {
+    'AcilDurum': LANE_EMERGENCY,
+    'IlacHatirlatma': LANE_CLINICAL,
+    'IlacEklendi': LANE_CLINICAL,
+    'RandevuOnay': LANE_CLINICAL,
+    'RandevuRed': LANE_CLINICAL,
+    'RandevuIptal': LANE_CLINICAL,
+    'RandevuHatirlatma': LANE_CLINICAL,
+    'DoktorMesaj': LANE_CLINICAL,
+    # DoctorAlarm.alarm_type değerleri
+    'medication': LANE_CLINICAL,
+    'appointment': LANE_CLINICAL,
+    'checkup': LANE_CLINICAL,
+}
+
+
+def lane_for(message_type=None, oncelik=None):
+    """Mesaj için şerit: Bildirim önceliği verilmişse o, yoksa mesaj tipi belirler"""
+    if oncelik in ONCELIK_LANES:
+        return ONCELIK_LANES[oncelik]
+    return MESSAGE_TYPE_LANES.get(message_type, LANE_BULK)
+
+
+def lane_concurrency():
+    """{şerit: ayrılmış gönderici, 'shared': ortak gönderici}"""
+    concurrency = dict(DEFAULT_LANE_CONCURRENCY)
+    concurrency.update(getattr(settings, 'SMS_LANE_CONCURRENCY', {}) or {})
+    return concurrency
+
+
+def _percentile(values, ratio):
+    if not values:
+        return None
+    return values[min(len(values) - 1, int(len(values) * ratio))]
+
+
+def latency_stats(since=None, lanes=LANE_ORDER, message_type=None):
+    """
+    Şerit başına kuyruk gecikmesi (created_at -> sent_at, saniye):
+    {şerit_adı: {'count', 'p50', 'p95', 'p99', 'max', 'slo', 'slo_met'}}
+    """
+    from .models import SMSLog
+
+    since = since or timezone.now() - timedelta(hours=1)
+    logs = SMSLog.objects.filter(lane__in=lanes, created_at__gte=since, sent_at__isnull=False)
+    if message_type:
+        logs = logs.filter(message_type=message_type)
+
+    latencies = {lane: [] for lane in lanes}
+    for lane, gecikme in logs.annotate(gecikme=F('sent_at') - F('created_at')).values_list('lane', 'gecikme'):
+        latencies[lane].append(gecikme.total_seconds())
+
+    stats = {}
+    for lane, values in latencies.items():
+        values.sort()
+        p99 = _percentile(values, 0.99)
+        stats[LANE_NAMES[lane]] = {
+            'count': len(values),
+            'p50': _percentile(values, 0.50),
+            'p95': _percentile(values, 0.95),
+            'p99': p99,
+            'max': values[-1] if values else None,
+            'slo': LANE_LATENCY_SLO[lane],
+            'slo_met': p99 is None or p99 <= LANE_LATENCY_SLO[lane],
+        }
+    return stats
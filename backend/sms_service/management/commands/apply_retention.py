@@ -0,0 +1,35 @@
+# sms_service/management/commands/apply_retention.py
+from django.core.management.base import BaseCommand
+
+from sms_service.retention import DEFAULT_BATCH_SIZE, DEFAULT_PAUSE, RETENTION_POLICIES, apply_all
+
+
+class Command(BaseCommand):
+    help = 'Saklama süresi dolan log kayıtlarını arşivleyip parça parça siler (Celery çalışmayan ortamlar için)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--policy', action='append', choices=sorted(RETENTION_POLICIES),
+                            help='Sadece verilen politika(lar)')
+        parser.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument('--pause', type=float, default=DEFAULT_PAUSE, help='Parçalar arası bekleme (saniye)')
+        parser.add_argument('--no-archive', action='store_true', help='Arşive yazmadan sil')
+        parser.add_argument('--dry-run', action='store_true', help='Silinecek kayıtları say, silme')
+
+    def handle(self, *args, **options):
+        results = apply_all(
+            options['policy'],
+            batch_size=options['batch_size'],
+            pause=options['pause'],
+            archive=not options['no_archive'],
+            dry_run=options['dry_run'],
+        )
+        for result in results:
+            if result['cutoff'] is None:
+                self.stdout.write(f"{result['policy']}: saklama süresi tanımsız, atlandı")
+            elif options['dry_run']:
+                self.stdout.write(f"{result['policy']}: {result['deleted']} kayıt silinecek (< {result['cutoff']:%Y-%m-%d})")
+            else:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{result['policy']}: {result['deleted']} kayıt silindi, {result['archived']} arşivlendi, "
+                    f"{result['batches']} parça, {result['seconds']} sn ({result['rows_per_sec']} kayıt/sn)"
+                ))
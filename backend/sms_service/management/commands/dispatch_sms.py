@@ -0,0 +1,95 @@
+# sms_service/management/commands/dispatch_sms.py
+import signal
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.db.models import Count, Q
+from django.utils import timezone
+
+from sms_service import outbound
+from sms_service.coalesce import coalesce_stats
+from sms_service.lanes import LANE_NAMES, LANE_ORDER, latency_stats
+from sms_service.models import SMSLog
+from sms_service.ratelimit import rate_limiter
+from sms_service.services import sms_service
+
+
+class Command(BaseCommand):
+    help = ('Bekleyen SMS\'leri öncelik şeritlerine göre gönderir (acil > klinik > toplu). '
+            'Şerit başına ayrılmış gönderici sayısı settings.SMS_LANE_CONCURRENCY ile ayarlanır.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stats', action='store_true',
+                            help='Şerit gecikme (SLO), birleştirme, sağlayıcı ve hız sınırı metriklerini yaz ve çık')
+        parser.add_argument('--minutes', type=int, default=60, help='--stats için geriye bakılacak süre (dakika)')
+        parser.add_argument('--expire-every', type=float, default=60.0,
+                            help='Süresi dolan bekleyen mesajların kapatılma aralığı (saniye)')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self._stats(options['minutes'])
+            return
+
+        dispatcher = outbound.Dispatcher()
+        self._stop = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        dispatcher.start()
+        concurrency = dispatcher.concurrency
+        self.stdout.write(
+            'SMS göndericisi başladı: ' + ', '.join(f'{LANE_NAMES[lane]}={concurrency.get(lane, 0)}' for lane in LANE_ORDER)
+            + f", ortak={concurrency.get('shared', 0)}"
+        )
+
+        next_expire = 0.0
+        while not self._stop:
+            if time.monotonic() >= next_expire:
+                outbound.expire_stale()
+                next_expire = time.monotonic() + options['expire_every']
+            time.sleep(0.5)
+
+        # Elindeki mesajlar bitince çık
+        dispatcher.stop()
+        self.stdout.write('SMS göndericisi durdu: ' + ', '.join(
+            f'{LANE_NAMES[lane]} {count}' for lane, count in dispatcher.sent.items()
+        ))
+        self.stdout.write(f'sağlayıcı geçişi: {sms_service.router.failovers}')
+        for provider in sms_service.router.stats():
+            self.stdout.write(
+                f"{provider['name']}: {provider['sent']} gönderim, devre {provider['state']}, "
+                f"gecikme {provider['latency_ms']} ms, hata oranı {provider['error_rate']}"
+            )
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
+
+    def _stats(self, minutes):
+        since = timezone.now() - timedelta(minutes=minutes)
+        for name, stats in latency_stats(since=since).items():
+            if not stats['count']:
+                self.stdout.write(f"{name}: gönderim yok (SLO p99 <= {stats['slo']} sn)")
+                continue
+            line = (
+                f"{name}: {stats['count']} gönderim, p50 {stats['p50']:.2f} sn, p95 {stats['p95']:.2f} sn, "
+                f"p99 {stats['p99']:.2f} sn, en uzun {stats['max']:.2f} sn (SLO p99 <= {stats['slo']} sn)"
+            )
+            self.stdout.write(self.style.SUCCESS(line) if stats['slo_met'] else self.style.ERROR(line))
+        coalesced = coalesce_stats(since=since)
+        self.stdout.write(
+            f"birleştirme: {coalesced['carriers']} SMS'te {coalesced['coalesced']} mesaj birleştirildi, "
+            f"ort {coalesced['avg_fan_in']} mesaj/SMS, {coalesced['provider_calls_saved']} sağlayıcı çağrısı tasarrufu"
+        )
+        providers = SMSLog.objects.filter(created_at__gte=since).exclude(provider='').values('provider').annotate(
+            sent=Count('id', filter=Q(status__in=['Sent', 'Delivered'])),
+            failed=Count('id', filter=Q(status__in=['Failed', 'Rejected'])),
+        ).order_by('provider')
+        for provider in providers:
+            self.stdout.write(f"sağlayıcı {provider['provider']}: {provider['sent']} gönderildi, {provider['failed']} başarısız")
+        for bucket in rate_limiter.stats():
+            self.stdout.write(
+                f"{bucket['name']}: {bucket['rate']:g}/sn (kapasite {bucket['capacity']:g}, şu an {bucket['tokens']:g}), "
+                f"{bucket['acquired']} jeton, {bucket['denied']} ret, ort bekleme {bucket['avg_wait_ms']} ms, "
+                f"en uzun {bucket['max_wait_ms']} ms"
+            )
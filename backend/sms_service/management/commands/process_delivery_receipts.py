@@ -0,0 +1,27 @@
+# sms_service/management/commands/process_delivery_receipts.py
+import time
+
+from django.core.management.base import BaseCommand
+
+from sms_service.receipts import RECEIPT_BATCH_SIZE, drain_receipts
+
+
+class Command(BaseCommand):
+    help = 'Biriken SMS teslim raporlarını işler (Celery çalışmayan ortamlar için)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=RECEIPT_BATCH_SIZE)
+        parser.add_argument('--loop', action='store_true', help='Sürekli çalış')
+        parser.add_argument('--interval', type=float, default=2.0, help='Döngü aralığı (saniye)')
+
+    def handle(self, *args, **options):
+        while True:
+            totals = drain_receipts(batch_size=options['batch_size'])
+            if totals['received'] or not options['loop']:
+                self.stdout.write(
+                    f"Alınan: {totals['received']}, Güncellenen: {totals['updated']}, "
+                    f"Bekletilen: {totals['deferred']}, Atılan: {totals['dropped']}"
+                )
+            if not options['loop']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,76 @@
+# sms_service/management/commands/query_archive.py
+import json
+import time
+from datetime import datetime, time as dt_time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+
+from sms_service.cold_storage import SEGMENT_SCHEMAS, query, seal_days
+from sms_service.retention import sealed_before
+
+
+def _parse_time(value):
+    if not value:
+        return None
+    moment = parse_datetime(value)
+    if moment is None:
+        day = parse_date(value)
+        if day is None:
+            raise CommandError(f'Geçersiz tarih: {value}')
+        moment = datetime.combine(day, dt_time.min)
+    return timezone.make_aware(moment) if timezone.is_naive(moment) else moment
+
+
+class Command(BaseCommand):
+    help = 'Soğuk arşiv segmentlerinde arama yapar (birincil veritabanını kullanmaz), ör. bir numaraya giden tüm SMS\'ler'
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(SEGMENT_SCHEMAS))
+        parser.add_argument('--phone', help='Alıcı telefon (SMS logları)')
+        parser.add_argument('--user', type=int, help='Kullanıcı ID (sistem logları)')
+        parser.add_argument('--from', dest='start', help='Başlangıç (YYYY-AA-GG ya da ISO zaman, dahil)')
+        parser.add_argument('--to', dest='end', help='Bitiş (YYYY-AA-GG ya da ISO zaman, hariç)')
+        parser.add_argument('--where', action='append', default=[], help='Sütun eşitliği: status=Failed')
+        parser.add_argument('--limit', type=int)
+        parser.add_argument('--count', action='store_true', help='Sadece eşleşen kayıt sayısını yaz')
+        parser.add_argument('--seal', action='store_true',
+                            help='Önce saklama sınırından önceki (tamamlanmış) günlük arşivleri segmente dönüştür')
+
+    def handle(self, *args, **options):
+        table = options['table']
+        if options['seal']:
+            # Saklama sınırının günü hâlâ arşivlenmektedir; bugünü mühürlemek sonradan eklenen kayıtları kaybettirir
+            before = sealed_before(table)
+            if before is None:
+                raise CommandError(f'{table} politikası kayıt silmiyor, mühürlenecek arşiv yok')
+            created = seal_days(table, before=before)
+            self.stderr.write(f'{created} segment oluşturuldu')
+
+        filters = {}
+        for item in options['where']:
+            column, _, value = item.partition('=')
+            if column not in dict(SEGMENT_SCHEMAS[table]['columns']):
+                raise CommandError(f'Bilinmeyen sütun: {column}')
+            filters[column] = int(value) if dict(SEGMENT_SCHEMAS[table]['columns'])[column] == 'int' else value
+
+        started = time.monotonic()
+        count = 0
+        for row in query(
+            table,
+            start=_parse_time(options['start']),
+            end=_parse_time(options['end']),
+            phone=options['phone'],
+            user_id=options['user'],
+            filters=filters,
+            limit=options['limit'],
+        ):
+            count += 1
+            if not options['count']:
+                self.stdout.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False))
+
+        self.stderr.write(f'{count} kayıt, {time.monotonic() - started:.2f} sn')
+        if options['count']:
+            self.stdout.write(str(count))
@@ -0,0 +1,62 @@
+# sms_service/management/commands/run_jobs.py
+import signal
+import time
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from sms_service import jobs
+
+
+class Command(BaseCommand):
+    help = ('Veritabanı tabanlı görev çalıştırıcısı: periyodik görevleri zamanlar ve kuyruktaki görevleri çalıştırır. '
+            'Birden fazla süreç aynı anda çalıştırılabilir.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--once', action='store_true', help='Kuyruk boşalana kadar çalış ve çık')
+        parser.add_argument('--batch', type=int, default=jobs.DEFAULT_CLAIM_BATCH, help='Bir turda alınacak görev')
+        parser.add_argument('--poll', type=float, default=1.0, help='Kuyruk boşken bekleme (saniye)')
+        parser.add_argument('--no-sync', action='store_true', help='Periyodik görev tanımlarını senkronlama')
+        parser.add_argument('--stats', action='store_true', help='Son 24 saatin görev süre metriklerini yaz ve çık')
+
+    def handle(self, *args, **options):
+        if options['stats']:
+            self._stats()
+            return
+
+        if not options['no_sync']:
+            jobs.sync_schedule()
+
+        worker = jobs.worker_name()
+        self._stop = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+        self.stdout.write(f'Görev çalıştırıcısı başladı: {worker}')
+
+        while not self._stop:
+            ran = jobs.run_pending(worker, limit=options['batch'])
+            if not ran:
+                if options['once']:
+                    break
+                time.sleep(options['poll'])
+
+        self.stdout.write(f'Görev çalıştırıcısı durdu: {worker}')
+
+    def _request_stop(self, signum, frame):
+        # Elindeki görevler bitince çık
+        self._stop = True
+
+    def _stats(self):
+        from sms_service.models import JobSchedule
+
+        for schedule in JobSchedule.objects.all():
+            self.stdout.write(
+                f'{schedule.name}: {schedule.run_count} çalışma, {schedule.failure_count} hata, '
+                f'ort {schedule.avg_duration_ms} ms, son {schedule.last_duration_ms} ms, '
+                f'en uzun {schedule.max_duration_ms} ms, sonraki {timezone.localtime(schedule.next_run_at):%Y-%m-%d %H:%M:%S}'
+            )
+        for task, stats in jobs.job_stats().items():
+            self.stdout.write(
+                f"{task}: {stats['count']} çalışma ({stats['failed']} hata), ort {stats['avg_ms']} ms, "
+                f"p95 {stats['p95_ms']} ms, en uzun {stats['max_ms']} ms"
+            )
@@ -0,0 +1,50 @@
+# sms_service/management/commands/sms_segment_report.py
+"""
+SMS segment maliyet raporu
+
+Son günlerde gönderilen mesajları mesaj tipine göre kodlama (GSM-7 / UCS-2), segment ve harf çevirisiyle
+gönderilselerdi harcanacak segment üzerinden özetler. Hangi mesaj kalıplarının birden fazla segmente taştığını
+ve SMS_TRANSLITERATE açılırsa ne kadar kota kazanılacağını gösterir.
+"""
+
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from sms_service.encoding import GSM7, UCS2, plan
+from sms_service.models import SMSLog
+
+
+class Command(BaseCommand):
+    help = 'Gönderilen SMS\'lerin segment maliyetini ve harf çevirisinin kazancını raporlar'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=7, help='Kaç günlük mesajlar raporlanacak')
+
+    def handle(self, *args, **options):
+        if options['days'] < 1:
+            raise CommandError('--days en az 1 olmalıdır')
+
+        since = timezone.now() - timedelta(days=options['days'])
+        logs = SMSLog.objects.filter(created_at__gte=since, template_id__isnull=True).exclude(status='Coalesced')
+
+        by_type = {}
+        for message_type, message in logs.values_list('message_type', 'message').iterator(chunk_size=2000):
+            by_type.setdefault(message_type, []).append(message)
+
+        if not by_type:
+            self.stdout.write('Raporlanacak mesaj yok')
+            return
+
+        total = plan(message for messages in by_type.values() for message in messages)
+        for message_type, messages in sorted(by_type.items(), key=lambda item: -len(item[1])):
+            self._write(message_type, plan(messages))
+        self._write('TOPLAM', total)
+
+    def _write(self, label, stats):
+        self.stdout.write(
+            f"{label}: {stats['messages']} mesaj ({stats[GSM7]} GSM-7, {stats[UCS2]} UCS-2), "
+            f"{stats['segments']} segment, ort {stats['segments'] / stats['messages']:.2f}; "
+            f"harf çevirisiyle {stats['transliterated_segments']} segment ({stats['segments_saved']} tasarruf)"
+        )
@@ -0,0 +1,70 @@
+# sms_service/management/commands/sms_simulator.py
+"""
+Yerel Huawei SMS simülatörünü çalıştırır (simulator.py)
+
+Uygulamayı simülatöre bağlamak için HUAWEI_SMS_ENDPOINT simülatör adresine çevrilir. Teslim raporları isteğin
+statusCallback adresine (BASE_URL + sms_callback) gönderilir. Ctrl-C ile durur.
+"""
+
+import signal
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from sms_service.simulator import HuaweiSimulator
+
+
+class Command(BaseCommand):
+    help = 'Huawei batchSendSms API\'sini taklit eden yerel SMS simülatörünü çalıştırır'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--host', default='127.0.0.1')
+        parser.add_argument('--port', type=int, default=9090)
+        parser.add_argument('--latency', default='lognormal:0.05,0.5',
+                            help="Yanıt gecikmesi: const:S, uniform:A,B, lognormal:MEDYAN,SIGMA, exp:ORTALAMA")
+        parser.add_argument('--error-rate', type=float, default=0.0, help='HTTP 500 oranı')
+        parser.add_argument('--throttle-rate', type=float, default=0.0, help='HTTP 429 oranı')
+        parser.add_argument('--tps', type=float, default=None, help='Bu hızın üstünde 429 döner')
+        parser.add_argument('--callback-delay', default='uniform:0.5,3', help='Teslim raporu gecikmesi')
+        parser.add_argument('--delivery-rate', type=float, default=0.97, help='DELIVRD rapor oranı')
+        parser.add_argument('--duplicate-rate', type=float, default=0.0, help='İki kez gönderilen rapor oranı')
+        parser.add_argument('--report-every', type=float, default=10.0, help='İstatistik yazma aralığı (saniye)')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        try:
+            simulator = HuaweiSimulator(
+                host=options['host'], port=options['port'], latency=options['latency'],
+                error_rate=options['error_rate'], throttle_rate=options['throttle_rate'], tps=options['tps'],
+                callback_delay=options['callback_delay'], delivery_rate=options['delivery_rate'],
+                duplicate_rate=options['duplicate_rate'], seed=options['seed'],
+            )
+        except (ValueError, OSError) as e:
+            raise CommandError(str(e))
+
+        self._stop = False
+        signal.signal(signal.SIGTERM, self._request_stop)
+        signal.signal(signal.SIGINT, self._request_stop)
+
+        simulator.start()
+        self.stdout.write(f'SMS simülatörü çalışıyor: {simulator.url} (HUAWEI_SMS_ENDPOINT={simulator.url})')
+        next_report = time.monotonic() + options['report_every']
+        while not self._stop:
+            time.sleep(0.2)
+            if time.monotonic() >= next_report:
+                self.stdout.write(self._format(simulator))
+                next_report = time.monotonic() + options['report_every']
+
+        simulator.stop()
+        self.stdout.write('SMS simülatörü durdu: ' + self._format(simulator))
+
+    def _request_stop(self, signum, frame):
+        self._stop = True
+
+    def _format(self, simulator):
+        stats = simulator.stats
+        return (
+            f"{stats['requests']} istek, {stats['accepted']} kabul, {stats['errors']} hata, "
+            f"{stats['throttled']} 429, {stats['rejected']} ret, {stats['callbacks_sent']} rapor "
+            f"({stats['callbacks_failed']} başarısız, {simulator.pending_callbacks()} bekliyor)"
+        )
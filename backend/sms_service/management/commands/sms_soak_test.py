@@ -0,0 +1,272 @@
+# sms_service/management/commands/sms_soak_test.py
+"""
+SMS hattı için uzun süreli (soak) yük düzeneği
+
+Tamamen yerelde çalışır: Huawei yerine simülatör (simulator.py) başlatılır, teslim raporları için uygulama aynı
+süreçte bir WSGI sunucusunda dinler. Süre boyunca test doktoru için sürekli alarm kurulur ve zamanı gelenler
+tetiklenir, belirli aralıklarla toplu mesaj yüklenir; gönderici simülatöre gönderir, gelen raporlar işlenir.
+Her rapor aralığında gönderim hızı, kuyruk birikimi, alarm gecikmesi (planlanan zaman -> gönderim), toplu mesaj
+gecikmesi, teslim raporu kapsamı ve bellek (RSS) yazılır. Alarm p99 gecikmesi klinik SLO'yu aşarsa, raporların
+çoğu işlenmezse ya da bellek ısınmadan sonra sınırdan fazla büyürse komut hata verir.
+Düzenek canlı veritabanına yazmaz: çalışma boyunca test veritabanı kurulur (SQLite'ta geçici dosya), sonunda
+silinir. Teslim raporları da sadece bu çalışmanın simülatör kimlikleriyle işlenir.
+"""
+
+import os
+import random
+import resource
+import tempfile
+import threading
+import time
+import tracemalloc
+import uuid
+from datetime import timedelta
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from django.core.management.base import BaseCommand, CommandError
+from django.core.wsgi import get_wsgi_application
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connection
+from django.test.utils import setup_databases, teardown_databases
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from sms_service.alarms import due_alarms, fire_occurrence
+from sms_service.lanes import LANE_BULK, LANE_CLINICAL, LANE_LATENCY_SLO, _percentile
+from sms_service.models import AlarmHistory, DeliveryReceipt, DoctorAlarm, SMSLog
+from sms_service.outbound import Dispatcher
+from sms_service.providers import HuaweiProvider, ProviderRouter
+from sms_service.ratelimit import RateLimiter
+from sms_service.receipts import drain_receipts
+from sms_service.services import SMSService
+from sms_service.simulator import HuaweiSimulator
+
+
+class _ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class _QuietHandler(WSGIRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+
+def _rss_mb():
+    """Sürecin anlık bellek kullanımı (MB); /proc yoksa en yüksek değer"""
+    try:
+        with open('/proc/self/status') as status:
+            for line in status:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class Command(BaseCommand):
+    help = 'Alarm, gönderici ve toplu gönderimi simülatöre karşı saatlerce çalıştırıp hız, gecikme ve belleği ölçer'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=float, default=10.0, help='Test süresi (dakika; saatler için 240 vb.)')
+        parser.add_argument('--alarms-per-minute', type=float, default=120.0, help='Dakikada kurulan alarm')
+        parser.add_argument('--patients', type=int, default=200, help='Alarm ve toplu mesaj alan hasta numarası')
+        parser.add_argument('--bulk-every', type=float, default=120.0, help='Toplu gönderim aralığı (saniye)')
+        parser.add_argument('--bulk-size', type=int, default=300, help='Toplu gönderim başına mesaj')
+        parser.add_argument('--rate', type=float, default=50.0, help='Hız sınırı (SMS segmenti/sn)')
+        parser.add_argument('--latency', default='lognormal:0.05,0.6', help='Simülatör yanıt gecikmesi')
+        parser.add_argument('--error-rate', type=float, default=0.01, help='Simülatör HTTP 500 oranı')
+        parser.add_argument('--throttle-rate', type=float, default=0.01, help='Simülatör HTTP 429 oranı')
+        parser.add_argument('--callback-delay', default='uniform:0.5,3', help='Teslim raporu gecikmesi')
+        parser.add_argument('--report-every', type=float, default=60.0, help='Rapor aralığı (saniye)')
+        parser.add_argument('--max-rss-growth-mb', type=float, default=100.0,
+                            help='İlk rapordan sonra izin verilen bellek büyümesi (MB)')
+        parser.add_argument('--tracemalloc', action='store_true', help='En çok büyüyen bellek ayırımlarını yaz')
+        parser.add_argument('--seed', type=int, default=None)
+
+    def handle(self, *args, **options):
+        if options['minutes'] <= 0 or options['patients'] < 1 or options['report_every'] <= 0:
+            raise CommandError('--minutes, --patients ve --report-every pozitif olmalıdır')
+
+        with tempfile.TemporaryDirectory(prefix='sms-soak-') as tmpdir:
+            if connection.vendor == 'sqlite':
+                # Bellek içi test veritabanında iş parçacıkları yazma kilidini bekleyemez; geçici dosya kullanılır
+                connection.settings_dict['TEST']['NAME'] = os.path.join(tmpdir, 'soak.sqlite3')
+            old_config = setup_databases(verbosity=0, interactive=False, aliases={DEFAULT_DB_ALIAS})
+            try:
+                self._soak(options)
+            finally:
+                teardown_databases(old_config, verbosity=0)
+
+    def _soak(self, options):
+        rng = random.Random(options['seed'])
+        run_id = uuid.uuid4().hex[:8]
+        doctor = User.objects.create(username=f'soak-{run_id}', user_type='doktor')
+        phones = [f'0555{rng.randrange(10 ** 7):07d}' for _ in range(options['patients'])]
+
+        simulator = HuaweiSimulator(
+            latency=options['latency'], error_rate=options['error_rate'], throttle_rate=options['throttle_rate'],
+            callback_delay=options['callback_delay'], seed=options['seed'],
+        )
+        app_server = make_server(
+            '127.0.0.1', 0, get_wsgi_application(), server_class=_ThreadingWSGIServer, handler_class=_QuietHandler
+        )
+        callback_url = f'http://127.0.0.1:{app_server.server_port}{reverse("sms_service:sms_callback")}'
+        provider = HuaweiProvider(
+            name='simulator', endpoint=simulator.url, app_key='soak', app_secret='soak', callback_url=callback_url
+        )
+        limiter = RateLimiter(prefix=f'soak-{run_id}', limits={
+            'global': {'rate': options['rate'], 'burst': options['rate'] * 2},
+            'sender': {'rate': options['rate'], 'burst': options['rate'] * 2},
+        })
+        service = SMSService(router=ProviderRouter([provider]), limiter=limiter)
+        dispatcher = Dispatcher(transport=service.deliver, filters={'recipient_user': doctor})
+        receipt_filters = {'message_id__startswith': simulator.id_prefix}
+
+        if connection.vendor == 'sqlite':
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout = 60000')
+        if options['tracemalloc']:
+            tracemalloc.start()
+
+        samples = []
+        started = time.monotonic()
+        try:
+            simulator.start()
+            threading.Thread(target=app_server.serve_forever, name='soak-callback', daemon=True).start()
+            dispatcher.start()
+            self.stdout.write(f'Simülatör {simulator.url}, raporlar {callback_url}')
+            samples = self._run(doctor, phones, rng, simulator, receipt_filters, options)
+        finally:
+            dispatcher.stop()
+            simulator.stop()
+            app_server.shutdown()
+            app_server.server_close()
+
+        elapsed = time.monotonic() - started
+        sent = sum(sample['sent'] for sample in samples)
+        worst_alarm = max((sample['alarm_p99'] for sample in samples), default=0.0)
+        coverage = samples[-1]['coverage'] if samples else 0.0
+        growth = samples[-1]['rss'] - samples[0]['rss'] if len(samples) > 1 else 0.0
+        self.stdout.write(
+            f"{elapsed / 60:.1f} dk: {sent} SMS ({sent / elapsed:.1f}/sn), en kötü alarm p99 {worst_alarm:.1f} sn, "
+            f"rapor kapsamı %{coverage * 100:.1f}, bellek büyümesi {growth:.1f} MB; simülatör {simulator.stats}"
+        )
+        if options['tracemalloc']:
+            self._write_tracemalloc()
+
+        slo = LANE_LATENCY_SLO[LANE_CLINICAL]
+        if worst_alarm > slo:
+            raise CommandError(f'Alarm gecikmesi p99 {worst_alarm:.1f} sn, klinik SLO {slo} sn aşıldı')
+        if coverage < 0.9:
+            raise CommandError(f'Gönderilen SMS\'lerin sadece %{coverage * 100:.1f} kadarının raporu işlendi')
+        if growth > options['max_rss_growth_mb']:
+            raise CommandError(f'Bellek {growth:.1f} MB büyüdü (sınır {options["max_rss_growth_mb"]} MB)')
+        self.stdout.write(self.style.SUCCESS('Soak testi tamamlandı: gecikme SLO içinde, bellek sabit'))
+
+    def _run(self, doctor, phones, rng, simulator, receipt_filters, options):
+        deadline = time.monotonic() + options['minutes'] * 60
+        alarm_interval = 60 / options['alarms_per_minute'] if options['alarms_per_minute'] > 0 else None
+        next_alarm = next_bulk = next_receipts = time.monotonic()
+        next_report = time.monotonic() + options['report_every']
+        window_start = timezone.now()
+        samples = []
+        alarm_count = 0
+
+        while time.monotonic() < deadline:
+            now = timezone.now()
+            if alarm_interval:
+                while next_alarm <= time.monotonic():
+                    self._create_alarm(doctor, rng.choice(phones), now + timedelta(seconds=rng.uniform(0, 60)), alarm_count)
+                    alarm_count += 1
+                    next_alarm += alarm_interval
+            for alarm in due_alarms(now).filter(doctor=doctor):
+                fire_occurrence(alarm, now)
+
+            if options['bulk_size'] and time.monotonic() >= next_bulk:
+                SMSLog.bulk_create_logs(
+                    [
+                        SMSLog(recipient_phone=phone, recipient_user=doctor, message=f'Duyuru {alarm_count}: kontrol randevunuzu unutmayın',
+                               message_type='Duyuru', status='Pending', lane=LANE_BULK)
+                        for phone in rng.sample(phones, min(options['bulk_size'], len(phones)))
+                    ],
+                    batch_size=1000,
+                )
+                next_bulk = time.monotonic() + options['bulk_every']
+
+            if time.monotonic() >= next_receipts:
+                self._drain(receipt_filters)
+                next_receipts = time.monotonic() + 5
+
+            if time.monotonic() >= next_report:
+                window_end = timezone.now()
+                samples.append(self._sample(doctor, window_start, window_end, simulator))
+                window_start = window_end
+                next_report = time.monotonic() + options['report_every']
+            time.sleep(0.5)
+
+        # Son raporlar gelsin ve işlensin
+        drain_deadline = time.monotonic() + 30
+        while (
+            simulator.pending_callbacks() or DeliveryReceipt.objects.filter(**receipt_filters).exists()
+        ) and time.monotonic() < drain_deadline:
+            self._drain(receipt_filters)
+            time.sleep(1)
+        samples.append(self._sample(doctor, window_start, timezone.now(), simulator))
+        return samples
+
+    def _drain(self, receipt_filters):
+        try:
+            drain_receipts(filters=receipt_filters)
+        except OperationalError as e:
+            # SQLite'ta okuma işlemi yazmaya yükselirken kilit çakışması; raporlar kuyrukta kalır, sonraki turda işlenir
+            if connection.vendor != 'sqlite':
+                raise
+            self.stderr.write(f'Teslim raporları bu tur işlenemedi: {e}')
+
+    def _create_alarm(self, doctor, phone, run_at, index):
+        DoctorAlarm.objects.create(
+            doctor=doctor, patient_name=f'Hasta {phone[-4:]}', patient_phone=phone, alarm_type='medication',
+            title='İlaç', message=f'İlaç hatırlatması {index}: 1 tablet', alarm_time=timezone.localtime(run_at).time(),
+            alarm_date=timezone.localtime(run_at).date(), repeat_type='once', next_run=run_at,
+        )
+
+    def _sample(self, doctor, start, end, simulator):
+        logs = SMSLog.objects.filter(recipient_user=doctor)
+        sent = logs.filter(sent_at__gte=start, sent_at__lt=end)
+        alarm_lateness = sorted(
+            (sent_at - scheduled_for).total_seconds()
+            for scheduled_for, sent_at in AlarmHistory.objects.filter(
+                alarm__doctor=doctor, sms_log__sent_at__gte=start, sms_log__sent_at__lt=end
+            ).values_list('scheduled_for', 'sms_log__sent_at')
+        )
+        bulk_lateness = sorted(
+            (sent_at - created_at).total_seconds()
+            for created_at, sent_at in sent.filter(lane=LANE_BULK).values_list('created_at', 'sent_at')
+        )
+        total_sent = logs.filter(sent_at__isnull=False).count()
+        sample = {
+            'sent': sent.count(),
+            'rate': sent.count() / max((end - start).total_seconds(), 1e-6),
+            'backlog': logs.filter(status='Pending').count(),
+            'alarm_p50': _percentile(alarm_lateness, 0.50) if alarm_lateness else 0.0,
+            'alarm_p99': _percentile(alarm_lateness, 0.99) if alarm_lateness else 0.0,
+            'bulk_p99': _percentile(bulk_lateness, 0.99) if bulk_lateness else 0.0,
+            'coverage': logs.filter(receipt_at__isnull=False).count() / total_sent if total_sent else 1.0,
+            'failed': logs.filter(status='Failed').count(),
+            'rss': _rss_mb(),
+        }
+        self.stdout.write(
+            f"{timezone.localtime(end):%H:%M:%S} {sample['sent']} SMS ({sample['rate']:.1f}/sn), birikim {sample['backlog']}, "
+            f"alarm gecikmesi p50 {sample['alarm_p50']:.1f} / p99 {sample['alarm_p99']:.1f} sn, "
+            f"toplu p99 {sample['bulk_p99']:.1f} sn, rapor kapsamı %{sample['coverage'] * 100:.1f}, "
+            f"başarısız {sample['failed']}, RSS {sample['rss']:.1f} MB, simülatör 429 {simulator.stats['throttled']} "
+            f"/ 500 {simulator.stats['errors']}"
+        )
+        return sample
+
+    def _write_tracemalloc(self):
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+        for stat in snapshot.statistics('lineno')[:10]:
+            self.stdout.write(f'  {stat}')
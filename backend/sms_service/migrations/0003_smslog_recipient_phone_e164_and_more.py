@@ -0,0 +1,59 @@
+# Generated by Django 4.2.7 on 2025-08-19 09:40
+
+from django.db import migrations, models
+
+BACKFILL_CHUNK_SIZE = 2000
+
+
+def _backfill(model, source_field, target_field):
+    """Kaynak telefon alanından E.164 kolonunu parça parça doldur"""
+    from akilli_ilac_backend.telefon import normalize_phone
+
+    last_id = 0
+    while True:
+        chunk = list(
+            model.objects.filter(id__gt=last_id)
+            .order_by('id')
+            .only('id', source_field)[:BACKFILL_CHUNK_SIZE]
+        )
+        if not chunk:
+            break
+        for obj in chunk:
+            setattr(obj, target_field, normalize_phone(getattr(obj, source_field)))
+        model.objects.bulk_update(chunk, [target_field])
+        last_id = chunk[-1].id
+
+
+def backfill_phone_e164(apps, schema_editor):
+    _backfill(apps.get_model('sms_service', 'SMSLog'), 'recipient_phone', 'recipient_phone_e164')
+    _backfill(apps.get_model('sms_service', 'DoctorAlarm'), 'patient_phone', 'patient_phone_e164')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0002_doctoralarm_alarmhistory_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='doctoralarm',
+            name='patient_phone_e164',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Hasta Telefon (E.164)'),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='recipient_phone_e164',
+            field=models.CharField(blank=True, default='', editable=False, max_length=16, verbose_name='Alıcı Telefon (E.164)'),
+        ),
+        # İndeksler doldurma işleminden sonra oluşturulur
+        migrations.RunPython(backfill_phone_e164, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='doctoralarm',
+            index=models.Index(fields=['patient_phone_e164', '-created_at'], name='sms_service_patient_e219cd_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='smslog',
+            index=models.Index(fields=['recipient_phone_e164', '-created_at'], name='sms_service_recipie_9fb2c3_idx'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 4.2.7 on 2025-08-20 14:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0003_smslog_recipient_phone_e164_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DeliveryReceipt',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('message_id', models.CharField(max_length=100, verbose_name='Huawei Message ID')),
+                ('provider_status', models.CharField(help_text='DELIVRD, UNDELIV, EXPIRED, etc.', max_length=30, verbose_name='Operatör Durumu')),
+                ('status', models.CharField(choices=[('Pending', 'Beklemede'), ('Sent', 'Gönderildi'), ('Failed', 'Başarısız'), ('Delivered', 'Teslim Edildi'), ('Rejected', 'Reddedildi')], max_length=20, verbose_name='Durum')),
+                ('reported_at', models.DateTimeField(verbose_name='Rapor Zamanı')),
+                ('received_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Alınma Zamanı')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='İşleme Denemesi')),
+                ('next_attempt_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Sonraki İşleme Zamanı')),
+            ],
+            options={
+                'verbose_name': 'Teslim Raporu',
+                'verbose_name_plural': 'Teslim Raporları',
+                'ordering': ['id'],
+            },
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='receipt_at',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Son Rapor Zamanı'),
+        ),
+        migrations.AddIndex(
+            model_name='smslog',
+            index=models.Index(fields=['message_id'], name='sms_service_message_01cd0f_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='deliveryreceipt',
+            index=models.Index(fields=['next_attempt_at', 'id'], name='sms_service_next_at_215c31_idx'),
+        ),
+    ]
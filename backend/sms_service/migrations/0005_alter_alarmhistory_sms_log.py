@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2025-08-18 14:40
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0004_deliveryreceipt_smslog_receipt_at_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='alarmhistory',
+            name='sms_log',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='sms_service.smslog', verbose_name='SMS Log'),
+        ),
+    ]
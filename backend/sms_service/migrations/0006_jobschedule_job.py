@@ -0,0 +1,69 @@
+# Generated by Django 4.2.7 on 2025-08-19 09:25
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0005_alter_alarmhistory_sms_log'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='JobSchedule',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True, verbose_name='Görev Adı')),
+                ('task', models.CharField(help_text='sms_service.tasks.process_alarm_notifications', max_length=200, verbose_name='Görev Fonksiyonu')),
+                ('interval_seconds', models.PositiveIntegerField(blank=True, null=True, verbose_name='Aralık (Saniye)')),
+                ('cron', models.CharField(blank=True, help_text='dakika saat gün ay haftanın-günü (ör. 0 3 * * *)', max_length=100, verbose_name='Cron İfadesi')),
+                ('enabled', models.BooleanField(default=True, verbose_name='Aktif Mi')),
+                ('next_run_at', models.DateTimeField(db_index=True, verbose_name='Sonraki Çalışma')),
+                ('last_run_at', models.DateTimeField(blank=True, null=True, verbose_name='Son Çalışma')),
+                ('last_status', models.CharField(blank=True, max_length=20, verbose_name='Son Durum')),
+                ('run_count', models.PositiveIntegerField(default=0, verbose_name='Çalışma Sayısı')),
+                ('failure_count', models.PositiveIntegerField(default=0, verbose_name='Hata Sayısı')),
+                ('total_duration_ms', models.BigIntegerField(default=0, verbose_name='Toplam Süre (ms)')),
+                ('last_duration_ms', models.PositiveIntegerField(default=0, verbose_name='Son Süre (ms)')),
+                ('max_duration_ms', models.PositiveIntegerField(default=0, verbose_name='En Uzun Süre (ms)')),
+            ],
+            options={
+                'verbose_name': 'Periyodik Görev',
+                'verbose_name_plural': 'Periyodik Görevler',
+                'db_table': 'job_schedules',
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(primary_key=True, serialize=False)),
+                ('task', models.CharField(max_length=200, verbose_name='Görev Fonksiyonu')),
+                ('args', models.JSONField(blank=True, default=list, verbose_name='Argümanlar')),
+                ('kwargs', models.JSONField(blank=True, default=dict, verbose_name='İsimli Argümanlar')),
+                ('status', models.CharField(choices=[('queued', 'Sırada'), ('running', 'Çalışıyor'), ('done', 'Tamamlandı'), ('failed', 'Başarısız')], default='queued', max_length=20, verbose_name='Durum')),
+                ('run_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Çalışma Zamanı')),
+                ('locked_by', models.CharField(blank=True, max_length=100, verbose_name='Çalıştırıcı')),
+                ('lease_until', models.DateTimeField(blank=True, null=True, verbose_name='Kilit Bitişi')),
+                ('attempts', models.PositiveSmallIntegerField(default=0, verbose_name='Deneme Sayısı')),
+                ('max_attempts', models.PositiveSmallIntegerField(default=3, verbose_name='Maksimum Deneme')),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now, verbose_name='Oluşturulma Tarihi')),
+                ('started_at', models.DateTimeField(blank=True, null=True, verbose_name='Başlama Zamanı')),
+                ('finished_at', models.DateTimeField(blank=True, null=True, verbose_name='Bitiş Zamanı')),
+                ('duration_ms', models.PositiveIntegerField(blank=True, null=True, verbose_name='Süre (ms)')),
+                ('result', models.TextField(blank=True, verbose_name='Sonuç')),
+                ('error', models.TextField(blank=True, verbose_name='Hata')),
+                ('schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to='sms_service.jobschedule', verbose_name='Periyodik Görev')),
+            ],
+            options={
+                'verbose_name': 'Görev',
+                'verbose_name_plural': 'Görevler',
+                'db_table': 'jobs',
+                'ordering': ['run_at', 'id'],
+                'indexes': [models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'), models.Index(fields=['status', 'lease_until'], name='job_status_lease_idx'), models.Index(fields=['schedule', 'status'], name='job_schedule_status_idx'), models.Index(fields=['finished_at'], name='job_finished_at_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,38 @@
+# Generated by Django 4.2.7 on 2025-08-19 14:10
+
+from django.db import migrations, models
+
+from sms_service.lanes import LANE_BULK, MESSAGE_TYPE_LANES
+
+
+def fill_lanes(apps, schema_editor):
+    # Mevcut kayıtların şeridi mesaj tipinden; tip başına tek UPDATE
+    SMSLog = apps.get_model('sms_service', 'SMSLog')
+    for message_type, lane in MESSAGE_TYPE_LANES.items():
+        SMSLog.objects.filter(message_type=message_type, lane__isnull=True).update(lane=lane)
+    SMSLog.objects.filter(lane__isnull=True).update(lane=LANE_BULK)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0006_jobschedule_job'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smslog',
+            name='claimed_until',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Gönderici Sahipliği'),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='lane',
+            field=models.PositiveSmallIntegerField(blank=True, choices=[(0, 'Acil'), (1, 'Klinik'), (2, 'Toplu')], null=True, verbose_name='Öncelik Şeridi'),
+        ),
+        migrations.AddIndex(
+            model_name='smslog',
+            index=models.Index(fields=['status', 'lane', 'id'], name='sms_logs_outbound_idx'),
+        ),
+        migrations.RunPython(fill_lanes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 4.2.7 on 2025-08-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0007_smslog_lane'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RateBucket',
+            fields=[
+                ('name', models.CharField(max_length=100, primary_key=True, serialize=False, verbose_name='Kova')),
+                ('rate', models.FloatField(verbose_name='Saniyede Jeton')),
+                ('capacity', models.FloatField(verbose_name='Kapasite (Ani Yük)')),
+                ('tokens', models.FloatField(verbose_name='Jeton')),
+                ('updated_at', models.FloatField(verbose_name='Son Dolum (epoch sn)')),
+                ('acquired_count', models.BigIntegerField(default=0, verbose_name='Verilen Jeton')),
+                ('denied_count', models.BigIntegerField(default=0, verbose_name='Reddedilen İstek')),
+                ('wait_ms_total', models.FloatField(default=0, verbose_name='Toplam Bekleme (ms)')),
+                ('max_wait_ms', models.FloatField(default=0, verbose_name='En Uzun Bekleme (ms)')),
+            ],
+            options={
+                'verbose_name': 'Hız Sınırı Kovası',
+                'verbose_name_plural': 'Hız Sınırı Kovaları',
+                'db_table': 'rate_buckets',
+                'ordering': ['name'],
+            },
+        ),
+    ]
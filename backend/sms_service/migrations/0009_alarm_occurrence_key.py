@@ -0,0 +1,22 @@
+# Generated by Django 4.2.7 on 2025-08-20 09:15
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0008_ratebucket'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alarmhistory',
+            name='scheduled_for',
+            field=models.DateTimeField(blank=True, null=True, verbose_name='Planlanan Zaman'),
+        ),
+        migrations.AddConstraint(
+            model_name='alarmhistory',
+            constraint=models.UniqueConstraint(fields=('alarm', 'scheduled_for'), name='alarm_history_occurrence_uniq'),
+        ),
+    ]
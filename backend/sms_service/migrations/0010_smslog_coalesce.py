@@ -0,0 +1,39 @@
+# Generated by Django 4.2.7 on 2025-08-21 10:05
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0009_alarm_occurrence_key'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='alarmhistory',
+            name='fan_in',
+            field=models.PositiveSmallIntegerField(default=1, verbose_name='Birleşen Mesaj Sayısı'),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='coalesced_into',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='coalesced', to='sms_service.smslog', verbose_name='Birleştirildiği SMS'),
+        ),
+        migrations.AddField(
+            model_name='smslog',
+            name='fan_in',
+            field=models.PositiveSmallIntegerField(default=1, verbose_name='Birleşen Mesaj Sayısı'),
+        ),
+        migrations.AlterField(
+            model_name='deliveryreceipt',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Beklemede'), ('Sent', 'Gönderildi'), ('Failed', 'Başarısız'), ('Delivered', 'Teslim Edildi'), ('Rejected', 'Reddedildi'), ('Coalesced', 'Birleştirildi')], max_length=20, verbose_name='Durum'),
+        ),
+        migrations.AlterField(
+            model_name='smslog',
+            name='status',
+            field=models.CharField(choices=[('Pending', 'Beklemede'), ('Sent', 'Gönderildi'), ('Failed', 'Başarısız'), ('Delivered', 'Teslim Edildi'), ('Rejected', 'Reddedildi'), ('Coalesced', 'Birleştirildi')], default='Pending', max_length=20, verbose_name='Durum'),
+        ),
+    ]
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.7 on 2025-08-21 15:30
+
+from django.db import migrations, models
+
+from sms_service.encoding import segment_count
+
+
+def fill_segments(apps, schema_editor):
+    # Mevcut kayıtların segment sayısı; sadece tek segmentten uzun olanlar yazılır
+    SMSLog = apps.get_model('sms_service', 'SMSLog')
+    batch = []
+    for log in SMSLog.objects.only('id', 'message').iterator(chunk_size=2000):
+        segments = segment_count(log.message)
+        if segments > 1:
+            log.segments = segments
+            batch.append(log)
+        if len(batch) >= 1000:
+            SMSLog.objects.bulk_update(batch, ['segments'])
+            batch = []
+    if batch:
+        SMSLog.objects.bulk_update(batch, ['segments'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0010_smslog_coalesce'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smslog',
+            name='segments',
+            field=models.PositiveSmallIntegerField(default=1, verbose_name='Segment Sayısı'),
+        ),
+        migrations.RunPython(fill_segments, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2025-08-22 09:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('sms_service', '0011_smslog_segments'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='smslog',
+            name='provider',
+            field=models.CharField(blank=True, default='', max_length=30, verbose_name='Sağlayıcı'),
+        ),
+    ]
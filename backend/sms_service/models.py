@@ -3,6 +3,9 @@
 from django.db import models
 from django.utils import timezone
 from accounts.models import User
+from akilli_ilac_backend.telefon import E164_MAX_LENGTH, normalize_phone
+from .encoding import prepare, segment_count
+from .lanes import LANE_CHOICES, lane_for
 
 class SMSLog(models.Model):
     """
@@ -15,6 +18,7 @@ class SMSLog(models.Model):
         ('Failed', 'Başarısız'),
         ('Delivered', 'Teslim Edildi'),
         ('Rejected', 'Reddedildi'),
+        ('Coalesced', 'Birleştirildi'),
     ]
     
     # Primary Key
@@ -26,6 +30,15 @@ class SMSLog(models.Model):
         verbose_name="Alıcı Telefon"
     )
     
+    # recipient_phone'un E.164 hali - save() içinde bir kez hesaplanır, gönderim ve filtreleme bunu kullanır
+    recipient_phone_e164 = models.CharField(
+        max_length=E164_MAX_LENGTH,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Alıcı Telefon (E.164)"
+    )
+    
     recipient_user = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -94,6 +107,13 @@ class SMSLog(models.Model):
         verbose_name="Teslim Edilme Tarihi"
     )
     
+    # Uygulanan son teslim raporunun operatör zamanı (sıra dışı gelen raporları ayıklamak için)
+    receipt_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Son Rapor Zamanı"
+    )
+    
     # Tekrar Deneme Bilgileri
     retry_count = models.IntegerField(
         default=0,
@@ -110,6 +130,50 @@ class SMSLog(models.Model):
         blank=True,
         verbose_name="Sonraki Deneme Zamanı"
     )
+    
+    # Gönderim şeridi (lanes.py) - boş bırakılırsa mesaj tipinden belirlenir
+    lane = models.PositiveSmallIntegerField(
+        choices=LANE_CHOICES,
+        null=True,
+        blank=True,
+        verbose_name="Öncelik Şeridi"
+    )
+    
+    # Gönderici bu zamana kadar mesajı sahiplenmiştir (outbound.py); süresi geçen sahiplik tekrar alınabilir
+    claimed_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Gönderici Sahipliği"
+    )
+    
+    # Aynı alıcıya kısa aralıkla giden mesajlar tek SMS'te birleştirilir (coalesce.py)
+    coalesced_into = models.ForeignKey(
+        'self',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='coalesced',
+        verbose_name="Birleştirildiği SMS"
+    )
+    
+    fan_in = models.PositiveSmallIntegerField(
+        default=1,
+        verbose_name="Birleşen Mesaj Sayısı"
+    )
+    
+    # Mesajı gönderen sağlayıcı (providers.py, settings.SMS_PROVIDERS adı)
+    provider = models.CharField(
+        max_length=30,
+        blank=True,
+        default='',
+        verbose_name="Sağlayıcı"
+    )
+    
+    # Mesajın sağlayıcıda kapladığı segment (encoding.py) - kota ve ücret segment başınadır
+    segments = models.PositiveSmallIntegerField(
+        default=1,
+        verbose_name="Segment Sayısı"
+    )
 
     class Meta:
         verbose_name = "SMS Log"
@@ -119,12 +183,52 @@ class SMSLog(models.Model):
             models.Index(fields=['status']),
             models.Index(fields=['created_at']),
             models.Index(fields=['recipient_phone']),
+            models.Index(fields=['recipient_phone_e164', '-created_at']),
             models.Index(fields=['message_type']),
+            models.Index(fields=['message_id']),
+            # Göndericiler her şeridin en eski bekleyen mesajını bu indeksle bulur
+            models.Index(fields=['status', 'lane', 'id'], name='sms_logs_outbound_idx'),
         ]
         
     def __str__(self):
         return f"SMS to {self.recipient_phone} - {self.status}"
     
+    def fill_derived_fields(self):
+        """Kayıttan türetilen alanları doldur (bulk_create save() çağırmadığı için ayrıca kullanılır)"""
+        self.recipient_phone_e164 = normalize_phone(self.recipient_phone)
+        if self.lane is None:
+            self.lane = lane_for(self.message_type)
+        if self._state.adding and not self.template_id:
+            # Harf çevirisi açıksa yeni mesaj GSM-7'ye çevrilir; şablonlu mesajın metnini sağlayıcı üretir
+            self.message = prepare(self.message)
+        self.segments = segment_count(self.message)
+    
+    def save(self, *args, **kwargs):
+        self.fill_derived_fields()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'recipient_phone' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'recipient_phone_e164'}
+        super().save(*args, **kwargs)
+    
+    def resolve_patient(self):
+        """Teslim raporundan hastaya ulaş: önce kayıtlı kullanıcı, yoksa E.164 numara indeksi"""
+        from patients.models import Patient
+        
+        if self.recipient_user_id:
+            patient = Patient.objects.filter(user_id=self.recipient_user_id).first()
+            if patient:
+                return patient
+        if self.recipient_phone_e164:
+            return Patient.objects.filter(telefon_e164=self.recipient_phone_e164).first()
+        return None
+    
+    @classmethod
+    def bulk_create_logs(cls, logs, **kwargs):
+        """Türetilmiş alanları doldurarak toplu SMS log kaydı oluştur"""
+        for log in logs:
+            log.fill_derived_fields()
+        return cls.objects.bulk_create(logs, **kwargs)
+    
     @property
     def can_retry(self):
         """Tekrar denenebilir mi"""
@@ -167,6 +271,63 @@ class SMSLog(models.Model):
         self.save()
 
 
+class DeliveryReceipt(models.Model):
+    """
+    Operatörden gelen teslim raporları için ara tablo.
+    Callback raporları burada biriktirir, receipts.apply_pending_receipts toplu olarak SMSLog'a işler.
+    """
+    
+    id = models.BigAutoField(primary_key=True)
+    
+    message_id = models.CharField(
+        max_length=100,
+        verbose_name="Huawei Message ID"
+    )
+    
+    provider_status = models.CharField(
+        max_length=30,
+        verbose_name="Operatör Durumu",
+        help_text="DELIVRD, UNDELIV, EXPIRED, etc."
+    )
+    
+    status = models.CharField(
+        max_length=20,
+        choices=SMSLog.STATUS_CHOICES,
+        verbose_name="Durum"
+    )
+    
+    reported_at = models.DateTimeField(
+        verbose_name="Rapor Zamanı"
+    )
+    
+    received_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Alınma Zamanı"
+    )
+    
+    # SMSLog henüz message_id almamışsa rapor bir süre sonra tekrar denenir
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="İşleme Denemesi"
+    )
+    
+    next_attempt_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Sonraki İşleme Zamanı"
+    )
+
+    class Meta:
+        verbose_name = "Teslim Raporu"
+        verbose_name_plural = "Teslim Raporları"
+        ordering = ['id']
+        indexes = [
+            models.Index(fields=['next_attempt_at', 'id']),
+        ]
+        
+    def __str__(self):
+        return f"{self.message_id} - {self.provider_status}"
+
+
 class SMSTemplate(models.Model):
     """
     SMS şablonları için model
@@ -232,10 +393,8 @@ class SMSTemplate(models.Model):
     
     def format_message(self, *args):
         """Şablonu parametrelerle formatla"""
-        try:
-            return self.message_template.format(*args)
-        except (IndexError, KeyError) as e:
-            return f"Şablon formatı hatası: {str(e)}"
+        from .template_registry import template_registry
+        return template_registry.from_instance(self).render(args)
 
 
 class SystemSettings(models.Model):
@@ -521,6 +680,15 @@ class DoctorAlarm(models.Model):
         verbose_name="Hasta Telefon"
     )
     
+    # patient_phone'un E.164 hali - save() içinde doldurulur
+    patient_phone_e164 = models.CharField(
+        max_length=E164_MAX_LENGTH,
+        blank=True,
+        default='',
+        editable=False,
+        verbose_name="Hasta Telefon (E.164)"
+    )
+    
     patient_user = models.ForeignKey(
         User,
         on_delete=models.SET_NULL,
@@ -628,11 +796,19 @@ class DoctorAlarm(models.Model):
             models.Index(fields=['alarm_time']),
             models.Index(fields=['next_run']),
             models.Index(fields=['status']),
+            models.Index(fields=['patient_phone_e164', '-created_at']),
         ]
         
     def __str__(self):
         return f"{self.title} - {self.patient_name} ({self.alarm_time})"
     
+    def save(self, *args, **kwargs):
+        self.patient_phone_e164 = normalize_phone(self.patient_phone)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'patient_phone' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'patient_phone_e164'}
+        super().save(*args, **kwargs)
+    
     def calculate_next_run(self):
         """Sonraki çalışma zamanını hesapla"""
         from datetime import datetime, timedelta
@@ -684,7 +860,7 @@ class DoctorAlarm(models.Model):
         return self.next_run and now >= self.next_run
     
     def mark_sent(self, success=True):
-        """Gönderim olarak işaretle"""
+        """Gönderim olarak işaretle (zamanlanmış tetiklemeler alarms.fire_occurrence ile işlenir)"""
         self.last_sent = timezone.now()
         self.total_sent += 1
         
@@ -714,14 +890,22 @@ class AlarmHistory(models.Model):
         verbose_name="Alarm"
     )
     
+    # SMS logları saklama süresi dolunca silinir (bkz. retention.py); alarm geçmişi korunur
     sms_log = models.ForeignKey(
         SMSLog,
-        on_delete=models.CASCADE,
+        on_delete=models.SET_NULL,
         null=True,
         blank=True,
         verbose_name="SMS Log"
     )
     
+    # Tetiklemenin anahtarı (alarm + planlanan zaman) - aynı tetikleme iki kez gönderilmez (bkz. alarms.py)
+    scheduled_for = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Planlanan Zaman"
+    )
+    
     sent_at = models.DateTimeField(
         default=timezone.now,
         verbose_name="Gönderim Zamanı"
@@ -732,6 +916,12 @@ class AlarmHistory(models.Model):
         verbose_name="Başarılı"
     )
     
+    # Tetiklemenin gönderildiği SMS'te birleşen mesaj sayısı (1 = tek başına gönderildi)
+    fan_in = models.PositiveSmallIntegerField(
+        default=1,
+        verbose_name="Birleşen Mesaj Sayısı"
+    )
+    
     error_message = models.TextField(
         blank=True,
         verbose_name="Hata Mesajı"
@@ -741,7 +931,288 @@ class AlarmHistory(models.Model):
         verbose_name = "Alarm Geçmişi"
         verbose_name_plural = "Alarm Geçmişleri"
         ordering = ['-sent_at']
+        constraints = [
+            models.UniqueConstraint(fields=['alarm', 'scheduled_for'], name='alarm_history_occurrence_uniq'),
+        ]
         
     def __str__(self):
         status = "Başarılı" if self.success else "Başarısız"
-        return f"{self.alarm.title} - {status}"
\ No newline at end of file
+        return f"{self.alarm.title} - {status}"
+
+class JobSchedule(models.Model):
+    """
+    Periyodik görev tanımı - yerleşik görev çalıştırıcısı (jobs.py, manage.py run_jobs) zamanı gelen
+    tanımlar için Job kuyruğuna kayıt ekler. Süre metrikleri burada toplanır.
+    """
+
+    name = models.CharField(
+        max_length=100,
+        unique=True,
+        verbose_name="Görev Adı"
+    )
+
+    task = models.CharField(
+        max_length=200,
+        verbose_name="Görev Fonksiyonu",
+        help_text="sms_service.tasks.process_alarm_notifications"
+    )
+
+    interval_seconds = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Aralık (Saniye)"
+    )
+
+    cron = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Cron İfadesi",
+        help_text="dakika saat gün ay haftanın-günü (ör. 0 3 * * *)"
+    )
+
+    enabled = models.BooleanField(
+        default=True,
+        verbose_name="Aktif Mi"
+    )
+
+    next_run_at = models.DateTimeField(
+        db_index=True,
+        verbose_name="Sonraki Çalışma"
+    )
+
+    # Metrikler
+    last_run_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Son Çalışma"
+    )
+
+    last_status = models.CharField(
+        max_length=20,
+        blank=True,
+        verbose_name="Son Durum"
+    )
+
+    run_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Çalışma Sayısı"
+    )
+
+    failure_count = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Hata Sayısı"
+    )
+
+    total_duration_ms = models.BigIntegerField(
+        default=0,
+        verbose_name="Toplam Süre (ms)"
+    )
+
+    last_duration_ms = models.PositiveIntegerField(
+        default=0,
+        verbose_name="Son Süre (ms)"
+    )
+
+    max_duration_ms = models.PositiveIntegerField(
+        default=0,
+        verbose_name="En Uzun Süre (ms)"
+    )
+
+    class Meta:
+        verbose_name = "Periyodik Görev"
+        verbose_name_plural = "Periyodik Görevler"
+        db_table = 'job_schedules'
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.cron or f'{self.interval_seconds} sn'})"
+
+    @property
+    def avg_duration_ms(self):
+        return self.total_duration_ms // self.run_count if self.run_count else 0
+
+
+class Job(models.Model):
+    """
+    Görev kuyruğu kaydı - çalıştırıcılar kayıtları süreli kilitle (lease) alır; kilidin süresi dolarsa
+    (çalıştırıcı öldüyse) kayıt başka bir çalıştırıcı tarafından tekrar alınır
+    """
+
+    STATUS_CHOICES = [
+        ('queued', 'Sırada'),
+        ('running', 'Çalışıyor'),
+        ('done', 'Tamamlandı'),
+        ('failed', 'Başarısız'),
+    ]
+
+    id = models.BigAutoField(primary_key=True)
+
+    task = models.CharField(
+        max_length=200,
+        verbose_name="Görev Fonksiyonu"
+    )
+
+    args = models.JSONField(
+        default=list,
+        blank=True,
+        verbose_name="Argümanlar"
+    )
+
+    kwargs = models.JSONField(
+        default=dict,
+        blank=True,
+        verbose_name="İsimli Argümanlar"
+    )
+
+    schedule = models.ForeignKey(
+        JobSchedule,
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='jobs',
+        verbose_name="Periyodik Görev"
+    )
+
+    status = models.CharField(
+        max_length=20,
+        choices=STATUS_CHOICES,
+        default='queued',
+        verbose_name="Durum"
+    )
+
+    run_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Çalışma Zamanı"
+    )
+
+    # Kilit bilgileri
+    locked_by = models.CharField(
+        max_length=100,
+        blank=True,
+        verbose_name="Çalıştırıcı"
+    )
+
+    lease_until = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Kilit Bitişi"
+    )
+
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name="Deneme Sayısı"
+    )
+
+    max_attempts = models.PositiveSmallIntegerField(
+        default=3,
+        verbose_name="Maksimum Deneme"
+    )
+
+    # Sonuç ve metrikler
+    created_at = models.DateTimeField(
+        default=timezone.now,
+        verbose_name="Oluşturulma Tarihi"
+    )
+
+    started_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Başlama Zamanı"
+    )
+
+    finished_at = models.DateTimeField(
+        null=True,
+        blank=True,
+        verbose_name="Bitiş Zamanı"
+    )
+
+    duration_ms = models.PositiveIntegerField(
+        null=True,
+        blank=True,
+        verbose_name="Süre (ms)"
+    )
+
+    result = models.TextField(
+        blank=True,
+        verbose_name="Sonuç"
+    )
+
+    error = models.TextField(
+        blank=True,
+        verbose_name="Hata"
+    )
+
+    class Meta:
+        verbose_name = "Görev"
+        verbose_name_plural = "Görevler"
+        db_table = 'jobs'
+        ordering = ['run_at', 'id']
+        indexes = [
+            # Çalıştırıcıların kayıt alma sorgusu
+            models.Index(fields=['status', 'run_at'], name='job_status_run_at_idx'),
+            models.Index(fields=['status', 'lease_until'], name='job_status_lease_idx'),
+            models.Index(fields=['schedule', 'status'], name='job_schedule_status_idx'),
+            models.Index(fields=['finished_at'], name='job_finished_at_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.task} #{self.id} ({self.status})"
+
+
+class RateBucket(models.Model):
+    """
+    SMS sağlayıcı kotası için paylaşılan jeton kovası (bkz. ratelimit.py).
+    Jeton dolumu ve harcama tek bir koşullu UPDATE içinde hesaplandığı için zaman epoch saniye olarak tutulur.
+    """
+
+    name = models.CharField(
+        max_length=100,
+        primary_key=True,
+        verbose_name="Kova"
+    )
+
+    rate = models.FloatField(
+        verbose_name="Saniyede Jeton"
+    )
+
+    capacity = models.FloatField(
+        verbose_name="Kapasite (Ani Yük)"
+    )
+
+    tokens = models.FloatField(
+        verbose_name="Jeton"
+    )
+
+    updated_at = models.FloatField(
+        verbose_name="Son Dolum (epoch sn)"
+    )
+
+    # Metrikler
+    acquired_count = models.BigIntegerField(
+        default=0,
+        verbose_name="Verilen Jeton"
+    )
+
+    denied_count = models.BigIntegerField(
+        default=0,
+        verbose_name="Reddedilen İstek"
+    )
+
+    wait_ms_total = models.FloatField(
+        default=0,
+        verbose_name="Toplam Bekleme (ms)"
+    )
+
+    max_wait_ms = models.FloatField(
+        default=0,
+        verbose_name="En Uzun Bekleme (ms)"
+    )
+
+    class Meta:
+        verbose_name = "Hız Sınırı Kovası"
+        verbose_name_plural = "Hız Sınırı Kovaları"
+        db_table = 'rate_buckets'
+        ordering = ['name']
+
+    def __str__(self):
+        return f"{self.name} ({self.rate:g}/sn, kapasite {self.capacity:g})"
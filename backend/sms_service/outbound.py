@@ -0,0 +1,218 @@
+# sms_service/outbound.py
+"""
+Giden SMS kuyruğu ve şeritli gönderici
+
+- Mesajlar Pending durumunda SMSLog'a yazılır (enqueue_sms ya da toplu bulk_create), gönderimi Dispatcher yapar
+- Her şeridin ayrılmış göndericileri sadece kendi şeridini işler; ortak göndericiler her seferinde acil -> klinik
+  -> toplu sırasıyla bakar. Toplu şeritte on binlerce mesaj beklerken bile acil mesaj en geç bir yoklama
+  aralığında bir göndericiye düşer
+- Mesaj, claimed_until alanı tek bir koşullu UPDATE ile ileri alınarak sahiplenilir; gönderici çökerse sahiplik
+  süresi dolunca mesaj başka gönderici tarafından tekrar alınır (en az bir kez gönderim)
+- Çok eski bekleyen mesajlar gönderilmez, süresi doldu olarak kapatılır (expire_stale)
+- Klinik ve toplu şeritte aynı alıcıya bekleyen mesajlar gönderimden önce tek SMS'te birleştirilir (coalesce.py)
+"""
+
+import logging
+import threading
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import OperationalError, connection
+from django.db.models import Exists, F, OuterRef, Q
+from django.utils import timezone
+
+from .coalesce import COALESCE_LANES, coalesce, window as coalesce_window_setting
+from .lanes import LANE_BULK, LANE_CLINICAL, LANE_EMERGENCY, LANE_NAMES, LANE_ORDER, lane_concurrency, lane_for
+from .models import SMSLog
+
+logger = logging.getLogger(__name__)
+
+# Gönderici bir mesajı bu süre boyunca sahiplenir (HTTP zaman aşımından uzun olmalı)
+DEFAULT_LEASE_SECONDS = 120
+
+# Bu süreden eski bekleyen mesajlar gönderilmez (settings.SMS_PENDING_MAX_AGE_HOURS)
+DEFAULT_MAX_AGE_HOURS = 24
+
+# Şerit boşken bekleme (saniye) - ortak göndericiler servis ettikleri en öncelikli şeridin aralığını kullanır
+POLL_INTERVALS = {
+    LANE_EMERGENCY: 0.2,
+    LANE_CLINICAL: 1.0,
+    LANE_BULK: 2.0,
+}
+
+# Sahiplenme için bir seferde okunan aday mesaj sayısı (aynı şeridi işleyen göndericiler çakışırsa sonrakine geçilir)
+CLAIM_CANDIDATES = 8
+
+EXPIRED_MESSAGE = 'Gönderim süresi doldu (kuyrukta bekledi)'
+
+
+def max_age():
+    return timedelta(hours=getattr(settings, 'SMS_PENDING_MAX_AGE_HOURS', DEFAULT_MAX_AGE_HOURS))
+
+
+def enqueue_sms(phone_number, message, user=None, message_type='General', lane=None, oncelik=None, template_id=None):
+    """SMS'i gönderim kuyruğuna ekle; şerit verilmezse Bildirim önceliği ya da mesaj tipinden belirlenir"""
+    return SMSLog.objects.create(
+        recipient_phone=phone_number,
+        recipient_user=user,
+        message=message,
+        message_type=message_type,
+        template_id=template_id,
+        status='Pending',
+        lane=lane if lane is not None else lane_for(message_type, oncelik),
+    )
+
+
+def _claimable(lane, now, filters=None, coalesce_window=None):
+    pending = SMSLog.objects.filter(
+        status='Pending', lane=lane, created_at__gte=now - max_age(), **(filters or {})
+    ).filter(Q(claimed_until__isnull=True) | Q(claimed_until__lt=now))
+    if coalesce_window and lane in COALESCE_LANES:
+        # Aynı alıcıya gelecek diğer mesajlar için pencere kadar beklenir. Bir alıcının sadece en eski bekleyen
+        # mesajı alınabilir; diğerleri onunla birleşir ya da o gönderildikten sonra sıraya girer
+        earlier = SMSLog.objects.filter(
+            status='Pending', lane__in=COALESCE_LANES, recipient_phone_e164=OuterRef('recipient_phone_e164'),
+            id__lt=OuterRef('id'), created_at__gte=now - max_age(), **(filters or {})
+        )
+        pending = pending.filter(created_at__lte=now - coalesce_window).exclude(Exists(earlier))
+    return pending
+
+
+def claim_next(lane, lease_seconds=DEFAULT_LEASE_SECONDS, filters=None, coalesce_window=None):
+    """Şeridin en eski bekleyen mesajını sahiplen; yoksa None"""
+    now = timezone.now()
+    pending = _claimable(lane, now, filters, coalesce_window)
+    candidates = list(pending.order_by('id').values_list('id', flat=True)[:CLAIM_CANDIDATES])
+    for pk in candidates:
+        # Koşullu UPDATE: başka gönderici araya girdiyse 0 satır döner
+        if pending.filter(pk=pk).update(claimed_until=now + timedelta(seconds=lease_seconds)):
+            return SMSLog.objects.select_related('recipient_user').get(pk=pk)
+    return None
+
+
+def after_delivery(sms_log, result):
+    """Gönderim sonucunu mesaja bağlı bildirimlere ve alarm geçmişine yansıt"""
+    from notifications.models import Bildirim
+    from .alarms import record_delivery
+
+    record_delivery(sms_log, result)
+
+    bildirimler = Bildirim.objects.filter(sms_log_id=sms_log.id, sms_durum='pending')
+    if result.get('success'):
+        bildirimler.update(sms_durum='sent', sms_gonderildi=True, sms_gonderim_tarihi=timezone.now())
+    else:
+        bildirimler.update(sms_durum='failed', sms_hata_mesaji=result.get('error', ''))
+
+
+def expire_stale(now=None):
+    """Çok eski bekleyen mesajları gönderilmeden kapat (tekrar denenmez), kapatılan sayıyı döndür"""
+    from notifications.models import Bildirim
+
+    now = now or timezone.now()
+    expired = SMSLog.objects.filter(status='Pending', created_at__lt=now - max_age()).filter(
+        Q(claimed_until__isnull=True) | Q(claimed_until__lt=now)
+    ).update(status='Failed', error_message=EXPIRED_MESSAGE, retry_count=F('max_retries'))
+    if expired:
+        Bildirim.objects.filter(sms_durum='pending', sms_log__error_message=EXPIRED_MESSAGE).update(
+            sms_durum='failed', sms_hata_mesaji=EXPIRED_MESSAGE
+        )
+        logger.warning('%s bekleyen SMS süresi dolduğu için gönderilmedi', expired)
+    return expired
+
+
+class Dispatcher:
+    """
+    Şeritli SMS göndericisi. transport(sms_log) mesajı gönderip log durumunu günceller ve
+    {'success', 'error'} döndürür (varsayılan: SMSService.deliver). 'throttled' dönen mesaj Pending kalır.
+    filters verilirse sadece bu koşula uyan mesajlar alınır (yük testi kendi kayıtlarıyla sınırlanır).
+    coalesce_window: aynı alıcıya giden mesajların birleştirme penceresi (None = ayarlardan, 0 = birleştirme yok).
+    """
+
+    def __init__(self, transport=None, concurrency=None, lease_seconds=DEFAULT_LEASE_SECONDS, poll_intervals=None,
+                 filters=None, coalesce_window=None):
+        if transport is None:
+            from .services import sms_service
+            transport = sms_service.deliver
+        self.transport = transport
+        self.concurrency = concurrency or lane_concurrency()
+        self.lease_seconds = lease_seconds
+        self.poll_intervals = poll_intervals or POLL_INTERVALS
+        self.filters = filters
+        self.coalesce_window = coalesce_window_setting() if coalesce_window is None else coalesce_window
+        self.sent = {lane: 0 for lane in LANE_ORDER}
+        self._stop = threading.Event()
+        self._threads = []
+        self._lock = threading.Lock()
+
+    def sender_lanes(self):
+        """Her gönderici için işleyeceği şeritler (öncelik sırasıyla)"""
+        senders = []
+        for lane in LANE_ORDER:
+            senders += [(lane,)] * self.concurrency.get(lane, 0)
+        senders += [LANE_ORDER] * self.concurrency.get('shared', 0)
+        return senders
+
+    def start(self):
+        self._stop.clear()
+        for index, lanes in enumerate(self.sender_lanes()):
+            name = f"sms-{'shared' if len(lanes) > 1 else LANE_NAMES[lanes[0]]}-{index}"
+            thread = threading.Thread(target=self._run, args=(lanes,), name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        logger.info('SMS göndericisi başladı: %s gönderici', len(self._threads))
+
+    def stop(self, timeout=None):
+        """Göndericileri durdur; ellerindeki mesaj bitince çıkarlar"""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    def _claim(self, lanes):
+        for lane in lanes:
+            sms_log = claim_next(lane, self.lease_seconds, self.filters, self.coalesce_window)
+            if sms_log is not None:
+                return sms_log
+        return None
+
+    def _run(self, lanes):
+        poll = self.poll_intervals[lanes[0]]
+        if connection.vendor == 'sqlite':
+            # SQLite tek yazıcılı; göndericiler yazma kilidini varsayılan 5 sn'den uzun bekleyebilir
+            with connection.cursor() as cursor:
+                cursor.execute('PRAGMA busy_timeout = 30000')
+        try:
+            while not self._stop.is_set():
+                try:
+                    sms_log = self._claim(lanes)
+                except OperationalError as e:
+                    # SQLite yazma kilidi - kısa bekleyip tekrar dene
+                    logger.warning('SMS sahiplenme hatası: %s', e)
+                    sms_log = None
+                if sms_log is None:
+                    self._stop.wait(poll)
+                    continue
+                self.send(sms_log)
+        finally:
+            connection.close()
+
+    def send(self, sms_log):
+        if self.coalesce_window:
+            try:
+                coalesce(sms_log, filters=self.filters)
+            except Exception:
+                # Birleştirilemeyen mesaj tek başına gider
+                logger.exception('SMS birleştirme hatası: %s', sms_log.id)
+        try:
+            result = self.transport(sms_log)
+        except Exception as e:
+            logger.exception('SMS gönderici hatası: %s', sms_log.id)
+            result = {'success': False, 'error': str(e)}
+            sms_log.mark_failed(result['error'])
+        if result.get('throttled'):
+            # Gönderilmedi; mesaj Pending kaldı ve kısa süre sonra tekrar alınacak
+            return result
+        after_delivery(sms_log, result)
+        with self._lock:
+            self.sent[sms_log.lane] = self.sent.get(sms_log.lane, 0) + 1
+        return result
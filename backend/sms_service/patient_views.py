@@ -1,5 +1,4 @@
 #sms_service/patient_views.py
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 from django.utils import timezone
@@ -10,6 +9,7 @@ import json
 import logging
 
 # Mevcut modellerinizi import edin
+from akilli_ilac_backend.renderers import JsonResponse
 from .models import DoctorAlarm, SMSLog
 
 logger = logging.getLogger(__name__)
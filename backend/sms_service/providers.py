@@ -0,0 +1,419 @@
+# sms_service/providers.py
+"""
+SMS sağlayıcıları ve sağlayıcı yönlendirici
+
+- Sağlayıcı sadece ağ çağrısını yapar ve {'success', 'message_id', 'error', 'retryable', 'throttled'} döndürür;
+  SMSLog güncellemesi, hız sınırı ve sistem logu HuaweiSMSService.deliver'dadır
+- Sağlayıcılar: Huawei (batchSendSms), genel HTTP/JSON sağlayıcı ve testler için yerel dosya/loopback sağlayıcı
+- Yönlendirici her sağlayıcının son gönderimlerinden gecikme (EWMA) ve hata oranı tutar; mesajı en sağlıklı
+  sağlayıcıya gönderir, ağ hatası / zaman aşımı / 5xx / 429'da sıradakine geçer. 4xx (geçersiz numara vb.) mesaja
+  özeldir, diğer sağlayıcıda denenmez ve sağlayıcının sağlığını etkilemez
+- Devre kesici: art arda hata ya da yüksek hata oranında sağlayıcı bekleme süresi boyunca atlanır, böylece çökmüş
+  sağlayıcı her gönderimde zaman aşımı kadar bekletmez. Süre dolunca tek bir deneme mesajı gider; başarılıysa
+  sağlayıcı geri döner, değilse bekleme süresi ikiye katlanır
+- Sağlık durumu süreç içindedir; her gönderici süreci kendi ölçümüyle yönlendirir
+- Sağlayıcılar settings.SMS_PROVIDERS ile tanımlanır (varsayılan: sadece Huawei)
+"""
+
+import base64
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from datetime import datetime, timezone as dt_timezone
+
+import requests
+from django.conf import settings
+from django.urls import reverse
+from django.utils.module_loading import import_string
+
+logger = logging.getLogger(__name__)
+
+# Sağlayıcı HTTP zaman aşımı: (bağlantı, okuma) saniye
+DEFAULT_TIMEOUT = (3.05, 10)
+
+# Devre kesici: art arda bu kadar hata ya da pencerede en az MIN_SAMPLES gönderimde bu oranda hata sağlayıcıyı kapatır
+FAILURE_THRESHOLD = 5
+ERROR_RATE_THRESHOLD = 0.5
+MIN_SAMPLES = 20
+HEALTH_WINDOW = 50
+
+# Kapalı sağlayıcının ilk bekleme süresi ve üst sınırı (saniye)
+COOLDOWN_SECONDS = 30
+MAX_COOLDOWN_SECONDS = 300
+
+# Henüz ölçümü olmayan sağlayıcının varsayılan gecikmesi (saniye) ve EWMA ağırlığı
+DEFAULT_LATENCY = 1.0
+LATENCY_ALPHA = 0.2
+
+# Hata oranının puana etkisi ve yavaş sağlayıcıların ölçümü güncel kalsın diye diğerlerine giden trafik oranı
+ERROR_PENALTY = 10
+EXPLORE_RATE = 0.05
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+def _http_result(response, message_id):
+    """HTTP yanıtını sağlayıcı sonucuna çevir"""
+    if response.status_code == 200:
+        return {'success': True, 'message_id': message_id(response.json())}
+    error = f"HTTP {response.status_code}: {response.text[:500]}"
+    if response.status_code == 429:
+        return {'success': False, 'throttled': True, 'retryable': True, 'error': error}
+    return {'success': False, 'retryable': response.status_code >= 500, 'error': error}
+
+
+class SMSProvider:
+    """Sağlayıcı temeli; send(sms_log) mesajı sağlayıcıya iletir"""
+
+    backend = None
+
+    def __init__(self, name, sender=None, timeout=DEFAULT_TIMEOUT, weight=1.0, callback_url=None):
+        self.name = name
+        self.sender = sender
+        self.timeout = tuple(timeout) if isinstance(timeout, (list, tuple)) else timeout
+        # Puan çarpanı: pahalı ya da yedek sağlayıcı için 1'den büyük verilir
+        self.weight = weight
+        self._callback_url = callback_url
+
+    def send(self, sms_log):
+        raise NotImplementedError
+
+    def callback_url(self):
+        """Teslim raporlarının gönderileceği adres (varsayılan: BASE_URL + sms_callback view'ı)"""
+        if self._callback_url:
+            return self._callback_url
+        return f"{getattr(settings, 'BASE_URL', 'http://localhost:8000')}{reverse('sms_service:sms_callback')}"
+
+    def __repr__(self):
+        return f'<{type(self).__name__} {self.name}>'
+
+
+class HuaweiProvider(SMSProvider):
+    """Huawei Cloud SMS (batchSendSms, WSSE kimlik doğrulama)"""
+
+    backend = 'huawei'
+
+    def __init__(self, name='huawei', endpoint=None, app_key=None, app_secret=None, sender=None, **kwargs):
+        super().__init__(name, sender=sender or getattr(settings, 'HUAWEI_SMS_SENDER', 'SMS-INFO'), **kwargs)
+        self.endpoint = endpoint or getattr(settings, 'HUAWEI_SMS_ENDPOINT', 'https://smsapi.ap-southeast-1.myhuaweicloud.com')
+        self.app_key = app_key if app_key is not None else getattr(settings, 'HUAWEI_SMS_APP_KEY', '')
+        self.app_secret = app_secret if app_secret is not None else getattr(settings, 'HUAWEI_SMS_APP_SECRET', '')
+
+    def _generate_auth_header(self, timestamp):
+        """Huawei Cloud WSSE Authentication"""
+        nonce = base64.b64encode(timestamp.encode()).decode()
+        password_digest = base64.b64encode(
+            hashlib.sha256((nonce + timestamp + self.app_secret).encode('utf-8')).digest()
+        ).decode()
+        auth_header = 'WSSE realm="SDP",profile="UsernameToken",type="Appkey"'
+        x_wsse_header = (
+            f'UsernameToken Username="{self.app_key}",PasswordDigest="{password_digest}",'
+            f'Nonce="{nonce}",Created="{timestamp}"'
+        )
+        return auth_header, x_wsse_header
+
+    def send(self, sms_log):
+        timestamp = datetime.now(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        auth_header, x_wsse_header = self._generate_auth_header(timestamp)
+
+        body_data = {
+            "from": self.sender,
+            "to": [sms_log.recipient_phone_e164],
+            "smsContent": [sms_log.message],
+            "statusCallback": self.callback_url(),
+        }
+        if sms_log.template_id:
+            body_data["templateId"] = sms_log.template_id
+
+        response = requests.post(
+            f"{self.endpoint}/sms/batchSendSms/v1",
+            headers={
+                'Authorization': auth_header,
+                'X-WSSE': x_wsse_header,
+                'Content-Type': 'application/json',
+                'Accept': 'application/json',
+            },
+            data=json.dumps(body_data),
+            timeout=self.timeout,
+        )
+
+        def message_id(result):
+            # Teslim raporları smsMsgId ile gelir, eski alan adı yedek olarak okunur
+            items = result.get('result') or []
+            return (items[0].get('smsMsgId') or items[0].get('msgId')) if items else None
+
+        return _http_result(response, message_id)
+
+
+class HttpProvider(SMSProvider):
+    """
+    Genel HTTP/JSON sağlayıcı: {'to', 'message', 'sender', 'reference', 'callback_url'} gönderir,
+    yanıttaki message_id (ya da id) alanını okur. Teslim raporları message_id ile sms_callback'e gelebilir.
+    """
+
+    backend = 'http'
+
+    def __init__(self, name, url, token='', **kwargs):
+        super().__init__(name, **kwargs)
+        self.url = url
+        self.token = token
+
+    def send(self, sms_log):
+        headers = {'Content-Type': 'application/json', 'Accept': 'application/json'}
+        if self.token:
+            headers['Authorization'] = f'Bearer {self.token}'
+        response = requests.post(
+            self.url,
+            headers=headers,
+            data=json.dumps({
+                'to': sms_log.recipient_phone_e164,
+                'message': sms_log.message,
+                'sender': self.sender,
+                'reference': str(sms_log.id),
+                'callback_url': self.callback_url(),
+            }),
+            timeout=self.timeout,
+        )
+        return _http_result(response, lambda result: result.get('message_id') or result.get('id'))
+
+
+class FileProvider(SMSProvider):
+    """
+    Yerel sağlayıcı: mesajı dosyaya (JSON satırı) ya da bellekteki outbox'a yazar. Geliştirme ve testler içindir;
+    latency (saniye ya da (en az, en çok)), failure_rate ve down ile yavaş, hatalı ya da çökmüş sağlayıcı taklit edilir.
+    """
+
+    backend = 'file'
+
+    def __init__(self, name='file', path=None, latency=0.0, failure_rate=0.0, **kwargs):
+        super().__init__(name, **kwargs)
+        self.path = path
+        self.latency = latency
+        self.failure_rate = failure_rate
+        # True iken her gönderim zaman aşımı kadar bekleyip başarısız olur (çökmüş sağlayıcı)
+        self.down = False
+        self.outbox = deque(maxlen=10000)
+        self._lock = threading.Lock()
+
+    def _delay(self):
+        if isinstance(self.latency, (list, tuple)):
+            return random.uniform(*self.latency)
+        return self.latency
+
+    def send(self, sms_log):
+        if self.down:
+            timeout = self.timeout[-1] if isinstance(self.timeout, tuple) else self.timeout
+            time.sleep(timeout)
+            raise requests.Timeout(f'{self.name}: yanıt yok ({timeout} sn)')
+        time.sleep(self._delay())
+        if self.failure_rate and random.random() < self.failure_rate:
+            return {'success': False, 'retryable': True, 'error': f'{self.name}: simüle edilmiş hata'}
+
+        message_id = f'{self.name}-{uuid.uuid4().hex[:16]}'
+        record = {
+            'message_id': message_id,
+            'to': sms_log.recipient_phone_e164,
+            'message': sms_log.message,
+            'sender': self.sender,
+            'time': time.time(),
+        }
+        with self._lock:
+            if self.path:
+                with open(self.path, 'a', encoding='utf-8') as outbox:
+                    outbox.write(json.dumps(record, ensure_ascii=False) + '\n')
+            else:
+                self.outbox.append(record)
+        return {'success': True, 'message_id': message_id}
+
+
+PROVIDER_BACKENDS = {
+    'huawei': HuaweiProvider,
+    'http': HttpProvider,
+    'file': FileProvider,
+}
+
+
+class ProviderHealth:
+    """Sağlayıcının kayan penceredeki gecikme / hata ölçümü ve devre kesicisi"""
+
+    def __init__(self, window=HEALTH_WINDOW, failure_threshold=FAILURE_THRESHOLD,
+                 error_rate_threshold=ERROR_RATE_THRESHOLD, min_samples=MIN_SAMPLES, cooldown=COOLDOWN_SECONDS):
+        self.samples = deque(maxlen=window)
+        self.failure_threshold = failure_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.min_samples = min_samples
+        self.base_cooldown = cooldown
+        self.cooldown = cooldown
+        self.latency = None
+        self.state = CLOSED
+        self.opened_at = None
+        self.consecutive_failures = 0
+        self.probing = False
+        self._lock = threading.Lock()
+
+    @property
+    def error_rate(self):
+        if not self.samples:
+            return 0.0
+        return sum(1 for ok in self.samples if not ok) / len(self.samples)
+
+    def score(self):
+        """Düşük puan daha sağlıklıdır"""
+        latency = DEFAULT_LATENCY if self.latency is None else self.latency
+        return latency * (1 + ERROR_PENALTY * self.error_rate)
+
+    def probe_due(self, now=None):
+        """Kapalı sağlayıcının bekleme süresi doldu ve deneme mesajı bekliyor mu"""
+        now = now or time.monotonic()
+        return self.state != CLOSED and not self.probing and now >= self.opened_at + self.cooldown
+
+    def begin(self, now=None):
+        """Gönderime izin var mı; kapalı sağlayıcıda sadece tek deneme mesajına izin verilir"""
+        with self._lock:
+            if self.state == CLOSED:
+                return True
+            if self.probe_due(now):
+                self.state = HALF_OPEN
+                self.probing = True
+                return True
+            return False
+
+    def record(self, latency, ok, now=None):
+        now = now or time.monotonic()
+        with self._lock:
+            self.samples.append(ok)
+            self.latency = latency if self.latency is None else (
+                LATENCY_ALPHA * latency + (1 - LATENCY_ALPHA) * self.latency
+            )
+            self.consecutive_failures = 0 if ok else self.consecutive_failures + 1
+
+            if self.state == HALF_OPEN:
+                self.probing = False
+                if ok:
+                    # Kesintideki zaman aşımları ölçümü bozmasın; sağlayıcı deneme mesajının gecikmesiyle döner
+                    self.state = CLOSED
+                    self.cooldown = self.base_cooldown
+                    self.samples.clear()
+                    self.samples.append(ok)
+                    self.latency = latency
+                    return 'closed'
+                self.opened_at = now
+                self.cooldown = min(self.cooldown * 2, MAX_COOLDOWN_SECONDS)
+                self.state = OPEN
+                return None
+
+            if self.state == CLOSED and not ok and (
+                self.consecutive_failures >= self.failure_threshold
+                or (len(self.samples) >= self.min_samples and self.error_rate >= self.error_rate_threshold)
+            ):
+                self.state = OPEN
+                self.opened_at = now
+                return 'opened'
+            return None
+
+    def snapshot(self):
+        return {
+            'state': self.state,
+            'latency_ms': round(self.latency * 1000, 1) if self.latency is not None else None,
+            'error_rate': round(self.error_rate, 3),
+            'samples': len(self.samples),
+            'cooldown': self.cooldown if self.state != CLOSED else 0,
+        }
+
+
+class ProviderRouter:
+    """Mesajı en sağlıklı sağlayıcıya gönderir, hata olursa sıradakine geçer"""
+
+    def __init__(self, providers, explore_rate=EXPLORE_RATE, **health_options):
+        if not providers:
+            raise ValueError('En az bir SMS sağlayıcısı gerekli')
+        self.providers = list(providers)
+        self.explore_rate = explore_rate
+        self.health = {provider.name: ProviderHealth(**health_options) for provider in self.providers}
+        self.sent = {provider.name: 0 for provider in self.providers}
+        self.failovers = 0
+        self._lock = threading.Lock()
+
+    def candidates(self):
+        """Denenecek sağlayıcılar: bekleme süresi dolan kapalı sağlayıcılar önce (tek deneme), sonra puana göre"""
+        now = time.monotonic()
+        probes = [p for p in self.providers if self.health[p.name].probe_due(now)]
+        healthy = sorted(
+            (p for p in self.providers if self.health[p.name].state == CLOSED),
+            key=lambda p: self.health[p.name].score() * p.weight,
+        )
+        if len(healthy) > 1 and random.random() < self.explore_rate:
+            healthy.insert(0, healthy.pop(random.randrange(1, len(healthy))))
+        return probes + healthy
+
+    def send(self, sms_log):
+        """Mesajı gönder; sonuca gönderen sağlayıcının adı ('provider') eklenir"""
+        failures = []
+        for provider in self.candidates():
+            health = self.health[provider.name]
+            if not health.begin():
+                continue
+            started = time.monotonic()
+            try:
+                result = provider.send(sms_log)
+            except Exception as e:  # noqa: BLE001 - ağ hataları sıradaki sağlayıcıya geçer
+                result = {'success': False, 'retryable': True, 'error': f'{type(e).__name__}: {e}'}
+            # Mesaja özgü ret (4xx) sağlayıcının yanıt verdiğini gösterir, sağlığını bozmaz
+            ok = result.get('success') or not result.get('retryable')
+            transition = health.record(time.monotonic() - started, ok)
+            if transition:
+                logger.warning('SMS sağlayıcısı %s: devre %s (%s)', provider.name,
+                               'açıldı' if transition == 'opened' else 'kapandı', health.snapshot())
+            result['provider'] = provider.name
+
+            if result.get('success'):
+                with self._lock:
+                    self.sent[provider.name] += 1
+                    self.failovers += bool(failures)
+                return result
+            if not result.get('retryable'):
+                return result
+            logger.warning('SMS %s sağlayıcı %s ile gönderilemedi: %s',
+                           sms_log.id, provider.name, result.get('error'))
+            failures.append(result)
+
+        if not failures:
+            return {'success': False, 'throttled': True, 'provider': None,
+                    'error': 'Kullanılabilir SMS sağlayıcısı yok (tüm devreler açık)'}
+        result = dict(failures[-1])
+        result['error'] = '; '.join(f"{failure['provider']}: {failure.get('error')}" for failure in failures)
+        # Hepsi hız sınırına takıldıysa mesaj Pending kalır
+        result['throttled'] = all(failure.get('throttled') for failure in failures)
+        return result
+
+    def stats(self):
+        return [
+            dict(self.health[provider.name].snapshot(), name=provider.name, sent=self.sent[provider.name])
+            for provider in self.providers
+        ]
+
+
+def build_provider(config):
+    """{'backend': 'huawei' | 'http' | 'file' | sınıf yolu, 'name': ..., diğer ayarlar} sözlüğünden sağlayıcı"""
+    options = dict(config)
+    backend = options.pop('backend', 'huawei')
+    provider_class = PROVIDER_BACKENDS.get(backend) or import_string(backend)
+    options.setdefault('name', backend)
+    return provider_class(**options)
+
+
+def build_router(configs=None):
+    """settings.SMS_PROVIDERS listesinden yönlendirici (sıra, puanlar eşitken tercih sırasıdır)"""
+    configs = configs if configs is not None else getattr(settings, 'SMS_PROVIDERS', None) or [{'backend': 'huawei'}]
+    providers = [build_provider(config) for config in configs]
+    names = [provider.name for provider in providers]
+    if len(set(names)) != len(names):
+        raise ValueError(f'SMS sağlayıcı adları tekil olmalı: {names}')
+    return ProviderRouter(providers)
@@ -0,0 +1,302 @@
+# sms_service/ratelimit.py
+"""
+SMS sağlayıcı kotası için süreçler arası jeton kovası (token bucket)
+
+- Her gönderim hem genel kovadan hem de gönderici (sender ID) kovasından segment sayısı kadar jeton alır; tüm
+  worker'lar, görevler ve view'lar aynı kovaları paylaştığından toplam hız kotayı aşmaz, kota boşta kalmaz
+- Veritabanı arka ucu (varsayılan): dolum ve harcama tek bir koşullu UPDATE ile yapılır, kilit tutulmaz
+- Redis arka ucu (SMS_RATE_LIMIT_BACKEND='redis'): aynı algoritma Lua betiği olarak çalışır, saat Redis'ten alınır
+- acquire() bloklayan (zaman aşımlı) ya da bloklamayan şekilde çağrılabilir; bekleme süreleri kovada toplanır
+- Öncelik şeritleri için yedek: toplu şerit kovada birkaç jeton kalana kadar harcayabilir, kalanlar acil mesajlarındır
+"""
+
+import logging
+import random
+import threading
+import time
+
+from django.conf import settings
+from django.db.models import F, FloatField, Value
+from django.db.models.functions import Greatest, Least
+from django.db.models.lookups import GreaterThanOrEqual
+
+from .lanes import LANE_BULK, LANE_CLINICAL, LANE_EMERGENCY
+
+logger = logging.getLogger(__name__)
+
+# {'global' | 'sender': {'rate': saniyede jeton, 'burst': kova kapasitesi}} (settings.SMS_RATE_LIMITS ile değişir)
+DEFAULT_LIMITS = {
+    'global': {'rate': 20.0, 'burst': 40.0},
+    'sender': {'rate': 10.0, 'burst': 20.0},
+}
+
+# Şeridin jeton alabilmesi için kovada kalması gereken jeton (settings.SMS_RATE_LIMIT_LANE_RESERVE ile değişir)
+DEFAULT_LANE_RESERVE = {
+    LANE_EMERGENCY: 0,
+    LANE_CLINICAL: 1,
+    LANE_BULK: 3,
+}
+
+# Bloklayan acquire için varsayılan zaman aşımı (saniye, settings.SMS_RATE_LIMIT_TIMEOUT)
+DEFAULT_TIMEOUT = 10.0
+
+# Redis kovaları için varsayılan adres (settings.SMS_RATE_LIMIT_REDIS_URL)
+DEFAULT_REDIS_URL = 'redis://localhost:6379/0'
+
+# Jeton beklerken tek seferde en fazla uyuma süresi (saniye) - kova ayarı değişirse hızlı fark edilir
+MAX_SLEEP = 1.0
+
+
+def _float(value):
+    return Value(float(value), output_field=FloatField())
+
+
+class DatabaseBuckets:
+    """RateBucket tablosu üzerinde jeton kovaları"""
+
+    def __init__(self):
+        self._ensured = {}
+        self._lock = threading.Lock()
+
+    def ensure(self, name, rate, capacity):
+        """Kovayı oluştur; ayarlar değiştiyse güncelle (süreç başına bir kez)"""
+        if self._ensured.get(name) == (rate, capacity):
+            return
+        from .models import RateBucket
+
+        bucket, created = RateBucket.objects.get_or_create(
+            name=name, defaults={'rate': rate, 'capacity': capacity, 'tokens': capacity, 'updated_at': time.time()}
+        )
+        if not created and (bucket.rate, bucket.capacity) != (rate, capacity):
+            RateBucket.objects.filter(name=name).update(
+                rate=rate, capacity=capacity, tokens=Least(F('tokens'), _float(capacity))
+            )
+        with self._lock:
+            self._ensured[name] = (rate, capacity)
+
+    @staticmethod
+    def _refilled(now):
+        elapsed = Greatest(_float(now) - F('updated_at'), _float(0))
+        return Least(F('capacity'), F('tokens') + elapsed * F('rate'), output_field=FloatField())
+
+    def try_acquire(self, name, count, reserve, wait_ms):
+        """Jeton almayı dene: (alındı mı, tekrar denemeden önce beklenecek saniye)"""
+        from .models import RateBucket
+
+        now = time.time()
+        refilled = self._refilled(now)
+        taken = RateBucket.objects.filter(GreaterThanOrEqual(refilled, _float(count + reserve)), name=name).update(
+            tokens=refilled - _float(count),
+            updated_at=Greatest(F('updated_at'), _float(now)),
+            acquired_count=F('acquired_count') + count,
+            wait_ms_total=F('wait_ms_total') + _float(wait_ms),
+            max_wait_ms=Greatest(F('max_wait_ms'), _float(wait_ms)),
+        )
+        if taken:
+            return True, 0.0
+
+        bucket = RateBucket.objects.values('tokens', 'updated_at', 'rate', 'capacity').get(name=name)
+        tokens = min(bucket['capacity'], bucket['tokens'] + max(0.0, now - bucket['updated_at']) * bucket['rate'])
+        return False, max((count + reserve - tokens) / bucket['rate'], 0.001)
+
+    def refund(self, name, count):
+        from .models import RateBucket
+
+        RateBucket.objects.filter(name=name).update(
+            tokens=Least(F('capacity'), F('tokens') + _float(count)),
+            acquired_count=F('acquired_count') - count,
+        )
+
+    def deny(self, name):
+        from .models import RateBucket
+
+        RateBucket.objects.filter(name=name).update(denied_count=F('denied_count') + 1)
+
+    def stats(self):
+        from .models import RateBucket
+
+        now = time.time()
+        return [
+            {
+                'name': bucket.name,
+                'rate': bucket.rate,
+                'capacity': bucket.capacity,
+                'tokens': round(min(bucket.capacity, bucket.tokens + max(0.0, now - bucket.updated_at) * bucket.rate), 2),
+                'acquired': bucket.acquired_count,
+                'denied': bucket.denied_count,
+                'avg_wait_ms': round(bucket.wait_ms_total / bucket.acquired_count, 2) if bucket.acquired_count else 0.0,
+                'max_wait_ms': round(bucket.max_wait_ms, 2),
+            }
+            for bucket in RateBucket.objects.all()
+        ]
+
+
+# KEYS[1] = kova; ARGV = rate, capacity, count, reserve, wait_ms
+REDIS_ACQUIRE = """
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local count = tonumber(ARGV[3])
+local reserve = tonumber(ARGV[4])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'updated_at')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - updated_at) * rate)
+if tokens >= count + reserve then
+    redis.call('HSET', KEYS[1], 'tokens', tostring(tokens - count), 'updated_at', tostring(math.max(now, updated_at)),
+               'rate', ARGV[1], 'capacity', ARGV[2])
+    redis.call('HINCRBY', KEYS[1], 'acquired_count', count)
+    redis.call('HINCRBYFLOAT', KEYS[1], 'wait_ms_total', ARGV[5])
+    if tonumber(ARGV[5]) > (tonumber(redis.call('HGET', KEYS[1], 'max_wait_ms')) or 0) then
+        redis.call('HSET', KEYS[1], 'max_wait_ms', ARGV[5])
+    end
+    return {1, '0'}
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated_at', tostring(math.max(now, updated_at)),
+           'rate', ARGV[1], 'capacity', ARGV[2])
+return {0, tostring((count + reserve - tokens) / rate)}
+"""
+
+REDIS_REFUND = """
+local capacity = tonumber(redis.call('HGET', KEYS[1], 'capacity'))
+if not capacity then return 0 end
+local tokens = tonumber(redis.call('HGET', KEYS[1], 'tokens')) or capacity
+redis.call('HSET', KEYS[1], 'tokens', tostring(math.min(capacity, tokens + tonumber(ARGV[1]))))
+redis.call('HINCRBY', KEYS[1], 'acquired_count', -tonumber(ARGV[1]))
+return 1
+"""
+
+
+class RedisBuckets:
+    """Redis üzerinde jeton kovaları (redis paketi ve settings.SMS_RATE_LIMIT_REDIS_URL gerekir)"""
+
+    KEY_PREFIX = 'ratelimit:'
+
+    def __init__(self, url):
+        import redis
+
+        self.client = redis.Redis.from_url(url)
+        self._acquire = self.client.register_script(REDIS_ACQUIRE)
+        self._refund = self.client.register_script(REDIS_REFUND)
+        self._config = {}
+
+    def ensure(self, name, rate, capacity):
+        self._config[name] = (rate, capacity)
+        self.client.sadd(self.KEY_PREFIX + 'names', name)
+
+    def try_acquire(self, name, count, reserve, wait_ms):
+        rate, capacity = self._config[name]
+        taken, retry_after = self._acquire(keys=[self.KEY_PREFIX + name], args=[rate, capacity, count, reserve, wait_ms])
+        return bool(taken), max(float(retry_after), 0.0 if taken else 0.001)
+
+    def refund(self, name, count):
+        self._refund(keys=[self.KEY_PREFIX + name], args=[count])
+
+    def deny(self, name):
+        self.client.hincrby(self.KEY_PREFIX + name, 'denied_count', 1)
+
+    def stats(self):
+        stats = []
+        for raw_name in sorted(self.client.smembers(self.KEY_PREFIX + 'names')):
+            name = raw_name.decode()
+            bucket = {k.decode(): float(v) for k, v in self.client.hgetall(self.KEY_PREFIX + name).items()}
+            acquired = int(bucket.get('acquired_count', 0))
+            stats.append({
+                'name': name,
+                'rate': bucket.get('rate'),
+                'capacity': bucket.get('capacity'),
+                'tokens': round(bucket.get('tokens', 0.0), 2),
+                'acquired': acquired,
+                'denied': int(bucket.get('denied_count', 0)),
+                'avg_wait_ms': round(bucket.get('wait_ms_total', 0.0) / acquired, 2) if acquired else 0.0,
+                'max_wait_ms': round(bucket.get('max_wait_ms', 0.0), 2),
+            })
+        return stats
+
+
+class RateLimiter:
+    """Genel ve gönderici kovalarından birlikte jeton alan sınırlayıcı"""
+
+    def __init__(self, backend=None, prefix='sms', limits=None):
+        self._backend = backend
+        self.prefix = prefix
+        self._limits = limits
+
+    @property
+    def backend(self):
+        if self._backend is None:
+            if getattr(settings, 'SMS_RATE_LIMIT_BACKEND', 'db') == 'redis':
+                self._backend = RedisBuckets(getattr(settings, 'SMS_RATE_LIMIT_REDIS_URL', DEFAULT_REDIS_URL))
+            else:
+                self._backend = DatabaseBuckets()
+        return self._backend
+
+    def limits(self):
+        if self._limits is not None:
+            return self._limits
+        limits = {key: dict(value) for key, value in DEFAULT_LIMITS.items()}
+        for key, value in (getattr(settings, 'SMS_RATE_LIMITS', {}) or {}).items():
+            limits.setdefault(key, {}).update(value)
+        return limits
+
+    @staticmethod
+    def lane_reserve(lane):
+        reserves = dict(DEFAULT_LANE_RESERVE)
+        reserves.update(getattr(settings, 'SMS_RATE_LIMIT_LANE_RESERVE', {}) or {})
+        return reserves.get(lane, 0)
+
+    def buckets_for(self, sender):
+        """(kova adı, rate, kapasite) listesi - önce daha dar olan gönderici kovası"""
+        limits = self.limits()
+        buckets = []
+        if sender:
+            buckets.append((f'{self.prefix}:sender:{sender}', limits['sender']['rate'], limits['sender']['burst']))
+        buckets.append((f'{self.prefix}:global', limits['global']['rate'], limits['global']['burst']))
+        return buckets
+
+    def acquire(self, sender=None, count=1, lane=None, blocking=True, timeout=None):
+        """
+        Gönderim için jeton al. Bloklayan çağrı jeton gelene kadar (en fazla timeout saniye) bekler.
+        Jeton alınamazsa False döner, kısmen alınan jetonlar iade edilir.
+        """
+        if timeout is None:
+            timeout = getattr(settings, 'SMS_RATE_LIMIT_TIMEOUT', DEFAULT_TIMEOUT)
+        reserve = self.lane_reserve(lane)
+        buckets = self.buckets_for(sender)
+        for name, rate, capacity in buckets:
+            self.backend.ensure(name, rate, capacity)
+
+        started = time.monotonic()
+        deadline = started + timeout
+        taken = []
+        while True:
+            retry_after = 0.0
+            for name, rate, capacity in buckets[len(taken):]:
+                # Kapasiteden uzun istek (çok segmentli SMS) kovayı tamamen boşaltır, sonsuza kadar beklemez
+                need = min(count, int(capacity))
+                ok, retry_after = self.backend.try_acquire(
+                    name, need, min(reserve, max(capacity - need, 0)), (time.monotonic() - started) * 1000
+                )
+                if not ok:
+                    break
+                # Alınan jeton diğer kova beklenirken tutulur
+                taken.append((name, need))
+            if len(taken) == len(buckets):
+                return True
+
+            remaining = deadline - time.monotonic()
+            if not blocking or remaining <= 0:
+                for name, need in taken:
+                    self.backend.refund(name, need)
+                self.backend.deny(buckets[len(taken)][0])
+                logger.debug('Hız sınırı: %s kovasında jeton yok', buckets[len(taken)][0])
+                return False
+            # Aynı anda uyanan worker'lar çakışmasın diye küçük sapma eklenir
+            time.sleep(min(retry_after * (1 + random.random() * 0.2), remaining, MAX_SLEEP))
+
+    def stats(self):
+        return self.backend.stats()
+
+
+rate_limiter = RateLimiter()
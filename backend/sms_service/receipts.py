@@ -0,0 +1,273 @@
+# sms_service/receipts.py
+"""
+SMS teslim raporu (delivery receipt) işleme
+
+- sms_callback raporları ayrıştırıp DeliveryReceipt tablosuna tek INSERT ile yazar ve hemen 200 döner
+- apply_pending_receipts biriken raporları toplu olarak SMSLog ve Bildirim kayıtlarına işler
+- Aynı rapor birden fazla gelebilir, raporlar sırasız gelebilir: durum önceliği ve operatör zamanı
+  karşılaştırılarak sadece ileri yönlü değişiklikler uygulanır
+"""
+
+import json
+import logging
+from datetime import timedelta, timezone as dt_timezone
+from urllib.parse import parse_qs
+
+from django.db import connection, transaction
+from django.db.models import F
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .models import DeliveryReceipt, SMSLog
+
+logger = logging.getLogger(__name__)
+
+# Tek seferde işlenecek rapor sayısı
+RECEIPT_BATCH_SIZE = 5000
+
+# SMSLog'u henüz bulunamayan raporlar için bekleme süreleri
+UNMATCHED_RETRY_DELAY = timedelta(seconds=30)
+UNMATCHED_RECEIPT_TTL = timedelta(minutes=15)
+
+# Huawei durum kodları -> SMSLog durumu (listede olmayanlar başarısız sayılır)
+PROVIDER_STATUS_MAP = {
+    'DELIVRD': 'Delivered',
+    'ACCEPTD': 'Sent',
+    'REJECTD': 'Rejected',
+}
+
+# Durum önceliği: daha düşük öncelikli rapor mevcut durumu geri alamaz
+STATUS_RANK = {
+    'Pending': 0,
+    'Sent': 1,
+    'Failed': 2,
+    'Rejected': 2,
+    'Delivered': 3,
+}
+
+# Rapor uygulanırken güncellenen SMSLog alanları
+RECEIPT_UPDATE_FIELDS = ['status', 'receipt_at', 'delivered_at', 'error_message']
+
+# SMSLog durumu -> Bildirim.sms_durum
+BILDIRIM_STATUS_MAP = {
+    'Delivered': 'delivered',
+    'Failed': 'failed',
+    'Rejected': 'failed',
+}
+
+
+class ReceiptParseError(ValueError):
+    """Callback gövdesi çözümlenemedi"""
+
+
+def _receipt_items(request):
+    """Callback gövdesindeki rapor sözlüklerini döndür (form, tek JSON nesnesi veya JSON liste)"""
+    content_type = request.META.get('CONTENT_TYPE', '')
+    body = request.body
+
+    if 'json' in content_type or body[:1] in (b'{', b'['):
+        try:
+            data = json.loads(body)
+        except (ValueError, UnicodeDecodeError) as e:
+            raise ReceiptParseError(f'Geçersiz JSON: {e}')
+        if isinstance(data, dict):
+            data = data.get('receipts', data.get('statuses', [data]))
+        if not isinstance(data, list):
+            raise ReceiptParseError('Rapor listesi bekleniyordu')
+        return [item for item in data if isinstance(item, dict)]
+
+    # Huawei varsayılan olarak application/x-www-form-urlencoded tek rapor gönderir
+    form = parse_qs(body.decode('utf-8', errors='replace'))
+    return [{key: values[0] for key, values in form.items()}] if form else []
+
+
+def parse_receipts(request, now=None):
+    """Callback isteğinden kaydedilmeye hazır DeliveryReceipt nesneleri üret"""
+    now = now or timezone.now()
+    receipts = []
+
+    for item in _receipt_items(request):
+        message_id = item.get('smsMsgId') or item.get('msgId') or item.get('message_id')
+        provider_status = (item.get('status') or '').strip().upper()
+        if not message_id or not provider_status:
+            continue
+
+        reported_at = None
+        raw_time = item.get('updateTime') or item.get('reported_at')
+        if raw_time:
+            try:
+                reported_at = parse_datetime(str(raw_time))
+            except ValueError:
+                reported_at = None
+            if reported_at is not None and timezone.is_naive(reported_at):
+                reported_at = timezone.make_aware(reported_at, dt_timezone.utc)
+
+        receipts.append(DeliveryReceipt(
+            message_id=str(message_id)[:100],
+            provider_status=provider_status[:30],
+            status=PROVIDER_STATUS_MAP.get(provider_status, 'Failed'),
+            reported_at=reported_at or now,
+            received_at=now,
+            next_attempt_at=now,
+        ))
+
+    return receipts
+
+
+def enqueue_receipts(receipts):
+    """Raporları ara tabloya tek seferde yaz"""
+    if receipts:
+        DeliveryReceipt.objects.bulk_create(receipts, batch_size=1000)
+    return len(receipts)
+
+
+def _is_newer(receipt, sms_log):
+    """Rapor mevcut SMSLog durumunu ileri taşıyor mu"""
+    if sms_log.status == 'Delivered':
+        return False  # Teslim edildi son durumdur
+
+    receipt_rank = STATUS_RANK[receipt.status]
+    current_rank = STATUS_RANK.get(sms_log.status, 0)
+    if receipt_rank != current_rank:
+        return receipt_rank > current_rank
+    return sms_log.receipt_at is None or receipt.reported_at > sms_log.receipt_at
+
+
+def _pick_latest(receipts):
+    """Aynı mesaj için gelen raporlardan en ileri olanını seç (tekrarlar burada elenir)"""
+    latest = {}
+    for receipt in receipts:
+        current = latest.get(receipt.message_id)
+        if current is None or (
+            (STATUS_RANK[receipt.status], receipt.reported_at)
+            > (STATUS_RANK[current.status], current.reported_at)
+        ):
+            latest[receipt.message_id] = receipt
+    return latest
+
+
+def _bulk_update_by_id(sms_logs, field_names):
+    """
+    SMSLog kayıtlarını id ile toplu güncelle.
+    QuerySet.bulk_update her satır için CASE WHEN ifadesi ürettiğinden binlerce satırda yavaşlıyor;
+    tek bir parametreli UPDATE'i executemany ile çalıştırmak aynı işi çok daha hızlı yapıyor.
+    """
+    fields = [SMSLog._meta.get_field(name) for name in field_names]
+    quote = connection.ops.quote_name
+    assignments = ', '.join(f'{quote(field.column)} = %s' for field in fields)
+    sql = f'UPDATE {quote(SMSLog._meta.db_table)} SET {assignments} WHERE {quote(SMSLog._meta.pk.column)} = %s'
+    params = [
+        [field.get_db_prep_save(getattr(sms_log, field.attname), connection) for field in fields] + [sms_log.pk]
+        for sms_log in sms_logs
+    ]
+    with connection.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _propagate_to_notifications(sms_log_ids_by_status):
+    """SMS durumunu ilgili bildirimlere yansıt"""
+    from notifications.models import Bildirim
+
+    delivered_ids = sms_log_ids_by_status.get('delivered')
+    if delivered_ids:
+        Bildirim.objects.filter(sms_log_id__in=delivered_ids).exclude(
+            sms_durum='delivered'
+        ).update(sms_durum='delivered')
+
+    failed_ids = sms_log_ids_by_status.get('failed')
+    if failed_ids:
+        Bildirim.objects.filter(
+            sms_log_id__in=failed_ids,
+            sms_durum__in=['pending', 'sent']
+        ).update(sms_durum='failed', sms_hata_mesaji='Operatör SMS\'i teslim edemedi')
+
+
+def apply_pending_receipts(batch_size=RECEIPT_BATCH_SIZE, filters=None):
+    """
+    Biriken raporlardan bir parti işle; filters verilirse sadece bu koşula uyan raporlar alınır.
+    Dönen sözlük: received (partideki rapor), updated (güncellenen SMS), deferred (bekletilen), dropped (atılan)
+    """
+    now = timezone.now()
+    stats = {'received': 0, 'updated': 0, 'deferred': 0, 'dropped': 0}
+
+    with transaction.atomic():
+        queryset = DeliveryReceipt.objects.filter(next_attempt_at__lte=now, **(filters or {})).order_by(
+            'next_attempt_at', 'id'
+        )
+        if connection.features.has_select_for_update_skip_locked:
+            # Birden fazla işçi aynı partiyi almasın
+            queryset = queryset.select_for_update(skip_locked=True)
+        receipts = list(queryset[:batch_size])
+        if not receipts:
+            return stats
+        stats['received'] = len(receipts)
+
+        latest = _pick_latest(receipts)
+        sms_logs = list(
+            SMSLog.objects.filter(message_id__in=list(latest)).only(
+                'id', 'message_id', 'status', 'delivered_at', 'receipt_at', 'error_message'
+            )
+        )
+
+        changed = []
+        sms_log_ids_by_status = {}
+        for sms_log in sms_logs:
+            receipt = latest[sms_log.message_id]
+            if not _is_newer(receipt, sms_log):
+                continue
+            sms_log.status = receipt.status
+            sms_log.receipt_at = receipt.reported_at
+            if receipt.status == 'Delivered':
+                sms_log.delivered_at = receipt.reported_at
+            elif receipt.status in ('Failed', 'Rejected'):
+                sms_log.error_message = f'Operatör raporu: {receipt.provider_status}'
+            changed.append(sms_log)
+
+            bildirim_status = BILDIRIM_STATUS_MAP.get(receipt.status)
+            if bildirim_status:
+                sms_log_ids_by_status.setdefault(bildirim_status, []).append(sms_log.id)
+
+        if changed:
+            _bulk_update_by_id(changed, RECEIPT_UPDATE_FIELDS)
+            _propagate_to_notifications(sms_log_ids_by_status)
+        stats['updated'] = len(changed)
+
+        # Eşleşen raporlar silinir; eşleşmeyenler (gönderim kaydı henüz message_id almamış olabilir) bekletilir
+        matched = {sms_log.message_id for sms_log in sms_logs}
+        done_ids, deferred_ids = [], []
+        expire_before = now - UNMATCHED_RECEIPT_TTL
+        for receipt in receipts:
+            if receipt.message_id in matched:
+                done_ids.append(receipt.id)
+            elif receipt.received_at < expire_before:
+                done_ids.append(receipt.id)
+                stats['dropped'] += 1
+            else:
+                deferred_ids.append(receipt.id)
+
+        DeliveryReceipt.objects.filter(id__in=done_ids).delete()
+        if deferred_ids:
+            DeliveryReceipt.objects.filter(id__in=deferred_ids).update(
+                attempts=F('attempts') + 1,
+                next_attempt_at=now + UNMATCHED_RETRY_DELAY
+            )
+        stats['deferred'] = len(deferred_ids)
+
+    if stats['dropped']:
+        logger.warning(f"Eşleşmeyen {stats['dropped']} teslim raporu atıldı")
+    return stats
+
+
+def drain_receipts(batch_size=RECEIPT_BATCH_SIZE, max_batches=None, filters=None):
+    """Hazır bekleyen tüm raporları (filters verilirse sadece uyanları) parti parti işle"""
+    totals = {'received': 0, 'updated': 0, 'deferred': 0, 'dropped': 0, 'batches': 0}
+    while max_batches is None or totals['batches'] < max_batches:
+        stats = apply_pending_receipts(batch_size=batch_size, filters=filters)
+        if not stats['received']:
+            break
+        totals['batches'] += 1
+        for key, value in stats.items():
+            totals[key] += value
+        if stats['received'] < batch_size:
+            break
+    return totals
@@ -0,0 +1,189 @@
+# sms_service/retention.py
+"""
+Log saklama (retention) ve arşivleme
+
+- Her tablo için ayrı politika: hangi tarih alanına göre, kaç gün saklanacağı
+- Süresi dolan kayıtlar birincil anahtar sırasıyla küçük parçalar halinde okunur, önce günlere bölünmüş
+  sıkıştırılmış NDJSON dosyalarına (<arşiv>/<politika>/<YYYY>/<MM>/<YYYY-MM-DD>.ndjson.gz) eklenir,
+  dosya diske yazıldıktan sonra aynı parça silinir
+- Her parça kendi kısa işleminde silinir ve parçalar arasında beklenir; SQLite yazma kilidi uzun süre tutulmaz
+- Arşive yazılıp silinemeden yarıda kalan parça sonraki çalışmada tekrar arşivlenir (en az bir kez yazım)
+- Günü tamamlanan SMS ve sistem logu arşivleri sorgulanabilir sütunlu segmentlere dönüştürülür (cold_storage.py)
+"""
+
+import gzip
+import json
+import logging
+import os
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.apps import apps
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Tek parçada arşivlenip silinecek kayıt sayısı
+DEFAULT_BATCH_SIZE = 500
+
+# Parçalar arası bekleme (saniye) - diğer yazma işlemlerine kilit bırakılır
+DEFAULT_PAUSE = 0.05
+
+# Arşiv klasörü (settings.RETENTION_ARCHIVE_DIR); docker-compose'da log_archive volume'ü
+DEFAULT_ARCHIVE_DIR = '/data/archive'
+
+# Politikalar; gün sayıları settings.RETENTION_DAYS ile değiştirilebilir ({'sms_logs': 30, ...}, None = sakla)
+RETENTION_POLICIES = {
+    'sms_logs': {
+        'model': 'sms_service.SMSLog',
+        'date_field': 'created_at',
+        'days': 90,
+        'segments': True,
+    },
+    'system_logs': {
+        'model': 'sms_service.SystemLog',
+        'date_field': 'created_at',
+        'days': 180,
+        'segments': True,
+    },
+    'alarm_history': {
+        'model': 'sms_service.AlarmHistory',
+        'date_field': 'sent_at',
+        'days': 730,
+    },
+    # Biten görev kayıtları (jobs.py) arşivlenmeden silinir
+    'jobs': {
+        'model': 'sms_service.Job',
+        'date_field': 'finished_at',
+        'days': 7,
+        'archive': False,
+    },
+}
+
+
+def archive_root():
+    """Arşiv klasörü (settings.RETENTION_ARCHIVE_DIR); image içine değil, volume üzerine yazılmalı"""
+    return Path(getattr(settings, 'RETENTION_ARCHIVE_DIR', None) or DEFAULT_ARCHIVE_DIR)
+
+
+def retention_days(name):
+    """Politikanın saklama süresi (gün); None ise tablo temizlenmez"""
+    overrides = getattr(settings, 'RETENTION_DAYS', {}) or {}
+    return overrides.get(name, RETENTION_POLICIES[name]['days'])
+
+
+def sealed_before(name, now=None):
+    """Arşivi tamamlanmış günlerin sınırı: saklama sınırının günü (politika temizlemiyorsa None)"""
+    days = retention_days(name)
+    if days is None:
+        return None
+    return timezone.localtime((now or timezone.now()) - timedelta(days=days)).date()
+
+
+def _archive_path(root, name, day):
+    return root / name / f'{day:%Y}' / f'{day:%m}' / f'{day:%Y-%m-%d}.ndjson.gz'
+
+
+def archive_rows(name, rows, date_field, root=None):
+    """Kayıtları (values() sözlükleri) günlerine göre arşiv dosyalarına ekle, yazılan dosyaları döndür"""
+    root = root or archive_root()
+    by_day = {}
+    for row in rows:
+        by_day.setdefault(timezone.localtime(row[date_field]).date(), []).append(row)
+
+    paths = []
+    for day, day_rows in sorted(by_day.items()):
+        path = _archive_path(root, name, day)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # gzip dosyasına ekleme yeni bir gzip üyesi yazar; okurken dosya tek parça gibi açılır
+        with open(path, 'ab') as raw:
+            with gzip.GzipFile(fileobj=raw, mode='ab') as gz:
+                for row in day_rows:
+                    gz.write(json.dumps(row, cls=DjangoJSONEncoder, ensure_ascii=False).encode('utf-8'))
+                    gz.write(b'\n')
+            raw.flush()
+            os.fsync(raw.fileno())
+        paths.append(path)
+    return paths
+
+
+def apply_policy(name, batch_size=DEFAULT_BATCH_SIZE, pause=DEFAULT_PAUSE, archive=True, dry_run=False, now=None):
+    """
+    Politikayı uygula: süresi dolan kayıtları parça parça arşivle ve sil.
+    {'policy', 'cutoff', 'archived', 'deleted', 'batches', 'segments', 'seconds', 'rows_per_sec'} döndürür.
+    """
+    policy = RETENTION_POLICIES[name]
+    model = apps.get_model(policy['model'])
+    date_field = policy['date_field']
+    pk_name = model._meta.pk.attname
+
+    result = {'policy': name, 'cutoff': None, 'archived': 0, 'deleted': 0, 'batches': 0,
+              'segments': 0, 'seconds': 0.0, 'rows_per_sec': 0.0}
+    days = retention_days(name)
+    if days is None:
+        return result
+
+    cutoff = (now or timezone.now()) - timedelta(days=days)
+    result['cutoff'] = cutoff
+    expired = model.objects.filter(**{f'{date_field}__lt': cutoff})
+    if dry_run:
+        result['deleted'] = expired.count()
+        return result
+
+    fields = [field.attname for field in model._meta.concrete_fields]
+    started = time.monotonic()
+    last_pk = None
+    while True:
+        batch = expired.order_by(pk_name)
+        if last_pk is not None:
+            batch = batch.filter(**{f'{pk_name}__gt': last_pk})
+        rows = list(batch.values(*fields)[:batch_size])
+        if not rows:
+            break
+
+        if archive and policy.get('archive', True):
+            archive_rows(name, rows, date_field)
+            result['archived'] += len(rows)
+
+        last_pk = rows[-1][pk_name]
+        with transaction.atomic():
+            # Sadece arşive yazılan kayıtlar silinir; ilişkili kayıtlar (SET_NULL) bu parçayla sınırlı güncellenir
+            deleted = expired.filter(**{f'{pk_name}__in': [row[pk_name] for row in rows]}).delete()[1].get(
+                model._meta.label, 0
+            )
+        result['deleted'] += deleted
+        result['batches'] += 1
+
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+    result['seconds'] = round(time.monotonic() - started, 3)
+    if result['seconds']:
+        result['rows_per_sec'] = round(result['deleted'] / result['seconds'], 1)
+
+    if archive and policy.get('segments'):
+        # Saklama sınırının gününden önceki günler tamamen arşivlenmiştir
+        from .cold_storage import seal_days
+        try:
+            result['segments'] = seal_days(name, before=timezone.localtime(cutoff).date())
+        except Exception:
+            # Kayıtlar NDJSON arşivinde duruyor; segmentler bir sonraki çalışmada oluşturulur
+            logger.exception('%s: arşiv segmentleri oluşturulamadı', name)
+
+    if result['deleted']:
+        logger.info(
+            '%s: %s kayıt silindi (%s arşivlendi, %s parça, %.1f kayıt/sn)',
+            name, result['deleted'], result['archived'], result['batches'], result['rows_per_sec'],
+        )
+    return result
+
+
+def apply_all(names=None, **kwargs):
+    """Tüm (ya da verilen) politikaları sırayla uygula"""
+    return [apply_policy(name, **kwargs) for name in (names or RETENTION_POLICIES)]
@@ -1,142 +1,100 @@
 # sms_service/services.py
 
-import base64
-import hashlib
 from django.conf import settings
 from django.utils import timezone
-from datetime import datetime
-import json
+from datetime import timedelta
 import logging
-import requests
 
-from .models import SMSLog, SMSTemplate, SystemLog
+from akilli_ilac_backend.telefon import normalize_phone
+from .models import SMSLog, SystemLog
+from .providers import build_router
+from .ratelimit import rate_limiter
+from .template_registry import template_registry
 
 logger = logging.getLogger(__name__)
 
-class HuaweiSMSService:
+# Doğrudan gönderimde SMS kaydının kuyruk göndericisinden saklandığı süre (HTTP zaman aşımından uzun)
+SEND_LEASE_SECONDS = 120
+
+# Hız sınırına takılan SMS'in kuyrukta tekrar denenmeden önce beklediği süre (saniye)
+THROTTLE_BACKOFF_SECONDS = 5
+
+class SMSService:
     """
-    Huawei Cloud SMS servisi - circular import düzeltildi
+    SMS servisi - gönderimi sağlayıcı yönlendiricisi (providers.py) yapar, varsayılan sağlayıcı Huawei
     """
     
-    def __init__(self):
-        # Settings'den konfigürasyon al
-        self.access_key = getattr(settings, 'HUAWEI_ACCESS_KEY', '')
-        self.secret_key = getattr(settings, 'HUAWEI_SECRET_KEY', '')
-        self.endpoint = getattr(settings, 'HUAWEI_SMS_ENDPOINT', 'https://smsapi.ap-southeast-1.myhuaweicloud.com')
-        self.app_key = getattr(settings, 'HUAWEI_SMS_APP_KEY', '')
-        self.app_secret = getattr(settings, 'HUAWEI_SMS_APP_SECRET', '')
+    def __init__(self, router=None, limiter=None):
+        # Hız sınırı anahtarı; sağlayıcılar settings.SMS_PROVIDERS ile değişir
         self.sender = getattr(settings, 'HUAWEI_SMS_SENDER', 'SMS-INFO')
+        self._router = router
+        self.limiter = limiter or rate_limiter
     
-    def _generate_auth_header(self, timestamp):
-        """Huawei Cloud WSSE Authentication"""
-        try:
-            # Nonce oluştur
-            nonce = base64.b64encode(timestamp.encode()).decode()
-            
-            # PasswordDigest hesapla
-            password_digest = base64.b64encode(
-                hashlib.sha256(
-                    (nonce + timestamp + self.app_secret).encode('utf-8')
-                ).digest()
-            ).decode()
-            
-            # Headers
-            auth_header = 'WSSE realm="SDP",profile="UsernameToken",type="Appkey"'
-            x_wsse_header = f'UsernameToken Username="{self.app_key}",PasswordDigest="{password_digest}",Nonce="{nonce}",Created="{timestamp}"'
-            
-            return auth_header, x_wsse_header
-            
-        except Exception as e:
-            logger.error(f"Auth header hatası: {str(e)}")
-            return None, None
+    @property
+    def router(self):
+        # Ayarlar ilk gönderimde okunur (import sırasında settings hazır olmayabilir)
+        if self._router is None:
+            self._router = build_router()
+        return self._router
     
     def _format_phone_number(self, phone_number):
         """Telefon numarasını uluslararası formata çevir"""
-        clean_phone = ''.join(filter(str.isdigit, phone_number))
-        
-        if clean_phone.startswith('90'):
-            return f"+{clean_phone}"
-        elif clean_phone.startswith('0'):
-            return f"+90{clean_phone[1:]}"
-        elif len(clean_phone) == 10:
-            return f"+90{clean_phone}"
-        else:
-            return f"+90{clean_phone}"
+        return normalize_phone(phone_number)
     
-    def send_sms(self, phone_number, message, template_id=None, user=None, message_type='General'):
+    def send_sms(self, phone_number, message, template_id=None, user=None, message_type='General', lane=None):
         """
-        SMS gönder - mevcut SMSLog modeli ile uyumlu
+        SMS gönder - mevcut SMSLog modeli ile uyumlu.
+        İstek sırasında çağrılabildiği için jeton beklenmez; kota doluysa kayıt kuyruk göndericisine bırakılır.
         """
-        sms_log = None
-        
         try:
-            # SMS log kaydı oluştur
+            # SMS log kaydı oluştur; hemen gönderileceği için kuyruk göndericisi (outbound.py) bu kaydı almaz
             sms_log = SMSLog.objects.create(
                 recipient_phone=phone_number,
                 recipient_user=user,
                 message=message,
                 message_type=message_type,
                 template_id=template_id,
-                status='Pending'
+                status='Pending',
+                lane=lane,
+                claimed_until=timezone.now() + timedelta(seconds=SEND_LEASE_SECONDS)
             )
+        except Exception as e:
+            error_msg = f"SMS servis hatası: {str(e)}"
+            SystemLog.log(level='ERROR', category='SMS', message=error_msg, user=user)
+            logger.error(error_msg)
+            return {'success': False, 'error': error_msg, 'sms_log_id': None}
+        
+        return self.deliver(sms_log, blocking=False)
+    
+    def deliver(self, sms_log, blocking=True):
+        """
+        Kayıtlı (Pending) SMS'i en sağlıklı sağlayıcıyla gönder ve log durumunu güncelle.
+        blocking=False ise jeton beklenmez (SMS_RATE_LIMIT_TIMEOUT yalnız kuyruk göndericisini bekletir).
+        """
+        user = sms_log.recipient_user
+        
+        try:
+            # Numara kayıt sırasında E.164'e çevrildi
+            formatted_phone = sms_log.recipient_phone_e164
             
-            # Telefon numarasını formatla
-            formatted_phone = self._format_phone_number(phone_number)
-            
-            # Timestamp
-            timestamp = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
-            
-            # Auth headers
-            auth_header, x_wsse_header = self._generate_auth_header(timestamp)
-            
-            if not auth_header or not x_wsse_header:
-                raise Exception("Authentication başarısız")
-            
-            # Request body
-            body_data = {
-                "from": self.sender,
-                "to": [formatted_phone],
-                "smsContent": [message],
-                "statusCallback": f"{getattr(settings, 'BASE_URL', 'http://localhost:8000')}/api/sms/callback/"
-            }
-            
-            # Template varsa kullan
-            if template_id:
-                body_data["templateId"] = template_id
-            
-            body = json.dumps(body_data)
-            
-            # Headers
-            headers = {
-                'Authorization': auth_header,
-                'X-WSSE': x_wsse_header,
-                'Content-Type': 'application/json',
-                'Accept': 'application/json'
-            }
-            
-            # API çağrısı
-            url = f"{self.endpoint}/sms/batchSendSms/v1"
+            # Sağlayıcı kotası tüm worker'lar arasında paylaşılır ve segment başına harcanır;
+            # jeton yoksa SMS başarısız sayılmaz
+            if not self.limiter.acquire(self.sender, count=sms_log.segments, lane=sms_log.lane, blocking=blocking):
+                reason = 'Hız sınırı: jeton beklenirken zaman aşımı' if blocking else 'Hız sınırı: jeton yok'
+                return self._throttled(sms_log, reason)
             
             logger.info(f"SMS gönderiliyor: {formatted_phone}")
             
-            response = requests.post(url, headers=headers, data=body, timeout=30)
+            # Sağlayıcı hatasında (zaman aşımı, 5xx, 429) yönlendirici sıradaki sağlayıcıyı dener
+            result = self.router.send(sms_log)
+            provider = result.get('provider')
             
-            if response.status_code == 200:
-                result = response.json()
-                
-                # Message ID'yi al
-                message_id = None
-                if result.get('result') and len(result['result']) > 0:
-                    message_id = result['result'][0].get('msgId')
+            if result.get('success'):
+                message_id = result.get('message_id')
                 
                 # SMS log güncelle
-                if hasattr(sms_log, 'mark_sent'):
-                    sms_log.mark_sent(message_id)
-                else:
-                    sms_log.status = 'Sent'
-                    sms_log.message_id = message_id
-                    sms_log.sent_at = timezone.now()
-                    sms_log.save()
+                sms_log.provider = provider
+                sms_log.mark_sent(message_id)
                 
                 # System log
                 SystemLog.log(
@@ -144,23 +102,24 @@ class HuaweiSMSService:
                     category='SMS',
                     message=f'SMS gönderildi: {formatted_phone}',
                     user=user,
-                    extra_data={'message_id': message_id}
+                    extra_data={'message_id': message_id, 'segments': sms_log.segments, 'provider': provider}
                 )
                 
                 return {
                     'success': True,
                     'message_id': message_id,
-                    'sms_log_id': sms_log.id
+                    'sms_log_id': sms_log.id,
+                    'segments': sms_log.segments,
+                    'provider': provider
                 }
+            elif result.get('throttled'):
+                # Sağlayıcı hız sınırı ya da tüm devreler açık - kalıcı hata değil
+                return self._throttled(sms_log, result.get('error'))
             else:
                 # Hata durumu
-                error_msg = f"HTTP {response.status_code}: {response.text}"
-                if hasattr(sms_log, 'mark_failed'):
-                    sms_log.mark_failed(error_msg)
-                else:
-                    sms_log.status = 'Failed'
-                    sms_log.error_message = error_msg
-                    sms_log.save()
+                error_msg = result.get('error') or 'Bilinmeyen sağlayıcı hatası'
+                sms_log.provider = provider or ''
+                sms_log.mark_failed(error_msg)
                 
                 SystemLog.log(
                     level='ERROR',
@@ -178,13 +137,7 @@ class HuaweiSMSService:
         except Exception as e:
             error_msg = f"SMS servis hatası: {str(e)}"
             
-            if sms_log:
-                if hasattr(sms_log, 'mark_failed'):
-                    sms_log.mark_failed(error_msg)
-                else:
-                    sms_log.status = 'Failed'
-                    sms_log.error_message = error_msg
-                    sms_log.save()
+            sms_log.mark_failed(error_msg)
             
             SystemLog.log(
                 level='ERROR',
@@ -198,35 +151,43 @@ class HuaweiSMSService:
             return {
                 'success': False,
                 'error': error_msg,
-                'sms_log_id': sms_log.id if sms_log else None
+                'sms_log_id': sms_log.id
             }
     
+    def _throttled(self, sms_log, reason):
+        """Hız sınırı: kayıt Pending kalır, kuyruk göndericisi kısa bir süre sonra tekrar dener"""
+        SMSLog.objects.filter(pk=sms_log.pk, status='Pending').update(
+            claimed_until=timezone.now() + timedelta(seconds=THROTTLE_BACKOFF_SECONDS)
+        )
+        logger.warning(f"SMS hız sınırına takıldı, kuyruğa bırakıldı: {sms_log.id} - {reason}")
+        return {
+            'success': False,
+            'throttled': True,
+            'error': reason,
+            'sms_log_id': sms_log.id
+        }
+    
     def send_with_template(self, phone_number, template_name, template_params, user=None):
         """Şablon kullanarak SMS gönder"""
-        try:
-            template = SMSTemplate.objects.get(name=template_name, is_active=True)
-            
-            # Template parametrelerini message içine yerleştir
-            if hasattr(template, 'format_message'):
-                message = template.format_message(*template_params)
-            else:
-                # Basit string formatting
-                message = template.content
-                for i, param in enumerate(template_params):
-                    message = message.replace(f'{{{i}}}', str(param))
-            
-            return self.send_sms(
-                phone_number=phone_number,
-                message=message,
-                template_id=getattr(template, 'template_id', None),
-                user=user,
-                message_type=getattr(template, 'category', 'General')
-            )
-            
-        except SMSTemplate.DoesNotExist:
+        # Derlenmiş şablon önbellekten gelir, her mesajda sorgu atılmaz
+        template = template_registry.get(template_name)
+        
+        if template is None:
             # Şablon yoksa düz metin gönder
             message = ' '.join(str(param) for param in template_params)
             return self.send_sms(phone_number, message, user=user)
+        
+        return self.send_sms(
+            phone_number=phone_number,
+            message=template.render(template_params),
+            template_id=template.template_id,
+            user=user,
+            message_type=template.category
+        )
+    
+    def render_template_batch(self, template_name, param_tuples):
+        """Toplu kampanya için şablonu tüm parametre listesi üzerinde tek seferde üret"""
+        return template_registry.render_many(template_name, param_tuples)
     
     def send_medication_reminder(self, patient_phone, patient_name, medication_name, time_str, user=None):
         """İlaç hatırlatması gönder"""
@@ -261,6 +222,9 @@ class HuaweiSMSService:
             message_type='GenelHatirlatma'
         )
 
+# Eski ad (sağlayıcı soyutlamasından önce)
+HuaweiSMSService = SMSService
+
 # Singleton instance - CIRCULAR IMPORT HATASI DÜZELTİLDİ
 # Artık kendisini import etmiyor
-sms_service = HuaweiSMSService()
\ No newline at end of file
+sms_service = SMSService()
\ No newline at end of file
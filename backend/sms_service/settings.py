@@ -25,7 +25,8 @@ CELERY_TASK_SERIALIZER = 'json'
 CELERY_RESULT_SERIALIZER = 'json'
 CELERY_TIMEZONE = 'Europe/Istanbul'
 
-# Celery Beat Schedule (Cron Jobs)
+# Celery Beat Schedule (Cron Jobs) - bu modül ayarlara yüklenmez;
+# periyodik görevlerin takvimi sms_service/jobs.py DEFAULT_SCHEDULE'dadır
 from celery.schedules import crontab
 
 CELERY_BEAT_SCHEDULE = {
@@ -41,10 +42,10 @@ CELERY_BEAT_SCHEDULE = {
         'schedule': crontab(hour=2, minute=0),  # Her gün saat 02:00
     },
     
-    # Eski SMS loglarını temizle (ayda bir)
-    'cleanup-old-sms-logs': {
-        'task': 'sms_service.tasks.cleanup_old_sms_logs',
-        'schedule': crontab(day_of_month=1, hour=3, minute=0),  # Her ayın 1'i saat 03:00
+    # Saklama süresi dolan logları arşivle ve parça parça sil (SMS/sistem logları, alarm geçmişi)
+    'apply-retention-policies': {
+        'task': 'sms_service.tasks.apply_retention_policies',
+        'schedule': crontab(hour=3, minute=0),  # Her gün saat 03:00
     },
 }
 
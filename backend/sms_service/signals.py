@@ -0,0 +1,33 @@
+# sms_service/signals.py
+
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import SMSTemplate
+from .template_registry import template_registry
+
+
+@receiver(pre_save, sender=SMSTemplate)
+def remember_template_name(sender, instance, **kwargs):
+    """Şablon adı değişiyorsa eski adın önbelleğini de temizleyebilmek için eski adı sakla"""
+    instance._previous_name = None
+    if instance.pk:
+        instance._previous_name = (
+            SMSTemplate.objects.filter(pk=instance.pk).values_list('name', flat=True).first()
+        )
+
+
+@receiver(post_save, sender=SMSTemplate)
+def invalidate_template_on_save(sender, instance, **kwargs):
+    """Şablon değiştiğinde derlenmiş kopyaları geçersiz kıl"""
+    version = instance.updated_at.isoformat() if instance.updated_at else None
+    template_registry.invalidate(instance.name, version)
+
+    previous_name = getattr(instance, '_previous_name', None)
+    if previous_name and previous_name != instance.name:
+        template_registry.invalidate(previous_name)
+
+
+@receiver(post_delete, sender=SMSTemplate)
+def invalidate_template_on_delete(sender, instance, **kwargs):
+    template_registry.invalidate(instance.name)
@@ -0,0 +1,232 @@
+# sms_service/simulator.py
+"""
+Yerel Huawei SMS simülatörü
+
+- batchSendSms isteğini (POST /sms/batchSendSms/v1, WSSE başlıkları, from / to / smsContent / statusCallback)
+  Huawei yanıt biçimiyle karşılar; HuaweiProvider endpoint'i simülatöre çevrilerek gerçek gönderim kodu ağa
+  çıkmadan çalıştırılır
+- Gecikme dağılımı 'const:0.05', 'uniform:0.02,0.2', 'lognormal:0.05,0.6' (medyan, sigma) ya da 'exp:0.1'
+  (ortalama) biçiminde verilir
+- error_rate oranında 500, throttle_rate oranında ya da tps aşıldığında 429 döner
+- Kabul edilen her mesaj için callback_delay kadar sonra statusCallback adresine Huawei biçiminde (form) teslim
+  raporu gönderilir; delivery_rate dışındakiler UNDELIV, duplicate_rate oranındakiler iki kez gönderilir
+- Django'dan bağımsızdır; sms_simulator komutuyla tek başına ya da düzeneklerde iş parçacığında çalışır
+"""
+
+import heapq
+import json
+import logging
+import math
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone as dt_timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+SEND_PATH = '/sms/batchSendSms/v1'
+
+# Huawei yanıt kodları
+SUCCESS_CODE = '000000'
+ERROR_RESPONSES = {
+    400: {'code': 'E200015', 'description': 'Invalid request body'},
+    401: {'code': 'E000102', 'description': 'Invalid app_key or X-WSSE'},
+    429: {'code': 'E000510', 'description': 'The number of requests exceeds the upper limit'},
+    500: {'code': 'E000500', 'description': 'Internal server error'},
+}
+
+
+def latency_sampler(spec, rng=None):
+    """'tür:parametreler' biçimindeki dağılımdan saniye üreten fonksiyon"""
+    rng = rng or random.Random()
+    kind, _, raw = str(spec).partition(':')
+    if not raw:
+        kind, raw = 'const', kind
+    try:
+        params = [float(value) for value in raw.split(',')]
+    except ValueError:
+        raise ValueError(f'Geçersiz gecikme dağılımı: {spec}')
+
+    if kind == 'const' and len(params) == 1:
+        return lambda: params[0]
+    if kind == 'uniform' and len(params) == 2:
+        return lambda: rng.uniform(*params)
+    if kind == 'lognormal' and len(params) == 2:
+        median, sigma = params
+        return lambda: rng.lognormvariate(math.log(median), sigma)
+    if kind == 'exp' and len(params) == 1:
+        return lambda: rng.expovariate(1 / params[0])
+    raise ValueError(f'Geçersiz gecikme dağılımı: {spec}')
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'HuaweiSMSSimulator/1.0'
+
+    def log_message(self, format, *args):
+        logger.debug('simülatör: ' + format, *args)
+
+    def _reply(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length') or 0)
+        body = self.rfile.read(length)
+        if self.path.split('?')[0] != SEND_PATH:
+            self._reply(404, {'code': 'E000404', 'description': 'Not found'})
+            return
+        status, payload = self.server.simulator.handle_send(self.headers, body)
+        self._reply(status, payload)
+
+
+class HuaweiSimulator:
+    """Huawei batchSendSms simülatörü; start() ile arka planda dinlemeye başlar"""
+
+    def __init__(self, host='127.0.0.1', port=0, latency='const:0.02', error_rate=0.0, throttle_rate=0.0, tps=None,
+                 callback_delay='uniform:0.5,2', delivery_rate=0.97, duplicate_rate=0.0, seed=None):
+        self.rng = random.Random(seed)
+        self.latency = latency_sampler(latency, self.rng)
+        self.callback_delay = latency_sampler(callback_delay, self.rng)
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.tps = tps
+        self.delivery_rate = delivery_rate
+        self.duplicate_rate = duplicate_rate
+        self.id_prefix = f'sim-{uuid.uuid4().hex[:8]}'
+        self.stats = {
+            'requests': 0, 'accepted': 0, 'errors': 0, 'throttled': 0, 'rejected': 0,
+            'callbacks_sent': 0, 'callbacks_failed': 0,
+        }
+
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._server.daemon_threads = True
+        self._server.simulator = self
+        self._lock = threading.Lock()
+        self._callbacks = []
+        self._callback_ready = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._threads = []
+        # tps için jeton kovası
+        self._tokens = float(tps or 0)
+        self._refilled_at = time.monotonic()
+        self._session = requests.Session()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f'http://{host}:{port}'
+
+    def start(self):
+        self._stop.clear()
+        for target, name in ((self._server.serve_forever, 'sms-simulator'), (self._deliver_callbacks, 'sms-simulator-callback')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            self._callback_ready.notify_all()
+        self._server.shutdown()
+        self._server.server_close()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._threads = []
+
+    def pending_callbacks(self):
+        with self._lock:
+            return len(self._callbacks)
+
+    def _count(self, key, value=1):
+        with self._lock:
+            self.stats[key] += value
+
+    def _over_tps(self):
+        if not self.tps:
+            return False
+        with self._lock:
+            now = time.monotonic()
+            self._tokens = min(float(self.tps), self._tokens + (now - self._refilled_at) * self.tps)
+            self._refilled_at = now
+            if self._tokens < 1:
+                return True
+            self._tokens -= 1
+            return False
+
+    def handle_send(self, headers, body):
+        """batchSendSms isteğini işle: (HTTP durum, yanıt gövdesi)"""
+        self._count('requests')
+        if 'UsernameToken' not in (headers.get('X-WSSE') or ''):
+            self._count('rejected')
+            return 401, ERROR_RESPONSES[401]
+        try:
+            data = json.loads(body)
+            recipients = data['to']
+            contents = data.get('smsContent') or []
+            if not recipients or not (contents or data.get('templateId')):
+                raise ValueError
+        except (ValueError, KeyError, TypeError):
+            self._count('rejected')
+            return 400, ERROR_RESPONSES[400]
+
+        time.sleep(max(self.latency(), 0))
+        if self._over_tps() or self.rng.random() < self.throttle_rate:
+            self._count('throttled')
+            return 429, ERROR_RESPONSES[429]
+        if self.rng.random() < self.error_rate:
+            self._count('errors')
+            return 500, ERROR_RESPONSES[500]
+
+        created = datetime.now(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+        result = []
+        for recipient in recipients:
+            message_id = f'{self.id_prefix}-{uuid.uuid4().hex[:16]}'
+            result.append({
+                'originTo': recipient, 'createTime': created, 'from': data.get('from'),
+                'smsMsgId': message_id, 'status': SUCCESS_CODE,
+            })
+            if data.get('statusCallback'):
+                self._schedule_callback(data['statusCallback'], message_id)
+        self._count('accepted', len(result))
+        return 200, {'code': SUCCESS_CODE, 'description': 'Success', 'result': result}
+
+    def _schedule_callback(self, url, message_id):
+        status = 'DELIVRD' if self.rng.random() < self.delivery_rate else 'UNDELIV'
+        copies = 2 if self.rng.random() < self.duplicate_rate else 1
+        with self._lock:
+            for _ in range(copies):
+                due = time.monotonic() + max(self.callback_delay(), 0)
+                heapq.heappush(self._callbacks, (due, message_id, url, status))
+            self._callback_ready.notify()
+
+    def _deliver_callbacks(self):
+        while not self._stop.is_set():
+            with self._lock:
+                if not self._callbacks:
+                    self._callback_ready.wait(timeout=0.5)
+                    continue
+                due, message_id, url, status = self._callbacks[0]
+                wait = due - time.monotonic()
+                if wait > 0:
+                    self._callback_ready.wait(timeout=min(wait, 0.5))
+                    continue
+                heapq.heappop(self._callbacks)
+            report = {
+                'smsMsgId': message_id, 'total': '1', 'sequence': '1', 'status': status, 'source': '2',
+                'updateTime': datetime.now(dt_timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ'),
+            }
+            try:
+                response = self._session.post(url, data=report, timeout=5)
+                self._count('callbacks_sent' if response.status_code < 300 else 'callbacks_failed')
+            except requests.RequestException as e:
+                logger.warning('Simülatör teslim raporu gönderilemedi: %s', e)
+                self._count('callbacks_failed')
@@ -1,12 +1,13 @@
 # sms_service/tasks.py
 
-from accounts import models
-from celery import shared_task
-from django.utils import timezone
-from datetime import datetime, timedelta
+from django.db.models import F
+from sms_service.jobs import shared_task
 import logging
 
-from .models import DoctorAlarm, AlarmHistory, SMSLog, SystemLog
+from .alarms import fire_due_alarms
+from .models import SMSLog, SystemLog
+from .receipts import drain_receipts
+from .retention import apply_all, apply_policy
 from .services import sms_service
 
 logger = logging.getLogger(__name__)
@@ -14,88 +15,25 @@ logger = logging.getLogger(__name__)
 @shared_task
 def process_alarm_notifications():
     """
-    Zamanı gelen alarmları işle - Celery Beat ile her dakika çalışır
+    Zamanı gelen alarmları işle - her dakika çalışır.
+    Her tetikleme bir kez alınır (alarms.fire_occurrence); üst üste binen çalıştırmalar aynı alarmı tekrar göndermez.
+    SMS'leri kuyruk göndericisi gönderir, sonuç alarm geçmişine oradan yansır.
     """
     try:
-        now = timezone.now()
-        
-        # Çalışması gereken aktif alarmları bul
-        active_alarms = DoctorAlarm.objects.filter(
-            status='active',
-            next_run__lte=now
-        ).exclude(
-            end_date__lt=now.date()
-        )
-        
-        processed_count = 0
-        success_count = 0
-        
-        for alarm in active_alarms:
-            try:
-                # SMS gönder
-                result = sms_service.send_sms(
-                    phone_number=alarm.patient_phone,
-                    message=alarm.message,
-                    user=alarm.doctor,
-                    message_type=alarm.alarm_type
-                )
-                
-                # SMS Log referansını al
-                sms_log = None
-                if result.get('sms_log_id'):
-                    try:
-                        sms_log = SMSLog.objects.get(id=result['sms_log_id'])
-                    except SMSLog.DoesNotExist:
-                        pass
-                
-                # Alarm history kaydı oluştur
-                AlarmHistory.objects.create(
-                    alarm=alarm,
-                    sms_log=sms_log,
-                    success=result['success'],
-                    error_message=result.get('error', '')
-                )
-                
-                # Alarm durumunu güncelle
-                alarm.mark_sent(success=result['success'])
-                
-                if result['success']:
-                    success_count += 1
-                    logger.info(f"Alarm SMS gönderildi: {alarm.id} - {alarm.patient_name}")
-                else:
-                    logger.error(f"Alarm SMS hatası: {alarm.id} - {result.get('error')}")
-                
-                processed_count += 1
-                
-            except Exception as e:
-                logger.error(f"Alarm işleme hatası: {alarm.id} - {str(e)}")
-                
-                # Hata kaydı oluştur
-                AlarmHistory.objects.create(
-                    alarm=alarm,
-                    success=False,
-                    error_message=str(e)
-                )
-                
-                processed_count += 1
+        totals = fire_due_alarms()
         
         # Sistem logu
-        SystemLog.log(
-            level='INFO',
-            category='ALARM',
-            message=f'Alarm işleme: İşlenen: {processed_count}, Başarılı: {success_count}',
-            extra_data={
-                'processed_count': processed_count,
-                'success_count': success_count
-            }
-        )
+        if totals['due']:
+            SystemLog.log(
+                level='INFO',
+                category='ALARM',
+                message=f"Alarm işleme: Tetiklenen: {totals['fired']}, Atlanan: {totals['skipped']}, Hata: {totals['errors']}",
+                extra_data=totals
+            )
         
-        logger.info(f"Alarm işleme tamamlandı. İşlenen: {processed_count}, Başarılı: {success_count}")
+        logger.info(f"Alarm işleme tamamlandı. Tetiklenen: {totals['fired']}, Atlanan: {totals['skipped']}")
         
-        return {
-            'processed_count': processed_count,
-            'success_count': success_count
-        }
+        return totals
         
     except Exception as e:
         error_msg = f"Alarm işleme genel hatası: {str(e)}"
@@ -146,7 +84,7 @@ def retry_failed_sms():
         failed_sms_list = SMSLog.objects.filter(
             status='Failed'
         ).filter(
-            retry_count__lt=models.F('max_retries')
+            retry_count__lt=F('max_retries')
         )
         
         retry_count = 0
@@ -189,22 +127,38 @@ def retry_failed_sms():
         return {'error': error_msg}
 
 @shared_task
-def cleanup_old_sms_logs():
+def process_delivery_receipts():
     """
-    Eski SMS loglarını temizle - ayda bir çalışır
+    Callback ile biriken teslim raporlarını SMSLog ve bildirimlere işle - birkaç saniyede bir çalışır
     """
     try:
-        cutoff_date = timezone.now() - timedelta(days=90)  # 90 gün önce
+        totals = drain_receipts()
+        if totals['received']:
+            logger.info(
+                f"Teslim raporları işlendi. Alınan: {totals['received']}, "
+                f"Güncellenen: {totals['updated']}, Bekletilen: {totals['deferred']}"
+            )
+        return totals
         
-        deleted_count = SMSLog.objects.filter(
-            created_at__lt=cutoff_date
-        ).delete()[0]
+    except Exception as e:
+        error_msg = f"Teslim raporu işleme hatası: {str(e)}"
+        logger.error(error_msg)
+        return {'error': error_msg}
+
+@shared_task
+def cleanup_old_sms_logs():
+    """
+    Eski SMS loglarını arşivleyip parça parça temizle (alarm geçmişi korunur)
+    """
+    try:
+        result = apply_policy('sms_logs')
+        deleted_count = result['deleted']
         
         SystemLog.log(
             level='INFO',
             category='SMS',
             message=f'Eski SMS logları temizlendi: {deleted_count}',
-            extra_data={'deleted_count': deleted_count}
+            extra_data={'deleted_count': deleted_count, 'rows_per_sec': result['rows_per_sec']}
         )
         
         return {'deleted_count': deleted_count}
@@ -212,4 +166,24 @@ def cleanup_old_sms_logs():
     except Exception as e:
         error_msg = f"SMS log temizleme hatası: {str(e)}"
         logger.error(error_msg)
-        return {'error': error_msg}
\ No newline at end of file
+        return {'error': error_msg}
+
+
+@shared_task
+def apply_retention_policies():
+    """
+    Tüm saklama politikalarını uygula (SMS logları, sistem logları, alarm geçmişi) - her gece çalışır
+    """
+    results = apply_all()
+    summary = {
+        result['policy']: {'deleted': result['deleted'], 'rows_per_sec': result['rows_per_sec']}
+        for result in results
+    }
+    if any(result['deleted'] for result in results):
+        SystemLog.log(
+            level='INFO',
+            category='Retention',
+            message='Saklama süresi dolan kayıtlar arşivlendi ve silindi',
+            extra_data=summary
+        )
+    return summary
\ No newline at end of file
@@ -0,0 +1,203 @@
+# sms_service/template_registry.py
+"""
+SMS şablon kayıt defteri
+
+Her SMSTemplate bir kez derlenip süreç içinde (ad, sürüm) ile önbelleğe alınır.
+Şablon kaydedildiğinde/silindiğinde signals.py sürüm anahtarını paylaşılan cache'te (CACHES) günceller,
+böylece diğer süreçlerdeki kopyalar da en geç VERSION_CHECK_INTERVAL saniye içinde yenilenir.
+"""
+
+import logging
+import string
+from operator import itemgetter
+import threading
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Paylaşılan cache kaybolsa bile yerel kopyanın en fazla bu kadar eski kalmasına izin ver (saniye)
+LOCAL_TTL = 300
+
+# Paylaşılan sürüm en fazla bu sıklıkla okunur (saniye): veritabanı cache'inde her okuma bir sorgudur,
+# toplu gönderimde her mesaj için sorgu atılmasın
+VERSION_CHECK_INTERVAL = 2
+
+_VERSION_KEY = 'sms_template_version:{name}'
+
+_formatter = string.Formatter()
+
+
+class CompiledTemplate:
+    """Derlenmiş şablon: {0}, {1} parametreleri önceden ayrıştırılmış hızlı render"""
+
+    __slots__ = ('name', 'template_id', 'category', 'version', 'source', '_fmt', '_getter')
+
+    def __init__(self, name, source, template_id=None, category='General', version=None):
+        self.name = name
+        self.template_id = template_id
+        self.category = category
+        self.version = version
+        self.source = source
+        self._fmt, indexes = self._compile(source)
+        self._getter = self._make_getter(indexes) if indexes is not None else None
+
+    @staticmethod
+    def _compile(source):
+        """
+        '{0} ilacınız {1}' -> ('%s ilacınız %s', (0, 1))
+        Biçim belirteci, öznitelik erişimi vb. içeren şablonlarda (None, None) döner ve str.format kullanılır.
+        """
+        parts = []
+        indexes = []
+        auto_index = 0
+        try:
+            parsed = list(_formatter.parse(source))
+        except ValueError:
+            return None, None
+
+        for literal, field_name, format_spec, conversion in parsed:
+            parts.append(literal.replace('%', '%%'))
+            if field_name is None:
+                continue
+            if format_spec or conversion:
+                return None, None
+            if field_name == '':
+                index = auto_index
+                auto_index += 1
+            elif field_name.isdigit():
+                index = int(field_name)
+            else:
+                return None, None
+            parts.append('%s')
+            indexes.append(index)
+
+        return ''.join(parts), tuple(indexes)
+
+    @staticmethod
+    def _make_getter(indexes):
+        """Parametre dizisinden şablondaki sırayla değer tuple'ı çıkaran fonksiyon"""
+        if len(indexes) > 1:
+            return itemgetter(*indexes)
+        if len(indexes) == 1:
+            index = indexes[0]
+            return lambda params: (params[index],)
+        return lambda params: ()
+
+    def render(self, params):
+        """Parametre dizisiyle mesajı üret (SMSTemplate.format_message ile aynı hata davranışı)"""
+        try:
+            if self._fmt is None:
+                return self.source.format(*params)
+            return self._fmt % self._getter(params)
+        except (IndexError, KeyError) as e:
+            return f"Şablon formatı hatası: {str(e)}"
+
+    def render_many(self, param_tuples):
+        """Aynı şablonu birden çok parametre dizisi için üret"""
+        render = self.render
+        return [render(params) for params in param_tuples]
+
+
+def _version_of(template):
+    return template.updated_at.isoformat() if template.updated_at else None
+
+
+def compile_template(template):
+    """SMSTemplate instance'ını derle"""
+    return CompiledTemplate(
+        name=template.name,
+        source=template.message_template,
+        template_id=template.template_id,
+        category=template.category,
+        version=_version_of(template),
+    )
+
+
+class TemplateRegistry:
+    """Süreç içi derlenmiş şablon önbelleği"""
+
+    # Bulunamayan şablonlar da önbelleğe alınır, her mesajda tekrar sorgu atılmasın
+    _MISSING = object()
+
+    def __init__(self):
+        self._entries = {}
+        self._by_version = {}
+        self._lock = threading.Lock()
+
+    def _shared_version(self, name):
+        return cache.get(_VERSION_KEY.format(name=name))
+
+    def _is_fresh(self, entry, name):
+        compiled, version, loaded_at, checked_at = entry
+        now = time.monotonic()
+        if now - loaded_at > LOCAL_TTL:
+            return False
+        if now - checked_at < VERSION_CHECK_INTERVAL:
+            return True
+        shared = self._shared_version(name)
+        if shared is not None and shared != version:
+            return False
+        with self._lock:
+            self._entries[name] = (compiled, version, loaded_at, now)
+        return True
+
+    def get(self, name):
+        """Aktif şablonu derlenmiş olarak döndür, yoksa None"""
+        entry = self._entries.get(name)
+        if entry is not None and self._is_fresh(entry, name):
+            compiled = entry[0]
+            return None if compiled is self._MISSING else compiled
+
+        from .models import SMSTemplate
+
+        template = SMSTemplate.objects.filter(name=name, is_active=True).first()
+        if template is None:
+            # Olmayan şablonun sürümü "silinmiş" işaretiyle tutulur
+            now = time.monotonic()
+            entry = (self._MISSING, self._shared_version(name), now, now)
+        else:
+            compiled = self.from_instance(template)
+            now = time.monotonic()
+            entry = (compiled, compiled.version, now, now)
+
+        with self._lock:
+            self._entries[name] = entry
+        return None if entry[0] is self._MISSING else entry[0]
+
+    def from_instance(self, template):
+        """Elimizdeki SMSTemplate instance'ı için derlenmiş şablonu (ad, sürüm) önbelleğinden döndür"""
+        key = (template.name, _version_of(template), template.message_template)
+        compiled = self._by_version.get(key)
+        if compiled is None:
+            compiled = compile_template(template)
+            with self._lock:
+                # Eski sürümler birikmesin
+                self._by_version = {k: v for k, v in self._by_version.items() if k[0] != template.name}
+                self._by_version[key] = compiled
+        return compiled
+
+    def render(self, name, params):
+        """Tek mesaj üret; şablon yoksa None"""
+        compiled = self.get(name)
+        return compiled.render(params) if compiled else None
+
+    def render_many(self, name, param_tuples):
+        """Toplu gönderim için tek şablonu çok sayıda parametreyle üret (tek cache kontrolü)"""
+        compiled = self.get(name)
+        return compiled.render_many(param_tuples) if compiled else None
+
+    def invalidate(self, name, version=None):
+        """Şablonu bu süreçte ve paylaşılan cache'te geçersiz kıl"""
+        with self._lock:
+            self._entries.pop(name, None)
+        cache.set(_VERSION_KEY.format(name=name), version or f'deleted:{time.time()}', None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._by_version.clear()
+
+
+template_registry = TemplateRegistry()
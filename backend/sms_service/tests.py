@@ -1,3 +1,469 @@
-from django.test import TestCase
+import json
+import random
+import tempfile
+from datetime import datetime, time, timedelta
+from io import StringIO
+from time import monotonic, sleep
 
-# Create your tests here.
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from accounts.models import User
+from .alarms import fire_due_alarms, fire_occurrence
+from .coalesce import max_segments, window
+from .cold_storage import load_index, query
+from .encoding import segment_count
+from .jobs import claim, execute, shared_task
+from .lanes import LANE_BULK, LANE_CLINICAL, LANE_EMERGENCY, LANE_ORDER
+from .models import AlarmHistory, DeliveryReceipt, DoctorAlarm, Job, RateBucket, SMSLog
+from .outbound import Dispatcher, claim_next, enqueue_sms
+from .providers import CLOSED, FAILURE_THRESHOLD, OPEN, FileProvider, ProviderRouter
+from .ratelimit import RateLimiter
+from .receipts import apply_pending_receipts, drain_receipts
+from .retention import apply_policy, archive_rows, sealed_before
+from .services import THROTTLE_BACKOFF_SECONDS, SMSService
+
+TEST_PHONE = '+905550000000'
+
+
+def sahte_gonderim(sms_log):
+    """Sağlayıcıya gitmeden gönderildi say"""
+    sms_log.mark_sent(f'test-{sms_log.id}')
+    return {'success': True}
+
+
+def kopya(alarm):
+    """Başka bir çalıştırmanın elindeki (eski) alarm kopyası"""
+    return DoctorAlarm(**{f.attname: getattr(alarm, f.attname) for f in alarm._meta.concrete_fields})
+
+
+@shared_task(lease_seconds=1)
+def uzun_gorev():
+    """Kilit süresini aşan görev; bitmeden önce başka çalıştırıcı almaya çalışır"""
+    sleep(1.5)
+    return len(claim('diger-calistirici', lease_seconds=1))
+
+
+def toplu_birikim(adet, phone=TEST_PHONE):
+    SMSLog.bulk_create_logs(
+        [
+            SMSLog(recipient_phone=phone, message=f'Toplu mesaj {i}', message_type='General', status='Pending',
+                   lane=LANE_BULK)
+            for i in range(adet)
+        ],
+        batch_size=500,
+    )
+
+
+class LaneTests(TestCase):
+    """Öncelik şeritleri: toplu birikim acil mesajı geciktirmemeli"""
+
+    def test_shared_sender_takes_emergency_before_bulk_backlog(self):
+        toplu_birikim(2000)
+        acil = enqueue_sms(TEST_PHONE, 'Acil mesaj', message_type='AcilDurum')
+        self.assertEqual(acil.lane, LANE_EMERGENCY)
+
+        dispatcher = Dispatcher(transport=sahte_gonderim, coalesce_window=0)
+        sms_log = dispatcher._claim(LANE_ORDER)
+        self.assertEqual(sms_log.id, acil.id)
+
+        dispatcher.send(sms_log)
+        acil.refresh_from_db()
+        self.assertEqual(acil.status, 'Sent')
+        self.assertEqual(dispatcher.sent[LANE_EMERGENCY], 1)
+
+    def test_emergency_claim_cost_does_not_grow_with_backlog(self):
+        enqueue_sms(TEST_PHONE, 'Acil mesaj 0', message_type='AcilDurum')
+        with CaptureQueriesContext(connection) as bos:
+            self.assertIsNotNone(claim_next(LANE_EMERGENCY))
+
+        toplu_birikim(2000)
+        enqueue_sms(TEST_PHONE, 'Acil mesaj 1', message_type='AcilDurum')
+        with self.assertNumQueries(len(bos)):
+            self.assertIsNotNone(claim_next(LANE_EMERGENCY))
+
+    def test_claimed_message_is_not_claimed_again(self):
+        ilk = enqueue_sms(TEST_PHONE, 'Randevu 1', message_type='RandevuOnay')
+        ikinci = enqueue_sms('+905550000001', 'Randevu 2', message_type='RandevuOnay')
+        self.assertEqual(ilk.lane, LANE_CLINICAL)
+
+        self.assertEqual(claim_next(LANE_CLINICAL).id, ilk.id)
+        self.assertEqual(claim_next(LANE_CLINICAL).id, ikinci.id)
+        self.assertIsNone(claim_next(LANE_CLINICAL))
+
+    def test_reserved_senders_serve_only_their_lane(self):
+        dispatcher = Dispatcher(
+            transport=sahte_gonderim, coalesce_window=0,
+            concurrency={LANE_EMERGENCY: 1, LANE_CLINICAL: 0, LANE_BULK: 1, 'shared': 1},
+        )
+        self.assertEqual(dispatcher.sender_lanes(), [(LANE_EMERGENCY,), (LANE_BULK,), LANE_ORDER])
+
+        toplu_birikim(5)
+        self.assertIsNone(dispatcher._claim((LANE_EMERGENCY,)))
+        self.assertEqual(dispatcher._claim((LANE_BULK,)).lane, LANE_BULK)
+
+
+class AlarmOccurrenceTests(TestCase):
+    """Her alarm tetiklemesi tam olarak bir geçmiş kaydı ve bir SMS üretmeli"""
+
+    def setUp(self):
+        self.doctor = User.objects.create(username='alarm-doktor', user_type='doktor')
+        self.scheduled_for = timezone.now() - timedelta(minutes=1)
+
+    def alarm(self, i=0, repeat_type='daily'):
+        return DoctorAlarm.objects.create(
+            doctor=self.doctor, patient_name=f'Test {i}', patient_phone='05550000000', alarm_type='medication',
+            title='Test', message=f'Test alarmı {i}', alarm_time=timezone.localtime(self.scheduled_for).time(),
+            repeat_type=repeat_type, next_run=self.scheduled_for,
+        )
+
+    def test_overlapping_runs_fire_once(self):
+        alarm = self.alarm()
+        eski = kopya(alarm)
+
+        self.assertIsNotNone(fire_occurrence(alarm))
+        # Aynı alarm listesini okumuş ikinci çalıştırma
+        self.assertIsNone(fire_occurrence(eski))
+
+        self.assertEqual(AlarmHistory.objects.filter(alarm=alarm).count(), 1)
+        self.assertEqual(SMSLog.objects.filter(recipient_user=self.doctor).count(), 1)
+        alarm.refresh_from_db()
+        self.assertGreater(alarm.next_run, self.scheduled_for)
+        self.assertEqual(alarm.total_sent, 1)
+
+    def test_interrupted_run_does_not_resend(self):
+        alarm = self.alarm()
+        fire_occurrence(kopya(alarm))
+        # Yarıda kalmış çalıştırma alarmı eski tetikleme zamanında bırakmış gibi
+        DoctorAlarm.objects.filter(pk=alarm.pk).update(next_run=self.scheduled_for, total_sent=0)
+        alarm.refresh_from_db()
+
+        self.assertIsNone(fire_occurrence(alarm))
+        self.assertEqual(AlarmHistory.objects.filter(alarm=alarm).count(), 1)
+        self.assertEqual(SMSLog.objects.filter(recipient_user=self.doctor).count(), 1)
+        # Zaten işlenmiş tetiklemede kalan alarm ilerletilir, her dakika tekrar denenmez
+        alarm.refresh_from_db()
+        self.assertGreater(alarm.next_run, self.scheduled_for)
+
+    def test_fire_due_alarms(self):
+        for i in range(3):
+            self.alarm(i)
+        once = self.alarm(3, repeat_type='once')
+
+        self.assertEqual(fire_due_alarms(), {'due': 4, 'fired': 4, 'skipped': 0, 'errors': 0})
+        self.assertEqual(fire_due_alarms()['due'], 0)
+        self.assertEqual(SMSLog.objects.filter(recipient_user=self.doctor, lane=LANE_CLINICAL).count(), 4)
+        once.refresh_from_db()
+        self.assertEqual(once.status, 'completed')
+
+
+class CoalesceTests(TestCase):
+    """Aynı hastaya giden hatırlatmalar tek SMS'te birleşmeli, acil mesaj ayrı ve bekletilmeden gitmeli"""
+
+    def setUp(self):
+        self.doctor = User.objects.create(username='birlestirme-doktor', user_type='doktor')
+        self.calls = []
+
+    def transport(self, sms_log):
+        self.calls.append((sms_log.lane, sms_log.message))
+        return sahte_gonderim(sms_log)
+
+    def drain(self):
+        dispatcher = Dispatcher(transport=self.transport, filters={'recipient_user': self.doctor})
+        while True:
+            sms_log = dispatcher._claim(LANE_ORDER)
+            if sms_log is None:
+                return
+            dispatcher.send(sms_log)
+
+    def age_past_window(self):
+        # Mesajlar birleştirme penceresi kadar beklemiş gibi
+        SMSLog.objects.filter(recipient_user=self.doctor).update(
+            created_at=timezone.now() - window() - timedelta(seconds=1)
+        )
+
+    def test_reminders_to_same_patient_go_as_one_sms(self):
+        scheduled_for = timezone.now() - timedelta(minutes=1)
+        alarms = [
+            DoctorAlarm.objects.create(
+                doctor=self.doctor, patient_name='Test Hasta', patient_phone='05550000001', alarm_type='medication',
+                title='Test', message=f'İlaç {i}: 1 tablet', alarm_time=timezone.localtime(scheduled_for).time(),
+                repeat_type='daily', next_run=scheduled_for,
+            )
+            for i in range(5)
+        ]
+        for alarm in alarms:
+            fire_occurrence(alarm)
+        enqueue_sms('05550000001', 'Acil test mesajı', user=self.doctor, message_type='AcilDurum')
+        self.age_past_window()
+
+        self.drain()
+
+        self.assertEqual([lane for lane, _ in self.calls], [LANE_EMERGENCY, LANE_CLINICAL])
+        merged = self.calls[1][1]
+        for alarm in alarms:
+            self.assertIn(alarm.message, merged)
+        self.assertEqual(SMSLog.objects.filter(recipient_user=self.doctor, status='Coalesced').count(), 4)
+
+        histories = AlarmHistory.objects.filter(alarm__doctor=self.doctor)
+        self.assertEqual(len(set(histories.values_list('sms_log_id', flat=True))), 1)
+        self.assertEqual(set(histories.values_list('fan_in', flat=True)), {5})
+        self.assertFalse(histories.filter(success=False).exists())
+        self.assertFalse(DoctorAlarm.objects.filter(doctor=self.doctor).exclude(successful_sent=1).exists())
+
+    def test_messages_within_window_wait(self):
+        enqueue_sms('05550000001', 'Randevu hatırlatması', user=self.doctor, message_type='RandevuHatirlatma')
+        self.drain()
+        self.assertEqual(self.calls, [])
+
+    def test_merged_sms_stays_within_segment_limit(self):
+        # Her biri tek segment dolduran mesajlar: sınır kadarı birleşir, kalanı ayrı gider
+        for i in range(max_segments() + 1):
+            enqueue_sms('05550000001', f'{i}' + 'x' * 150, user=self.doctor, message_type='IlacHatirlatma')
+        self.age_past_window()
+
+        self.drain()
+
+        self.assertEqual(len(self.calls), 2)
+        for _, message in self.calls:
+            self.assertLessEqual(segment_count(message), max_segments())
+
+
+class ProviderFailoverTests(TestCase):
+    """Birincil sağlayıcı çöktüğünde gönderim yedekle sürmeli, birincil dönünce trafik geri gelmeli"""
+
+    def setUp(self):
+        # Çökmüş sağlayıcı zaman aşımı beklemeden hata verir
+        self.primary = FileProvider('birincil', timeout=0)
+        # Yedek daha yavaştır; birincil sağlıklıyken tercih edilen odur
+        self.backup = FileProvider('yedek', latency=0.01)
+        # Testin kendi kovaları: ölçülen sağlayıcı geçişidir, kota değil
+        self.limiter = RateLimiter(prefix='test', limits={
+            'global': {'rate': 1000.0, 'burst': 1000.0}, 'sender': {'rate': 1000.0, 'burst': 1000.0},
+        })
+
+    def sms(self, i=0):
+        return enqueue_sms(TEST_PHONE, f'Test mesajı {i}', message_type='IlacHatirlatma')
+
+    def test_outage_fails_over_without_losing_messages(self):
+        router = ProviderRouter([self.primary, self.backup], explore_rate=0)
+        service = SMSService(router=router, limiter=self.limiter)
+        self.primary.down = True
+
+        for i in range(FAILURE_THRESHOLD + 5):
+            self.assertEqual(service.deliver(self.sms(i))['provider'], 'yedek')
+
+        self.assertFalse(SMSLog.objects.exclude(status='Sent').exists())
+        self.assertEqual(set(SMSLog.objects.values_list('provider', flat=True)), {'yedek'})
+        # Devre açıldıktan sonra birincil denenmez, mesajlar doğrudan yedeğe gider
+        self.assertEqual(router.health['birincil'].state, OPEN)
+        self.assertEqual(router.failovers, FAILURE_THRESHOLD)
+
+    def test_traffic_returns_after_recovery(self):
+        router = ProviderRouter([self.primary, self.backup], explore_rate=0, cooldown=0)
+        self.primary.down = True
+        for i in range(FAILURE_THRESHOLD):
+            router.send(SMSLog(id=i, message='Test', recipient_phone_e164=TEST_PHONE))
+        self.assertEqual(router.health['birincil'].state, OPEN)
+
+        self.primary.down = False
+        result = router.send(SMSLog(id=99, message='Test', recipient_phone_e164=TEST_PHONE))
+        self.assertEqual(result['provider'], 'birincil')
+        self.assertEqual(router.health['birincil'].state, CLOSED)
+
+    def test_all_circuits_open_leaves_message_pending(self):
+        router = ProviderRouter([self.primary], explore_rate=0)
+        service = SMSService(router=router, limiter=self.limiter)
+        self.primary.down = True
+        for i in range(FAILURE_THRESHOLD):
+            service.deliver(self.sms(i))
+
+        sms_log = self.sms('bekleyen')
+        result = service.deliver(sms_log)
+        self.assertTrue(result['throttled'])
+        sms_log.refresh_from_db()
+        self.assertEqual(sms_log.status, 'Pending')
+
+
+class RateLimitTests(TestCase):
+    """Jeton kovası kotayı aşmamalı, acil şeride yer bırakmalı ve istek sırasında beklememeli"""
+
+    def limiter(self, sender, global_=None):
+        return RateLimiter(prefix='test', limits={'sender': sender, 'global': global_ or {'rate': 1000.0, 'burst': 1000.0}})
+
+    def jeton(self, name):
+        return next(bucket['tokens'] for bucket in RateLimiter(prefix='test').stats() if bucket['name'] == name)
+
+    def test_verilen_jeton_kapasite_ve_hizi_asmaz(self):
+        rate, burst = 20.0, 5.0
+        limiter = self.limiter({'rate': rate, 'burst': burst})
+        basla = monotonic()
+        verilen = 0
+        while monotonic() - basla < 0.3:
+            verilen += limiter.acquire('TEST', blocking=False)
+        gecen = monotonic() - basla
+        self.assertGreaterEqual(verilen, burst)
+        self.assertLessEqual(verilen, burst + rate * gecen + 1)
+
+    def test_dusuk_oncelikli_serit_yedek_birakir(self):
+        limiter = self.limiter({'rate': 0.001, 'burst': 4.0})
+        self.assertTrue(limiter.acquire('TEST', lane=LANE_BULK, blocking=False))
+        self.assertFalse(limiter.acquire('TEST', lane=LANE_BULK, blocking=False))
+        # Toplu şeritten sonra kalan 3 jetondan klinik şerit 1'i bırakır, sonuncusu acil mesajındır
+        self.assertTrue(limiter.acquire('TEST', lane=LANE_CLINICAL, blocking=False))
+        self.assertTrue(limiter.acquire('TEST', lane=LANE_CLINICAL, blocking=False))
+        self.assertFalse(limiter.acquire('TEST', lane=LANE_CLINICAL, blocking=False))
+        self.assertTrue(limiter.acquire('TEST', lane=LANE_EMERGENCY, blocking=False))
+        self.assertFalse(limiter.acquire('TEST', lane=LANE_EMERGENCY, blocking=False))
+
+    def test_bloklamayan_cagri_alinan_jetonu_iade_eder(self):
+        limiter = self.limiter({'rate': 0.001, 'burst': 5.0}, {'rate': 0.001, 'burst': 1.0})
+        self.assertTrue(limiter.acquire('TEST', blocking=False))
+        self.assertFalse(limiter.acquire('TEST', blocking=False))
+        self.assertAlmostEqual(self.jeton('test:sender:TEST'), 4.0, places=1)
+        self.assertEqual(RateBucket.objects.get(name='test:global').denied_count, 1)
+
+    @override_settings(SMS_RATE_LIMIT_TIMEOUT=10.0)
+    def test_dogrudan_gonderim_beklemeden_kuyruga_birakir(self):
+        limiter = self.limiter({'rate': 0.001, 'burst': 1.0})
+        limiter.acquire('SMS-INFO', blocking=False)
+        service = SMSService(router=ProviderRouter([FileProvider('dosya')]), limiter=limiter)
+        service.sender = 'SMS-INFO'
+
+        basla = monotonic()
+        result = service.send_sms(TEST_PHONE, 'Kota dolu')
+        self.assertLess(monotonic() - basla, 1.0)
+        self.assertTrue(result['throttled'])
+
+        sms_log = SMSLog.objects.get(id=result['sms_log_id'])
+        self.assertEqual(sms_log.status, 'Pending')
+        # Kayıt kısa bekleme sonrası kuyruk göndericisine açılır
+        self.assertLessEqual(sms_log.claimed_until, timezone.now() + timedelta(seconds=THROTTLE_BACKOFF_SECONDS))
+
+
+class ColdStorageTests(TestCase):
+    """Arşivlenen loglar segmentlerden eksiksiz sorgulanabilmeli"""
+
+    def setUp(self):
+        tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(tmpdir.cleanup)
+        override = override_settings(RETENTION_ARCHIVE_DIR=tmpdir.name)
+        override.enable()
+        self.addCleanup(override.disable)
+        self.old = timezone.now() - timedelta(days=100)
+
+    def old_sms(self, i):
+        sms_log = enqueue_sms(TEST_PHONE, f'Eski mesaj {i}', message_type='IlacHatirlatma')
+        SMSLog.objects.filter(pk=sms_log.pk).update(created_at=self.old)
+
+    def test_day_archived_after_sealing_is_resealed(self):
+        self.old_sms(0)
+        self.assertEqual(apply_policy('sms_logs', pause=0)['segments'], 1)
+        self.assertEqual(len(list(query('sms_logs', phone=TEST_PHONE))), 1)
+
+        # Aynı güne sonradan düşen kayıt (ör. geriye tarihli) arşive eklenir, segment yeniden yazılır
+        self.old_sms(1)
+        self.assertEqual(apply_policy('sms_logs', pause=0)['segments'], 1)
+        self.assertEqual(
+            sorted(row['message'] for row in query('sms_logs', phone=TEST_PHONE)), ['Eski mesaj 0', 'Eski mesaj 1']
+        )
+        self.assertFalse(SMSLog.objects.exists())
+
+    def test_seal_option_leaves_cutoff_day_open(self):
+        cutoff_day = sealed_before('sms_logs')
+        moment = timezone.make_aware(datetime.combine(cutoff_day, time.min))
+        archive_rows('sms_logs', [{'id': 1, 'created_at': moment, 'recipient_phone_e164': TEST_PHONE}], 'created_at')
+
+        call_command('query_archive', 'sms_logs', '--seal', '--count', stdout=StringIO(), stderr=StringIO())
+        self.assertNotIn(cutoff_day.isoformat(), load_index('sms_logs'))
+
+
+def rapor(message_id, status, reported_at):
+    return {'smsMsgId': message_id, 'status': status, 'updateTime': reported_at.strftime('%Y-%m-%dT%H:%M:%SZ')}
+
+
+class DeliveryReceiptTests(TestCase):
+    """Tekrarlı ve sırasız gelen teslim raporları toplu işlenmeli, durum geri gitmemeli"""
+
+    def setUp(self):
+        self.sent_at = timezone.now() - timedelta(minutes=5)
+
+    def sent_logs(self, adet):
+        logs = [
+            SMSLog(recipient_phone=f'0555{i:07d}', message='rapor testi', message_id=f'rapor-{i}', status='Sent',
+                   sent_at=self.sent_at)
+            for i in range(adet)
+        ]
+        SMSLog.bulk_create_logs(logs)
+        return logs
+
+    def post(self, receipts):
+        response = self.client.post(
+            reverse('sms_service:sms_callback'), data=json.dumps(receipts), content_type='application/json'
+        )
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def replay(self, logs, rng):
+        """Her mesaj için ACCEPTD + DELIVRD, bir kısmı tekrarlı ve hepsi karışık sırada"""
+        receipts = []
+        for log in logs:
+            accepted_at = self.sent_at + timedelta(seconds=rng.randint(1, 30))
+            delivered_at = accepted_at + timedelta(seconds=rng.randint(1, 60))
+            receipts += [rapor(log.message_id, 'ACCEPTD', accepted_at), rapor(log.message_id, 'DELIVRD', delivered_at)]
+            if rng.random() < 0.2:
+                receipts.append(rapor(log.message_id, 'DELIVRD', delivered_at))
+        rng.shuffle(receipts)
+        for start in range(0, len(receipts), 100):
+            self.post(receipts[start:start + 100])
+
+    def test_duplicate_and_out_of_order_receipts(self):
+        logs = self.sent_logs(200)
+        self.replay(logs, random.Random(42))
+
+        totals = drain_receipts()
+        self.assertEqual(totals['updated'], 200)
+        self.assertEqual(SMSLog.objects.filter(status='Delivered').count(), 200)
+        self.assertFalse(DeliveryReceipt.objects.exists())
+
+        # Teslimden sonra gelen eski rapor durumu geri almaz
+        self.post([rapor('rapor-0', 'ACCEPTD', self.sent_at + timedelta(seconds=1))])
+        drain_receipts()
+        self.assertEqual(SMSLog.objects.get(message_id='rapor-0').status, 'Delivered')
+
+    def test_batch_cost_does_not_grow_with_batch_size(self):
+        self.replay(self.sent_logs(10), random.Random(1))
+        with CaptureQueriesContext(connection) as kucuk:
+            apply_pending_receipts()
+        # İstekler sorgu kaydını sıfırlar; sayı callback'lerden önce alınır
+        sorgu = len(kucuk)
+
+        self.replay(self.sent_logs(300)[10:], random.Random(2))
+        with self.assertNumQueries(sorgu):
+            apply_pending_receipts()
+
+    def test_unmatched_receipt_is_deferred(self):
+        self.post([rapor('bilinmeyen', 'DELIVRD', self.sent_at)])
+        self.assertEqual(apply_pending_receipts()['deferred'], 1)
+        receipt = DeliveryReceipt.objects.get()
+        self.assertEqual(receipt.attempts, 1)
+        self.assertGreater(receipt.next_attempt_at, timezone.now())
+
+
+class JobLeaseTests(TransactionTestCase):
+    """Kilit süresinden uzun süren görevin kilidi çalışırken yenilenmeli; görev ikinci kez alınmamalı"""
+
+    def test_uzun_gorev_baska_calistiriciya_gecmez(self):
+        job = uzun_gorev.delay()
+        [job] = claim('calistirici', lease_seconds=1)
+
+        self.assertEqual(execute(job, 'calistirici'), 'done')
+
+        job.refresh_from_db()
+        # Görevin içindeki claim hiçbir şey alamamış olmalı
+        self.assertEqual((job.status, job.attempts, json.loads(job.result)), ('done', 1, 0))
+        self.assertFalse(Job.objects.filter(locked_by='diger-calistirici').exists())
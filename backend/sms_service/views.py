@@ -1,7 +1,6 @@
 # sms_service/views.py - AUTHENTICATION BYPASS VERSION
 
 from django.shortcuts import render
-from django.http import JsonResponse
 from django.views.decorators.csrf import csrf_exempt
 from django.views.decorators.http import require_http_methods
 # GEÇİCİ: Bu satırı YORUMA ALIN
@@ -19,7 +18,12 @@ from datetime import datetime, timedelta
 import json
 import logging
 
+from akilli_ilac_backend.conditional import conditional, fingerprint
+from akilli_ilac_backend.fieldsets import Fieldset
+from akilli_ilac_backend.renderers import JsonResponse
+from akilli_ilac_backend.telefon import normalize_phone, phone_lookup
 from .models import DoctorAlarm, AlarmHistory, SMSLog, SMSTemplate, SystemLog
+from .receipts import ReceiptParseError, enqueue_receipts, parse_receipts
 
 # GEÇİCİ: Bu satırları YORUMA ALIN - eksik modüller varsa hata vermesin
 # from .services import sms_service
@@ -27,6 +31,49 @@ from .models import DoctorAlarm, AlarmHistory, SMSLog, SMSTemplate, SystemLog
 
 logger = logging.getLogger(__name__)
 
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+
+def _templates_etag(request, *args, **kwargs):
+    """Şablonlar herkes için aynı; pasifleştirme de updated_at'i ilerletir"""
+    return fingerprint(SMSTemplate.objects.all(), 'updated_at')
+
+
+# Liste satırları: çıktı alanı -> (okunan sütunlar, değer); ?fields= ile seçilir
+ALARM_FIELDS = {
+    'id': (('id',), lambda alarm: alarm.id),
+    'title': (('title',), lambda alarm: alarm.title),
+    'patient_name': (('patient_name',), lambda alarm: alarm.patient_name),
+    'patient_phone': (('patient_phone',), lambda alarm: alarm.patient_phone),
+    'message': (('message',), lambda alarm: alarm.message),
+    'alarm_type': (('alarm_type',), lambda alarm: alarm.alarm_type),
+    'alarm_time': (('alarm_time',), lambda alarm: alarm.alarm_time.strftime('%H:%M')),
+    'alarm_date': (('alarm_date',), lambda alarm: _iso(alarm.alarm_date)),
+    'repeat_type': (('repeat_type',), lambda alarm: alarm.repeat_type),
+    'status': (('status',), lambda alarm: alarm.status),
+    'total_sent': (('total_sent',), lambda alarm: alarm.total_sent),
+    'successful_sent': (('successful_sent',), lambda alarm: alarm.successful_sent),
+    'last_sent': (('last_sent',), lambda alarm: _iso(alarm.last_sent)),
+    'next_run': (('next_run',), lambda alarm: _iso(alarm.next_run)),
+    'created_at': (('created_at',), lambda alarm: alarm.created_at.isoformat()),
+}
+
+SMS_LOG_FIELDS = {
+    'id': (('id',), lambda log: log.id),
+    'recipient_phone': (('recipient_phone',), lambda log: log.recipient_phone),
+    'message': (('message',), lambda log: log.message),
+    'message_type': (('message_type',), lambda log: log.message_type),
+    'status': (('status',), lambda log: log.status),
+    'created_at': (('created_at',), lambda log: log.created_at.isoformat()),
+    'sent_at': (('sent_at',), lambda log: _iso(log.sent_at)),
+    'delivered_at': (('delivered_at',), lambda log: _iso(log.delivered_at)),
+    'error_message': (('error_message',), lambda log: log.error_message or ''),
+    'retry_count': (('retry_count',), lambda log: log.retry_count),
+    'segments': (('segments',), lambda log: log.segments),
+}
+
 @login_required
 @require_http_methods(["GET"])
 def doctor_notifications_page(request):
@@ -201,30 +248,16 @@ def get_doctor_alarms(request):
         
         alarms = alarms.order_by('-created_at')
         
+        # ?fields= verilmişse sadece istenen sütunlar okunur
+        fields = Fieldset(request)
+        alarms = fields.only(alarms, ALARM_FIELDS)
+        
         # Sayfalama uygula
         paginator = Paginator(alarms, per_page)
         page_obj = paginator.get_page(page)
         
         # JSON formatına çevir
-        alarms_data = []
-        for alarm in page_obj:
-            alarms_data.append({
-                'id': alarm.id,
-                'title': alarm.title,
-                'patient_name': alarm.patient_name,
-                'patient_phone': alarm.patient_phone,
-                'message': alarm.message,
-                'alarm_type': alarm.alarm_type,
-                'alarm_time': alarm.alarm_time.strftime('%H:%M'),
-                'alarm_date': alarm.alarm_date.isoformat() if alarm.alarm_date else None,
-                'repeat_type': alarm.repeat_type,
-                'status': alarm.status,
-                'total_sent': getattr(alarm, 'total_sent', 0),
-                'successful_sent': getattr(alarm, 'successful_sent', 0),
-                'last_sent': alarm.last_sent.isoformat() if hasattr(alarm, 'last_sent') and alarm.last_sent else None,
-                'next_run': alarm.next_run.isoformat() if hasattr(alarm, 'next_run') and alarm.next_run else None,
-                'created_at': alarm.created_at.isoformat()
-            })
+        alarms_data = [fields.row(alarm, ALARM_FIELDS) for alarm in page_obj]
         
         return JsonResponse({
             'success': True,
@@ -315,29 +348,22 @@ def get_sms_logs(request):
             sms_logs = sms_logs.filter(status=status_filter)
         
         if phone_filter:
-            sms_logs = sms_logs.filter(recipient_phone__icontains=phone_filter)
+            # Tam numarada eşitlik, kısmi numarada ön ek araması (E.164 indeksini kullanır)
+            phone_lookup_kwargs = phone_lookup('recipient_phone_e164', phone_filter)
+            sms_logs = sms_logs.filter(**phone_lookup_kwargs) if phone_lookup_kwargs else sms_logs.none()
         
         sms_logs = sms_logs.order_by('-created_at')
         
+        # ?fields= verilmişse sadece istenen sütunlar okunur
+        fields = Fieldset(request)
+        sms_logs = fields.only(sms_logs, SMS_LOG_FIELDS)
+        
         # Sayfalama
         paginator = Paginator(sms_logs, per_page)
         page_obj = paginator.get_page(page)
         
         # JSON formatına çevir
-        logs_data = []
-        for log in page_obj:
-            logs_data.append({
-                'id': log.id,
-                'recipient_phone': log.recipient_phone,
-                'message': log.message,
-                'message_type': getattr(log, 'message_type', 'General'),
-                'status': log.status,
-                'created_at': log.created_at.isoformat(),
-                'sent_at': log.sent_at.isoformat() if hasattr(log, 'sent_at') and log.sent_at else None,
-                'delivered_at': log.delivered_at.isoformat() if hasattr(log, 'delivered_at') and log.delivered_at else None,
-                'error_message': getattr(log, 'error_message', '') or '',
-                'retry_count': getattr(log, 'retry_count', 0)
-            })
+        logs_data = [fields.row(log, SMS_LOG_FIELDS) for log in page_obj]
         
         return JsonResponse({
             'success': True,
@@ -359,13 +385,16 @@ def get_sms_logs(request):
 def sms_callback(request):
     """
     Huawei Cloud SMS callback endpoint
+    Raporlar sadece ara tabloya yazılır, SMSLog güncellemesi process_delivery_receipts görevinde yapılır
     """
     try:
-        data = json.loads(request.body)
-        
-        # GEÇİCİ: Basit callback simülasyonu
-        return JsonResponse({'success': True, 'message': 'Callback received (TEST MODE)'})
+        receipts = parse_receipts(request)
+        accepted = enqueue_receipts(receipts)
+        return JsonResponse({'success': True, 'accepted': accepted})
         
+    except ReceiptParseError as e:
+        logger.warning(f"SMS callback çözümlenemedi: {str(e)}")
+        return JsonResponse({'success': False, 'error': str(e)}, status=400)
     except Exception as e:
         logger.error(f"SMS callback hatası: {str(e)}")
         return JsonResponse({'success': False}, status=500)
@@ -390,17 +419,30 @@ def get_alarm_statistics(request):
         failed_sms = SMSLog.objects.filter(status='Failed').count()
         pending_sms = SMSLog.objects.filter(status='Pending').count()
         
+        # Segment istatistikleri (sağlayıcı kotası ve ücret segment başınadır); birleştirilen mesajlar
+        # taşıyıcı SMS'te sayıldığı için hariç
+        segment_stats = SMSLog.objects.exclude(status='Coalesced').aggregate(
+            segment_total=models.Sum('segments'),
+            multi_segment=models.Count('id', filter=models.Q(segments__gt=1)),
+            sms=models.Count('id'),
+        )
+        total_segments = segment_stats['segment_total'] or 0
+        
         # Son 7 günün SMS verileri
         last_7_days = []
         for i in range(7):
             date = timezone.now().date() - timedelta(days=i)
-            count = SMSLog.objects.filter(
+            day = SMSLog.objects.filter(
                 created_at__date=date
-            ).count()
+            ).aggregate(
+                count=models.Count('id'),
+                segment_total=models.Sum('segments', filter=~models.Q(status='Coalesced')),
+            )
             
             last_7_days.append({
                 'date': date.isoformat(),
-                'count': count
+                'count': day['count'],
+                'segments': day['segment_total'] or 0
             })
         
         # Alarm türlerine göre dağılım
@@ -425,7 +467,10 @@ def get_alarm_statistics(request):
                     'successful': successful_sms,
                     'failed': failed_sms,
                     'pending': pending_sms,
-                    'success_rate': round((successful_sms / total_sms * 100) if total_sms > 0 else 0, 2)
+                    'success_rate': round((successful_sms / total_sms * 100) if total_sms > 0 else 0, 2),
+                    'segments': total_segments,
+                    'multi_segment': segment_stats['multi_segment'],
+                    'avg_segments': round(total_segments / segment_stats['sms'], 2) if segment_stats['sms'] else 0
                 },
                 'alarm_types': alarm_type_stats,
                 'last_7_days': list(reversed(last_7_days))
@@ -439,12 +484,38 @@ def get_alarm_statistics(request):
             'error': f'İstatistikler getirilemedi: {str(e)}'
         }, status=500)
 
-# BASIT PLACEHOLDER FONKSİYONLAR - Hata vermemesi için
 @login_required
 @require_http_methods(["GET"])
+@conditional(_templates_etag)
 def get_sms_templates(request):
-    return JsonResponse({'success': True, 'templates': []})
+    """
+    SMS şablonlarını listele (?category=, ?active=all ile pasifler dahil)
+    """
+    templates = SMSTemplate.objects.all()
+    if request.GET.get('active', 'true').lower() != 'all':
+        templates = templates.filter(is_active=True)
+    category = request.GET.get('category')
+    if category:
+        templates = templates.filter(category=category)
+    
+    return JsonResponse({
+        'success': True,
+        'templates': [
+            {
+                'id': template.id,
+                'name': template.name,
+                'template_id': template.template_id,
+                'message_template': template.message_template,
+                'description': template.description or '',
+                'category': template.category,
+                'is_active': template.is_active,
+                'updated_at': template.updated_at.isoformat(),
+            }
+            for template in templates
+        ]
+    })
 
+# BASIT PLACEHOLDER FONKSİYONLAR - Hata vermemesi için
 @login_required
 @csrf_exempt
 @require_http_methods(["POST"])
@@ -500,7 +571,7 @@ def get_patient_alarms(request, patient_id=None):
 
         # *** ÖNEMLİ: SADECE HASTAYA AİT ALARMLARI FİLTRELE ***
         queryset = DoctorAlarm.objects.filter(
-            patient_phone=patient_phone
+            patient_phone_e164=normalize_phone(patient_phone)
         ).order_by('-created_at')
 
         # Filtreleme